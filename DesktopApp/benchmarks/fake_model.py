@@ -0,0 +1,40 @@
+"""
+Fake Whisper model for benchmarks
+Mimics pywhispercpp.model.Model.transcribe so the pipeline runs without Whisper weights
+"""
+
+import time
+
+SAMPLE_RATE = 16000
+
+WORDS = (
+    "the team reviewed the quarterly roadmap and agreed to ship the release "
+    "after the design review next week"
+).split()
+
+
+class FakeSegment:
+    """Same fields as a pywhispercpp Segment (t0/t1 in 10ms units)"""
+
+    def __init__(self, t0, t1, text):
+        self.t0 = t0
+        self.t1 = t1
+        self.text = text
+
+
+class FakeWhisperModel:
+    """Spends real_time_factor seconds per second of audio and returns filler words"""
+
+    def __init__(self, real_time_factor=0.05, words_per_second=2.5):
+        self.real_time_factor = real_time_factor
+        self.words_per_second = words_per_second
+        self.word_index = 0
+
+    def transcribe(self, media, **params):
+        duration = len(media) / SAMPLE_RATE
+        time.sleep(duration * self.real_time_factor)
+
+        n_words = max(1, int(duration * self.words_per_second))
+        words = [WORDS[(self.word_index + i) % len(WORDS)] for i in range(n_words)]
+        self.word_index += n_words
+        return [FakeSegment(0, int(duration * 100), " " + " ".join(words))]
@@ -0,0 +1,47 @@
+"""
+Transcription server with the fake Whisper model
+Runs a real AudioServer process without Whisper weights, so several can be started on
+different ports to exercise the session router.
+
+Usage:
+    python benchmarks/fake_server.py --port 17491 --metrics-port 17492 --fake-rtf 0.05
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+SRC_DIR = os.path.join(os.path.dirname(BENCH_DIR), "src")
+if SRC_DIR not in sys.path:
+    sys.path.insert(0, SRC_DIR)
+
+from fake_model import FakeWhisperModel
+from transcription.server import AudioServer
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Transcription server with a fake model")
+    parser.add_argument("--host", default="localhost")
+    parser.add_argument("--port", type=int, required=True)
+    parser.add_argument("--metrics-port", type=int, help="Default: port + 1")
+    parser.add_argument("--fake-rtf", type=float, default=0.05, help="Real-time factor of the fake model")
+    args = parser.parse_args()
+
+    server = AudioServer(
+        model=FakeWhisperModel(real_time_factor=args.fake_rtf),
+        partial_model=FakeWhisperModel(real_time_factor=args.fake_rtf / 5),
+        host=args.host,
+        port=args.port,
+        metrics_port=args.metrics_port or args.port + 1,
+        model_info={"model": "fake", "source": "benchmark", "expected_rtf": args.fake_rtf},
+    )
+    try:
+        asyncio.run(server.start())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,651 @@
+"""
+Replay benchmark for the transcription pipeline
+Streams WAV files through TranscriptionWebSocketClient into an in-process AudioServer
+and reports throughput, latency percentiles, dropped audio and memory high-water marks.
+
+Usage:
+    python benchmarks/replay_benchmark.py --meetings 4 --speed 10x
+    python benchmarks/replay_benchmark.py recording.wav --speed max --output results.json
+    python benchmarks/replay_benchmark.py --streaming --speed 1x  # partial/final caption latency
+    python benchmarks/replay_benchmark.py meeting.wav --model base.en --compare-context
+        # inference time and word error rate (against meeting.txt) with and without decoder context
+    python benchmarks/replay_benchmark.py --baseline results.json  # exit 1 on regression
+    python benchmarks/replay_benchmark.py --embedded  # engine in a child process, no websocket
+"""
+
+import argparse
+import asyncio
+import functools
+import json
+import os
+import platform
+import queue
+import re
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+import wave
+from datetime import datetime
+
+import numpy as np
+import websockets
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+SRC_DIR = os.path.join(os.path.dirname(BENCH_DIR), "src")
+if SRC_DIR not in sys.path:
+    sys.path.insert(0, SRC_DIR)
+
+from fake_model import FakeWhisperModel
+from monitoring.metrics import REGISTRY, snapshot
+from transcription.embedded import EmbeddedTranscriptionClient
+from transcription.server import AudioServer, load_model
+from transcription.websocket_client import TranscriptionWebSocketClient
+
+
+def parse_speed(value):
+    """'1x', '10x' or a number -> playback multiplier, 'max' -> None (no pacing)"""
+    if value == "max":
+        return None
+    speed = float(value.rstrip("x"))
+    if speed <= 0:
+        raise argparse.ArgumentTypeError("speed must be positive")
+    return speed
+
+
+def synthesize_wav(path, seconds=30.0, rate=48000, channels=2):
+    """Write a speech-like test signal: 3s of modulated tones followed by 1s of silence"""
+    t = np.arange(int(seconds * rate)) / rate
+    voice = np.sin(2 * np.pi * 220 * t) + 0.5 * np.sin(2 * np.pi * 660 * t)
+    syllables = 0.5 * (1 + np.sin(2 * np.pi * 4 * t))
+    talking = (t % 4.0) < 3.0
+    rng = np.random.default_rng(0)
+    signal = voice * syllables * talking + 0.01 * rng.standard_normal(len(t))
+    samples = (signal / np.max(np.abs(signal)) * 0.5 * 32767).astype(np.int16)
+    frames = np.repeat(samples[:, None], channels, axis=1)
+
+    with wave.open(path, "wb") as wf:
+        wf.setnchannels(channels)
+        wf.setsampwidth(2)
+        wf.setframerate(rate)
+        wf.writeframes(frames.tobytes())
+    return path
+
+
+def percentiles(values):
+    """Summary statistics for a list of latencies in seconds"""
+    if not values:
+        return None
+    arr = np.asarray(values)
+    return {
+        "count": int(len(arr)),
+        "mean": float(arr.mean()),
+        "p50": float(np.percentile(arr, 50)),
+        "p90": float(np.percentile(arr, 90)),
+        "p99": float(np.percentile(arr, 99)),
+        "max": float(arr.max()),
+    }
+
+
+def normalize_text(text):
+    return re.sub(r"[^a-z0-9' ]+", " ", text.lower()).split()
+
+
+def word_error_rate(reference, hypothesis):
+    """Word-level edit distance divided by the reference length"""
+    ref = normalize_text(reference)
+    hyp = normalize_text(hypothesis)
+    previous = list(range(len(hyp) + 1))
+    for i, ref_word in enumerate(ref, 1):
+        current = [i]
+        for j, hyp_word in enumerate(hyp, 1):
+            current.append(
+                min(
+                    previous[j] + 1,  # deletion
+                    current[j - 1] + 1,  # insertion
+                    previous[j - 1] + (ref_word != hyp_word),  # substitution
+                )
+            )
+        previous = current
+    return previous[-1] / max(1, len(ref))
+
+
+def load_reference(wav_path):
+    """Reference transcript stored next to the WAV as <name>.txt, if any"""
+    path = os.path.splitext(wav_path)[0] + ".txt"
+    if os.path.exists(path):
+        with open(path) as f:
+            return f.read()
+    return None
+
+
+def inference_totals():
+    """Cumulative server inference seconds and passes from the metrics registry"""
+    totals = {}
+    for pass_name in ("chunk", "partial", "final"):
+        labels = {"pass": pass_name}
+        totals[pass_name] = {
+            "seconds": REGISTRY.get_sample_value("focusnote_server_inference_seconds_sum", labels) or 0.0,
+            "count": REGISTRY.get_sample_value("focusnote_server_inference_seconds_count", labels) or 0.0,
+        }
+    return totals
+
+
+class WavReplaySource:
+    """
+    Plays a 16-bit WAV file into a bounded queue the same way AudioCapture does while recording.
+    At a fixed speed a full queue drops chunks, at max speed playback waits for the consumer.
+    """
+
+    def __init__(self, path, speed=1.0, chunk=1024, queue_size=100):
+        self.path = path
+        self.speed = speed
+        self.chunk = chunk
+        self.audio_stream_queue = queue.Queue(maxsize=queue_size)
+        self.finished = threading.Event()
+        self.thread = None
+        self.chunks_played = 0
+        self.chunks_dropped = 0
+
+        with wave.open(path, "rb") as wf:
+            if wf.getsampwidth() != 2:
+                raise ValueError(f"{path}: only 16-bit PCM WAV files are supported")
+            self.sample_rate = wf.getframerate()
+            self.channels = wf.getnchannels()
+            self.audio_seconds = wf.getnframes() / self.sample_rate
+
+    @property
+    def dropped_seconds(self):
+        return self.chunks_dropped * self.chunk / self.sample_rate
+
+    def start(self):
+        self.thread = threading.Thread(target=self._play, daemon=True)
+        self.thread.start()
+
+    def _play(self):
+        chunk_seconds = self.chunk / self.sample_rate
+        start = time.monotonic()
+        with wave.open(self.path, "rb") as wf:
+            while True:
+                data = wf.readframes(self.chunk)
+                if not data:
+                    break
+
+                if self.speed is None:
+                    self.audio_stream_queue.put(
+                        (data, self.sample_rate, self.channels, time.monotonic())
+                    )
+                else:
+                    due = start + self.chunks_played * chunk_seconds / self.speed
+                    delay = due - time.monotonic()
+                    if delay > 0:
+                        time.sleep(delay)
+                    try:
+                        self.audio_stream_queue.put_nowait(
+                            (data, self.sample_rate, self.channels, time.monotonic())
+                        )
+                    except queue.Full:
+                        self.chunks_dropped += 1
+                self.chunks_played += 1
+        self.finished.set()
+
+    def get_audio_chunk(self, timeout=None):
+        """Same contract as AudioCapture.get_audio_chunk"""
+        try:
+            return self.audio_stream_queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def drained(self):
+        return self.finished.is_set() and self.audio_stream_queue.empty()
+
+
+class BenchmarkClient(TranscriptionWebSocketClient):
+    """TranscriptionWebSocketClient that records per-buffer and caption latencies"""
+
+    def __init__(self, source, server_url, **options):
+        super().__init__(source, server_url=server_url, **options)
+        self.send_to_result = []
+        self.capture_to_result = []
+        self.caption_latency = {"partial": [], "final": []}
+        self.buffers_acked = 0
+        self.last_activity = time.monotonic()
+        self.set_result_callback(self._record_result)
+
+    def _record_result(self, data):
+        self.last_activity = time.monotonic()
+        if data.get("type") in self.caption_latency and "caption_latency" in data:
+            self.caption_latency[data["type"]].append(data["caption_latency"])
+
+    def _send_to_meeting_service(self, recording_id=None, transcript=None, segments=None):
+        pass  # benchmarks never post to the meeting service
+
+    def idle(self, settle_seconds):
+        """Every buffer acknowledged and no results for settle_seconds"""
+        quiet = time.monotonic() - self.last_activity
+        return len(self.backlog) == 0 and quiet >= settle_seconds
+
+    def _queue(self, float32_data, captured_at):
+        self.last_activity = time.monotonic()
+        return super()._queue(float32_data, captured_at)
+
+    def _buffer_done(self, seq, round_trip, captured_at):
+        super()._buffer_done(seq, round_trip, captured_at)
+        now = time.monotonic()
+        self.last_activity = now
+        self.buffers_acked += 1
+        # Streaming hops are acked on receipt, only 5s buffers are acked once transcribed
+        if not self.streaming:
+            self.send_to_result.append(round_trip)
+            if captured_at is not None:
+                self.capture_to_result.append(now - captured_at)
+
+
+class EmbeddedBenchmarkClient(BenchmarkClient, EmbeddedTranscriptionClient):
+    """BenchmarkClient with its own engine process instead of the shared server"""
+
+
+class ServerThread:
+    """Runs an AudioServer on its own event loop on a free localhost port"""
+
+    def __init__(self, audio_server):
+        self.audio_server = audio_server
+        self.loop = None
+        self.thread = None
+        self.port = None
+        self.ready = threading.Event()
+        self.stop_event = None
+
+    @property
+    def url(self):
+        return f"ws://127.0.0.1:{self.port}"
+
+    def start(self):
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+        if not self.ready.wait(timeout=10):
+            raise RuntimeError("Transcription server did not start")
+
+    def _run(self):
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+        self.loop.run_until_complete(self._serve())
+        self.loop.close()
+
+    async def _serve(self):
+        self.stop_event = asyncio.Event()
+        async with websockets.serve(self.audio_server.handle_client, "127.0.0.1", 0) as srv:
+            self.port = srv.sockets[0].getsockname()[1]
+            self.ready.set()
+            await self.stop_event.wait()
+        self.audio_server.close_sessions()
+        await asyncio.sleep(0)  # let cancelled session tasks finish
+
+    def stop(self):
+        if self.loop and self.stop_event:
+            self.loop.call_soon_threadsafe(self.stop_event.set)
+        if self.thread:
+            self.thread.join(timeout=5)
+
+
+def run_benchmark(
+    wav_paths,
+    meetings,
+    speed,
+    model,
+    timeout,
+    streaming=False,
+    partial_model=None,
+    decoder_context=True,
+    vocabulary=None,
+    embedded=False,
+):
+    """
+    Replay one WAV per simulated meeting concurrently and collect results. With embedded,
+    model and partial_model are factories and every meeting runs its own engine process
+    (whose inference time is not in this process's metrics)
+    """
+    tracemalloc.start()
+    inference_before = inference_totals()
+    server = None
+    if not embedded:
+        server = ServerThread(
+            AudioServer(model=model, metrics_port=None, partial_model=partial_model)
+        )
+        server.start()
+
+    sessions = []
+    for i in range(meetings):
+        source = WavReplaySource(wav_paths[i % len(wav_paths)], speed=speed)
+        options = {"streaming": streaming, "decoder_context": decoder_context, "vocabulary": vocabulary}
+        if embedded:
+            client = EmbeddedBenchmarkClient(
+                source, "embedded", model_factory=model, partial_model_factory=partial_model, **options
+            )
+        else:
+            client = BenchmarkClient(source, server.url, **options)
+        sessions.append((source, client))
+
+    start = time.monotonic()
+    for source, client in sessions:
+        client.start()
+        source.start()
+
+    deadline = start + timeout
+    while time.monotonic() < deadline and not all(s.drained() for s, _ in sessions):
+        time.sleep(0.1)
+
+    # End every meeting as the app does after a call: the last partial buffer is sent and the
+    # server transcribes its tail. Audio still unacknowledged when time runs out was lost
+    unacknowledged = [0.0] * len(sessions)
+    transcripts = [""] * len(sessions)
+
+    def finish(i, client):
+        client.end_timeout = max(1.0, deadline - time.monotonic())
+        ended = client.finish_meeting()
+        if ended is not None:
+            unacknowledged[i] = ended["unacknowledged_seconds"]
+            transcripts[i] = ended["transcript"]
+
+    finishers = [threading.Thread(target=finish, args=(i, c)) for i, (_, c) in enumerate(sessions)]
+    for thread in finishers:
+        thread.start()
+    for thread in finishers:
+        thread.join()
+    timed_out = time.monotonic() >= deadline or any(unacknowledged)
+    wall_seconds = time.monotonic() - start
+
+    per_meeting = []
+    for i, (source, client) in enumerate(sessions):
+        transcript = transcripts[i]
+        client.stop()
+        reference = load_reference(source.path)
+        per_meeting.append(
+            {
+                "meeting": i,
+                "wav": os.path.basename(source.path),
+                "audio_seconds": source.audio_seconds,
+                "dropped_chunks": source.chunks_dropped,
+                "dropped_audio_seconds": source.dropped_seconds + unacknowledged[i],
+                "unacknowledged_audio_seconds": unacknowledged[i],
+                "buffers_sent": client.buffers_acked,
+                "transcript_words": len(transcript.split()),
+                "wer": word_error_rate(reference, transcript) if reference else None,
+                "send_to_result": percentiles(client.send_to_result),
+                "capture_to_result": percentiles(client.capture_to_result),
+                "caption_latency": {
+                    kind: percentiles(values) for kind, values in client.caption_latency.items()
+                },
+            }
+        )
+    if server is not None:
+        server.stop()
+
+    _, tracemalloc_peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    max_rss_mb = None
+    if resource is not None:
+        max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # ru_maxrss is kilobytes on Linux and bytes on macOS
+        max_rss_mb = max_rss / (1024 * 1024) if sys.platform == "darwin" else max_rss / 1024
+
+    inference_after = inference_totals()
+    inference = {}
+    for pass_name, after in inference_after.items():
+        seconds = after["seconds"] - inference_before[pass_name]["seconds"]
+        count = after["count"] - inference_before[pass_name]["count"]
+        if count:
+            inference[pass_name] = {"seconds": seconds, "passes": count, "mean": seconds / count}
+
+    audio_seconds = sum(m["audio_seconds"] for m in per_meeting)
+    wers = [m["wer"] for m in per_meeting if m["wer"] is not None]
+    return {
+        "wall_seconds": wall_seconds,
+        "timed_out": timed_out,
+        "audio_seconds": audio_seconds,
+        "throughput_x_realtime": audio_seconds / wall_seconds if wall_seconds else None,
+        "buffers_sent": sum(m["buffers_sent"] for m in per_meeting),
+        "dropped_chunks": sum(m["dropped_chunks"] for m in per_meeting),
+        "dropped_audio_seconds": sum(m["dropped_audio_seconds"] for m in per_meeting),
+        "unacknowledged_audio_seconds": sum(m["unacknowledged_audio_seconds"] for m in per_meeting),
+        "send_to_result": percentiles(
+            [x for _, c in sessions for x in c.send_to_result]
+        ),
+        "capture_to_result": percentiles(
+            [x for _, c in sessions for x in c.capture_to_result]
+        ),
+        "caption_latency": {
+            kind: percentiles([x for _, c in sessions for x in c.caption_latency[kind]])
+            for kind in ("partial", "final")
+        },
+        "inference": inference,
+        "wer": sum(wers) / len(wers) if wers else None,
+        "memory": {
+            "tracemalloc_peak_mb": tracemalloc_peak / (1024 * 1024),
+            "max_rss_mb": max_rss_mb,
+        },
+        "meetings": per_meeting,
+    }
+
+
+def find_regressions(results, baseline, tolerance):
+    """Compare against a previous results file, return a list of human-readable regressions"""
+    regressions = []
+    old, new = baseline["results"], results["results"]
+
+    if old.get("throughput_x_realtime") and new.get("throughput_x_realtime"):
+        if new["throughput_x_realtime"] < old["throughput_x_realtime"] * (1 - tolerance):
+            regressions.append(
+                f"throughput {new['throughput_x_realtime']:.2f}x < "
+                f"baseline {old['throughput_x_realtime']:.2f}x"
+            )
+
+    for key in ("send_to_result", "capture_to_result"):
+        if old.get(key) and new.get(key):
+            if new[key]["p90"] > old[key]["p90"] * (1 + tolerance):
+                regressions.append(
+                    f"{key} p90 {new[key]['p90'] * 1000:.0f}ms > "
+                    f"baseline {old[key]['p90'] * 1000:.0f}ms"
+                )
+
+    for kind in ("partial", "final"):
+        old_stats = old.get("caption_latency", {}).get(kind)
+        new_stats = new.get("caption_latency", {}).get(kind)
+        if old_stats and new_stats and new_stats["p90"] > old_stats["p90"] * (1 + tolerance):
+            regressions.append(
+                f"{kind} caption p90 {new_stats['p90'] * 1000:.0f}ms > "
+                f"baseline {old_stats['p90'] * 1000:.0f}ms"
+            )
+
+    if new["dropped_chunks"] > old["dropped_chunks"]:
+        regressions.append(
+            f"dropped chunks {new['dropped_chunks']} > baseline {old['dropped_chunks']}"
+        )
+    # Includes audio that was captured but never transcribed
+    if round(new["dropped_audio_seconds"], 1) > round(old.get("dropped_audio_seconds", 0.0), 1):
+        regressions.append(
+            f"dropped audio {new['dropped_audio_seconds']:.1f}s > "
+            f"baseline {old.get('dropped_audio_seconds', 0.0):.1f}s"
+        )
+    return regressions
+
+
+def print_report(results):
+    r = results["results"]
+    print("\n" + "=" * 60)
+    print("Transcription Pipeline Benchmark")
+    print("=" * 60)
+    print(f"Meetings: {results['config']['meetings']}, speed: {results['config']['speed']}")
+    print(f"Audio: {r['audio_seconds']:.1f}s in {r['wall_seconds']:.1f}s wall")
+    if r["throughput_x_realtime"]:
+        print(f"Throughput: {r['throughput_x_realtime']:.2f}x real time")
+    stats_by_name = [(key, r[key]) for key in ("send_to_result", "capture_to_result")]
+    stats_by_name += [(f"{kind} caption", stats) for kind, stats in r["caption_latency"].items()]
+    for key, stats in stats_by_name:
+        if stats:
+            print(
+                f"{key}: p50 {stats['p50'] * 1000:.0f}ms, p90 {stats['p90'] * 1000:.0f}ms, "
+                f"p99 {stats['p99'] * 1000:.0f}ms ({stats['count']} results)"
+            )
+    for pass_name, stats in r["inference"].items():
+        print(f"Inference ({pass_name}): {stats['seconds']:.2f}s over {stats['passes']:.0f} passes, mean {stats['mean'] * 1000:.0f}ms")
+    if r["wer"] is not None:
+        print(f"Word error rate: {r['wer']:.1%}")
+    print(
+        f"Dropped audio: {r['dropped_audio_seconds']:.1f}s ({r['dropped_chunks']} chunks at capture, "
+        f"{r['unacknowledged_audio_seconds']:.1f}s never transcribed)"
+    )
+    mem = r["memory"]
+    print(f"Memory: tracemalloc peak {mem['tracemalloc_peak_mb']:.1f} MB", end="")
+    print(f", max RSS {mem['max_rss_mb']:.1f} MB" if mem["max_rss_mb"] else "")
+    if r["timed_out"]:
+        print("Warning: benchmark timed out before all audio was transcribed")
+
+
+def compare_context(with_context, without_context):
+    """Inference time per audio second and WER with decoder context relative to without"""
+    def inference_per_audio_second(results):
+        seconds = sum(stats["seconds"] for name, stats in results["inference"].items() if name != "partial")
+        return seconds / results["audio_seconds"] if results["audio_seconds"] else None
+
+    comparison = {
+        "inference_per_audio_second": {
+            "with_context": inference_per_audio_second(with_context),
+            "without_context": inference_per_audio_second(without_context),
+        },
+        "wer": {
+            "with_context": with_context["wer"],
+            "without_context": without_context["wer"],
+        },
+    }
+    for stats in comparison.values():
+        if stats["with_context"] is not None and stats["without_context"]:
+            stats["change"] = stats["with_context"] / stats["without_context"] - 1
+    return comparison
+
+
+def print_comparison(comparison):
+    print("\nDecoder context comparison (with vs without):")
+    for name, stats in comparison.items():
+        if stats["with_context"] is None:
+            continue
+        line = f"  {name}: {stats['with_context']:.4f} vs {stats['without_context']:.4f}"
+        if "change" in stats:
+            line += f" ({stats['change']:+.1%})"
+        print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay WAV files through the transcription pipeline")
+    parser.add_argument("wav", nargs="*", help="16-bit WAV files (default: synthesized 30s clip)")
+    parser.add_argument("--meetings", type=int, default=1, help="Concurrent simulated meetings")
+    parser.add_argument("--speed", default="10x", help="Playback speed: 1x, 10x, max or a number")
+    parser.add_argument("--model", default="fake", help="'fake' or a Whisper model name, e.g. base.en")
+    parser.add_argument("--fake-rtf", type=float, default=0.05, help="Real-time factor of the fake model")
+    parser.add_argument("--streaming", action="store_true", help="Stream short hops and measure partial captions")
+    parser.add_argument("--partial-model", default="fake", help="'fake' or a Whisper model name for partials")
+    parser.add_argument("--vocabulary", help="Comma-separated names and terms to prompt Whisper with")
+    parser.add_argument("--no-context", action="store_true", help="Decode every chunk without decoder context")
+    parser.add_argument("--compare-context", action="store_true", help="Run with and without decoder context and report the difference")
+    parser.add_argument("--embedded", action="store_true", help="Run the engine in a child process fed through shared memory")
+    parser.add_argument("--timeout", type=float, default=600, help="Give up after this many seconds")
+    parser.add_argument("--output", help="Write JSON results to this file")
+    parser.add_argument("--baseline", help="Previous JSON results, exit 1 on regression")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed regression vs baseline")
+    args = parser.parse_args()
+
+    speed = parse_speed(args.speed)
+    wav_paths = args.wav
+    if not wav_paths:
+        wav_paths = [synthesize_wav(os.path.join(tempfile.mkdtemp(), "synthetic.wav"))]
+
+    def load(factory, *factory_args, **kwargs):
+        """A model, or for the embedded engine a factory its child process calls"""
+        if args.embedded:
+            return functools.partial(factory, *factory_args, **kwargs)
+        return factory(*factory_args, **kwargs)
+
+    if args.model == "fake":
+        model = load(FakeWhisperModel, real_time_factor=args.fake_rtf)
+    else:
+        model = load(load_model, args.model)
+    vocabulary = [t.strip() for t in args.vocabulary.split(",")] if args.vocabulary else None
+
+    partial_model = None
+    if args.streaming:
+        if args.partial_model == "fake":
+            partial_model = load(FakeWhisperModel, real_time_factor=args.fake_rtf / 5)
+        else:
+            partial_model = load(load_model, args.partial_model)
+
+    def run(decoder_context):
+        return run_benchmark(
+            wav_paths,
+            args.meetings,
+            speed,
+            model,
+            args.timeout,
+            streaming=args.streaming,
+            partial_model=partial_model,
+            decoder_context=decoder_context,
+            vocabulary=vocabulary,
+            embedded=args.embedded,
+        )
+
+    results = {
+        "benchmark": "transcription_replay",
+        "timestamp": datetime.now().isoformat(),
+        "config": {
+            "wav": [os.path.basename(p) for p in wav_paths],
+            "meetings": args.meetings,
+            "speed": args.speed,
+            "model": args.model,
+            "fake_rtf": args.fake_rtf if args.model == "fake" else None,
+            "streaming": args.streaming,
+            "partial_model": args.partial_model if args.streaming else None,
+            "decoder_context": not args.no_context,
+            "vocabulary": vocabulary,
+            "embedded": args.embedded,
+        },
+        "host": {
+            "platform": platform.platform(),
+            "python": platform.python_version(),
+            "cpu_count": os.cpu_count(),
+        },
+        "results": run(decoder_context=not args.no_context),
+    }
+    print_report(results)
+
+    if args.compare_context:
+        results["without_context"] = run(decoder_context=False)
+        results["context_comparison"] = compare_context(
+            results["results"], results["without_context"]
+        )
+        print_comparison(results["context_comparison"])
+    results["metrics"] = snapshot()
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"Results written to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = find_regressions(results, baseline, args.tolerance)
+        if regressions:
+            print("\nRegressions:")
+            for regression in regressions:
+                print(f"  {regression}")
+            sys.exit(1)
+        print("\nNo regressions against baseline")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,277 @@
+"""
+Session router benchmark
+Starts several fake-model transcription server processes on free local ports, routes
+simulated meetings to them through a SessionRouter and reports how meetings were spread
+over the backends. With --kill-after one backend is killed mid-run to check that its
+meetings are re-homed and no acknowledged-or-pending audio is lost.
+
+Usage:
+    python benchmarks/router_benchmark.py --backends 3 --meetings 6
+    python benchmarks/router_benchmark.py --backends 2 --meetings 4 --kill-after 5 --output results.json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.request
+from datetime import datetime
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+SRC_DIR = os.path.join(os.path.dirname(BENCH_DIR), "src")
+if SRC_DIR not in sys.path:
+    sys.path.insert(0, SRC_DIR)
+
+from monitoring.metrics import REGISTRY
+from replay_benchmark import BenchmarkClient, WavReplaySource, parse_speed, synthesize_wav
+from transcription.router import Backend, SessionRouter
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_backend(fake_rtf):
+    """Launch a fake_server.py process, returns (Popen, Backend) once /status answers"""
+    port, metrics_port = free_port(), free_port()
+    process = subprocess.Popen(
+        [
+            sys.executable,
+            os.path.join(BENCH_DIR, "fake_server.py"),
+            "--host", "127.0.0.1",
+            "--port", str(port),
+            "--metrics-port", str(metrics_port),
+            "--fake-rtf", str(fake_rtf),
+        ],
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    backend = Backend("127.0.0.1", port, metrics_port)
+    deadline = time.monotonic() + 15
+    while time.monotonic() < deadline:
+        try:
+            urllib.request.urlopen(backend.status_url, timeout=0.5).close()
+            # The websocket listener comes up right after the metrics server
+            with socket.create_connection(("127.0.0.1", port), timeout=0.5):
+                return process, backend
+        except OSError:
+            time.sleep(0.1)
+    process.kill()
+    raise RuntimeError(f"Backend on port {port} did not start")
+
+
+class RouterThread:
+    """Runs a SessionRouter on its own event loop"""
+
+    def __init__(self, router):
+        self.router = router
+        self.loop = None
+        self.task = None
+        self.thread = None
+
+    @property
+    def url(self):
+        return f"ws://127.0.0.1:{self.router.port}"
+
+    def start(self):
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+        deadline = time.monotonic() + 10
+        while time.monotonic() < deadline:
+            try:
+                with socket.create_connection(("127.0.0.1", self.router.port), timeout=0.5):
+                    return
+            except OSError:
+                time.sleep(0.05)
+        raise RuntimeError("Router did not start")
+
+    def _run(self):
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+        self.task = self.loop.create_task(self.router.start())
+        try:
+            self.loop.run_until_complete(self.task)
+        except asyncio.CancelledError:
+            pass
+        self.loop.close()
+
+    def call(self, function):
+        """Run function on the router's loop and return its result"""
+        done = threading.Event()
+        result = []
+        self.loop.call_soon_threadsafe(lambda: (result.append(function()), done.set()))
+        done.wait(timeout=5)
+        return result[0] if result else None
+
+    def stop(self):
+        if self.loop and self.task:
+            self.loop.call_soon_threadsafe(self.task.cancel)
+        if self.thread:
+            self.thread.join(timeout=5)
+
+
+def placement(router):
+    """Backend name -> number of meetings pinned to it"""
+    counts = {b.name: 0 for b in router.backends}
+    for backend in router.pins.values():
+        counts[backend.name] += 1
+    return counts
+
+
+def run_benchmark(wav_path, backends, meetings, speed, fake_rtf, kill_after, timeout, streaming=False):
+    processes = []
+    try:
+        for _ in range(backends):
+            processes.append(start_backend(fake_rtf))
+        router = SessionRouter(
+            [backend for _, backend in processes],
+            host="127.0.0.1",
+            port=free_port(),
+            metrics_port=None,
+            health_interval=0.5,
+        )
+        router_thread = RouterThread(router)
+        router_thread.start()
+        rehomed_before = REGISTRY.get_sample_value("focusnote_router_rehomed_total") or 0.0
+
+        sessions = []
+        for _ in range(meetings):
+            source = WavReplaySource(wav_path, speed=speed)
+            client = BenchmarkClient(source, router_thread.url, streaming=streaming)
+            sessions.append((source, client))
+
+        start = time.monotonic()
+        for source, client in sessions:
+            client.start()
+            source.start()
+            # Let each meeting be placed before the next arrives
+            time.sleep(0.1)
+        initial = router_thread.call(lambda: placement(router))
+
+        killed = None
+        settle_seconds = 1.0 if streaming else 0.0
+        deadline = start + timeout
+        while time.monotonic() < deadline:
+            if kill_after is not None and killed is None and time.monotonic() - start >= kill_after:
+                process, backend = processes[0]
+                print(f"Killing backend {backend.name}")
+                process.kill()
+                killed = backend.name
+            if all(s.drained() and c.idle(settle_seconds) for s, c in sessions):
+                if kill_after is None or killed is not None:
+                    break
+            time.sleep(0.1)
+        timed_out = time.monotonic() >= deadline
+        wall_seconds = time.monotonic() - start
+
+        final = router_thread.call(lambda: placement(router))
+        status = router_thread.call(router.status)
+        per_meeting = []
+        for i, (source, client) in enumerate(sessions):
+            per_meeting.append(
+                {
+                    "meeting": i,
+                    "audio_seconds": source.audio_seconds,
+                    "buffers_acked": client.buffers_acked,
+                    "buffers_unacked": len(client.backlog),
+                    "dropped_audio_seconds": source.dropped_seconds,
+                    "transcript_words": len(client.transcript.split()),
+                }
+            )
+            client.stop()
+        router_thread.stop()
+    finally:
+        for process, _ in processes:
+            process.kill()
+            process.wait()
+
+    return {
+        "wall_seconds": wall_seconds,
+        "timed_out": timed_out,
+        "killed_backend": killed,
+        "initial_placement": initial,
+        "final_placement": final,
+        "rehomed": (REGISTRY.get_sample_value("focusnote_router_rehomed_total") or 0.0) - rehomed_before,
+        "backends": status["backends"] if status else None,
+        "audio_seconds": sum(m["audio_seconds"] for m in per_meeting),
+        "buffers_unacked": sum(m["buffers_unacked"] for m in per_meeting),
+        "dropped_audio_seconds": sum(m["dropped_audio_seconds"] for m in per_meeting),
+        "meetings": per_meeting,
+    }
+
+
+def print_report(results):
+    r = results["results"]
+    config = results["config"]
+    print("\n" + "=" * 60)
+    print("Session Router Benchmark")
+    print("=" * 60)
+    print(f"Backends: {config['backends']}, meetings: {config['meetings']}, speed: {config['speed']}")
+    print(f"Audio: {r['audio_seconds']:.1f}s in {r['wall_seconds']:.1f}s wall")
+    print("Initial placement: " + ", ".join(f"{name} {n}" for name, n in r["initial_placement"].items()))
+    if r["killed_backend"]:
+        print(f"Killed {r['killed_backend']}, re-homed {r['rehomed']:.0f} meetings")
+        print("Final placement: " + ", ".join(f"{name} {n}" for name, n in r["final_placement"].items()))
+    words = [m["transcript_words"] for m in r["meetings"]]
+    print(f"Transcript words per meeting: min {min(words)}, max {max(words)}")
+    print(f"Unacknowledged buffers at the end: {r['buffers_unacked']}")
+    print(f"Dropped audio: {r['dropped_audio_seconds']:.1f}s")
+    if r["timed_out"]:
+        print("Warning: benchmark timed out before all audio was transcribed")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Route simulated meetings over several local transcription servers")
+    parser.add_argument("wav", nargs="?", help="16-bit WAV file (default: synthesized 30s clip)")
+    parser.add_argument("--backends", type=int, default=3, help="Fake-model server processes to start")
+    parser.add_argument("--meetings", type=int, default=6, help="Concurrent simulated meetings")
+    parser.add_argument("--speed", default="5x", help="Playback speed: 1x, 10x, max or a number")
+    parser.add_argument("--fake-rtf", type=float, default=0.05, help="Real-time factor of the fake model")
+    parser.add_argument("--streaming", action="store_true", help="Stream short hops with partial captions")
+    parser.add_argument("--kill-after", type=float, help="Kill the first backend after this many seconds")
+    parser.add_argument("--timeout", type=float, default=300, help="Give up after this many seconds")
+    parser.add_argument("--output", help="Write JSON results to this file")
+    args = parser.parse_args()
+
+    wav_path = args.wav or synthesize_wav(os.path.join(tempfile.mkdtemp(), "synthetic.wav"))
+    results = {
+        "benchmark": "session_router",
+        "timestamp": datetime.now().isoformat(),
+        "config": {
+            "wav": os.path.basename(wav_path),
+            "backends": args.backends,
+            "meetings": args.meetings,
+            "speed": args.speed,
+            "fake_rtf": args.fake_rtf,
+            "streaming": args.streaming,
+            "kill_after": args.kill_after,
+        },
+        "results": run_benchmark(
+            wav_path,
+            args.backends,
+            args.meetings,
+            parse_speed(args.speed),
+            args.fake_rtf,
+            args.kill_after,
+            args.timeout,
+            streaming=args.streaming,
+        ),
+    }
+    print_report(results)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
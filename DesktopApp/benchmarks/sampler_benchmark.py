@@ -0,0 +1,244 @@
+"""
+Per-tick cost of the call detection process samplers
+Builds a fake /proc tree with N processes (two of them call apps burning CPU, a few
+percent of the rest replaced every tick) and times one detection tick for each sampler:
+
+- legacy: the previous detector loop, one process_iter(["name", "cpu_percent"]) scan per
+  detector (Zoom, Discord, Teams) plus a blocking cpu_percent(interval=0.1) per match
+- psutil: PsutilSampler, one pass classified by the platform registry
+- procfs: ProcfsSampler, one pass classified by the platform registry
+
+Usage:
+    python benchmarks/sampler_benchmark.py
+    python benchmarks/sampler_benchmark.py --processes 100 1000 5000 --ticks 50 --output results.json
+    python benchmarks/sampler_benchmark.py --real  # the live /proc instead of a fake tree (Linux)
+
+The report also estimates idle monitoring CPU per hour: the legacy loop ran the detectors
+every second in the monitor thread and again in the UI status timer, the samplers run
+once per DetectionScheduler idle interval.
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import shutil
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+import numpy as np
+import psutil
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+SRC_DIR = os.path.join(os.path.dirname(BENCH_DIR), "src")
+if SRC_DIR not in sys.path:
+    sys.path.insert(0, SRC_DIR)
+
+from detection.platforms import PlatformRegistry
+from detection.process_sampler import ProcfsSampler, PsutilSampler
+from detection.scheduler import DetectionScheduler
+
+# The hand-written detectors scanned all processes once each
+LEGACY_DETECTORS = {
+    "zoom": {"zoom.exe", "zoom.us", "zoom", "zoom.us.app"},
+    "discord": {"discord.exe", "discord"},
+    "teams": {"teams.exe", "teams"},
+}
+CALL_APPS = ["zoom", "Discord"]
+# psutil parses all 52 fields of /proc/<pid>/stat
+STAT_FIELDS = 52
+# Detection ticks per second while no call is running
+LEGACY_IDLE_TICKS_PER_SECOND = 2.0  # monitor loop + UI status timer, once a second each
+SCHEDULED_IDLE_TICKS_PER_SECOND = 1.0 / DetectionScheduler().interval
+
+
+def percentiles(values):
+    """Summary statistics for a list of durations in seconds"""
+    if not values:
+        return None
+    arr = np.asarray(values)
+    return {
+        "count": int(len(arr)),
+        "mean": float(arr.mean()),
+        "p50": float(np.percentile(arr, 50)),
+        "p90": float(np.percentile(arr, 90)),
+        "p99": float(np.percentile(arr, 99)),
+        "max": float(arr.max()),
+    }
+
+
+class FakeProcTree:
+    """A /proc lookalike with enough of stat, comm and cmdline for both samplers"""
+
+    def __init__(self, processes, churn=0.01, seed=0):
+        self.root = tempfile.mkdtemp(prefix="focusnote-proc-")
+        self.rng = random.Random(seed)
+        self.churn = churn
+        self.next_pid = 1000
+        self.pids = {}  # pid -> [name, jiffies]
+        with open(os.path.join(self.root, "stat"), "w") as f:
+            f.write("cpu  100 0 100 1000 0 0 0 0 0 0\nbtime 1700000000\n")
+        with open(os.path.join(self.root, "uptime"), "w") as f:
+            f.write("1000.00 900.00\n")
+
+        for name in CALL_APPS:
+            self.spawn(name)
+        while len(self.pids) < processes:
+            self.spawn(f"worker{self.next_pid}")
+
+    def spawn(self, name):
+        pid = self.next_pid
+        self.next_pid += 1
+        os.mkdir(os.path.join(self.root, str(pid)))
+        with open(os.path.join(self.root, str(pid), "comm"), "w") as f:
+            f.write(name + "\n")
+        with open(os.path.join(self.root, str(pid), "cmdline"), "w") as f:
+            f.write(f"/usr/bin/{name}\0")
+        self.pids[pid] = [name, 0]
+        self.write_stat(pid)
+
+    def write_stat(self, pid):
+        name, jiffies = self.pids[pid]
+        fields = ["0"] * STAT_FIELDS
+        fields[0], fields[1] = "S", "1"
+        fields[11], fields[12] = str(jiffies), "0"  # utime, stime
+        fields[19] = str(pid)  # start time
+        with open(os.path.join(self.root, str(pid), "stat"), "w") as f:
+            f.write(f"{pid} ({name[:15]}) {' '.join(fields)}\n")
+
+    def tick(self, seconds):
+        """Advance the call apps' CPU time and replace a few of the other processes"""
+        for pid, (name, jiffies) in list(self.pids.items()):
+            if name in CALL_APPS:
+                # ~10% of one core
+                self.pids[pid][1] = jiffies + int(seconds * os.sysconf("SC_CLK_TCK") * 0.1) + 1
+                self.write_stat(pid)
+
+        workers = [pid for pid, (name, _) in self.pids.items() if name not in CALL_APPS]
+        for pid in self.rng.sample(workers, int(len(workers) * self.churn)):
+            shutil.rmtree(os.path.join(self.root, str(pid)))
+            del self.pids[pid]
+            self.spawn(f"worker{self.next_pid}")
+
+    def close(self):
+        shutil.rmtree(self.root, ignore_errors=True)
+
+
+def legacy_tick():
+    """The detector loop before samplers: one full psutil scan per detector"""
+    for names in LEGACY_DETECTORS.values():
+        for proc in psutil.process_iter(["name", "cpu_percent"]):
+            try:
+                if proc.info["name"].lower() in names:
+                    proc.cpu_percent(interval=0.1)
+            except (psutil.NoSuchProcess, psutil.AccessDenied):
+                continue
+
+
+def sampler_tick(sampler, registry):
+    registry.evaluate(sampler.sample(registry.classify))
+
+
+def measure(tick, ticks, tree=None):
+    """CPU and wall time per tick, the fake tree changes between (untimed) ticks"""
+    cpu_times, wall_times = [], []
+    tick()  # warm up name caches and CPU baselines
+    for _ in range(ticks):
+        if tree is not None:
+            tree.tick(1.0)
+        cpu_start, wall_start = time.process_time(), time.perf_counter()
+        tick()
+        cpu_times.append(time.process_time() - cpu_start)
+        wall_times.append(time.perf_counter() - wall_start)
+    return {"cpu": percentiles(cpu_times), "wall": percentiles(wall_times)}
+
+
+def run_benchmark(process_counts, ticks, samplers, real=False):
+    results = []
+    for count in [None] if real else process_counts:
+        tree = None
+        proc_root = "/proc"
+        if not real:
+            tree = FakeProcTree(count)
+            proc_root = tree.root
+        psutil.PROCFS_PATH = proc_root
+        try:
+            processes = count if count is not None else len(psutil.pids())
+            row = {"processes": processes}
+            for name in samplers:
+                if name == "legacy":
+                    tick = legacy_tick
+                elif name == "psutil":
+                    tick = lambda s=PsutilSampler(), r=PlatformRegistry(): sampler_tick(s, r)
+                else:
+                    tick = lambda s=ProcfsSampler(proc_root=proc_root), r=PlatformRegistry(): sampler_tick(s, r)
+                # The legacy loop blocks 100ms per matching process, fewer ticks keep it bearable
+                n = max(3, ticks // 10) if name == "legacy" else ticks
+                row[name] = measure(tick, n, tree)
+                ticks_per_second = (
+                    LEGACY_IDLE_TICKS_PER_SECOND if name == "legacy" else SCHEDULED_IDLE_TICKS_PER_SECOND
+                )
+                row[name]["idle_cpu_seconds_per_hour"] = row[name]["cpu"]["mean"] * ticks_per_second * 3600
+            results.append(row)
+        finally:
+            psutil.PROCFS_PATH = "/proc"
+            if tree is not None:
+                tree.close()
+    return results
+
+
+def print_report(results):
+    rows = results["results"]
+    print("\n" + "=" * 60)
+    print("Process Sampler Benchmark (per detection tick)")
+    print("=" * 60)
+    for row in rows:
+        print(f"{row['processes']} processes:")
+        for name, stats in row.items():
+            if name == "processes":
+                continue
+            print(
+                f"  {name:7s} cpu p50 {stats['cpu']['p50'] * 1000:7.2f}ms, p90 {stats['cpu']['p90'] * 1000:7.2f}ms"
+                f" | wall p50 {stats['wall']['p50'] * 1000:7.2f}ms"
+                f" | idle {stats['idle_cpu_seconds_per_hour']:7.1f} cpu-s/hour"
+            )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the call detection process samplers")
+    parser.add_argument("--processes", type=int, nargs="+", default=[100, 1000, 5000], help="Fake process counts")
+    parser.add_argument("--ticks", type=int, default=30, help="Timed ticks per sampler")
+    parser.add_argument("--samplers", nargs="+", default=["legacy", "psutil", "procfs"], choices=["legacy", "psutil", "procfs"])
+    parser.add_argument("--real", action="store_true", help="Sample the live /proc instead of a fake tree")
+    parser.add_argument("--output", help="Write JSON results to this file")
+    args = parser.parse_args()
+
+    if platform.system() != "Linux":
+        # The fake tree relies on psutil's Linux /proc parser
+        print("The process sampler benchmark needs Linux")
+        sys.exit(1)
+
+    results = {
+        "benchmark": "process_sampler",
+        "timestamp": datetime.now().isoformat(),
+        "config": {"ticks": args.ticks, "real": args.real},
+        "host": {
+            "platform": platform.platform(),
+            "python": platform.python_version(),
+            "cpu_count": os.cpu_count(),
+        },
+        "results": run_benchmark(args.processes, args.ticks, args.samplers, args.real),
+    }
+    print_report(results)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -16,6 +16,9 @@ pip install -q -r requirements.txt
 echo Dependencies up to date!
 echo.
 
+REM The meeting service ships a copy of the desktop app's profiler, refresh it from the source
+copy /Y "%~dp0\..\src\monitoring\profiling.py" "%~dp0\..\..\MeetingAssistant\profiling.py" >nul
+
 cd "%~dp0\..\src\transcription"
 start cmd /k "echo Starting transcription server... & python3 server.py"
 
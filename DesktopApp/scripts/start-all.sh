@@ -19,6 +19,9 @@ pip install -q -r requirements.txt
 echo "Dependencies up to date!"
 echo ""
 
+# The meeting service ships a copy of the desktop app's profiler, refresh it from the source
+cp "$SCRIPT_DIR/../src/monitoring/profiling.py" "$SCRIPT_DIR/../../MeetingAssistant/profiling.py"
+
 # Start the transcription server in a new terminal
 echo "Starting transcription server..."
 cd "$SCRIPT_DIR/../src/transcription"
@@ -0,0 +1,83 @@
+"""
+Meeting service client
+Uploads a finished transcript to the meeting microservice once, gzip-compressed, and
+requests the summary, minutes and action items by its ID instead of sending the full
+text with every request. Falls back to inline transcripts when the service has no
+/transcripts endpoint.
+"""
+
+import gzip
+import json
+
+import requests
+
+
+class MeetingServiceClient:
+    def __init__(self, base_url="http://localhost:8888", timeout=30):
+        self.base_url = base_url
+        self.timeout = timeout
+        self.session = requests.Session()
+        # (transcript, segments, ID the service returned) of the last upload
+        self.last_upload = None
+
+    def upload(self, transcript, segments=None):
+        """
+        Store the transcript on the service, returns the ID the service gave it or None when
+        it cannot take uploads. Nothing is sent again for the transcript uploaded last
+        """
+        if self.last_upload is not None:
+            last_transcript, last_segments, last_id = self.last_upload
+            if last_transcript == transcript and last_segments == (segments or None):
+                return last_id
+        try:
+            body = {"transcript": transcript}
+            if segments:
+                body["segments"] = segments
+            payload = gzip.compress(json.dumps(body).encode("utf-8"))
+            response = self.session.post(
+                f"{self.base_url}/transcripts",
+                data=payload,
+                headers={"Content-Type": "application/json", "Content-Encoding": "gzip"},
+                timeout=self.timeout,
+            )
+        except requests.exceptions.RequestException as e:
+            print(f"Transcript upload failed: {e}")
+            return None
+
+        if response.status_code not in (200, 201):
+            print(f"Transcript upload failed (status {response.status_code}), sending it inline")
+            return None
+        result = response.json()
+        print(
+            f"Uploaded transcript {result['transcript_id'][:12]} "
+            f"({result['chars']} chars in {result['bytes_received']} bytes)"
+        )
+        self.last_upload = (transcript, segments or None, result["transcript_id"])
+        return result["transcript_id"]
+
+    def generate(self, endpoint, transcript, segments=None, transcript_id=None, **fields):
+        """
+        POST to /summary, /minutes or /action-items by transcript_id when given, inline
+        otherwise. An ID the service no longer knows (restart, eviction) is uploaded again
+        """
+        if transcript_id is not None:
+            response = self.session.post(
+                f"{self.base_url}{endpoint}",
+                json={"transcript_id": transcript_id, **fields},
+                timeout=self.timeout,
+            )
+            if response.status_code != 404:
+                return response
+            self.last_upload = None
+            transcript_id = self.upload(transcript, segments)
+            if transcript_id is not None:
+                return self.session.post(
+                    f"{self.base_url}{endpoint}",
+                    json={"transcript_id": transcript_id, **fields},
+                    timeout=self.timeout,
+                )
+
+        payload = {"transcript": transcript, **fields}
+        if segments:
+            payload["segments"] = segments
+        return self.session.post(f"{self.base_url}{endpoint}", json=payload, timeout=self.timeout)
@@ -0,0 +1,219 @@
+"""
+Long-lived audio engine
+Keeps one PortAudio instance for the lifetime of the app instead of one per recording,
+caches the speaker loopback and microphone devices, and can pre-open the input streams
+while a call is being confirmed so recording starts without device setup.
+"""
+
+import platform
+import threading
+import time
+
+SYSTEM = platform.system()
+SPEAKER = "speaker"
+MIC = "mic"
+
+
+class AudioEngine:
+    def __init__(self, pyaudio_module, backend, rate=48000, device_check_interval=60.0):
+        """
+        pyaudio_module is pyaudio or pyaudiowpatch, backend its name. rate is the capture
+        rate the microphone is forced to so it matches the speaker stream
+        """
+        self.pyaudio = pyaudio_module
+        self.backend = backend
+        self.rate = rate
+        self.format = pyaudio_module.paInt16
+        self.device_check_interval = device_check_interval
+
+        self.pa = None
+        self.lock = threading.RLock()
+        self.speaker_device = None
+        self.mic_device = None
+        self.device_signature = None
+        self.last_device_check = 0.0
+        self.open_streams = set()
+        self.warm_streams = {}  # role -> (stream opened but not started, frames per buffer)
+
+    def start(self):
+        """Initialize PortAudio and find the devices, safe to call again"""
+        with self.lock:
+            if self.pa is None:
+                self.pa = self.pyaudio.PyAudio()
+                self._find_devices()
+
+    def close(self):
+        with self.lock:
+            self.cool()
+            for stream in list(self.open_streams):
+                self.close_stream(stream)
+            if self.pa is not None:
+                try:
+                    self.pa.terminate()
+                except Exception:
+                    pass
+                self.pa = None
+
+    def sample_width(self):
+        return self.pyaudio.get_sample_size(self.format)
+
+    def refresh_devices(self):
+        """
+        Re-enumerate devices, at most every device_check_interval seconds. PortAudio only
+        sees new devices after a restart, so this only runs while no stream is open and is
+        meant for when devices are about to be used, not for polling.
+        Returns True when the speaker or microphone changed
+        """
+        now = time.monotonic()
+        with self.lock:
+            if self.pa is None or self.open_streams or self.warm_streams:
+                return False
+            if now - self.last_device_check < self.device_check_interval:
+                return False
+            previous_signature = self.device_signature
+            try:
+                self.pa.terminate()
+            except Exception:
+                pass
+            self.pa = self.pyaudio.PyAudio()
+            self._find_devices(verbose=False)
+            if self.device_signature == previous_signature:
+                return False
+            changed = self.device_signature[1:] != previous_signature[1:]
+            if changed:
+                print("Audio devices changed:")
+                self._print_devices()
+            return changed
+
+    def _find_devices(self, verbose=True):
+        p = self.pa
+        self.last_device_check = time.monotonic()
+        self.speaker_device = None
+        self.mic_device = None
+
+        if SYSTEM == "Windows" and self.backend == "pyaudiowpatch":
+            # Speaker loopback (other people's audio)
+            try:
+                wasapi_info = p.get_host_api_info_by_type(self.pyaudio.paWASAPI)
+                default_speakers = p.get_device_info_by_index(wasapi_info["defaultOutputDevice"])
+                if not default_speakers["isLoopbackDevice"]:
+                    for loopback in p.get_loopback_device_info_generator():
+                        if default_speakers["name"] in loopback["name"]:
+                            self.speaker_device = loopback
+                            break
+                else:
+                    self.speaker_device = default_speakers
+            except Exception as e:
+                print(f"Could not setup speaker loopback: {e}")
+        elif SYSTEM != "Darwin":
+            # Linux monitor source, macOS captures system audio with ffmpeg instead
+            for i in range(p.get_device_count()):
+                dev = p.get_device_info_by_index(i)
+                if "monitor" in dev["name"].lower() and dev["maxInputChannels"] > 0:
+                    self.speaker_device = dev
+                    break
+
+        # Microphone (your voice)
+        try:
+            self.mic_device = p.get_default_input_device_info()
+        except Exception as e:
+            print(f"Could not setup microphone: {e}")
+
+        devices = []
+        for i in range(p.get_device_count()):
+            try:
+                dev = p.get_device_info_by_index(i)
+            except Exception:
+                continue
+            devices.append((dev["name"], dev["maxInputChannels"], dev["defaultSampleRate"]))
+        self.device_signature = (
+            tuple(devices),
+            (self.speaker_device["name"], self.speaker_device["index"]) if self.speaker_device else None,
+            (self.mic_device["name"], self.mic_device["index"]) if self.mic_device else None,
+        )
+        if verbose:
+            self._print_devices()
+
+    def _print_devices(self):
+        if SYSTEM == "Darwin":
+            print("macOS detected - will use ffmpeg for system audio capture")
+        elif self.speaker_device:
+            print(f"Speaker loopback: {self.speaker_device['name']}")
+        if self.mic_device:
+            print(f"Microphone: {self.mic_device['name']}")
+
+    def stream_format(self, role):
+        """(channels, rate) a role's stream is opened with, None without a device"""
+        if role == SPEAKER:
+            if SYSTEM == "Darwin" or not self.speaker_device:
+                return None
+            channels = min(self.speaker_device.get("maxInputChannels", 2), 2)
+            return channels, int(self.speaker_device.get("defaultSampleRate", self.rate))
+        if not self.mic_device:
+            return None
+        # The mic keeps its channel count but is forced to the capture rate
+        return min(self.mic_device.get("maxInputChannels", 2), 2), self.rate
+
+    def open_stream(self, role, frames_per_buffer, start=True, reuse_warm=True):
+        """
+        Open an input stream for SPEAKER or MIC, None without a device. The warm stream
+        for the role is handed out when reuse_warm is set and the buffer size matches
+        """
+        with self.lock:
+            if reuse_warm and role in self.warm_streams:
+                stream, warm_frames = self.warm_streams.pop(role)
+                if warm_frames == frames_per_buffer:
+                    if start:
+                        stream.start_stream()
+                    return stream
+                self.close_stream(stream)
+
+            stream_format = self.stream_format(role)
+            if stream_format is None:
+                return None
+            self.start()
+            channels, rate = stream_format
+            device = self.speaker_device if role == SPEAKER else self.mic_device
+            stream = self.pa.open(
+                format=self.format,
+                channels=channels,
+                rate=rate,
+                input=True,
+                frames_per_buffer=frames_per_buffer,
+                input_device_index=device["index"],
+                start=start,
+            )
+            self.open_streams.add(stream)
+            return stream
+
+    def close_stream(self, stream):
+        with self.lock:
+            self.open_streams.discard(stream)
+        try:
+            if stream.is_active():
+                stream.stop_stream()
+            stream.close()
+        except Exception:
+            pass
+
+    def warm(self, frames_per_buffer):
+        """
+        Pre-open the recording streams without starting them, called while a call is
+        being confirmed. Opening negotiates with the device, starting is cheap
+        """
+        with self.lock:
+            for role in (SPEAKER, MIC):
+                if role in self.warm_streams or self.stream_format(role) is None:
+                    continue
+                try:
+                    stream = self.open_stream(role, frames_per_buffer, start=False)
+                    self.warm_streams[role] = (stream, frames_per_buffer)
+                except Exception as e:
+                    print(f"Could not pre-open {role} stream: {e}")
+
+    def cool(self):
+        """Close pre-opened streams that were not used"""
+        with self.lock:
+            for stream, _ in self.warm_streams.values():
+                self.close_stream(stream)
+            self.warm_streams.clear()
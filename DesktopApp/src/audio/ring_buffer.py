@@ -0,0 +1,59 @@
+"""
+Pre-roll ring buffer
+Holds the last few seconds of captured audio in a preallocated int16 array while a call
+is being confirmed, so the start of a meeting can be prepended to the recording once it
+is. Writing never allocates and nothing touches the disk.
+"""
+
+import numpy as np
+
+# 30s of 48kHz stereo int16 is about 5.5MB
+MAX_SECONDS = 30.0
+
+
+class AudioRingBuffer:
+    def __init__(self, seconds, sample_rate, channels):
+        seconds = min(seconds, MAX_SECONDS)
+        self.sample_rate = sample_rate
+        self.channels = channels
+        self.capacity = int(seconds * sample_rate) * channels
+        self.buffer = np.zeros(self.capacity, dtype=np.int16)
+        self.write_pos = 0
+        self.filled = 0
+
+    @property
+    def duration(self):
+        """Seconds of audio currently held"""
+        return self.filled / self.channels / self.sample_rate
+
+    def write(self, data):
+        """Append interleaved int16 bytes, overwriting the oldest audio once full"""
+        samples = np.frombuffer(data, dtype=np.int16)
+        n = len(samples)
+        if n == 0 or self.capacity == 0:
+            return
+        if n >= self.capacity:
+            self.buffer[:] = samples[-self.capacity :]
+            self.write_pos = 0
+            self.filled = self.capacity
+            return
+
+        end = self.write_pos + n
+        if end <= self.capacity:
+            self.buffer[self.write_pos : end] = samples
+        else:
+            first = self.capacity - self.write_pos
+            self.buffer[self.write_pos :] = samples[:first]
+            self.buffer[: n - first] = samples[first:]
+        self.write_pos = end % self.capacity
+        self.filled = min(self.capacity, self.filled + n)
+
+    def read(self):
+        """Everything held, oldest first, as int16 bytes"""
+        if self.filled < self.capacity:
+            return self.buffer[: self.filled].tobytes()
+        return np.concatenate((self.buffer[self.write_pos :], self.buffer[: self.write_pos])).tobytes()
+
+    def clear(self):
+        self.write_pos = 0
+        self.filled = 0
@@ -0,0 +1,215 @@
+"""
+Audio-energy call confirmation
+While a call app is running but not yet recording, low-rate monitors read the speaker
+loopback and the microphone and classify 100ms frames as speech from their RMS level and
+the share of their energy in the speech band. The speech score is combined with the process
+CPU signal, so an app idling above its CPU threshold without anyone talking is not a call.
+"""
+
+import subprocess
+import threading
+import time
+from collections import deque
+
+import numpy as np
+
+ANALYSIS_RATE = 16000
+SPEECH_BAND = (300.0, 3400.0)
+# A frame counts as speech above this level with a good share of its energy in the speech
+# band and little above it (broadband noise spreads evenly up to the Nyquist frequency)
+SPEECH_DBFS = -50.0
+SPEECH_BAND_RATIO = 0.25
+HIGH_BAND_RATIO = 0.3
+# Combined confidence needed for a detection tick to count as a call hit
+CONFIRM_CONFIDENCE = 0.75
+
+
+def downmix(samples, channels, rate):
+    """Interleaved int16 -> mono float32 in [-1, 1] at roughly ANALYSIS_RATE"""
+    audio = samples.astype(np.float32) / 32768.0
+    if channels > 1:
+        audio = audio[: len(audio) // channels * channels].reshape(-1, channels).mean(axis=1)
+    factor = max(1, int(rate // ANALYSIS_RATE))
+    if factor > 1:
+        # Averaging neighbours is a cheap low-pass before dropping samples
+        audio = audio[: len(audio) // factor * factor].reshape(-1, factor).mean(axis=1)
+    return audio, rate / factor
+
+
+def analyze_frames(audio, rate, frame_seconds=0.1):
+    """
+    (RMS in dBFS, share of energy in the speech band, share above it) for each full
+    frame of mono float32 audio
+    """
+    frame = int(rate * frame_seconds)
+    n_frames = len(audio) // frame
+    if n_frames == 0:
+        return np.zeros(0), np.zeros(0), np.zeros(0)
+    frames = audio[: n_frames * frame].reshape(n_frames, frame)
+
+    rms = np.sqrt(np.mean(frames * frames, axis=1))
+    rms_dbfs = 20 * np.log10(np.maximum(rms, 1e-10))
+
+    spectrum = np.abs(np.fft.rfft(frames * np.hanning(frame), axis=1)) ** 2
+    freqs = np.fft.rfftfreq(frame, d=1.0 / rate)
+    band = (freqs >= SPEECH_BAND[0]) & (freqs <= SPEECH_BAND[1])
+    high = freqs > SPEECH_BAND[1]
+    total = np.maximum(spectrum.sum(axis=1), 1e-20)
+    band_ratio = spectrum[:, band].sum(axis=1) / total
+    high_ratio = spectrum[:, high].sum(axis=1) / total
+    return rms_dbfs, band_ratio, high_ratio
+
+
+def is_speech(rms_dbfs, band_ratio, high_ratio):
+    return (rms_dbfs > SPEECH_DBFS) & (band_ratio > SPEECH_BAND_RATIO) & (high_ratio < HIGH_BAND_RATIO)
+
+
+def speech_score(monitors):
+    """
+    Highest speech share among the monitors with a usable source, None if there is none.
+    Either side talking counts, the far end can stay quiet for long stretches
+    """
+    scores = [monitor.score() for monitor in monitors]
+    scores = [score for score in scores if score is not None]
+    return max(scores) if scores else None
+
+
+def combine_confidence(process_ratio, audio_score):
+    """
+    Confidence that a call is live. process_ratio is CPU / threshold of the busiest call
+    app, audio_score the share of recent speech frames, None without an audio monitor
+    """
+    process = min(process_ratio, 1.0)
+    if audio_score is None:
+        return process
+    return 0.5 * process + 0.5 * audio_score
+
+
+class PyAudioSource:
+    """Blocking reads from an open PyAudio input stream"""
+
+    def __init__(self, stream, rate, channels, frames_per_read, close_stream=None):
+        """close_stream(stream) replaces the default stop and close, for engine-owned streams"""
+        self.stream = stream
+        self.rate = rate
+        self.channels = channels
+        self.frames_per_read = frames_per_read
+        self.close_stream = close_stream
+
+    def read(self):
+        return self.stream.read(self.frames_per_read, exception_on_overflow=False)
+
+    def close(self):
+        if self.close_stream:
+            self.close_stream(self.stream)
+            return
+        try:
+            self.stream.stop_stream()
+            self.stream.close()
+        except Exception:
+            pass
+
+
+class FfmpegSource:
+    """macOS system audio through ffmpeg, already resampled to 16kHz mono"""
+
+    def __init__(self, device=":0", read_seconds=0.1):
+        self.rate = ANALYSIS_RATE
+        self.channels = 1
+        self.read_bytes = int(self.rate * read_seconds) * 2
+        self.process = subprocess.Popen(
+            [
+                "ffmpeg", "-loglevel", "quiet",
+                "-f", "avfoundation", "-i", device,
+                "-f", "s16le", "-acodec", "pcm_s16le",
+                "-ar", str(self.rate), "-ac", "1",
+                "pipe:1",
+            ],
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+        )
+
+    def read(self):
+        return self.process.stdout.read(self.read_bytes)
+
+    def close(self):
+        self.process.terminate()
+        try:
+            self.process.wait(timeout=2)
+        except subprocess.TimeoutExpired:
+            self.process.kill()
+
+
+class AudioActivityMonitor:
+    """Reads a loopback or microphone source on a background thread and keeps recent speech decisions"""
+
+    def __init__(self, open_source, window_seconds=2.0):
+        """open_source() returns an object with read() -> int16 bytes, close(), rate and channels"""
+        self.open_source = open_source
+        self.window_seconds = window_seconds
+        self.frames = deque()  # (monotonic time, is speech)
+        self.lock = threading.Lock()
+        self.thread = None
+        self.stop_event = threading.Event()
+        self.available = True
+
+    @property
+    def running(self):
+        return self.thread is not None and self.thread.is_alive() and not self.stop_event.is_set()
+
+    def start(self):
+        if self.running or not self.available:
+            return
+        # Each run gets its own stop event, a reader still finishing its last read keeps the old one
+        self.stop_event = threading.Event()
+        self.thread = threading.Thread(target=self._run, args=(self.stop_event,), daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.stop_event.set()
+        with self.lock:
+            self.frames.clear()
+
+    def score(self):
+        """Share of speech frames in the last window, None without a usable loopback source"""
+        if not self.available:
+            return None
+        cutoff = time.monotonic() - self.window_seconds
+        with self.lock:
+            while self.frames and self.frames[0][0] < cutoff:
+                self.frames.popleft()
+            if not self.frames:
+                return 0.0
+            return sum(speech for _, speech in self.frames) / len(self.frames)
+
+    def add_audio(self, data, rate, channels):
+        """Classify a block of int16 audio and remember the result per frame"""
+        audio, analysis_rate = downmix(np.frombuffer(data, dtype=np.int16), channels, rate)
+        speech_frames = is_speech(*analyze_frames(audio, analysis_rate))
+        now = time.monotonic()
+        with self.lock:
+            for speech in speech_frames:
+                self.frames.append((now, bool(speech)))
+
+    def _run(self, stop_event):
+        try:
+            source = self.open_source()
+        except Exception as e:
+            # No loopback device, detection falls back to the process signal alone
+            print(f"Audio activity monitor unavailable: {e}")
+            self.available = False
+            return
+
+        try:
+            while not stop_event.is_set():
+                data = source.read()
+                if not data:
+                    self.available = False
+                    break
+                if not stop_event.is_set():
+                    self.add_audio(data, source.rate, source.channels)
+        except Exception as e:
+            print(f"Audio activity monitor error: {e}")
+            self.available = False
+        finally:
+            source.close()
@@ -1,16 +1,37 @@
 import wave
-import psutil
 import time
 import threading
 from datetime import datetime
 import os
 import sys
 import platform
-import struct
 import queue
 import subprocess
 import argparse
 
+import numpy as np
+
+# Make the src/ packages importable when this file is run directly
+SRC_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if SRC_DIR not in sys.path:
+    sys.path.insert(0, SRC_DIR)
+
+from audio.engine import MIC, SPEAKER, AudioEngine
+from audio.ring_buffer import AudioRingBuffer
+from detection.audio_activity import (
+    CONFIRM_CONFIDENCE,
+    AudioActivityMonitor,
+    FfmpegSource,
+    PyAudioSource,
+    combine_confidence,
+    speech_score,
+)
+from detection.platforms import PlatformRegistry
+from detection.process_sampler import create_process_sampler
+from detection.scheduler import BURST, IDLE, WATCHING, DetectionScheduler
+from monitoring.metrics import CAPTURE_CHUNKS, CAPTURE_QUEUE_DEPTH, CAPTURE_QUEUE_DROPS
+from storage.catalog import RECORDING
+
 
 # Import appropriate audio library based on OS
 SYSTEM = platform.system()
@@ -39,62 +60,94 @@ else:  # Linux
         sys.exit(1)
 
 
+# Pre-roll is queued for transcription in pieces of this length
+PREROLL_PIECE_SECONDS = 0.5
+# How long stopping the pre-roll waits for its thread, a device open can hang
+PREROLL_JOIN_SECONDS = 2.0
+
+
 class AudioCapture:
-    def __init__(self, output_dir="meeting_recordings"):
+    def __init__(self, output_dir="meeting_recordings", preroll_seconds=0.0, catalog=None):
+        """
+        preroll_seconds > 0 keeps that much audio from before a call is confirmed,
+        catalog (storage.catalog.MeetingCatalog) indexes each recording under meeting_id
+        """
         self.output_dir = output_dir
+        self.catalog = catalog
+        # Catalog ID of the current or last recording, the transcript and AI outputs share it
+        self.meeting_id = None
+        self.recording_path = None  # WAV of the current or last recording, written when it stops
         self.is_recording = False
         self.audio_thread = None
         self.running = False
-        self.stream_speaker = None
-        self.stream_mic = None
-        self.p = None
 
         # Audio settings
         self.chunk = 1024
         self.format = pyaudio.paInt16
         self.rate = 48000  # Use standard 48kHz to match device native rates
 
+        # One PortAudio instance for the whole run, streams are pre-opened while a call is confirmed
+        self.engine = AudioEngine(pyaudio, AUDIO_BACKEND, rate=self.rate)
+
         os.makedirs(output_dir, exist_ok=True)
 
         self.in_call = False
         self.active_platform = None
 
-        # CPU threshold for detecting active calls
-        self.cpu_threshold = 3.5
-        self.discord_cpu_threshold = 5.0
+        # Lists processes and measures their CPU between detection ticks
+        self.process_sampler = create_process_sampler()
+        # Picks the delay between detection ticks, wake_event cuts it short on stop
+        self.scheduler = DetectionScheduler()
+        self.wake_event = threading.Event()
+        # Call apps to watch for, with their thresholds and priorities
+        self.platforms = PlatformRegistry()
+        # Latest detection results, {platform: (active, name, cpu)}, read by the UI
+        self.platform_status = {}
 
         # Track consecutive detections
         self.call_detected_count = 0
         self.call_detection_threshold = 3
 
-        # Inactivity threshold
-        self.inactive_count = 0
+        # Seconds of inactivity before a recorded call counts as ended
+        self.inactive_seconds = 0.0
         self.inactive_threshold = 3
 
+        # Pre-roll: audio captured into a ring buffer while a call app is running
+        self.preroll_seconds = preroll_seconds
+        self.prerolling = False
+        self.preroll_thread = None
+        self.preroll = None  # (capture, AudioRingBuffer) once the pre-roll thread has opened the devices
+        # Guards the handoff: the thread publishes its capture, or closes it itself once abandoned
+        self.preroll_lock = threading.Lock()
+        self.preroll_abandoned = threading.Event()
+        self.preroll_released = threading.Event()
+
         # Audio streaming queue for transcription
         self.audio_stream_queue = queue.Queue(maxsize=100)
 
         # Callback for real-time audio processing
         self.audio_callback = None
         
-        # Callback for when recording stops
+        # Callbacks for when recording starts and stops
+        self.recording_start_callback = None
         self.recording_stop_callback = None
         
-        # macOS ffmpeg process
-        self.ffmpeg_process = None
-        self.ffmpeg_thread = None
-        self.ffmpeg_queue = queue.Queue(maxsize=50)
-        
         # Audio device setup
-        self.speaker_device = None
-        self.mic_device = None
         self.setup_audio_devices()
 
+        # Listen to the speakers and the microphone while a call app is running to confirm
+        # someone is talking, empty without either (detection then uses the process signal alone)
+        self.activity_monitors = []
+        if SYSTEM == "Darwin" or self.speaker_device:
+            self.activity_monitors.append(AudioActivityMonitor(self.open_activity_source))
+        if SYSTEM != "Darwin" and self.mic_device:
+            self.activity_monitors.append(AudioActivityMonitor(lambda: self.open_activity_source(MIC)))
+
         print(f"Platform: {SYSTEM}")
         print(f"Audio backend: {AUDIO_BACKEND}\n")
 
-    def start_ffmpeg_capture(self):
-        """Start ffmpeg system audio capture for macOS"""
+    def start_ffmpeg_capture(self, capture):
+        """Start ffmpeg system audio capture for macOS into capture, True when it runs"""
         if SYSTEM != "Darwin":
             return False
         
@@ -114,34 +167,41 @@ class AudioCapture:
             #read the system audio from ffmpeg
             print(f"DEBUG: Starting ffmpeg with sample rate: {self.rate} Hz")
             
-            self.ffmpeg_process = subprocess.Popen(
+            process = subprocess.Popen(
                 cmd,
                 stdout=subprocess.PIPE,
                 stderr=subprocess.DEVNULL,
                 bufsize=10**8
             )
+            chunks = queue.Queue(maxsize=50)
+            capture["ffmpeg"] = process
+            capture["ffmpeg_queue"] = chunks
             
             print(f"ffmpeg system audio capture started at {self.rate} Hz, 2 channels")
             
             # Start thread to read from ffmpeg
             def read_ffmpeg():
                 chunk_size = self.chunk * 2 * 2  # samples * channels * bytes
-                while self.is_recording and self.ffmpeg_process:
+                # Ends when close_capture terminates the process
+                while True:
                     try:
-                        raw_data = self.ffmpeg_process.stdout.read(chunk_size)
+                        raw_data = process.stdout.read(chunk_size)
                         if not raw_data:
                             break
                         try:
-                            self.ffmpeg_queue.put_nowait(raw_data)
+                            chunks.put_nowait(raw_data)
                         except queue.Full:
-                            pass
+                            CAPTURE_QUEUE_DROPS.labels(queue="ffmpeg").inc()
+                        CAPTURE_QUEUE_DEPTH.labels(queue="ffmpeg").set(
+                            chunks.qsize()
+                        )
                     except Exception as e:
                         if self.is_recording:
                             print(f"ffmpeg read error: {e}")
                         break
             
-            self.ffmpeg_thread = threading.Thread(target=read_ffmpeg, daemon=True)
-            self.ffmpeg_thread.start()
+            capture["ffmpeg_thread"] = threading.Thread(target=read_ffmpeg, daemon=True)
+            capture["ffmpeg_thread"].start()
             return True
             
         except FileNotFoundError:
@@ -152,21 +212,22 @@ class AudioCapture:
             print(f"Could not start ffmpeg: {e}")
             return False
 
-    def stop_ffmpeg_capture(self):
-        """Stop ffmpeg system audio capture"""
-        if self.ffmpeg_process:
+    def stop_ffmpeg_capture(self, capture):
+        """Stop the capture's ffmpeg system audio capture"""
+        process = capture.pop("ffmpeg", None)
+        if process:
             try:
-                self.ffmpeg_process.terminate()
-                self.ffmpeg_process.wait(timeout=2)
+                process.terminate()
+                process.wait(timeout=2)
             except:
                 try:
-                    self.ffmpeg_process.kill()
+                    process.kill()
                 except:
                     pass
-            self.ffmpeg_process = None
-        
-        if self.ffmpeg_thread and self.ffmpeg_thread.is_alive():
-            self.ffmpeg_thread.join(timeout=1)
+
+        thread = capture.pop("ffmpeg_thread", None)
+        if thread and thread.is_alive():
+            thread.join(timeout=1)
 
     def set_audio_callback(self, callback):
         """
@@ -175,6 +236,13 @@ class AudioCapture:
         """
         self.audio_callback = callback
     
+    def set_recording_start_callback(self, callback):
+        """
+        Set a callback function that will be called when a recording starts, before its
+        first audio is queued. callback should accept no arguments
+        """
+        self.recording_start_callback = callback
+
     def set_recording_stop_callback(self, callback):
         """
         Set a callback function that will be called when recording stops
@@ -185,74 +253,28 @@ class AudioCapture:
     def get_audio_chunk(self, timeout=None):
         """
         Get the next audio chunk from the queue (blocking)
-        Returns: (audio_data: bytes, sample_rate: int, channels: int) or None if timeout
+        Returns: (audio_data: bytes, sample_rate: int, channels: int, captured_at: float)
+        or None if timeout. captured_at is a time.monotonic() timestamp
         """
         try:
-            return self.audio_stream_queue.get(timeout=timeout)
+            chunk = self.audio_stream_queue.get(timeout=timeout)
         except queue.Empty:
             return None
+        CAPTURE_QUEUE_DEPTH.labels(queue="stream").set(self.audio_stream_queue.qsize())
+        return chunk
+
+    @property
+    def speaker_device(self):
+        return self.engine.speaker_device
+
+    @property
+    def mic_device(self):
+        return self.engine.mic_device
 
     def setup_audio_devices(self):
         """Setup both speaker loopback AND microphone"""
         try:
-            p = pyaudio.PyAudio()
-
-            if SYSTEM == "Windows" and AUDIO_BACKEND == "pyaudiowpatch":
-                # Get speaker loopback (for other people's audio)
-                try:
-                    wasapi_info = p.get_host_api_info_by_type(pyaudio.paWASAPI)
-                    default_speakers = p.get_device_info_by_index(
-                        wasapi_info["defaultOutputDevice"]
-                    )
-
-                    if not default_speakers["isLoopbackDevice"]:
-                        for loopback in p.get_loopback_device_info_generator():
-                            if default_speakers["name"] in loopback["name"]:
-                                self.speaker_device = loopback
-                                print(f"Speaker loopback: {loopback['name']}")
-                                break
-                    else:
-                        self.speaker_device = default_speakers
-                        print(f"Speaker loopback: {default_speakers['name']}")
-                except Exception as e:
-                    print(f"Could not setup speaker loopback: {e}")
-
-                # Get microphone (for your voice)
-                try:
-                    default_mic = p.get_default_input_device_info()
-                    self.mic_device = default_mic
-                    print(f"Microphone: {default_mic['name']}")
-                except Exception as e:
-                    print(f"Could not setup microphone: {e}")
-
-            elif SYSTEM == "Darwin":  # macOS
-                # On macOS, we'll use ffmpeg for system audio instead of PyAudio
-                print("macOS detected - will use ffmpeg for system audio capture")
-                
-                # Still set up microphone for user's voice
-                try:
-                    default_mic = p.get_default_input_device_info()
-                    self.mic_device = default_mic
-                    print(f"Microphone: {default_mic['name']}")
-                except Exception as e:
-                    print(f"Could not setup microphone: {e}")
-
-            else:  # Linux
-                for i in range(p.get_device_count()):
-                    dev = p.get_device_info_by_index(i)
-                    if "monitor" in dev["name"].lower() and dev["maxInputChannels"] > 0:
-                        self.speaker_device = dev
-                        print(f"Linux monitor device: {dev['name']}")
-                        break
-
-                try:
-                    default_mic = p.get_default_input_device_info()
-                    self.mic_device = default_mic
-                    print(f"Microphone: {default_mic['name']}")
-                except Exception as e:
-                    print(f"Could not setup microphone: {e}")
-
-            p.terminate()
+            self.engine.start()
 
             if SYSTEM == "Darwin":
                 # On macOS, we don't need speaker_device for PyAudio
@@ -268,92 +290,197 @@ class AudioCapture:
         except Exception as e:
             print(f"Warning: Could not initialize audio: {e}")
 
-    def get_process_names(self, base_names):
-        """Get platform-specific process names"""
-        if SYSTEM == "Windows":
-            return [
-                f"{name}.exe" if not name.endswith(".exe") else name
-                for name in base_names
-            ]
-        return base_names
-
-    def is_process_active(self, process_names, cpu_threshold=3.5):
-        """Check if process is running AND using significant CPU"""
-        platform_names = self.get_process_names(process_names)
-
-        for proc in psutil.process_iter(["name", "cpu_percent"]):
-            try:
-                proc_name = proc.info["name"].lower()
-                if proc_name in [p.lower() for p in platform_names]:
-                    cpu = proc.cpu_percent(interval=0.1)
-                    if cpu > cpu_threshold:
-                        return True, proc_name, cpu
-            except (psutil.NoSuchProcess, psutil.AccessDenied):
-                continue
-        return False, None, 0
-
-    def detect_discord_call(self):
-        """Detect active Discord call"""
-        process_names = ["discord.exe", "discord", "Discord"]
-        max_cpu = 0
-        has_udp = False
-
-        for proc in psutil.process_iter(["name", "cpu_percent"]):
-            try:
-                proc_name = proc.info["name"]
-                if any(name.lower() in proc_name.lower() for name in process_names):
-                    cpu = proc.cpu_percent(interval=0.1)
-                    if cpu > max_cpu:
-                        max_cpu = cpu
-
-                    try:
-                        connections = proc.net_connections(kind="inet")
-                        udp_connections = [c for c in connections if c.type == 2]
-                        if len(udp_connections) > 2:
-                            has_udp = True
-                    except (psutil.AccessDenied, psutil.NoSuchProcess, AttributeError):
-                        pass
-            except (psutil.NoSuchProcess, psutil.AccessDenied):
-                continue
-
-        if has_udp and max_cpu > 3.0:
-            return True, "discord", max_cpu
-        elif max_cpu > self.discord_cpu_threshold:
-            return True, "discord", max_cpu
-        return False, None, 0
-
-    def detect_zoom_call(self):
-        """Detect active Zoom call"""
-        process_names = ["zoom.exe", "zoom.us", "zoom", "zoom.us.app"]
-        return self.is_process_active(process_names, cpu_threshold=self.cpu_threshold)
-
-    def detect_teams_call(self):
-        """Detect active Teams call"""
-        process_names = ["teams.exe", "teams", "Teams"]
-        return self.is_process_active(process_names, cpu_threshold=self.cpu_threshold)
-
     def mono_to_stereo(self, mono_data):
         """Convert mono audio to stereo by duplicating the channel"""
-        samples = struct.unpack(f"{len(mono_data) // 2}h", mono_data)
-        # Duplicate each sample for left and right channels
-        stereo = []
-        for sample in samples:
-            stereo.append(sample)  # Left channel
-            stereo.append(sample)  # Right channel
-        return struct.pack(f"{len(stereo)}h", *stereo)
+        samples = np.frombuffer(mono_data, dtype=np.int16)
+        return np.repeat(samples, 2).tobytes()
 
     def mix_audio_simple(self, data1, data2):
         """Simple audio mixing - handles different buffer sizes"""
-        min_len = min(len(data1), len(data2))
-        data1 = data1[:min_len]
-        data2 = data2[:min_len]
+        min_len = min(len(data1), len(data2)) // 2
+        samples1 = np.frombuffer(data1, dtype=np.int16, count=min_len).astype(np.int32)
+        samples2 = np.frombuffer(data2, dtype=np.int16, count=min_len)
+        return ((samples1 + samples2) // 2).astype(np.int16).tobytes()
 
-        samples1 = struct.unpack(f"{min_len // 2}h", data1)
-        samples2 = struct.unpack(f"{min_len // 2}h", data2)
+    def open_capture(self):
+        """
+        Start system audio and open the mic, returns the capture: its format and the
+        streams it owns, for read_capture and close_capture
+        """
+        capture = {"sample_rate": self.rate, "channels": 2, "channels_mic": None, "speaker": None, "mic": None}
+        try:
+            self._open_capture(capture)
+        except Exception:
+            self.close_capture(capture)
+            raise
+        return capture
+
+    def _open_capture(self, capture):
+        # macOS: Start ffmpeg for system audio
+        if SYSTEM == "Darwin":
+            if self.start_ffmpeg_capture(capture):
+                print("System audio: ffmpeg capture")
+
+        # Windows/Linux: Open speaker stream
+        speaker_format = self.engine.stream_format(SPEAKER)
+        if speaker_format:
+            channels_spk, rate_spk = speaker_format
+            capture["speaker"] = self.engine.open_stream(SPEAKER, self.chunk)
+            capture["sample_rate"] = rate_spk
+            capture["channels"] = channels_spk
+            print(f"Speaker: {channels_spk}ch @ {rate_spk}Hz")
+
+        # Open microphone stream (all platforms)
+        mic_format = self.engine.stream_format(MIC)
+        if mic_format:
+            # Mic's native channel count (usually 1 for built-in mics), forced to self.rate
+            channels_mic, rate_mic = mic_format
+            capture["mic"] = self.engine.open_stream(MIC, self.chunk)
+            capture["channels_mic"] = channels_mic
+            print(f"Microphone: {channels_mic}ch @ {rate_mic}Hz")
+            # If mic-only and not macOS, use mic's native channels
+            # On macOS with ffmpeg, we keep channels=2 (default set earlier)
+            if not self.speaker_device and SYSTEM != "Darwin":
+                capture["sample_rate"] = rate_mic
+                capture["channels"] = channels_mic
+
+    def read_capture(self, capture):
+        """Read one chunk from the open streams and mix it, None when nothing was read"""
+        speaker_data = None
+        mic_data = None
+
+        # Read speaker audio (Windows/Linux: PyAudio, macOS: ffmpeg)
+        if SYSTEM == "Darwin" and capture.get("ffmpeg"):
+            try:
+                speaker_data = capture["ffmpeg_queue"].get(timeout=0.1)
+            except queue.Empty:
+                pass
+        elif capture["speaker"]:
+            try:
+                speaker_data = capture["speaker"].read(
+                    self.chunk, exception_on_overflow=False
+                )
+            except:
+                pass
 
-        mixed = [(s1 + s2) // 2 for s1, s2 in zip(samples1, samples2)]
+        # Read mic audio
+        if capture["mic"]:
+            try:
+                mic_data = capture["mic"].read(
+                    self.chunk, exception_on_overflow=False
+                )
+                # Convert mono mic to stereo if needed (for macOS)
+                if capture["channels_mic"] == 1 and mic_data:
+                    mic_data = self.mono_to_stereo(mic_data)
+            except:
+                pass
+
+        # Combine audio
+        if speaker_data and mic_data:
+            return self.mix_audio_simple(speaker_data, mic_data)
+        return speaker_data or mic_data or None
+
+    def close_capture(self, capture):
+        # Stop ffmpeg (macOS)
+        self.stop_ffmpeg_capture(capture)
+
+        # Cleanup streams, PortAudio itself stays up for the next call
+        for role in ("speaker", "mic"):
+            if capture[role]:
+                self.engine.close_stream(capture[role])
+                capture[role] = None
+
+    def start_preroll(self):
+        """Capture into the pre-roll ring buffer while a call is being confirmed"""
+        if self.preroll_seconds <= 0 or self.prerolling or self.is_recording:
+            return
+        if self.audio_thread and self.audio_thread.is_alive():
+            return  # the last recording is still closing its streams
+        if self.preroll_thread and self.preroll_thread.is_alive():
+            return  # an abandoned pre-roll is still opening or closing its devices
+        if SYSTEM != "Darwin" and not self.speaker_device and not self.mic_device:
+            return
+        self.prerolling = True
+        self.preroll_abandoned = threading.Event()
+        self.preroll_released = threading.Event()
+        self.preroll_thread = threading.Thread(
+            target=self._preroll, args=(self.preroll_abandoned, self.preroll_released), daemon=True
+        )
+        self.preroll_thread.start()
+
+    def _preroll(self, abandoned, released):
+        """
+        Fill the pre-roll until stopped. The capture is published for stop_preroll to take,
+        unless stop_preroll gave up waiting (abandoned), then this thread closes it
+        """
+        capture = preroll = None
+        failed = False
+        try:
+            capture = self.open_capture()
+            ring = AudioRingBuffer(self.preroll_seconds, capture["sample_rate"], capture["channels"])
+            with self.preroll_lock:
+                if not abandoned.is_set():
+                    preroll = self.preroll = (capture, ring)
+            while self.prerolling and not abandoned.is_set():
+                audio_chunk = self.read_capture(capture)
+                if audio_chunk:
+                    ring.write(audio_chunk)
+        except Exception as e:
+            print(f"Pre-roll error: {e}")
+            failed = True
+            self.prerolling = False
+
+        with self.preroll_lock:
+            if failed and preroll is not None and self.preroll is preroll:
+                self.preroll = None
+                preroll = None
+            # Nobody took the streams, or stop_preroll stopped waiting for them
+            owned = capture is not None and (preroll is None or abandoned.is_set())
+            released.set()
+        if owned:
+            self.close_capture(capture)
+
+    def stop_preroll(self, keep_capture=False):
+        """
+        Stop filling the pre-roll. With keep_capture the open streams and the buffer are
+        returned as (capture, ring buffer) for a recording to continue from, otherwise closed
+        """
+        if not self.prerolling and self.preroll is None:
+            return None
+        self.prerolling = False
+        if self.preroll_thread and self.preroll_thread is not threading.current_thread():
+            # Once the devices are open the thread stops within one read, only a hanging
+            # open or read keeps it longer
+            self.preroll_thread.join(timeout=PREROLL_JOIN_SECONDS)
+        with self.preroll_lock:
+            preroll, self.preroll = self.preroll, None
+            if not self.preroll_released.is_set():
+                # Still in there: leave the streams to the thread, it closes them when it gets out
+                print("Pre-roll devices still opening, not waiting for them")
+                self.preroll_abandoned.set()
+                preroll = None
+        if keep_capture or preroll is None:
+            return preroll
+        self.close_capture(preroll[0])
+        return None
+
+    def queue_audio(self, audio_chunk, sample_rate, channels, captured_at):
+        """Hand a chunk to transcription and the audio callback"""
+        try:
+            self.audio_stream_queue.put_nowait(
+                (audio_chunk, sample_rate, channels, captured_at)
+            )
+        except queue.Full:
+            CAPTURE_QUEUE_DROPS.labels(queue="stream").inc()
+        CAPTURE_QUEUE_DEPTH.labels(queue="stream").set(
+            self.audio_stream_queue.qsize()
+        )
 
-        return struct.pack(f"{len(mixed)}h", *mixed)
+        if self.audio_callback:
+            try:
+                self.audio_callback(audio_chunk, sample_rate, channels)
+            except Exception as e:
+                print(f"Callback error: {e}")
 
     def start_recording(self, platform_name=None):
         if self.is_recording:
@@ -364,10 +491,24 @@ class AudioCapture:
             return
 
         self.is_recording = True
-        self.inactive_count = 0
+        self.inactive_seconds = 0.0
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         platform = f"_{platform_name}" if platform_name else ""
         filename = os.path.join(self.output_dir, f"meeting{platform}_{timestamp}.wav")
+        meeting_id = os.path.splitext(os.path.basename(filename))[0]
+        self.meeting_id = meeting_id
+        self.recording_path = filename
+        if self.catalog is not None:
+            try:
+                self.catalog.start_meeting(meeting_id, platform=platform_name, started_at=datetime.now().isoformat(timespec="seconds"))
+            except Exception as e:
+                print(f"Catalog error: {e}")
+        # meeting_id is already the new recording's, the transcription session is named after it
+        if self.recording_start_callback:
+            try:
+                self.recording_start_callback()
+            except Exception as e:
+                print(f"Recording start callback error: {e}")
 
         print(f"\nRecording to: {filename}")
         if self.mic_device:
@@ -379,59 +520,28 @@ class AudioCapture:
             channels = 2
             sample_rate = self.rate
             recording_active = True
-            ffmpeg_started = False
+            capture = None
 
             try:
-                self.p = pyaudio.PyAudio()
-
-                # macOS: Start ffmpeg for system audio
-                if SYSTEM == "Darwin":
-                    ffmpeg_started = self.start_ffmpeg_capture()
-                    if ffmpeg_started:
-                        print("System audio: ffmpeg capture")
-
-                # Windows/Linux: Open speaker stream
-                if SYSTEM != "Darwin" and self.speaker_device:
-                    channels_spk = min(
-                        self.speaker_device.get("maxInputChannels", 2), 2
-                    )
-                    rate_spk = int(
-                        self.speaker_device.get("defaultSampleRate", self.rate)
-                    )
-                    self.stream_speaker = self.p.open(
-                        format=self.format,
-                        channels=channels_spk,
-                        rate=rate_spk,
-                        input=True,
-                        frames_per_buffer=self.chunk,
-                        input_device_index=self.speaker_device["index"],
-                    )
-                    sample_rate = rate_spk
-                    channels = channels_spk
-                    print(f"Speaker: {channels_spk}ch @ {rate_spk}Hz")
-
-                # Open microphone stream (all platforms)
-                if self.mic_device:
-                    # Use mic's native channel count (usually 1 for built-in mics)
-                    channels_mic = min(self.mic_device.get("maxInputChannels", 2), 2)
-                    # Force the mic to use the same rate as ffmpeg/self.rate
-                    rate_mic = self.rate  # Force to match ffmpeg capture rate
-                    print(f"DEBUG: Mic native rate: {self.mic_device.get('defaultSampleRate')}, forcing to: {rate_mic}")
-                    print(f"DEBUG: Mic native channels: {self.mic_device.get('maxInputChannels')}, using: {channels_mic}")
-                    self.stream_mic = self.p.open(
-                        format=self.format,
-                        channels=channels_mic,
-                        rate=rate_mic,
-                        input=True,
-                        frames_per_buffer=self.chunk,
-                        input_device_index=self.mic_device["index"],
-                    )
-                    # If mic-only and not macOS, use mic's native channels
-                    # On macOS with ffmpeg, we keep channels=2 (default set earlier)
-                    if not self.speaker_device and SYSTEM != "Darwin":
-                        sample_rate = rate_mic
-                        channels = channels_mic
-                    print(f"Mic: {channels_mic}ch @ {rate_mic}Hz (will be converted to stereo if needed)")
+                # Continue from the pre-roll streams, waiting here rather than in the monitor loop
+                # if the devices are still opening
+                preroll = self.stop_preroll(keep_capture=True)
+                if preroll is not None:
+                    capture, ring = preroll
+                else:
+                    capture, ring = self.open_capture(), None
+                sample_rate = capture["sample_rate"]
+                channels = capture["channels"]
+
+                if ring is not None and ring.filled:
+                    # The seconds before confirmation go first, in pieces the transcription queue can hold
+                    print(f"Pre-roll: {ring.duration:.1f}s")
+                    audio = ring.read()
+                    frames.append(audio)
+                    piece = int(sample_rate * PREROLL_PIECE_SECONDS) * channels * 2
+                    now = time.monotonic()
+                    for start in range(0, len(audio), piece):
+                        self.queue_audio(audio[start : start + piece], sample_rate, channels, now)
 
                 print("Recording...\n")
                 sys.stdout.flush()
@@ -439,63 +549,16 @@ class AudioCapture:
                 # Recording loop
                 while self.is_recording and recording_active:
                     try:
-                        speaker_data = None
-                        mic_data = None
-
-                        # Read speaker audio (Windows/Linux: PyAudio, macOS: ffmpeg)
-                        if SYSTEM == "Darwin" and ffmpeg_started:
-                            try:
-                                speaker_data = self.ffmpeg_queue.get(timeout=0.1)
-                            except queue.Empty:
-                                pass
-                        elif self.stream_speaker:
-                            try:
-                                speaker_data = self.stream_speaker.read(
-                                    self.chunk, exception_on_overflow=False
-                                )
-                            except:
-                                pass
-
-                        # Read mic audio
-                        if self.stream_mic:
-                            try:
-                                mic_data = self.stream_mic.read(
-                                    self.chunk, exception_on_overflow=False
-                                )
-                                # Convert mono mic to stereo if needed (for macOS)
-                                if channels_mic == 1 and mic_data:
-                                    mic_data = self.mono_to_stereo(mic_data)
-                            except:
-                                pass
-
-                        # Combine audio
-                        audio_chunk = None
-                        if speaker_data and mic_data:
-                            audio_chunk = self.mix_audio_simple(speaker_data, mic_data)
-                        elif speaker_data:
-                            audio_chunk = speaker_data
-                        elif mic_data:
-                            audio_chunk = mic_data
-                        else:
+                        audio_chunk = self.read_capture(capture)
+                        if audio_chunk is None:
                             continue
 
                         # Save to frames
                         frames.append(audio_chunk)
+                        CAPTURE_CHUNKS.inc()
 
                         # Stream to transcription
-                        try:
-                            self.audio_stream_queue.put_nowait(
-                                (audio_chunk, sample_rate, channels)
-                            )
-                        except queue.Full:
-                            pass
-
-                        # Call callback
-                        if self.audio_callback:
-                            try:
-                                self.audio_callback(audio_chunk, sample_rate, channels)
-                            except Exception as e:
-                                print(f"Callback error: {e}")
+                        self.queue_audio(audio_chunk, sample_rate, channels, time.monotonic())
 
                     except Exception as e:
                         if self.is_recording:
@@ -513,33 +576,8 @@ class AudioCapture:
                 sys.stdout.flush()
 
             finally:
-                # Stop ffmpeg (macOS)
-                if SYSTEM == "Darwin":
-                    self.stop_ffmpeg_capture()
-
-                # Cleanup streams
-                if self.stream_speaker:
-                    try:
-                        self.stream_speaker.stop_stream()
-                        self.stream_speaker.close()
-                        self.stream_speaker = None
-                    except:
-                        pass
-
-                if self.stream_mic:
-                    try:
-                        self.stream_mic.stop_stream()
-                        self.stream_mic.close()
-                        self.stream_mic = None
-                    except:
-                        pass
-
-                if self.p:
-                    try:
-                        self.p.terminate()
-                        self.p = None
-                    except:
-                        pass
+                if capture is not None:
+                    self.close_capture(capture)
 
                 # Save file
                 if len(frames) > 0:
@@ -548,20 +586,23 @@ class AudioCapture:
                         print(f"DEBUG: WAV file params - Rate: {sample_rate} Hz, Channels: {channels}")
                         sys.stdout.flush()
 
-                        temp_p = pyaudio.PyAudio()
+                        sample_width = self.engine.sample_width()
+                        audio = b"".join(frames)
                         wf = wave.open(filename, "wb")
                         wf.setnchannels(channels)
-                        wf.setsampwidth(temp_p.get_sample_size(self.format))
+                        wf.setsampwidth(sample_width)
                         wf.setframerate(sample_rate)
-                        wf.writeframes(b"".join(frames))
+                        wf.writeframes(audio)
                         wf.close()
-                        temp_p.terminate()
 
                         file_size = os.path.getsize(filename) / (1024 * 1024)
-                        duration = len(frames) * self.chunk / sample_rate
+                        duration = len(audio) / (sample_width * channels * sample_rate)
                         print(f"Saved: {file_size:.2f} MB, {duration:.1f}s")
                         print(f"{filename}\n")
                         sys.stdout.flush()
+                        if self.catalog is not None:
+                            self.catalog.add_artifact(meeting_id, RECORDING, filename, duration_seconds=duration)
+                            self.catalog.finish_meeting(meeting_id)
                     except Exception as e:
                         print(f"Save error: {e}")
                         import traceback
@@ -599,52 +640,87 @@ class AudioCapture:
             except Exception as e:
                 print(f"Recording stop callback error: {e}")
 
+    def last_recording(self):
+        """
+        Callable that waits for the last recording to be saved and returns its WAV path,
+        or None if nothing was saved. Safe to call after the next recording has started
+        """
+        thread, path = self.audio_thread, self.recording_path
+
+        def wait(timeout=None):
+            if thread is not None and thread is not threading.current_thread():
+                thread.join(timeout)
+            return path if path and os.path.exists(path) else None
+
+        return wait
+
+    def open_activity_source(self, role=SPEAKER):
+        """Low-rate speaker loopback or microphone for an audio activity monitor, 100ms per read"""
+        if SYSTEM == "Darwin":
+            return FfmpegSource()
+
+        stream_format = self.engine.stream_format(role)
+        if stream_format is None:
+            raise RuntimeError(f"no {role} device")
+        channels, rate = stream_format
+        # A separate stream, the pre-opened one is kept for the recording
+        stream = self.engine.open_stream(role, rate // 10, reuse_warm=False)
+        return PyAudioSource(stream, rate, channels, rate // 10, close_stream=self.engine.close_stream)
+
+    def detect_calls(self):
+        """Classify running processes once, returns {platform: (active, name, cpu)}"""
+        samples = self.process_sampler.sample(self.platforms.classify)
+        status = self.platforms.evaluate(samples)
+        self.platform_status = status
+        return status
+
     def monitor_loop(self):
         print("Monitoring for calls...")
         print(f"Inactivity timeout: {self.inactive_threshold}s")
         print(f"Call confirmation: {self.call_detection_threshold} checks\n")
         sys.stdout.flush()
 
-        check_count = 0
+        self.wake_event.clear()
+        last_tick = time.monotonic()
+        last_status_print = last_tick
         while self.running:
-            zoom_active, zoom_name, zoom_cpu = self.detect_zoom_call()
-            discord_active, discord_name, discord_cpu = self.detect_discord_call()
-            teams_active, teams_name, teams_cpu = self.detect_teams_call()
+            platform_status = self.detect_calls()
 
-            check_count += 1
-            if check_count % 30 == 0 and not self.in_call:
+            now = time.monotonic()
+            elapsed = now - last_tick
+            last_tick = now
+            if now - last_status_print >= 30 and not self.in_call:
+                last_status_print = now
                 status = []
-                if discord_active:
-                    status.append(f"Discord: cpu {discord_cpu:.1f}%")
-                else:
-                    status.append(f"Discord: not active")
-                if zoom_active:
-                    status.append(f"Zoom: cpu {zoom_cpu:.1f}%")
-                else:
-                    status.append(f"Zoom: not active")
+                for call_platform in self.platforms:
+                    active, name, cpu = platform_status[call_platform.key]
+                    if active:
+                        status.append(f"{call_platform.display_name}: cpu {cpu:.1f}%")
+                    elif name is not None:
+                        status.append(f"{call_platform.display_name}: not active")
+                if not status:
+                    status.append("No call apps running")
 
                 print(f"[{datetime.now().strftime('%H:%M:%S')}] {' | '.join(status)}")
                 sys.stdout.flush()
 
-            current_platform = None
-            is_any_call_active = False
+            present, confidence = self.platforms.confidence(platform_status)
+            audio_score = speech_score(self.activity_monitors)
+            confidence = combine_confidence(confidence, audio_score)
 
-            if zoom_active:
-                current_platform = "zoom"
-                is_any_call_active = True
-            elif discord_active:
-                current_platform = "discord"
-                is_any_call_active = True
-            elif teams_active:
-                current_platform = "teams"
-                is_any_call_active = True
+            current_platform = self.platforms.active_platform(platform_status)
+            is_any_call_active = current_platform is not None
+            if audio_score is not None and not self.in_call:
+                # A busy call app only counts while someone on either side is talking
+                is_any_call_active = is_any_call_active and confidence >= CONFIRM_CONFIDENCE
 
             if not self.in_call:
                 if is_any_call_active:
-                    self.inactive_count = 0
+                    self.inactive_seconds = 0.0
                     self.call_detected_count += 1
+                    audio = f", speech {audio_score:.0%}" if audio_score is not None else ""
                     print(
-                        f"🔍 Call activity ({self.call_detected_count}/{self.call_detection_threshold})"
+                        f"🔍 Call activity ({self.call_detected_count}/{self.call_detection_threshold}{audio})"
                     )
                     sys.stdout.flush()
 
@@ -660,26 +736,18 @@ class AudioCapture:
                     self.call_detected_count = 0
 
             else:
-                is_original_call_active = False
-                if self.active_platform == "zoom" and zoom_active:
-                    is_original_call_active = True
-                elif self.active_platform == "discord" and discord_active:
-                    is_original_call_active = True
-                elif self.active_platform == "teams" and teams_active:
-                    is_original_call_active = True
+                is_original_call_active = platform_status[self.active_platform][0]
 
                 if is_original_call_active:
-                    self.inactive_count = 0
+                    self.inactive_seconds = 0.0
                 else:
-                    self.inactive_count += 1
-
-                    if self.inactive_count % 3 == 0:
-                        print(
-                            f"Inactive {self.inactive_count}/{self.inactive_threshold}s"
-                        )
-                        sys.stdout.flush()
+                    self.inactive_seconds += elapsed
+                    print(
+                        f"Inactive {self.inactive_seconds:.0f}/{self.inactive_threshold}s"
+                    )
+                    sys.stdout.flush()
 
-                    if self.inactive_count >= self.inactive_threshold:
+                    if self.inactive_seconds >= self.inactive_threshold:
                         print(
                             f"\n{self.active_platform.upper()} call ended (inactive {self.inactive_threshold}s)"
                         )
@@ -687,11 +755,38 @@ class AudioCapture:
                         self.stop_recording()
                         self.in_call = False
                         self.active_platform = None
-                        self.inactive_count = 0
+                        self.inactive_seconds = 0.0
                         print("👀 Back to monitoring...\n")
                         sys.stdout.flush()
 
-            time.sleep(1)
+            was_idle = self.scheduler.state == IDLE
+            interval = self.scheduler.update(
+                present,
+                confidence,
+                in_call=self.in_call,
+                call_ending=self.inactive_seconds > 0,
+            )
+            if was_idle and self.scheduler.state != IDLE:
+                # A call app just started: pick up a headset plugged in since the last check
+                # before any stream opens, instead of restarting PortAudio on a timer while idle
+                self.engine.refresh_devices()
+            for monitor in self.activity_monitors:
+                # Only listen while a call app is running and nothing is being recorded
+                if not self.in_call and self.scheduler.state in (WATCHING, BURST):
+                    monitor.start()
+                else:
+                    monitor.stop()
+            if not self.in_call:
+                if self.preroll_seconds > 0 and self.scheduler.state in (WATCHING, BURST):
+                    # Streams are already running for the pre-roll, no need to warm them
+                    self.start_preroll()
+                elif self.scheduler.state == BURST:
+                    # Confirmation is under way, open the devices now so recording starts at once
+                    self.engine.warm(self.chunk)
+                elif self.scheduler.state == IDLE:
+                    self.stop_preroll()
+                    self.engine.cool()
+            self.wake_event.wait(interval)
 
     def start(self):
         self.running = True
@@ -703,8 +798,13 @@ class AudioCapture:
     def stop(self):
         print("\nShutting down...")
         self.running = False
+        self.wake_event.set()
+        for monitor in self.activity_monitors:
+            monitor.stop()
+        self.stop_preroll()
         self.stop_recording()
         time.sleep(1)
+        self.engine.close()
 
 
 def main():
@@ -712,8 +812,16 @@ def main():
     parser = argparse.ArgumentParser(description="FocusNote - Call recording")
     parser.add_argument("--test", action="store_true", help="Test 10s recording")
     parser.add_argument("--manual", action="store_true", help="Manual mode")
-
-    backend = AudioCapture()
+    parser.add_argument(
+        "--preroll",
+        type=float,
+        default=0.0,
+        metavar="SECONDS",
+        help="Keep this much audio from before a call is confirmed (kept in memory only)",
+    )
+    args = parser.parse_args()
+
+    backend = AudioCapture(preroll_seconds=args.preroll)
 
     try:
         backend.start()
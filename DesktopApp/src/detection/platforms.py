@@ -0,0 +1,213 @@
+"""
+Call platform registry
+Each entry says how to recognise a call app: exact process names or name patterns, the CPU
+use that counts as a call, an optional UDP signal and a priority for when several apps
+look active. PlatformRegistry compiles the entries into one matcher, so every process is
+classified in a single pass per detection tick. Adding a platform is a new entry here.
+"""
+
+import re
+
+import psutil
+
+PLATFORMS = [
+    {
+        "key": "zoom",
+        "display_name": "Zoom",
+        "process_names": ["zoom", "zoom.us", "zoom.us.app"],
+        "cpu_threshold": 3.5,
+        "priority": 50,
+    },
+    {
+        "key": "discord",
+        "display_name": "Discord",
+        # Discord, DiscordPTB, DiscordCanary and their helper processes
+        "name_patterns": [r"discord"],
+        "cpu_threshold": 5.0,
+        # An open voice connection lowers the CPU needed to count as a call
+        "udp_sockets": 3,
+        "udp_cpu_threshold": 3.0,
+        "priority": 40,
+    },
+    {
+        "key": "teams",
+        "display_name": "Teams",
+        "process_names": ["teams", "ms-teams", "msteams"],
+        "cpu_threshold": 3.5,
+        "priority": 30,
+    },
+    {
+        "key": "webex",
+        "display_name": "Webex",
+        "process_names": ["ciscocollabhost", "webexmta"],
+        "name_patterns": [r"^webex"],
+        "cpu_threshold": 3.5,
+        "priority": 20,
+    },
+    {
+        "key": "slack",
+        "display_name": "Slack",
+        "process_names": ["slack"],
+        # Slack runs all day, only a huddle opens UDP media sockets
+        "cpu_threshold": 5.0,
+        "udp_sockets": 1,
+        "udp_cpu_threshold": 3.0,
+        "require_udp": True,
+        "priority": 10,
+    },
+    # Browser calls (Google Meet) have no process of their own to match on
+]
+
+# Names seen in one run are few, but bound the cache anyway
+MAX_CACHED_NAMES = 4096
+
+
+class CallPlatform:
+    def __init__(
+        self,
+        key,
+        display_name,
+        process_names=(),
+        name_patterns=(),
+        cpu_threshold=3.5,
+        udp_sockets=None,
+        udp_cpu_threshold=None,
+        require_udp=False,
+        priority=0,
+    ):
+        self.key = key
+        self.display_name = display_name
+        self.process_names = [name.lower() for name in process_names]
+        self.name_patterns = list(name_patterns)
+        self.cpu_threshold = cpu_threshold
+        self.udp_sockets = udp_sockets
+        self.udp_cpu_threshold = udp_cpu_threshold if udp_cpu_threshold is not None else cpu_threshold
+        self.require_udp = require_udp
+        self.priority = priority
+
+    def is_active(self, cpu, udp_sockets=None):
+        """udp_sockets is None when the network signal was not needed or not readable"""
+        has_udp = (
+            self.udp_sockets is not None
+            and udp_sockets is not None
+            and udp_sockets >= self.udp_sockets
+        )
+        if self.require_udp:
+            return has_udp and cpu > self.udp_cpu_threshold
+        if has_udp and cpu > self.udp_cpu_threshold:
+            return True
+        return cpu > self.cpu_threshold
+
+    def needs_udp_check(self, cpu):
+        """Whether counting UDP sockets could change is_active for this CPU reading"""
+        if self.udp_sockets is None or cpu <= self.udp_cpu_threshold:
+            return False
+        return self.require_udp or cpu <= self.cpu_threshold
+
+
+class PlatformRegistry:
+    def __init__(self, platforms=PLATFORMS):
+        self.platforms = sorted(
+            (p if isinstance(p, CallPlatform) else CallPlatform(**p) for p in platforms),
+            key=lambda p: p.priority,
+            reverse=True,
+        )
+        self.by_key = {p.key: p for p in self.platforms}
+
+        # Exact names go in a dict, patterns into one alternation with a group per platform
+        self.exact = {}
+        alternatives = []
+        for index, p in enumerate(self.platforms):
+            for name in p.process_names:
+                self.exact.setdefault(name, p)
+                if not name.endswith(".exe"):
+                    self.exact.setdefault(f"{name}.exe", p)
+            for pattern in p.name_patterns:
+                alternatives.append(f"(?P<p{index}>{pattern})")
+        self.pattern = re.compile("|".join(alternatives), re.IGNORECASE) if alternatives else None
+        self.cache = {}
+
+    def __iter__(self):
+        return iter(self.platforms)
+
+    def get(self, key):
+        return self.by_key.get(key)
+
+    def classify(self, process_name):
+        """The platform a process belongs to, or None"""
+        try:
+            return self.cache[process_name]
+        except KeyError:
+            pass
+
+        lowered = process_name.lower()
+        platform = self.exact.get(lowered)
+        if platform is None and self.pattern is not None:
+            match = self.pattern.search(lowered)
+            if match:
+                platform = self.platforms[int(match.lastgroup[1:])]
+
+        if len(self.cache) >= MAX_CACHED_NAMES:
+            self.cache.clear()
+        self.cache[process_name] = platform
+        return platform
+
+    def evaluate(self, samples):
+        """
+        ProcessSamples of one tick -> {platform key: (active, name, cpu)} for every platform.
+        A running but quiet app is (False, name, cpu), a missing one (False, None, 0)
+        """
+        busiest = {}
+        udp_candidates = {}
+        for sample in samples:
+            platform = self.classify(sample.name)
+            if platform is None:
+                continue
+            current = busiest.get(platform.key)
+            if current is None or sample.cpu_percent > current.cpu_percent:
+                busiest[platform.key] = sample
+            udp_candidates.setdefault(platform.key, []).append(sample.pid)
+
+        status = {}
+        for platform in self.platforms:
+            sample = busiest.get(platform.key)
+            if sample is None:
+                status[platform.key] = (False, None, 0)
+                continue
+            udp_sockets = None
+            if platform.needs_udp_check(sample.cpu_percent):
+                udp_sockets = count_udp_sockets(udp_candidates[platform.key])
+            name = sample.name.lower()
+            status[platform.key] = (platform.is_active(sample.cpu_percent, udp_sockets), name, sample.cpu_percent)
+        return status
+
+    def active_platform(self, status):
+        """Key of the highest priority platform that looks like it is in a call"""
+        for platform in self.platforms:
+            if status.get(platform.key, (False,))[0]:
+                return platform.key
+        return None
+
+    def confidence(self, status):
+        """(any call app running, highest CPU / threshold ratio) for the detection scheduler"""
+        present = False
+        confidence = 0.0
+        for key, (active, name, cpu) in status.items():
+            if name is None:
+                continue
+            present = True
+            ratio = 1.0 if active else cpu / self.by_key[key].cpu_threshold
+            confidence = max(confidence, ratio)
+        return present, confidence
+
+
+def count_udp_sockets(pids):
+    """Most UDP sockets held by any of pids, None if none could be read"""
+    best = None
+    for pid in pids:
+        try:
+            count = len(psutil.Process(pid).net_connections(kind="udp"))
+        except (psutil.AccessDenied, psutil.NoSuchProcess, AttributeError):
+            continue
+        best = count if best is None else max(best, count)
+    return best
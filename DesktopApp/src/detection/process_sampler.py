@@ -0,0 +1,159 @@
+"""
+Process samplers for call detection
+A sampler lists running processes once per tick and reports CPU usage for the ones
+a detector is interested in. On Linux ProcfsSampler reads /proc directly, elsewhere
+PsutilSampler wraps psutil.
+"""
+
+import os
+import platform
+import threading
+import time
+
+import psutil
+
+
+class ProcessSample:
+    __slots__ = ("pid", "name", "cpu_percent")
+
+    def __init__(self, pid, name, cpu_percent):
+        self.pid = pid
+        self.name = name
+        self.cpu_percent = cpu_percent
+
+    def __repr__(self):
+        return f"ProcessSample(pid={self.pid}, name={self.name!r}, cpu_percent={self.cpu_percent:.1f})"
+
+
+class ProcessSampler:
+    """
+    sample(match) returns a ProcessSample for every running process whose name match()
+    accepts. CPU is measured between consecutive ticks, like psutil's cpu_percent(None),
+    so the first tick after a process appears reports 0.0
+    """
+
+    def __init__(self):
+        # Samplers keep CPU times between ticks, overlapping calls would corrupt them
+        self.lock = threading.Lock()
+
+    def sample(self, match=None):
+        with self.lock:
+            return self._sample(match or (lambda name: True))
+
+    def _sample(self, match):
+        raise NotImplementedError
+
+
+class PsutilSampler(ProcessSampler):
+    """Portable sampler, psutil keeps the per-process CPU times between calls"""
+
+    def _sample(self, match):
+        samples = []
+        for proc in psutil.process_iter(["name"]):
+            try:
+                name = proc.info["name"]
+                if name and match(name):
+                    samples.append(ProcessSample(proc.pid, name, proc.cpu_percent(None)))
+            except (psutil.NoSuchProcess, psutil.AccessDenied):
+                continue
+        return samples
+
+
+class ProcfsSampler(ProcessSampler):
+    """
+    Linux sampler that reads /proc/<pid>/stat itself. Names are cached by PID and start
+    time, so an idle tick costs one stat read per process and a reused PID is named again
+    """
+
+    def __init__(self, proc_root="/proc"):
+        super().__init__()
+        self.proc_root = proc_root
+        self.clock_ticks = os.sysconf("SC_CLK_TCK")
+        self.names = {}  # pid -> (start time, process name)
+        self.cpu_times = {}  # pid -> (utime + stime in jiffies, wall time)
+
+    def _sample(self, match):
+        now = time.monotonic()
+        pids = set()
+        samples = []
+        for entry in os.listdir(self.proc_root):
+            if not entry.isdigit():
+                continue
+            pid = int(entry)
+            pids.add(pid)
+
+            stat = self._read_stat(pid)
+            if stat is None:
+                continue  # exited while listing
+            start_time, jiffies = stat
+            cached = self.names.get(pid)
+            if cached is None or cached[0] != start_time:
+                # A new process, or the PID was reused since the last tick
+                name = self._read_name(pid)
+                if name is None:
+                    continue
+                self.names[pid] = (start_time, name)
+                self.cpu_times.pop(pid, None)
+            else:
+                name = cached[1]
+            if not match(name):
+                continue
+
+            cpu = 0.0
+            previous = self.cpu_times.get(pid)
+            if previous is not None and now > previous[1]:
+                cpu = (jiffies - previous[0]) / self.clock_ticks / (now - previous[1]) * 100
+            self.cpu_times[pid] = (jiffies, now)
+            samples.append(ProcessSample(pid, name, cpu))
+
+        # Forget processes that exited
+        if len(self.names) > len(pids):
+            for pid in self.names.keys() - pids:
+                del self.names[pid]
+                self.cpu_times.pop(pid, None)
+        return samples
+
+    def _read(self, pid, filename):
+        try:
+            fd = os.open(f"{self.proc_root}/{pid}/{filename}", os.O_RDONLY)
+        except OSError:
+            return None
+        try:
+            return os.read(fd, 4096)
+        except OSError:
+            return None
+        finally:
+            os.close(fd)
+
+    def _read_name(self, pid):
+        comm = self._read(pid, "comm")
+        if comm is None:
+            return None
+        name = comm.decode("utf-8", "replace").rstrip("\n")
+        if len(name) >= 15:
+            # comm is truncated to 15 characters, take the full name from cmdline like psutil
+            cmdline = self._read(pid, "cmdline")
+            if cmdline:
+                exe = os.path.basename(cmdline.split(b"\0", 1)[0].decode("utf-8", "replace"))
+                if exe.startswith(name):
+                    name = exe
+        return name
+
+    def _read_stat(self, pid):
+        """(start time, utime + stime) in jiffies"""
+        stat = self._read(pid, "stat")
+        if stat is None:
+            return None
+        # comm may contain spaces and parentheses, the fields start after the last ")"
+        fields = stat[stat.rfind(b")") + 2 :].split()
+        try:
+            return int(fields[19]), int(fields[11]) + int(fields[12])
+        except (IndexError, ValueError):
+            return None
+
+
+def create_process_sampler():
+    """ProcfsSampler on Linux, PsutilSampler everywhere else"""
+    if platform.system() == "Linux" and os.path.isdir("/proc/self"):
+        return ProcfsSampler()
+    return PsutilSampler()
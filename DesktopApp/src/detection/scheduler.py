@@ -0,0 +1,55 @@
+"""
+Adaptive cadence for the call detection loop
+Polls rarely while no call app is running, samples quickly once one starts using CPU so
+a call is confirmed within a second, and relaxes again once the call is recording.
+"""
+
+IDLE = "idle"  # no call app running, only watch for one to start
+WATCHING = "watching"  # a call app is running but quiet
+BURST = "burst"  # call activity rising, confirm it quickly
+IN_CALL = "in_call"  # recording, only notice when the call ends
+
+
+class DetectionScheduler:
+    def __init__(
+        self,
+        idle_interval=5.0,
+        watch_interval=1.0,
+        burst_interval=0.25,
+        call_interval=2.0,
+        rising_ratio=0.5,
+    ):
+        """rising_ratio is the fraction of a platform's CPU threshold that counts as rising activity"""
+        self.intervals = {
+            IDLE: idle_interval,
+            WATCHING: watch_interval,
+            BURST: burst_interval,
+            IN_CALL: call_interval,
+        }
+        self.rising_ratio = rising_ratio
+        self.state = IDLE
+
+    @property
+    def interval(self):
+        """Seconds until the next detection tick"""
+        return self.intervals[self.state]
+
+    def update(self, targets_present, confidence, in_call=False, call_ending=False):
+        """
+        Pick the state after a tick. confidence is the highest CPU / threshold ratio
+        of any call app, call_ending is set while a recorded call looks inactive
+        """
+        previous = self.state
+        if in_call:
+            # Watch an ending call more closely so the recording stops on time
+            self.state = WATCHING if call_ending else IN_CALL
+        elif confidence >= self.rising_ratio:
+            self.state = BURST
+        elif targets_present:
+            self.state = WATCHING
+        else:
+            self.state = IDLE
+
+        if self.state != previous:
+            print(f"Detection: {previous} -> {self.state} (every {self.interval}s)")
+        return self.interval
@@ -1,14 +1,57 @@
+import time
+
+STARTED = time.perf_counter()
+
+import argparse
 import sys
-from PyQt6.QtWidgets import QApplication
-from ui.main_window import MainWindow
+
+from monitoring.profiling import MODES as PROFILE_MODES, SAMPLE
+from monitoring.startup import StartupProfile
 
 
 def main():
-    app = QApplication(sys.argv)
-    window = MainWindow()
+    parser = argparse.ArgumentParser(description="FocusNote desktop app")
+    parser.add_argument(
+        "--profile-startup",
+        action="store_true",
+        help="Print import and init timings per subsystem once started, then exit",
+    )
+    parser.add_argument(
+        "--profile-for",
+        type=float,
+        metavar="SECONDS",
+        help="Profile the first SECONDS, kill -USR2 <pid> profiles a running app",
+    )
+    parser.add_argument("--profile-mode", choices=PROFILE_MODES, default=SAMPLE)
+    args, qt_args = parser.parse_known_args()
+
+    profile = StartupProfile(origin=STARTED)
+    with profile.phase("import dotenv"):
+        from dotenv import load_dotenv
+
+        load_dotenv()
+    with profile.phase("import Qt"):
+        from PyQt6.QtCore import QTimer
+        from PyQt6.QtWidgets import QApplication
+    with profile.phase("import ui"):
+        from ui.main_window import MainWindow
+
+    app = QApplication([sys.argv[0]] + qt_args)
+    window = MainWindow(profile)
     window.show()
+    window.profiler.install_signal_handler()
+    if args.profile_for:
+        window.profiler.start(args.profile_for, args.profile_mode)
+
+    if args.profile_startup:
+
+        def report():
+            print(profile.report())
+            QTimer.singleShot(0, window.close)  # closeEvent stops the capture thread
+
+        window.ready.connect(report)
     sys.exit(app.exec())
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
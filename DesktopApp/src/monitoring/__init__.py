@@ -0,0 +1,4 @@
+import os
+
+# Where the desktop app and transcription server write profiles
+PROFILE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "logs", "profiles"))
@@ -0,0 +1,243 @@
+"""
+Pipeline metrics for FocusNote
+Histograms and counters for audio capture, the transcription client, the transcription server
+and the session router
+"""
+
+import concurrent.futures
+import json
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+)
+
+METRIC_PREFIX = "focusnote_"
+
+# Latency buckets in seconds, from a few milliseconds up to the 30s client timeout
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+REAL_TIME_FACTOR_BUCKETS = (0.05, 0.1, 0.25, 0.5, 0.75, 1.0, 1.5, 2.0, 3.0, 5.0)
+
+# Audio capture (AudioCapture)
+CAPTURE_CHUNKS = Counter(
+    "focusnote_capture_chunks_total",
+    "Audio chunks captured from the speaker and microphone streams",
+)
+CAPTURE_QUEUE_DEPTH = Gauge(
+    "focusnote_capture_queue_depth",
+    "Chunks waiting in a capture queue",
+    ["queue"],
+)
+CAPTURE_QUEUE_DROPS = Counter(
+    "focusnote_capture_queue_drops_total",
+    "Chunks dropped because a capture queue was full",
+    ["queue"],
+)
+
+# Transcription client (TranscriptionWebSocketClient)
+CLIENT_CAPTURE_TO_SEND = Histogram(
+    "focusnote_client_capture_to_send_seconds",
+    "Time from capturing the last chunk of a buffer until the buffer is sent",
+    buckets=LATENCY_BUCKETS,
+)
+CLIENT_ROUND_TRIP = Histogram(
+    "focusnote_client_round_trip_seconds",
+    "Time from first sending a buffer until the server acknowledges it",
+    buckets=LATENCY_BUCKETS,
+)
+CLIENT_BUFFERS_SENT = Counter(
+    "focusnote_client_buffers_sent_total",
+    "Audio buffers sent to the transcription server",
+)
+CLIENT_TIMEOUTS = Counter(
+    "focusnote_client_timeouts_total",
+    "Connections dropped because the server went quiet with buffers unacknowledged",
+)
+CLIENT_CAPTION_LATENCY = Histogram(
+    "focusnote_client_caption_latency_seconds",
+    "Time from capturing audio until a partial or final result covering it arrives",
+    ["kind"],
+    buckets=LATENCY_BUCKETS,
+)
+CLIENT_RECONNECTS = Counter(
+    "focusnote_client_reconnects_total",
+    "Reconnect attempts to the transcription server",
+)
+CLIENT_BACKLOG_CHUNKS = Gauge(
+    "focusnote_client_backlog_chunks",
+    "Audio buffers waiting for the server to acknowledge them",
+)
+CLIENT_BACKLOG_SPILLED_BYTES = Gauge(
+    "focusnote_client_backlog_spilled_bytes",
+    "Bytes of unacknowledged audio spilled to disk",
+)
+CLIENT_BACKLOG_DROPS = Counter(
+    "focusnote_client_backlog_drops_total",
+    "Unacknowledged audio buffers dropped because the backlog was full",
+)
+CLIENT_DEGRADED_RESULTS = Counter(
+    "focusnote_client_degraded_results_total",
+    "Results the server produced with reduced quality while behind",
+    ["kind"],
+)
+
+# Transcription server (AudioServer)
+SERVER_CONNECTIONS = Gauge(
+    "focusnote_server_connections",
+    "Currently connected transcription clients",
+)
+SERVER_CHUNKS = Counter(
+    "focusnote_server_chunks_total",
+    "Audio chunks received by the transcription server",
+    ["outcome"],
+)
+SERVER_AUDIO_SECONDS = Counter(
+    "focusnote_server_audio_seconds_total",
+    "Seconds of audio transcribed",
+)
+SERVER_INFERENCE = Histogram(
+    "focusnote_server_inference_seconds",
+    "Whisper inference time per chunk",
+    ["pass"],
+    buckets=LATENCY_BUCKETS,
+)
+SERVER_REAL_TIME_FACTOR = Histogram(
+    "focusnote_server_real_time_factor",
+    "Inference time divided by audio duration per chunk",
+    ["pass"],
+    buckets=REAL_TIME_FACTOR_BUCKETS,
+)
+SERVER_BACKLOG_SECONDS = Gauge(
+    "focusnote_server_backlog_seconds",
+    "Seconds of audio waiting for inference across sessions",
+)
+SERVER_LAG = Gauge(
+    "focusnote_server_lag_seconds",
+    "How long the oldest audio waiting for inference has been queued",
+)
+SERVER_DEGRADATIONS = Counter(
+    "focusnote_server_degradations_total",
+    "Results produced with reduced quality because the server was behind",
+    ["kind"],
+)
+
+# Session router (SessionRouter)
+ROUTER_BACKEND_UP = Gauge(
+    "focusnote_router_backend_up",
+    "Whether a transcription backend passed its last health check",
+    ["backend"],
+)
+ROUTER_SESSIONS = Gauge(
+    "focusnote_router_sessions",
+    "Meetings pinned to a transcription backend",
+    ["backend"],
+)
+ROUTER_CONNECTIONS = Gauge(
+    "focusnote_router_connections",
+    "Client connections currently proxied by the router",
+)
+ROUTER_REHOMED = Counter(
+    "focusnote_router_rehomed_total",
+    "Meetings moved to another backend because theirs went down",
+)
+
+
+def snapshot(registry=REGISTRY, prefix=METRIC_PREFIX):
+    """Return the current value of every FocusNote metric as a JSON-serializable dict"""
+    result = {}
+    for family in registry.collect():
+        if not family.name.startswith(prefix):
+            continue
+        samples = []
+        for sample in family.samples:
+            samples.append(
+                {
+                    "name": sample.name,
+                    "labels": dict(sample.labels),
+                    "value": sample.value,
+                }
+            )
+        result[family.name] = {
+            "type": family.type,
+            "help": family.documentation,
+            "samples": samples,
+        }
+    return result
+
+
+def write_snapshot(path, registry=REGISTRY):
+    """Write a JSON snapshot of the metrics to path"""
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, "w") as f:
+        json.dump(snapshot(registry), f, indent=2)
+    return path
+
+
+def on_loop(loop, route, timeout=1.0):
+    """
+    Wrap a /status route so it runs on loop's thread: the state it reads is only changed
+    there, and iterating it from the metrics thread could see it mid-update
+    """
+
+    def call():
+        future = concurrent.futures.Future()
+
+        def run():
+            try:
+                future.set_result(route())
+            except Exception as e:
+                future.set_exception(e)
+
+        loop.call_soon_threadsafe(run)
+        return future.result(timeout)
+
+    return call
+
+
+def start_metrics_server(host, port, routes=None, registry=REGISTRY):
+    """
+    Serve Prometheus metrics on http://host:port/metrics in a background thread
+    routes maps extra GET paths to callables returning a JSON-serializable dict
+    """
+    routes = dict(routes or {})
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            path = self.path.split("?", 1)[0]
+            if path == "/metrics":
+                body = generate_latest(registry)
+                content_type = CONTENT_TYPE_LATEST
+            elif path in routes:
+                try:
+                    body = json.dumps(routes[path]()).encode("utf-8")
+                except TimeoutError:
+                    self.send_error(503, "Event loop not responding")
+                    return
+                content_type = "application/json"
+            else:
+                self.send_error(404)
+                return
+
+            self.send_response(200)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            # Scrapes every few seconds would flood the console
+            pass
+
+    httpd = ThreadingHTTPServer((host, port), MetricsHandler)
+    httpd.daemon_threads = True
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    print(f"Metrics available on http://{host}:{port}/metrics")
+    return httpd
@@ -0,0 +1,219 @@
+"""
+On-demand profiling
+Profiles a running process for a time window without restarting it: a sampling profiler
+that walks every thread's stack (collapsed stacks, for flamegraph.pl or speedscope) or
+cProfile on one thread (pstats), plus a tracemalloc snapshot of what was allocated during
+the window. Files are named after the process and the meeting being recorded. Only one
+window runs at a time and its length is capped, so triggering it in production is safe.
+Standard library only and shared with the meeting service: MeetingAssistant/profiling.py is
+an exact copy the start scripts refresh from DesktopApp/src/monitoring/profiling.py, edit that one.
+"""
+
+import cProfile
+import logging
+import os
+import signal
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+
+PROFILE_DIR = "profiles"
+
+SAMPLE = "sample"
+CPROFILE = "cprofile"
+MODES = (SAMPLE, CPROFILE)
+
+DEFAULT_SECONDS = 30.0
+MAX_SECONDS = 600.0
+# 100 stacks a second costs well under a percent of a core for a few dozen threads
+SAMPLE_INTERVAL = 0.01
+TRACEMALLOC_FRAMES = 10
+TOP_ALLOCATIONS = 30
+
+
+def frame_name(code):
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})".replace(";", ",")
+
+
+class Profiler:
+    def __init__(self, process, output_dir=PROFILE_DIR, call_in_thread=None, meeting_id=None, logger=None):
+        """
+        process names the output files. call_in_thread(fn) runs fn on the thread cProfile
+        should profile (an event loop's call_soon_threadsafe, a queued Qt signal), without
+        it only sampling is available. meeting_id() returns the current meeting's ID for
+        the file names when the trigger does not give one. Messages go to logger when
+        given, printed otherwise
+        """
+        self.process = process
+        self.logger = logger
+        self.output_dir = output_dir
+        self.call_in_thread = call_in_thread
+        self.meeting_id = meeting_id
+        self.lock = threading.Lock()
+        self.current = None  # {"mode", "meeting_id", "started", "seconds"} while running
+        self.stop_event = threading.Event()
+        self.last_outputs = []
+
+    def start(self, seconds=DEFAULT_SECONDS, mode=SAMPLE, meeting_id=None, memory=True):
+        """Start a window in the background, returns status(). RuntimeError if one is running"""
+        if mode not in MODES:
+            raise ValueError(f"Unknown profiling mode {mode!r}, expected one of {', '.join(MODES)}")
+        if mode == CPROFILE and self.call_in_thread is None:
+            raise ValueError("cProfile is not available in this process, use sampling")
+        seconds = min(max(float(seconds), 0.1), MAX_SECONDS)
+        if meeting_id is None and self.meeting_id is not None:
+            meeting_id = self.meeting_id()
+        with self.lock:
+            if self.current is not None:
+                raise RuntimeError("A profile is already running")
+            self.current = {"mode": mode, "meeting_id": meeting_id, "started": time.time(), "seconds": seconds}
+            self.stop_event.clear()
+        threading.Thread(
+            target=self._run, args=(seconds, mode, meeting_id, memory), name="profiler", daemon=True
+        ).start()
+        self._log(logging.INFO, f"Profiling {self.process} for {seconds:.0f}s ({mode})")
+        return self.status()
+
+    def stop(self):
+        """End the running window early, its files are still written"""
+        self.stop_event.set()
+
+    def status(self):
+        with self.lock:
+            current = dict(self.current) if self.current else None
+            outputs = list(self.last_outputs)
+        status = {"running": current is not None, "last_outputs": outputs}
+        if current:
+            status.update(current)
+            status["remaining"] = max(0.0, current["started"] + current["seconds"] - time.time())
+        return status
+
+    def install_signal_handler(self, signum=None):
+        """
+        Start a default window on SIGUSR2 (`kill -USR2 <pid>`). Returns False where there is
+        no such signal (Windows) or off the main thread
+        """
+        signum = signum or getattr(signal, "SIGUSR2", None)
+        if signum is None:
+            return False
+        requested = threading.Event()
+
+        def handle(signum, frame):
+            # Runs on the main thread wherever it was interrupted, possibly inside start() or
+            # status() holding self.lock, so it only wakes the thread that starts the window
+            requested.set()
+
+        def watch():
+            while True:
+                requested.wait()
+                requested.clear()
+                try:
+                    self.start()
+                except (RuntimeError, ValueError) as e:
+                    self._log(logging.WARNING, f"Profiling not started: {e}")
+
+        try:
+            signal.signal(signum, handle)
+        except ValueError:
+            return False
+        threading.Thread(target=watch, name="profiler-signal", daemon=True).start()
+        return True
+
+    def _log(self, level, message):
+        if self.logger is not None:
+            self.logger.log(level, message)
+        else:
+            print(message)
+
+    def _run(self, seconds, mode, meeting_id, memory):
+        stem = os.path.join(
+            self.output_dir,
+            f"{self.process}-{meeting_id or 'idle'}-{time.strftime('%Y%m%d_%H%M%S')}",
+        )
+        outputs = []
+        started_tracing = False
+        try:
+            os.makedirs(self.output_dir, exist_ok=True)
+            if memory and not tracemalloc.is_tracing():
+                tracemalloc.start(TRACEMALLOC_FRAMES)
+                started_tracing = True
+            if mode == SAMPLE:
+                outputs.append(self._sample(seconds, stem + ".collapsed"))
+            else:
+                outputs.append(self._cprofile(seconds, stem + ".pstats"))
+            if memory:
+                outputs.extend(self._memory_snapshot(stem))
+        except Exception as e:
+            self._log(logging.ERROR, f"Profiling failed: {e}")
+        finally:
+            if started_tracing:
+                tracemalloc.stop()
+            outputs = [path for path in outputs if path]
+            with self.lock:
+                self.current = None
+                self.last_outputs = outputs
+        for path in outputs:
+            self._log(logging.INFO, f"Profile written to {path}")
+
+    def _sample(self, seconds, path):
+        """Count every other thread's stack each SAMPLE_INTERVAL, written as collapsed stacks"""
+        counts = Counter()
+        own = threading.get_ident()
+        names = {}
+        deadline = time.monotonic() + seconds
+        samples = 0
+        while not self.stop_event.wait(SAMPLE_INTERVAL) and time.monotonic() < deadline:
+            if samples % 100 == 0:
+                names = {thread.ident: thread.name.replace(";", ",") for thread in threading.enumerate()}
+            samples += 1
+            for ident, frame in sys._current_frames().items():
+                if ident == own:
+                    continue
+                stack = []
+                while frame is not None:
+                    stack.append(frame_name(frame.f_code))
+                    frame = frame.f_back
+                stack.append(names.get(ident, str(ident)))
+                counts[";".join(reversed(stack))] += 1
+        with open(path, "w", encoding="utf-8") as f:
+            for stack, count in counts.most_common():
+                f.write(f"{stack} {count}\n")
+        return path
+
+    def _cprofile(self, seconds, path):
+        """cProfile the thread call_in_thread runs on; enable and disable both happen there"""
+        profile = cProfile.Profile()
+        enabled, disabled = threading.Event(), threading.Event()
+
+        def enable():
+            profile.enable()
+            enabled.set()
+
+        def disable():
+            profile.disable()
+            disabled.set()
+
+        self.call_in_thread(enable)
+        if not enabled.wait(5.0):
+            raise RuntimeError("The profiled thread did not respond")
+        self.stop_event.wait(seconds)
+        self.call_in_thread(disable)
+        if not disabled.wait(5.0):
+            raise RuntimeError("The profiled thread did not respond, profile left running")
+        profile.dump_stats(path)
+        return path
+
+    def _memory_snapshot(self, stem):
+        """The tracemalloc snapshot (load with tracemalloc.Snapshot.load) and its top lines"""
+        snapshot = tracemalloc.take_snapshot().filter_traces(
+            (tracemalloc.Filter(False, tracemalloc.__file__),)
+        )
+        snapshot.dump(stem + ".tracemalloc")
+        traced, peak = tracemalloc.get_traced_memory()
+        with open(stem + ".memory.txt", "w", encoding="utf-8") as f:
+            f.write(f"Traced {traced / 1e6:.1f} MB, peak {peak / 1e6:.1f} MB\n")
+            for stat in snapshot.statistics("lineno")[:TOP_ALLOCATIONS]:
+                f.write(f"{stat}\n")
+        return [stem + ".tracemalloc", stem + ".memory.txt"]
@@ -0,0 +1,61 @@
+"""
+Startup profile
+Wall-clock timings of the desktop app's start: Qt import, window shown, and the import and
+initialization of each subsystem loaded after the window is up. Printed by
+`python src/main.py --profile-startup`
+"""
+
+import threading
+import time
+from contextlib import contextmanager
+
+
+class StartupProfile:
+    def __init__(self, origin=None):
+        """origin is the perf_counter() value times are measured from, defaults to now"""
+        self.origin = time.perf_counter() if origin is None else origin
+        self.phases = []  # (name, started ms, duration ms, thread name)
+        self.marks = []  # (name, ms)
+        self.lock = threading.Lock()
+
+    def elapsed_ms(self):
+        return (time.perf_counter() - self.origin) * 1000
+
+    @contextmanager
+    def phase(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            end = time.perf_counter()
+            with self.lock:
+                self.phases.append(
+                    (name, (start - self.origin) * 1000, (end - start) * 1000, threading.current_thread().name)
+                )
+
+    def mark(self, name):
+        """A milestone such as the window becoming visible"""
+        with self.lock:
+            self.marks.append((name, self.elapsed_ms()))
+
+    def to_dict(self):
+        with self.lock:
+            return {
+                "phases": [
+                    {"name": name, "start_ms": start, "duration_ms": duration, "thread": thread}
+                    for name, start, duration, thread in self.phases
+                ],
+                "marks": {name: ms for name, ms in self.marks},
+            }
+
+    def report(self):
+        with self.lock:
+            phases = sorted(self.phases, key=lambda p: p[1])
+            marks = list(self.marks)
+        lines = ["Startup profile (ms from process start)"]
+        lines.append(f"{'phase':<36} {'start':>8} {'took':>8}  thread")
+        for name, start, duration, thread in phases:
+            lines.append(f"{name:<36} {start:>8.1f} {duration:>8.1f}  {thread}")
+        for name, ms in marks:
+            lines.append(f"{name + ':':<36} {ms:>8.1f}")
+        return "\n".join(lines)
@@ -0,0 +1,298 @@
+"""
+Meeting catalog
+SQLite index of every meeting: its recording, transcript and AI outputs linked by meeting
+ID, with start time, duration, platform and file sizes. Files are written next to their
+catalog rows in one step (the file only replaces its final path inside the transaction),
+so the history view never walks meeting_output/ or meeting_recordings/. Meetings are
+listed newest first with keyset pagination; artifact contents are read on demand.
+"""
+
+import os
+import re
+import sqlite3
+import tempfile
+import threading
+import wave
+from datetime import datetime
+
+DEFAULT_PATH = os.path.abspath(
+    os.path.join(os.path.dirname(__file__), "..", "..", "meeting_output", "catalog.sqlite3")
+)
+
+RECORDING = "recording"
+TRANSCRIPT = "transcript"
+SUMMARY = "summary"
+ACTION_ITEMS = "action_items"
+MINUTES = "minutes"
+ARTIFACT_KINDS = [RECORDING, TRANSCRIPT, SUMMARY, ACTION_ITEMS, MINUTES]
+
+# File names inside a meeting's output directory
+ARTIFACT_FILES = {
+    TRANSCRIPT: "transcript.txt",
+    SUMMARY: "meeting_summary.txt",
+    ACTION_ITEMS: "action_items.txt",
+    MINUTES: "meeting_minutes.txt",
+}
+# Characters of the summary kept on the meeting row for list views
+PREVIEW_CHARS = 160
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meetings (
+    id TEXT PRIMARY KEY,
+    started_at TEXT NOT NULL,
+    ended_at TEXT,
+    duration_seconds REAL,
+    platform TEXT,
+    title TEXT,
+    preview TEXT
+);
+CREATE INDEX IF NOT EXISTS meetings_started ON meetings (started_at DESC, id DESC);
+CREATE TABLE IF NOT EXISTS artifacts (
+    meeting_id TEXT NOT NULL REFERENCES meetings (id) ON DELETE CASCADE,
+    kind TEXT NOT NULL,
+    path TEXT NOT NULL,
+    size_bytes INTEGER NOT NULL,
+    created_at TEXT NOT NULL,
+    PRIMARY KEY (meeting_id, kind)
+);
+"""
+
+RECORDING_NAME_RE = re.compile(r"meeting(?:_(?P<platform>.+))?_(?P<stamp>\d{8}_\d{6})\.wav$")
+
+
+def now():
+    return datetime.now().isoformat(timespec="seconds")
+
+
+class MeetingCatalog:
+    def __init__(self, path=DEFAULT_PATH):
+        """Opens (and creates) the catalog, usable from the recording, transcription and UI threads"""
+        self.path = path
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        with self.lock, self.conn:
+            self.conn.execute("PRAGMA journal_mode=WAL")
+            self.conn.execute("PRAGMA foreign_keys=ON")
+            self.conn.executescript(SCHEMA)
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
+
+    def _upsert_meeting(self, meeting_id, started_at=None, **fields):
+        """Insert the meeting if new, then set the non-None fields. Caller holds the lock"""
+        self.conn.execute(
+            "INSERT OR IGNORE INTO meetings (id, started_at) VALUES (?, ?)",
+            (meeting_id, started_at or now()),
+        )
+        fields = {k: v for k, v in fields.items() if v is not None}
+        if started_at is not None:
+            fields["started_at"] = started_at
+        if fields:
+            assignments = ", ".join(f"{column} = ?" for column in fields)
+            self.conn.execute(f"UPDATE meetings SET {assignments} WHERE id = ?", (*fields.values(), meeting_id))
+
+    def start_meeting(self, meeting_id, platform=None, started_at=None, title=None):
+        with self.lock, self.conn:
+            self._upsert_meeting(meeting_id, started_at, platform=platform, title=title)
+
+    def finish_meeting(self, meeting_id, duration_seconds=None, ended_at=None):
+        with self.lock, self.conn:
+            self._upsert_meeting(meeting_id, duration_seconds=duration_seconds, ended_at=ended_at or now())
+
+    def add_artifact(self, meeting_id, kind, path, **meeting_fields):
+        """Record a file that is already on disk, meeting_fields update the meeting row"""
+        if kind not in ARTIFACT_KINDS:
+            raise ValueError(f"Unknown artifact kind {kind!r}")
+        path = os.path.abspath(path)
+        size = os.path.getsize(path)
+        with self.lock, self.conn:
+            self._upsert_meeting(meeting_id, **meeting_fields)
+            self._insert_artifact(meeting_id, kind, path, size)
+
+    def _insert_artifact(self, meeting_id, kind, path, size, content=None):
+        """content is the file's text when it is not at path yet. Caller holds the lock"""
+        self.conn.execute(
+            "INSERT OR REPLACE INTO artifacts (meeting_id, kind, path, size_bytes, created_at) VALUES (?, ?, ?, ?, ?)",
+            (meeting_id, kind, path, size, now()),
+        )
+        if kind == SUMMARY:
+            if content is None:
+                with open(path, encoding="utf-8") as f:
+                    content = f.read(PREVIEW_CHARS * 2)
+            preview = " ".join(content[: PREVIEW_CHARS * 2].split())[:PREVIEW_CHARS]
+            self.conn.execute("UPDATE meetings SET preview = ? WHERE id = ?", (preview, meeting_id))
+
+    def save_artifact(self, meeting_id, kind, path, content, **meeting_fields):
+        """
+        Write content (str) to path and catalog it together: the file is written to a
+        temporary name and moved into place once its row is inserted, before the transaction
+        commits. A failed write, insert or move leaves neither
+        """
+        if kind not in ARTIFACT_KINDS:
+            raise ValueError(f"Unknown artifact kind {kind!r}")
+        path = os.path.abspath(path)
+        directory = os.path.dirname(path)
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                f.write(content)
+            size = os.path.getsize(tmp_path)
+            with self.lock, self.conn:
+                self._upsert_meeting(meeting_id, **meeting_fields)
+                self._insert_artifact(meeting_id, kind, path, size, content)
+                os.replace(tmp_path, path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+        return path
+
+    def count(self):
+        with self.lock:
+            return self.conn.execute("SELECT COUNT(*) FROM meetings").fetchone()[0]
+
+    def list_meetings(self, limit=50, after=None, platform=None):
+        """
+        Newest meetings first, without artifact contents. after is the cursor returned
+        with the previous page ((started_at, id) of its last meeting), None at the end
+        """
+        where, params = [], []
+        if after is not None:
+            where.append("(m.started_at < ? OR (m.started_at = ? AND m.id < ?))")
+            params += [after[0], after[0], after[1]]
+        if platform is not None:
+            where.append("m.platform = ?")
+            params.append(platform)
+        sql = f"""
+            SELECT m.*, GROUP_CONCAT(a.kind) AS kinds, COALESCE(SUM(a.size_bytes), 0) AS size_bytes
+            FROM (
+                SELECT * FROM meetings m {"WHERE " + " AND ".join(where) if where else ""}
+                ORDER BY m.started_at DESC, m.id DESC LIMIT ?
+            ) m
+            LEFT JOIN artifacts a ON a.meeting_id = m.id
+            GROUP BY m.id
+            ORDER BY m.started_at DESC, m.id DESC
+        """
+        with self.lock:
+            rows = self.conn.execute(sql, (*params, limit)).fetchall()
+        meetings = []
+        for row in rows:
+            meeting = dict(row)
+            kinds = meeting.pop("kinds")
+            meeting["artifacts"] = sorted(kinds.split(",")) if kinds else []
+            meetings.append(meeting)
+        cursor = (rows[-1]["started_at"], rows[-1]["id"]) if len(rows) == limit else None
+        return meetings, cursor
+
+    def get_meeting(self, meeting_id):
+        """The meeting row with {kind: {path, size_bytes, created_at}}, None if unknown"""
+        with self.lock:
+            row = self.conn.execute("SELECT * FROM meetings WHERE id = ?", (meeting_id,)).fetchone()
+            if row is None:
+                return None
+            artifacts = self.conn.execute(
+                "SELECT kind, path, size_bytes, created_at FROM artifacts WHERE meeting_id = ?", (meeting_id,)
+            ).fetchall()
+        meeting = dict(row)
+        meeting["artifacts"] = {a["kind"]: {k: a[k] for k in ("path", "size_bytes", "created_at")} for a in artifacts}
+        return meeting
+
+    def find_artifact(self, path):
+        """(meeting ID, kind) of the file at path, None if it is not cataloged"""
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT meeting_id, kind FROM artifacts WHERE path = ?", (os.path.abspath(path),)
+            ).fetchone()
+        return (row["meeting_id"], row["kind"]) if row else None
+
+    def read_artifact(self, meeting_id, kind):
+        """Text of a transcript or AI output, None when missing"""
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT path FROM artifacts WHERE meeting_id = ? AND kind = ?", (meeting_id, kind)
+            ).fetchone()
+        if row is None or not os.path.exists(row["path"]):
+            return None
+        with open(row["path"], encoding="utf-8", errors="replace") as f:
+            return f.read()
+
+    def delete_meeting(self, meeting_id, delete_files=False):
+        with self.lock, self.conn:
+            paths = [r["path"] for r in self.conn.execute("SELECT path FROM artifacts WHERE meeting_id = ?", (meeting_id,))]
+            self.conn.execute("DELETE FROM meetings WHERE id = ?", (meeting_id,))
+        if delete_files:
+            for path in paths:
+                if os.path.exists(path):
+                    os.remove(path)
+
+    def import_existing(self, output_root, recordings_root=None):
+        """
+        One-off backfill from the loose files written before the catalog existed:
+        each meeting_output/<timestamp>/ directory and each meeting_<platform>_<stamp>.wav.
+        A recording is linked to the first output directory written during or shortly
+        after it. Returns the number of meetings added
+        """
+        with self.lock:
+            known = {r["path"] for r in self.conn.execute("SELECT path FROM artifacts")}
+
+        recordings = []
+        if recordings_root and os.path.isdir(recordings_root):
+            for name in sorted(os.listdir(recordings_root)):
+                match = RECORDING_NAME_RE.match(name)
+                path = os.path.abspath(os.path.join(recordings_root, name))
+                if not match or path in known:
+                    continue
+                started = datetime.strptime(match["stamp"], "%Y%m%d_%H%M%S")
+                try:
+                    with wave.open(path, "rb") as wf:
+                        duration = wf.getnframes() / wf.getframerate()
+                except (wave.Error, EOFError, OSError):
+                    duration = None
+                recordings.append((started, duration, match["platform"], path))
+
+        outputs = []
+        if os.path.isdir(output_root):
+            for name in sorted(os.listdir(output_root)):
+                directory = os.path.join(output_root, name)
+                try:
+                    written = datetime.fromisoformat(name)
+                except ValueError:
+                    continue
+                files = {
+                    kind: os.path.abspath(os.path.join(directory, filename))
+                    for kind, filename in ARTIFACT_FILES.items()
+                    if os.path.exists(os.path.join(directory, filename))
+                }
+                if files and not known.intersection(files.values()):
+                    outputs.append((written, files))
+
+        added = 0
+        for started, duration, platform, path in recordings:
+            meeting_id = f"legacy-{started:%Y%m%d_%H%M%S}"
+            self.add_artifact(
+                meeting_id,
+                RECORDING,
+                path,
+                started_at=started.isoformat(),
+                platform=platform,
+                duration_seconds=duration,
+            )
+            # Outputs are written when the recording stops plus the time the service takes
+            end = started.timestamp() + (duration or 0) + 600
+            for index, (written, files) in enumerate(outputs):
+                if started <= written and written.timestamp() <= end:
+                    for kind, file_path in files.items():
+                        self.add_artifact(meeting_id, kind, file_path)
+                    del outputs[index]
+                    break
+            added += 1
+        for written, files in outputs:
+            meeting_id = f"legacy-{written:%Y%m%d_%H%M%S}"
+            for kind, file_path in files.items():
+                self.add_artifact(meeting_id, kind, file_path, started_at=written.isoformat())
+            added += 1
+        return added
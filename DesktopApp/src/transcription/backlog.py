@@ -0,0 +1,132 @@
+"""
+Client-side backlog of audio the transcription server has not acknowledged yet
+Buffers are numbered in capture order and kept until the server acks them, so a
+reconnect can replay exactly what was lost. Older buffers spill to a temporary file
+once the in-memory part grows past max_memory_bytes.
+"""
+
+import tempfile
+from collections import deque
+
+from monitoring.metrics import (
+    CLIENT_BACKLOG_CHUNKS,
+    CLIENT_BACKLOG_DROPS,
+    CLIENT_BACKLOG_SPILLED_BYTES,
+)
+
+# 16kHz float32 audio is 64KB per second: ~2 minutes in memory, ~1 hour on disk
+MAX_MEMORY_BYTES = 8 * 1024 * 1024
+MAX_DISK_BYTES = 256 * 1024 * 1024
+
+
+class BacklogEntry:
+    __slots__ = ("seq", "captured_at", "payload", "offset", "length")
+
+    def __init__(self, seq, payload, captured_at):
+        self.seq = seq
+        self.captured_at = captured_at
+        self.payload = payload  # None once spilled to disk
+        self.offset = None
+        self.length = len(payload)
+
+
+class AudioBacklog:
+    def __init__(self, max_memory_bytes=MAX_MEMORY_BYTES, max_disk_bytes=MAX_DISK_BYTES):
+        self.max_memory_bytes = max_memory_bytes
+        self.max_disk_bytes = max_disk_bytes
+        self.entries = deque()
+        self.next_seq = 1
+        self.memory_bytes = 0
+        self.disk_bytes = 0
+        self.file_bytes = 0  # includes acked entries until the file is reset
+        # Entries are spilled oldest first and acked oldest first, so the spilled ones are a prefix
+        self.spilled = 0
+        self.spill_file = None
+
+    def __len__(self):
+        return len(self.entries)
+
+    def append(self, payload, captured_at=None):
+        """Add a buffer and return its sequence number"""
+        entry = BacklogEntry(self.next_seq, payload, captured_at)
+        self.next_seq += 1
+        self.entries.append(entry)
+        self.memory_bytes += entry.length
+        self._spill()
+        CLIENT_BACKLOG_CHUNKS.set(len(self.entries))
+        return entry.seq
+
+    def ack(self, seq):
+        """Forget every buffer up to and including seq"""
+        while self.entries and self.entries[0].seq <= seq:
+            self._pop_oldest()
+        if self.spilled == 0 and self.file_bytes:
+            # Nothing left on disk, reuse the file from the start
+            self.spill_file.seek(0)
+            self.spill_file.truncate()
+            self.file_bytes = 0
+        CLIENT_BACKLOG_CHUNKS.set(len(self.entries))
+
+    def next_after(self, seq):
+        """(seq, payload, captured_at) of the first buffer after seq, or None"""
+        if not self.entries or seq >= self.entries[-1].seq:
+            return None
+        index = max(0, seq + 1 - self.entries[0].seq)
+        entry = self.entries[index]
+        return entry.seq, self._read(entry), entry.captured_at
+
+    def close(self):
+        if self.spill_file is not None:
+            self.spill_file.close()
+            self.spill_file = None
+
+    def _read(self, entry):
+        if entry.payload is not None:
+            return entry.payload
+        self.spill_file.seek(entry.offset)
+        return self.spill_file.read(entry.length)
+
+    def _pop_oldest(self):
+        entry = self.entries.popleft()
+        if entry.payload is None:
+            self.spilled -= 1
+            self.disk_bytes -= entry.length
+            CLIENT_BACKLOG_SPILLED_BYTES.set(self.disk_bytes)
+        else:
+            self.memory_bytes -= entry.length
+        return entry
+
+    def _spill(self):
+        # The newest buffer always stays in memory, it is about to be sent
+        while self.memory_bytes > self.max_memory_bytes and self.spilled < len(self.entries) - 1:
+            if self.spill_file is None:
+                self.spill_file = tempfile.TemporaryFile(prefix="focusnote-backlog-")
+            entry = self.entries[self.spilled]
+            self.spill_file.seek(self.file_bytes)
+            entry.offset = self.file_bytes
+            self.spill_file.write(entry.payload)
+            self.file_bytes += entry.length
+            entry.payload = None
+            self.spilled += 1
+            self.memory_bytes -= entry.length
+            self.disk_bytes += entry.length
+
+        while self.disk_bytes > self.max_disk_bytes and self.spilled:
+            self._pop_oldest()
+            CLIENT_BACKLOG_DROPS.inc()
+        if self.file_bytes > 2 * self.max_disk_bytes:
+            self._compact()
+        CLIENT_BACKLOG_SPILLED_BYTES.set(self.disk_bytes)
+
+    def _compact(self):
+        """Copy the spilled entries that are still live into a fresh file, during long outages"""
+        new_file = tempfile.TemporaryFile(prefix="focusnote-backlog-")
+        offset = 0
+        for i in range(self.spilled):
+            entry = self.entries[i]
+            new_file.write(self._read(entry))
+            entry.offset = offset
+            offset += entry.length
+        self.spill_file.close()
+        self.spill_file = new_file
+        self.file_bytes = offset
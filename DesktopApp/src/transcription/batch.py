@@ -0,0 +1,315 @@
+"""
+Batch transcription of saved recordings
+Transcribes every WAV under the given files and directories (meeting_recordings/ by
+default) with a pool of Whisper worker processes that load the same model as server.py,
+instead of replaying the audio through the server in real time. Writes a timestamped
+transcript per recording and, with --ai, the summary, action items and minutes from the
+meeting service. Progress is appended to a manifest so an interrupted run picks up where
+it stopped; recordings that changed since they were transcribed are done again.
+
+Usage:
+    python src/transcription/batch.py                       # everything in meeting_recordings/
+    python src/transcription/batch.py old_calls/ --ai --workers 4
+    python src/transcription/batch.py --retry-failed --model medium.en
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from datetime import datetime
+
+SRC_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if SRC_DIR not in sys.path:
+    sys.path.insert(0, SRC_DIR)
+
+from api.meeting_service import MeetingServiceClient
+from storage.catalog import (
+    ACTION_ITEMS,
+    ARTIFACT_FILES,
+    MINUTES,
+    RECORDING,
+    RECORDING_NAME_RE,
+    SUMMARY,
+    TRANSCRIPT,
+    MeetingCatalog,
+)
+from transcription.retranscribe import Retranscriber
+from transcription.server import choose_model
+
+OUTPUT_ROOT = os.path.abspath(os.path.join(SRC_DIR, "..", "meeting_output"))
+MANIFEST_NAME = "batch_manifest.jsonl"
+SEGMENTS_FILE = "segments.json"
+AI_ENDPOINTS = {SUMMARY: "/summary", ACTION_ITEMS: "/action-items", MINUTES: "/minutes"}
+
+
+def find_recordings(paths):
+    """WAV files given directly or found under the given directories, sorted"""
+    found = []
+    for path in paths:
+        if os.path.isdir(path):
+            for root, _, names in os.walk(path):
+                found.extend(os.path.join(root, name) for name in names if name.lower().endswith(".wav"))
+        elif os.path.isfile(path):
+            found.append(path)
+        else:
+            print(f"Skipping {path}: not found")
+    return sorted(os.path.abspath(path) for path in found)
+
+
+def format_timestamp(seconds):
+    minutes, seconds = divmod(int(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours:02d}:{minutes:02d}:{seconds:02d}"
+
+
+def timestamped_transcript(segments):
+    return "".join(f"[{format_timestamp(segment['start'])}] {segment['text']}\n" for segment in segments)
+
+
+class Manifest:
+    """Append-only JSON lines, one entry per finished or failed recording; the last one wins"""
+
+    def __init__(self, path):
+        self.path = path
+        self.entries = {}
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue  # a line cut off when the previous run was killed
+                    self.entries[entry["path"]] = entry
+
+    @staticmethod
+    def fingerprint(path):
+        stat = os.stat(path)
+        return {"size": stat.st_size, "mtime": stat.st_mtime}
+
+    def pending(self, path, ai=False, retry_failed=False):
+        """Whether path still needs transcribing ("transcribe"), only AI outputs ("ai") or nothing"""
+        entry = self.entries.get(path)
+        if entry is None or any(entry.get(k) != v for k, v in self.fingerprint(path).items()):
+            return "transcribe"
+        if entry["status"] == "failed":
+            return "transcribe" if retry_failed else None
+        if ai and not entry.get("ai"):
+            return "ai"
+        return None
+
+    def record(self, path, **fields):
+        entry = {"path": path, **self.fingerprint(path), **fields}
+        self.entries[path] = entry
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(entry) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+
+class BatchTranscriber:
+    def __init__(self, retranscriber, output_root=OUTPUT_ROOT, catalog=None, service=None):
+        """service (api.meeting_service.MeetingServiceClient) is only needed for AI outputs"""
+        self.retranscriber = retranscriber
+        self.output_root = output_root
+        self.catalog = catalog
+        self.service = service
+        os.makedirs(output_root, exist_ok=True)
+        self.manifest = Manifest(os.path.join(output_root, MANIFEST_NAME))
+
+    def meeting_id(self, path, audio_seconds):
+        """The catalog's ID for a recording, the file name for one it does not know yet"""
+        if self.catalog is None:
+            return os.path.splitext(os.path.basename(path))[0]
+        found = self.catalog.find_artifact(path)
+        if found and found[1] == RECORDING:
+            return found[0]
+        meeting_id = os.path.splitext(os.path.basename(path))[0]
+        match = RECORDING_NAME_RE.match(os.path.basename(path))
+        try:
+            started = datetime.strptime(match["stamp"], "%Y%m%d_%H%M%S").isoformat() if match else None
+        except ValueError:
+            started = None
+        self.catalog.add_artifact(
+            meeting_id,
+            RECORDING,
+            path,
+            started_at=started,
+            platform=match["platform"] if match else None,
+            duration_seconds=audio_seconds,
+        )
+        return meeting_id
+
+    def save(self, meeting_id, kind, content):
+        path = os.path.join(self.output_root, meeting_id, ARTIFACT_FILES[kind])
+        if self.catalog is not None:
+            return self.catalog.save_artifact(meeting_id, kind, path, content)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(content)
+        return path
+
+    def generate_outputs(self, meeting_id, transcript, segments):
+        """
+        Summary, action items and minutes from the meeting service, True if all were saved.
+        A failed output is reported and left for a later run, it never stops the batch
+        """
+        try:
+            transcript_id = self.service.upload(transcript, segments)
+        except Exception as e:
+            print(f"  /transcripts: {e!r}, sending the transcript inline")
+            transcript_id = None
+        saved = 0
+        for kind, endpoint in AI_ENDPOINTS.items():
+            try:
+                response = self.service.generate(endpoint, transcript, segments, transcript_id=transcript_id)
+                if response.status_code != 200:
+                    print(f"  {endpoint}: failed (status {response.status_code})")
+                    continue
+                result = response.json()
+                if kind == SUMMARY:
+                    content = result.get("summary", "")
+                elif kind == ACTION_ITEMS:
+                    content = "".join(f"- {item}\n" for item in result.get("action_items", []))
+                else:
+                    content = result.get("minutes", "")
+                self.save(meeting_id, kind, content)
+            except Exception as e:
+                # Unreachable service, a reply that is not JSON, a catalog or disk error
+                print(f"  {endpoint}: {e!r}")
+                continue
+            saved += 1
+        return saved == len(AI_ENDPOINTS)
+
+    def save_transcript(self, path, result):
+        """Index the recording and save its transcript and segments, returns its meeting ID"""
+        meeting_id = self.meeting_id(path, result["audio_seconds"])
+        self.save(meeting_id, TRANSCRIPT, timestamped_transcript(result["segments"]))
+        # Kept for AI outputs requested by a later run
+        with open(os.path.join(self.output_root, meeting_id, SEGMENTS_FILE), "w", encoding="utf-8") as f:
+            json.dump(result["segments"], f)
+        return meeting_id
+
+    def run(self, paths, ai=False, retry_failed=False):
+        """Transcribe what the manifest has not done yet, returns the run's totals"""
+        todo, ai_only = [], []
+        for path in paths:
+            state = self.manifest.pending(path, ai, retry_failed)
+            if state == "transcribe":
+                todo.append(path)
+            elif state == "ai":
+                ai_only.append(path)
+        skipped = len(paths) - len(todo) - len(ai_only)
+        print(f"{len(paths)} recordings: {len(todo)} to transcribe, {len(ai_only)} need AI outputs, {skipped} done")
+
+        started = time.perf_counter()
+        totals = {"transcribed": 0, "failed": 0, "audio_seconds": 0.0}
+        for path in ai_only:
+            entry = dict(self.manifest.entries[path])
+            try:
+                with open(os.path.join(self.output_root, entry["meeting_id"], SEGMENTS_FILE), encoding="utf-8") as f:
+                    segments = json.load(f)
+            except (OSError, ValueError) as e:
+                print(f"{os.path.basename(path)}: no saved segments for AI outputs ({e})")
+                continue
+            transcript = " ".join(segment["text"] for segment in segments)
+            entry["ai"] = self.generate_outputs(entry["meeting_id"], transcript, segments)
+            self.manifest.record(path, **{k: v for k, v in entry.items() if k not in ("path", "size", "mtime")})
+
+        for i, (path, result, error) in enumerate(self.retranscriber.transcribe_many(todo), 1):
+            name = os.path.basename(path)
+            if error is not None:
+                print(f"[{i}/{len(todo)}] {name}: failed ({error})")
+                self.manifest.record(path, status="failed", error=str(error))
+                totals["failed"] += 1
+                continue
+            try:
+                meeting_id = self.save_transcript(path, result)
+            except Exception as e:
+                # Transcribed but not saved, a later run with --retry-failed does it again
+                print(f"[{i}/{len(todo)}] {name}: could not save the transcript ({e!r})")
+                self.manifest.record(path, status="failed", error=str(e))
+                totals["failed"] += 1
+                continue
+            ai_done = False
+            if ai and result["transcript"].strip():
+                ai_done = self.generate_outputs(meeting_id, result["transcript"], result["segments"])
+            self.manifest.record(
+                path,
+                status="done",
+                meeting_id=meeting_id,
+                audio_seconds=result["audio_seconds"],
+                seconds=result["seconds"],
+                model=result["model"],
+                ai=ai_done,
+            )
+            totals["transcribed"] += 1
+            totals["audio_seconds"] += result["audio_seconds"]
+            elapsed = time.perf_counter() - started
+            print(
+                f"[{i}/{len(todo)}] {name}: {result['audio_seconds'] / 60:.1f} min, "
+                f"{len(result['segments'])} segments ({totals['audio_seconds'] / elapsed:.1f}x real time so far)"
+            )
+
+        totals["wall_seconds"] = time.perf_counter() - started
+        totals["audio_hours_per_hour"] = (
+            totals["audio_seconds"] / totals["wall_seconds"] if totals["wall_seconds"] else None
+        )
+        return totals
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Transcribe saved recordings in bulk")
+    parser.add_argument("paths", nargs="*", default=["meeting_recordings"], help="WAV files or directories")
+    parser.add_argument("--output", default=OUTPUT_ROOT, help="Where transcripts and the manifest go")
+    parser.add_argument("--model", help="Whisper model name (default: the calibrated one, see server.py --calibrate)")
+    parser.add_argument("--workers", type=int, help="Worker processes, each loads the model")
+    parser.add_argument("--threads", type=int, help="Inference threads per worker")
+    parser.add_argument("--vocabulary", help="Comma-separated names and terms to prompt Whisper with")
+    parser.add_argument("--language", help="Skip language detection")
+    parser.add_argument("--ai", action="store_true", help="Also generate summaries, action items and minutes")
+    parser.add_argument("--service-url", default="http://localhost:8888", help="Meeting service for --ai")
+    parser.add_argument("--retry-failed", action="store_true", help="Transcribe recordings that failed before again")
+    parser.add_argument("--no-catalog", action="store_true", help="Do not index the outputs in the meeting catalog")
+    args = parser.parse_args()
+
+    paths = find_recordings(args.paths)
+    # Only the model, the calibrated thread count is for a single process
+    model = args.model or choose_model()["model"]
+    retranscriber = Retranscriber(
+        model=model,
+        workers=args.workers,
+        threads=args.threads,
+        vocabulary=[t.strip() for t in args.vocabulary.split(",")] if args.vocabulary else None,
+        language=args.language,
+    )
+    catalog = None if args.no_catalog else MeetingCatalog()
+    batch = BatchTranscriber(
+        retranscriber,
+        output_root=args.output,
+        catalog=catalog,
+        service=MeetingServiceClient(args.service_url) if args.ai else None,
+    )
+    print(f"Model {model}, {retranscriber.workers} workers x {retranscriber.threads} threads")
+    try:
+        with retranscriber:
+            totals = batch.run(paths, ai=args.ai, retry_failed=args.retry_failed)
+    except KeyboardInterrupt:
+        print("\nInterrupted, run again to continue")
+        sys.exit(1)
+
+    hours = totals["audio_seconds"] / 3600
+    wall_hours = totals["wall_seconds"] / 3600
+    print(f"\nTranscribed {totals['transcribed']} recordings, {totals['failed']} failed")
+    if totals["audio_hours_per_hour"]:
+        print(
+            f"{hours:.2f} audio hours in {wall_hours:.2f} hours: "
+            f"{totals['audio_hours_per_hour']:.1f} audio hours per hour"
+        )
+    if totals["failed"]:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
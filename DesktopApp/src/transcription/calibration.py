@@ -0,0 +1,174 @@
+"""
+Whisper model calibration
+Times candidate models and thread counts on a reference clip and saves the results as a
+host profile. At startup the server picks the most accurate model whose real-time factor
+(inference seconds per second of audio) stays under a target, so smaller boxes keep up
+with live audio instead of falling behind on large-v3.
+"""
+
+import json
+import os
+import platform
+import time
+import wave
+from datetime import datetime
+
+import numpy as np
+
+SAMPLE_RATE = 16000
+# Most accurate first, quantized variants trade a little accuracy for speed
+CANDIDATE_MODELS = [
+    "large-v3",
+    "large-v3-q5_0",
+    "medium",
+    "medium-q5_0",
+    "small",
+    "small-q5_1",
+    "base",
+    "base-q5_1",
+    "tiny",
+]
+# Headroom for partial passes and a second meeting on the same box
+DEFAULT_TARGET_RTF = 0.5
+# Stop sweeping thread counts for a model this far above the target
+HOPELESS_RTF_FACTOR = 4.0
+REFERENCE_SECONDS = 30.0
+PROFILE_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+    "config",
+    "whisper_profile.json",
+)
+
+
+def reference_clip(seconds=REFERENCE_SECONDS):
+    """
+    Built-in speech-like clip: voiced syllables with a moving pitch and formant-ish
+    harmonics, pauses between phrases and a noise floor. Deterministic, so profiles
+    from different runs are comparable
+    """
+    rng = np.random.default_rng(0)
+    t = np.arange(int(seconds * SAMPLE_RATE)) / SAMPLE_RATE
+    pitch = 140 + 30 * np.sin(2 * np.pi * 0.3 * t) + 15 * np.sin(2 * np.pi * 2.1 * t)
+    phase = 2 * np.pi * np.cumsum(pitch) / SAMPLE_RATE
+    voice = sum(np.sin(k * phase) / k for k in range(1, 12))
+    syllables = np.clip(np.sin(2 * np.pi * 3.5 * t), 0, None) ** 0.5
+    phrases = (t % 5.0) < 3.8
+    signal = voice * syllables * phrases + 0.02 * rng.standard_normal(len(t))
+    return (signal / np.max(np.abs(signal)) * 0.5).astype(np.float32)
+
+
+def load_clip(path):
+    """16-bit WAV -> 16kHz mono float32"""
+    with wave.open(path, "rb") as wf:
+        channels, rate = wf.getnchannels(), wf.getframerate()
+        samples = np.frombuffer(wf.readframes(wf.getnframes()), dtype=np.int16)
+    audio = samples.reshape(-1, channels).mean(axis=1) / 32768.0
+    if rate != SAMPLE_RATE:
+        positions = np.arange(0, len(audio), rate / SAMPLE_RATE)
+        audio = np.interp(positions, np.arange(len(audio)), audio)
+    return audio.astype(np.float32)
+
+
+def thread_counts(cpu_count=None):
+    """1, 2, 4, ... up to the number of CPUs, which is always included"""
+    cpu_count = cpu_count or os.cpu_count() or 1
+    counts = []
+    n = 1
+    while n < cpu_count:
+        counts.append(n)
+        n *= 2
+    counts.append(cpu_count)
+    return counts
+
+
+def host_info():
+    return {
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "cpu_count": os.cpu_count(),
+    }
+
+
+def measure(model, clip, threads):
+    """Real-time factor of one transcription of clip with threads threads"""
+    start = time.perf_counter()
+    list(model.transcribe(clip, n_threads=threads))
+    return (time.perf_counter() - start) / (len(clip) / SAMPLE_RATE)
+
+
+def calibrate(load_model, models=CANDIDATE_MODELS, threads=None, clip=None, target_rtf=DEFAULT_TARGET_RTF):
+    """
+    Time every model at every thread count, largest count first. load_model(name) returns
+    a model whose transcribe() accepts n_threads. Returns the profile dict
+    """
+    clip = reference_clip() if clip is None else clip
+    threads = sorted(threads or thread_counts(), reverse=True)
+    results = []
+    for name in models:
+        print(f"Calibrating {name}...")
+        try:
+            load_start = time.perf_counter()
+            model = load_model(name)
+            load_seconds = time.perf_counter() - load_start
+            # The first call pays for lazy initialization, keep it out of the timings
+            list(model.transcribe(clip[: 2 * SAMPLE_RATE], n_threads=threads[0]))
+        except Exception as e:
+            print(f"  {name}: could not load ({e})")
+            results.append({"model": name, "error": str(e)})
+            continue
+
+        for n in threads:
+            rtf = measure(model, clip, n)
+            print(f"  {name} x{n} threads: real-time factor {rtf:.2f}")
+            results.append({"model": name, "threads": n, "rtf": rtf, "load_seconds": load_seconds})
+            if rtf > target_rtf * HOPELESS_RTF_FACTOR:
+                break  # fewer threads will not bring it under the target
+        del model
+
+    return {
+        "created": datetime.now().isoformat(),
+        "host": host_info(),
+        "clip_seconds": len(clip) / SAMPLE_RATE,
+        "models": list(models),
+        "results": results,
+    }
+
+
+def select(profile, target_rtf=DEFAULT_TARGET_RTF):
+    """
+    (model, threads, rtf) of the most accurate model that stays under target_rtf at its
+    best thread count, or the fastest measured configuration when none does
+    """
+    measured = [r for r in profile["results"] if "rtf" in r]
+    if not measured:
+        return None
+    rank = {name: i for i, name in enumerate(profile.get("models", CANDIDATE_MODELS))}
+    fitting = [r for r in measured if r["rtf"] <= target_rtf]
+    if fitting:
+        best = min(fitting, key=lambda r: (rank.get(r["model"], len(rank)), r["rtf"]))
+    else:
+        best = min(measured, key=lambda r: r["rtf"])
+        print(f"No calibrated model stays under real-time factor {target_rtf}, using the fastest")
+    return best["model"], best["threads"], best["rtf"]
+
+
+def save_profile(profile, path=PROFILE_PATH):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w") as f:
+        json.dump(profile, f, indent=2)
+    print(f"Calibration profile written to {path}")
+
+
+def load_profile(path=PROFILE_PATH):
+    """The saved profile, None if missing, unreadable or made on different hardware"""
+    try:
+        with open(path) as f:
+            profile = json.load(f)
+    except (OSError, ValueError):
+        return None
+    host = profile.get("host", {})
+    current = host_info()
+    if host.get("machine") != current["machine"] or host.get("cpu_count") != current["cpu_count"]:
+        print(f"Ignoring calibration profile from different hardware: {path}")
+        return None
+    return profile
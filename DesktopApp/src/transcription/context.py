@@ -0,0 +1,88 @@
+"""
+Decoder context carried between chunks of one transcription session
+The tail of the previous text and a vocabulary of names and project terms are passed to
+Whisper as the initial prompt, and the language is detected once instead of per chunk.
+"""
+
+# Whisper keeps at most 224 prompt tokens, stay well below that
+MAX_PROMPT_CHARS = 600
+MAX_VOCABULARY_TERMS = 40
+# Detection on near-silent audio is unreliable, so only trust confident results
+MIN_LANGUAGE_PROBABILITY = 0.5
+MAX_LANGUAGE_ATTEMPTS = 3
+
+
+class DecoderContext:
+    def __init__(self, vocabulary=None, language=None, enabled=True, tail_chars=200):
+        self.vocabulary = [term.strip() for term in (vocabulary or []) if term.strip()]
+        self.vocabulary = self.vocabulary[:MAX_VOCABULARY_TERMS]
+        self.language = language
+        self.enabled = enabled
+        self.tail_chars = tail_chars
+        self.previous_text = ""
+        self.language_attempts = 0
+
+    def configure(self, data):
+        """Apply the vocabulary/language/context fields of a client config message"""
+        if "vocabulary" in data:
+            terms = data.get("vocabulary") or []
+            self.vocabulary = [str(t).strip() for t in terms if str(t).strip()]
+            self.vocabulary = self.vocabulary[:MAX_VOCABULARY_TERMS]
+        if data.get("language"):
+            self.language = data["language"]
+        if "context" in data:
+            self.enabled = bool(data["context"])
+
+    @property
+    def needs_language(self):
+        return (
+            self.enabled
+            and self.language is None
+            and self.language_attempts < MAX_LANGUAGE_ATTEMPTS
+        )
+
+    def set_detected_language(self, language, probability):
+        """Record a detection result, returns True once the language is fixed for the session"""
+        self.language_attempts += 1
+        if language and probability >= MIN_LANGUAGE_PROBABILITY:
+            self.language = language
+            return True
+        return False
+
+    def stop_language_detection(self):
+        """The model cannot detect languages, let Whisper decide per chunk"""
+        self.language_attempts = MAX_LANGUAGE_ATTEMPTS
+
+    def initial_prompt(self):
+        """
+        Vocabulary first, then as much of the end of the previous text as still fits,
+        cut at a word boundary. Terms that do not fit are left out whole
+        """
+        prompt = ""
+        if self.vocabulary:
+            prompt = "Glossary: " + ", ".join(self.vocabulary) + "."
+            if len(prompt) > MAX_PROMPT_CHARS:
+                prompt = prompt[: MAX_PROMPT_CHARS - 1].rsplit(", ", 1)[0] + "."
+        room = MAX_PROMPT_CHARS - len(prompt) - 1  # one for the separating space
+        if self.previous_text and room > 0:
+            tail = self.previous_text[-min(self.tail_chars, room) :]
+            if len(tail) < len(self.previous_text) and self.previous_text[-len(tail) - 1] != " ":
+                # Starts mid-word, drop the partial word (all of it when nothing else fits)
+                tail = tail.split(" ", 1)[1] if " " in tail else ""
+            prompt = f"{prompt} {tail}".strip()
+        return prompt
+
+    def decode_params(self):
+        """
+        Extra pywhispercpp transcribe() params for the next chunk. Both keys are always
+        set because pywhispercpp keeps params between calls on a model shared by sessions.
+        """
+        prompt = self.initial_prompt() if self.enabled else ""
+        return {"initial_prompt": prompt, "language": self.language or "auto"}
+
+    def update(self, text):
+        """Remember the finalized text of the last chunk"""
+        text = text.strip()
+        if text:
+            combined = f"{self.previous_text} {text}".strip()
+            self.previous_text = combined[-self.tail_chars * 2 :]
@@ -0,0 +1,347 @@
+"""
+Embedded transcription engine
+Runs the transcription server's AudioServer in a child process of the desktop app instead of
+as a separate websocket service. Audio buffers are written into a shared-memory ring and only
+their position in it crosses the process boundary, so nothing is framed, sent over TCP or
+copied through a pipe. Control messages and results still use the server's JSON messages so
+sessions, acks and resume behave exactly as they do over a websocket.
+EmbeddedTranscriptionClient is a drop-in replacement for TranscriptionWebSocketClient.
+"""
+
+import asyncio
+import multiprocessing
+import queue
+import threading
+from multiprocessing import shared_memory
+
+import numpy as np
+from websockets.exceptions import ConnectionClosed
+
+from transcription.websocket_client import TranscriptionWebSocketClient
+
+# Ring size, room for a dozen 10s buffers or a few hundred streaming hops
+RING_CAPACITY = 8 * 1024 * 1024
+# Bytes before the ring's data: the total the engine has read, a uint64 only it writes
+RING_HEADER = 8
+# Seconds the engine may take to load its models before the client gives up on it
+READY_TIMEOUT = 300.0
+
+CLOSED = None  # end of a connection's messages
+
+
+class SharedAudioRing:
+    """
+    Single-producer, single-consumer byte ring in shared memory. Positions are running
+    totals, the writer waits for the reader when the ring is full
+    """
+
+    def __init__(self, shm, capacity):
+        self.shm = shm
+        self.capacity = capacity
+        self.read_total = np.ndarray((1,), dtype=np.uint64, buffer=shm.buf[:RING_HEADER])
+        self.data = shm.buf[RING_HEADER : RING_HEADER + capacity]
+        self.write_total = 0  # only meaningful in the writing process
+
+    @classmethod
+    def create(cls, capacity=RING_CAPACITY):
+        ring = cls(shared_memory.SharedMemory(create=True, size=RING_HEADER + capacity), capacity)
+        ring.read_total[0] = 0
+        return ring
+
+    @classmethod
+    def attach(cls, name, capacity):
+        return cls(shared_memory.SharedMemory(name=name), capacity)
+
+    @property
+    def name(self):
+        return self.shm.name
+
+    def free(self):
+        return self.capacity - (self.write_total - int(self.read_total[0]))
+
+    def write(self, payload):
+        """Copy payload in at the write position, returns (start, length). Caller checks free()"""
+        start, length = self.write_total, len(payload)
+        offset = start % self.capacity
+        first = min(length, self.capacity - offset)
+        self.data[offset : offset + first] = payload[:first]
+        if first < length:
+            self.data[: length - first] = payload[first:]
+        self.write_total += length
+        return start, length
+
+    def read(self, start, length):
+        """Copy out length bytes written at start and hand the space back to the writer"""
+        offset = start % self.capacity
+        first = min(length, self.capacity - offset)
+        payload = bytes(self.data[offset : offset + first])
+        if first < length:
+            payload += bytes(self.data[: length - first])
+        self.read_total[0] = start + length
+        return payload
+
+    def close(self, unlink=False):
+        # Views into the buffer must go before the mapping can be closed
+        self.read_total = None
+        self.data.release()
+        self.shm.close()
+        if unlink:
+            self.shm.unlink()
+
+
+class LocalConnection:
+    """The engine's side of a connection, fed by the client's commands instead of a socket"""
+
+    remote_address = "embedded client"
+
+    def __init__(self, results):
+        self.results = results
+        self.inbox = asyncio.Queue()
+        self.closed = False
+
+    def deliver(self, message):
+        self.inbox.put_nowait(message)
+
+    def close(self):
+        if not self.closed:
+            self.closed = True
+            self.inbox.put_nowait(CLOSED)
+
+    async def send(self, data):
+        if self.closed:
+            raise ConnectionClosed(None, None)
+        self.results.put(data)
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        message = await self.inbox.get()
+        if message is CLOSED:
+            raise StopAsyncIteration
+        return message
+
+
+def engine_main(ring_name, capacity, commands, results, ready, model_factory=None, partial_model_factory=None):
+    """
+    Child process entry point. model_factory and partial_model_factory are picklable
+    callables returning models, by default the calibrated Whisper model is loaded
+    """
+    from transcription.server import AudioServer, choose_model
+
+    ring = SharedAudioRing.attach(ring_name, capacity)
+    if model_factory is None:
+        server = AudioServer(metrics_port=None, model_info=choose_model())
+    else:
+        server = AudioServer(
+            model=model_factory(),
+            metrics_port=None,
+            partial_model=partial_model_factory() if partial_model_factory else None,
+        )
+    ready.set()
+    try:
+        asyncio.run(serve(server, ring, commands, results))
+    except KeyboardInterrupt:
+        pass  # the app handles Ctrl+C and stops the engine
+    finally:
+        ring.close()
+
+
+async def serve(server, ring, commands, results):
+    """Run one connection at a time from the client's commands until told to stop"""
+    loop = asyncio.get_running_loop()
+    inbox = asyncio.Queue()
+
+    def pump():
+        # multiprocessing queues block, so a thread feeds them to the event loop
+        while True:
+            command = commands.get()
+            loop.call_soon_threadsafe(inbox.put_nowait, command)
+            if command[0] == "stop":
+                return
+
+    threading.Thread(target=pump, name="engine-commands", daemon=True).start()
+    connection = None
+    try:
+        while True:
+            command = await inbox.get()
+            kind = command[0]
+            if kind == "audio":
+                # Read straight away so the ring frees up while the chunk waits its turn
+                payload = ring.read(command[1], command[2])
+                if connection is not None:
+                    connection.deliver(payload)
+            elif kind == "text":
+                if connection is not None:
+                    connection.deliver(command[1])
+            elif kind == "open":
+                if connection is not None:
+                    connection.close()
+                connection = LocalConnection(results)
+                asyncio.ensure_future(server.handle_client(connection))
+            elif kind == "close":
+                if connection is not None:
+                    connection.close()
+                    connection = None
+            elif kind == "stop":
+                break
+    finally:
+        if connection is not None:
+            connection.close()
+        server.close_sessions()
+        await asyncio.sleep(0)  # let cancelled session tasks finish
+
+
+class EngineProcess:
+    """The engine child process with its ring and queues, replaced when it dies"""
+
+    def __init__(self, model_factory=None, partial_model_factory=None, capacity=RING_CAPACITY):
+        # spawn, since forking a process with Qt and audio threads running is unsafe
+        context = multiprocessing.get_context("spawn")
+        self.ring = SharedAudioRing.create(capacity)
+        self.commands = context.Queue()
+        self.results = context.Queue()
+        self.ready = context.Event()
+        self.process = context.Process(
+            target=engine_main,
+            args=(
+                self.ring.name,
+                capacity,
+                self.commands,
+                self.results,
+                self.ready,
+                model_factory,
+                partial_model_factory,
+            ),
+            name="transcription-engine",
+            daemon=True,
+        )
+        self.process.start()
+
+    @property
+    def alive(self):
+        return self.process.is_alive()
+
+    def wait_ready(self):
+        """Block until the models are loaded, raises ConnectionError if the engine dies first"""
+        waited = 0.0
+        while not self.ready.wait(0.25):
+            waited += 0.25
+            if not self.alive:
+                raise ConnectionError(f"Transcription engine exited with code {self.process.exitcode}")
+            if waited >= READY_TIMEOUT:
+                raise ConnectionError(f"Transcription engine not ready after {READY_TIMEOUT:.0f}s")
+
+    def stop(self, timeout=5.0):
+        if self.alive:
+            self.commands.put(("stop",))
+            self.process.join(timeout)
+        if self.alive:
+            self.process.terminate()
+            self.process.join(1.0)
+        self.ring.close(unlink=True)
+
+
+class EngineConnection:
+    """
+    The client's side of a connection to the engine, with the parts of the websockets
+    connection API the client uses
+    """
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.inbox = None
+        self.reader = None
+        self.closed = False
+
+    async def __aenter__(self):
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, self.engine.wait_ready)
+        self.inbox = asyncio.Queue()
+        self.engine.commands.put(("open",))
+        self.reader = threading.Thread(
+            target=self._read_results, args=(loop,), name="engine-results", daemon=True
+        )
+        self.reader.start()
+        return self
+
+    async def __aexit__(self, *exc_info):
+        self.closed = True
+        if self.engine.alive:
+            self.engine.commands.put(("close",))
+        await asyncio.get_running_loop().run_in_executor(None, self.reader.join)
+
+    def _read_results(self, loop):
+        while not self.closed:
+            try:
+                message = self.engine.results.get(timeout=0.25)
+            except queue.Empty:
+                if self.engine.alive:
+                    continue
+                print(f"Transcription engine exited with code {self.engine.process.exitcode}")
+                message = CLOSED
+            loop.call_soon_threadsafe(self.inbox.put_nowait, message)
+            if message is CLOSED:
+                return
+
+    async def send(self, message):
+        if not self.engine.alive:
+            raise ConnectionError("Transcription engine is not running")
+        if isinstance(message, str):
+            self.engine.commands.put(("text", message))
+            return
+        ring = self.engine.ring
+        if len(message) > ring.capacity:
+            raise ValueError(f"Audio frame of {len(message)} bytes does not fit the ring")
+        while ring.free() < len(message):
+            # The engine reads frames as they arrive, so this only waits while it is busy
+            if not self.engine.alive:
+                raise ConnectionError("Transcription engine is not running")
+            await asyncio.sleep(0.005)
+        start, length = ring.write(message)
+        self.engine.commands.put(("audio", start, length))
+
+    async def recv(self):
+        message = await self.inbox.get()
+        if message is CLOSED:
+            raise ConnectionError("Transcription engine exited")
+        return message
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        message = await self.inbox.get()
+        if message is CLOSED:
+            raise StopAsyncIteration
+        return message
+
+
+class EmbeddedTranscriptionClient(TranscriptionWebSocketClient):
+    """
+    TranscriptionWebSocketClient backed by an engine in a child process. The engine starts
+    with the first connection, keeps its models loaded between recordings and is restarted
+    if it dies; unacknowledged audio is resent to the new engine from the backlog
+    """
+
+    def __init__(self, audio_capture, model_factory=None, partial_model_factory=None, **options):
+        """model_factory and partial_model_factory are passed to engine_main"""
+        options.setdefault("server_url", "embedded")
+        super().__init__(audio_capture, **options)
+        self.model_factory = model_factory
+        self.partial_model_factory = partial_model_factory
+        self.engine = None
+
+    def _connect(self):
+        if self.engine is None or not self.engine.alive:
+            if self.engine is not None:
+                self.engine.stop()
+            print("Starting transcription engine...")
+            self.engine = EngineProcess(self.model_factory, self.partial_model_factory)
+        return EngineConnection(self.engine)
+
+    def stop(self):
+        super().stop()
+        if self.engine is not None:
+            self.engine.stop()
+            self.engine = None
@@ -0,0 +1,129 @@
+"""
+Load shedding for the transcription server
+Tracks audio waiting for inference per session and the age of the oldest waiting audio.
+When that lag grows the server degrades in steps instead of falling further behind:
+queued chunks are merged into larger batches, near-silent chunks are skipped and partial
+captions pause; past a second threshold finals move to the fast model. Levels recover
+with hysteresis once the lag drops. Results carry the degradations applied to them.
+"""
+
+import time
+from collections import deque
+
+import numpy as np
+
+from monitoring.metrics import SERVER_BACKLOG_SECONDS, SERVER_DEGRADATIONS, SERVER_LAG
+
+NORMAL = "normal"
+DEGRADED = "degraded"
+OVERLOADED = "overloaded"
+LEVELS = [NORMAL, DEGRADED, OVERLOADED]
+
+# Degradations reported in a result's "degraded" list
+MERGED = "merged"  # several queued chunks were transcribed as one
+SKIPPED_SILENCE = "skipped_silence"  # the chunk was too quiet to be worth transcribing
+FAST_MODEL = "fast_model"  # transcribed with the partial-caption model
+NO_PARTIALS = "no_partials"  # partial captions were paused while this audio was queued
+
+SAMPLE_RATE = 16000
+
+
+def is_quiet(audio, silence_dbfs):
+    """Whether float32 audio stays below silence_dbfs RMS"""
+    if len(audio) == 0:
+        return True
+    rms = float(np.sqrt(np.mean(audio * audio)))
+    return 20 * np.log10(max(rms, 1e-10)) < silence_dbfs
+
+
+class LoadShedder:
+    def __init__(
+        self,
+        degrade_lag=5.0,
+        overload_lag=15.0,
+        recover_ratio=0.5,
+        silence_dbfs=-45.0,
+        max_batch_seconds=25.0,
+    ):
+        """
+        Lags are seconds the oldest waiting audio has been queued. A level is left once
+        the lag falls below recover_ratio times its threshold. max_batch_seconds bounds
+        a merged batch, Whisper sees at most 30s at once
+        """
+        self.thresholds = {DEGRADED: degrade_lag, OVERLOADED: overload_lag}
+        self.recover_ratio = recover_ratio
+        self.silence_dbfs = silence_dbfs
+        self.max_batch_seconds = max_batch_seconds
+        self.level = NORMAL
+        self.pending = {}  # session -> deque of (queued at, seconds)
+
+    def add(self, session, seconds):
+        """Audio of a session was queued for inference"""
+        self.pending.setdefault(session, deque()).append((time.monotonic(), seconds))
+        self.update()
+
+    def done(self, session, count=1):
+        """The oldest count queued chunks of a session were transcribed or skipped"""
+        queue = self.pending.get(session)
+        for _ in range(count):
+            if queue:
+                queue.popleft()
+        if not queue:
+            self.pending.pop(session, None)
+        self.update()
+
+    def forget(self, session):
+        self.pending.pop(session, None)
+        self.update()
+
+    def lag(self):
+        """Seconds the oldest queued audio of any session has been waiting"""
+        oldest = [queue[0][0] for queue in self.pending.values() if queue]
+        return time.monotonic() - min(oldest) if oldest else 0.0
+
+    def pending_seconds(self, session=None):
+        queues = [self.pending.get(session, ())] if session is not None else self.pending.values()
+        return sum(seconds for queue in queues for _, seconds in queue)
+
+    def update(self):
+        """Re-evaluate the level from the current lag"""
+        lag = self.lag()
+        SERVER_LAG.set(lag)
+        SERVER_BACKLOG_SECONDS.set(self.pending_seconds())
+
+        level = NORMAL
+        for candidate in (DEGRADED, OVERLOADED):
+            threshold = self.thresholds[candidate]
+            # Stay in a level until the lag is well below its threshold
+            if LEVELS.index(self.level) >= LEVELS.index(candidate):
+                threshold *= self.recover_ratio
+            if lag >= threshold:
+                level = candidate
+        if level != self.level:
+            print(f"Load: {self.level} -> {level} (lag {lag:.1f}s, {self.pending_seconds():.0f}s of audio queued)")
+            self.level = level
+        return level
+
+    @property
+    def degraded(self):
+        return self.level != NORMAL
+
+    @property
+    def overloaded(self):
+        return self.level == OVERLOADED
+
+    def quiet(self, audio):
+        """Skip this chunk? Only while degraded, silence is otherwise left to Whisper"""
+        return self.degraded and is_quiet(audio, self.silence_dbfs)
+
+    def record(self, degradations):
+        for kind in degradations:
+            SERVER_DEGRADATIONS.labels(kind=kind).inc()
+
+    def status(self):
+        return {
+            "level": self.level,
+            "lag": self.lag(),
+            "queued_audio_seconds": self.pending_seconds(),
+            "sessions_waiting": len(self.pending),
+        }
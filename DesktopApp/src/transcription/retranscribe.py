@@ -0,0 +1,315 @@
+"""
+Post-meeting re-transcription
+Transcribes a saved recording again once the call is over, without the live path's time
+pressure: the best model, ~25s segments cut at pauses instead of 5s buffers, and decoder
+context carried through the whole recording. The recording is split into one contiguous
+part per worker process; each worker memory-maps the WAV and reads only its own part, so
+the audio is never loaded whole or copied between processes. A started Retranscriber keeps
+its workers and their models for any number of recordings (see transcription/batch.py).
+"""
+
+import multiprocessing
+import os
+import struct
+import threading
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+import numpy as np
+import psutil
+
+from transcription.context import DecoderContext
+from transcription.load import is_quiet
+from transcription.streaming import SEGMENT_PARAMS
+
+SAMPLE_RATE = 16000
+# Whisper decodes 30s windows, stay a little below so a segment is never cut in two
+SEGMENT_SECONDS = 25.0
+# Segments end at the quietest frame of their last few seconds
+SEARCH_SECONDS = 5.0
+FRAME_SECONDS = 0.1
+# Segments that stay below this are silence and are not transcribed
+SILENCE_DBFS = -45.0
+# Seconds of audio read from the memory map at a time while looking for pauses
+SCAN_BLOCK_SECONDS = 60.0
+# Memory one worker needs for its copy of the model (whisper.cpp's figures), by model size
+MODEL_MEMORY_MB = {"tiny": 273, "base": 388, "small": 852, "medium": 2100, "large": 3900}
+# Quantized models (e.g. large-v3-q5_0) need about this share of it
+QUANTIZED_MEMORY_SHARE = 0.4
+# Left free for the app, the live transcription model and everything else on the box
+RESERVED_MEMORY_MB = 1024
+
+
+def wav_memmap(path):
+    """(int16 frames x channels memory map, sample rate) of a 16-bit PCM WAV file"""
+    with open(path, "rb") as f:
+        riff, _, wave_id = struct.unpack("<4sI4s", f.read(12))
+        if riff != b"RIFF" or wave_id != b"WAVE":
+            raise ValueError(f"{path} is not a WAV file")
+        fmt = None
+        while True:
+            header = f.read(8)
+            if len(header) < 8:
+                raise ValueError(f"{path} has no audio data")
+            chunk_id, size = struct.unpack("<4sI", header)
+            if chunk_id == b"fmt ":
+                fmt = struct.unpack("<HHIIHH", f.read(16))
+                f.seek(size - 16 + (size & 1), os.SEEK_CUR)
+            elif chunk_id == b"data":
+                offset = f.tell()
+                break
+            else:
+                f.seek(size + (size & 1), os.SEEK_CUR)
+    if fmt is None:
+        raise ValueError(f"{path} has no format chunk")
+    audio_format, channels, sample_rate, _, _, bits = fmt
+    if audio_format != 1 or bits != 16:
+        raise ValueError(f"{path}: only 16-bit PCM is supported")
+    # A recording cut off while saving can claim more data than the file holds
+    size = min(size, os.path.getsize(path) - offset)
+    frames = size // (channels * 2)
+    if frames == 0:
+        return np.zeros((0, channels), dtype=np.int16), sample_rate
+    return np.memmap(path, dtype="<i2", mode="r", offset=offset, shape=(frames, channels)), sample_rate
+
+
+def to_float32_16k(frames, sample_rate):
+    """int16 frames x channels -> 16kHz mono float32 as Whisper expects"""
+    audio = frames.astype(np.float32).mean(axis=1) / 32768.0
+    if sample_rate != SAMPLE_RATE and len(audio):
+        target_length = int(len(audio) * SAMPLE_RATE / sample_rate)
+        positions = np.linspace(0, len(audio) - 1, target_length)
+        audio = np.interp(positions, np.arange(len(audio)), audio).astype(np.float32)
+    return audio
+
+
+def frame_energy(frames, sample_rate):
+    """Mean square of the mono signal per FRAME_SECONDS frame, read block by block"""
+    frame = int(sample_rate * FRAME_SECONDS)
+    block = frame * int(SCAN_BLOCK_SECONDS / FRAME_SECONDS)
+    energy = []
+    for start in range(0, len(frames) - frame + 1, block):
+        piece = frames[start : start + block]
+        n_frames = len(piece) // frame
+        mono = piece[: n_frames * frame].astype(np.float32).mean(axis=1) / 32768.0
+        energy.append(np.mean((mono * mono).reshape(n_frames, frame), axis=1))
+    return np.concatenate(energy) if energy else np.zeros(0, dtype=np.float32)
+
+
+def speech_segments(energy, segment_seconds=SEGMENT_SECONDS, search_seconds=SEARCH_SECONDS):
+    """
+    (first frame, end frame) of segments of at most segment_seconds, each ending at the
+    quietest frame of its last search_seconds so no word is split. Silent ones are left out
+    """
+    length = int(segment_seconds / FRAME_SECONDS)
+    search = int(search_seconds / FRAME_SECONDS)
+    silence = 10 ** (SILENCE_DBFS / 10)  # as mean square
+    segments = []
+    start = 0
+    while start < len(energy):
+        end = start + length
+        if end >= len(energy):
+            end = len(energy)
+        else:
+            tail = energy[end - search : end]
+            end = end - search + int(np.argmin(tail)) + 1
+        if np.mean(energy[start:end]) >= silence:
+            segments.append((start, end))
+        start = end
+    return segments
+
+
+def split_parts(segments, count):
+    """count contiguous runs of segments with about the same amount of audio each"""
+    if not segments:
+        return []
+    total = sum(end - start for start, end in segments)
+    parts, part, done = [], [], 0
+    for segment in segments:
+        part.append(segment)
+        done += segment[1] - segment[0]
+        if done >= total * (len(parts) + 1) / count and len(parts) < count - 1:
+            parts.append(part)
+            part = []
+    if part:
+        parts.append(part)
+    return parts
+
+
+# The worker process's model, loaded once by init_worker
+worker_model = None
+
+
+def init_worker(model_factory, model_name, threads):
+    global worker_model
+    if model_factory is not None:
+        worker_model = model_factory()
+    else:
+        from transcription.server import load_model
+
+        worker_model = load_model(model_name, threads)
+
+
+def transcribe_part(path, part, vocabulary, language):
+    """Transcribe one run of segments in order with decoder context, returns segment dicts"""
+    frames, sample_rate = wav_memmap(path)
+    frame = int(sample_rate * FRAME_SECONDS)
+    context = DecoderContext(vocabulary=vocabulary, language=language)
+    results = []
+    for start, end in part:
+        audio = to_float32_16k(frames[start * frame : end * frame], sample_rate)
+        if is_quiet(audio, SILENCE_DBFS):
+            continue
+        if context.needs_language and hasattr(worker_model, "auto_detect_language"):
+            try:
+                (detected, probability), _ = worker_model.auto_detect_language(audio)
+                context.set_detected_language(detected, probability)
+            except Exception:
+                context.stop_language_detection()
+        offset = start * FRAME_SECONDS
+        segments = worker_model.transcribe(audio, **{**SEGMENT_PARAMS, **context.decode_params()})
+        for segment in segments:
+            text = segment.text.strip()
+            if text:
+                results.append(
+                    {
+                        "start": round(offset + segment.t0 / 100, 2),
+                        "end": round(offset + segment.t1 / 100, 2),
+                        "text": text,
+                    }
+                )
+        context.update(" ".join(segment.text.strip() for segment in segments))
+    return results
+
+
+def model_memory_mb(model):
+    """Approximate resident memory of one worker with model loaded, large for unknown names"""
+    size = model.split("-")[0].split(".")[0]  # large-v3-q5_0 -> large, base.en -> base
+    memory = MODEL_MEMORY_MB.get(size, MODEL_MEMORY_MB["large"])
+    if "-q" in model:
+        memory *= QUANTIZED_MEMORY_SHARE
+    return memory
+
+
+def memory_workers(model):
+    """How many workers with model loaded fit in the memory available now, at least one"""
+    available = psutil.virtual_memory().available / (1024 * 1024) - RESERVED_MEMORY_MB
+    return max(1, int(available // model_memory_mb(model)))
+
+
+class Retranscriber:
+    def __init__(self, model="large-v3", workers=None, threads=None, vocabulary=None, language=None, model_factory=None):
+        """
+        workers defaults to a quarter of the CPUs, as many as there is memory for (each loads
+        its own copy of the model), threads per worker to an even share of the CPUs.
+        model_factory is a picklable callable returning a model, used instead of loading
+        model by name
+        """
+        cpus = os.cpu_count() or 1
+        self.model = model
+        if not workers:
+            workers = max(1, min(4, cpus // 4))
+            if model_factory is None:
+                workers = min(workers, memory_workers(model))
+        self.workers = workers
+        self.threads = threads or max(1, cpus // self.workers)
+        self.vocabulary = list(vocabulary or [])
+        self.language = language
+        self.model_factory = model_factory
+        self.pool = None
+        # Recordings that end close together are transcribed one after the other
+        self.lock = threading.Lock()
+
+    def start(self):
+        """Start the worker processes, they load the model once and stay until close()"""
+        if self.pool is None:
+            # spawn, the desktop app has Qt and audio threads running
+            self.pool = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=init_worker,
+                initargs=(self.model_factory, self.model, self.threads),
+            )
+
+    def close(self):
+        if self.pool is not None:
+            self.pool.shutdown(cancel_futures=True)
+            self.pool = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def transcribe(self, path):
+        """
+        {"transcript", "segments", "audio_seconds", "seconds", "model", "workers"} for the
+        WAV file at path, segment times in seconds from the start of the recording
+        """
+        with self.lock:
+            results = self.transcribe_many([path])
+            try:
+                _, result, error = next(results)
+            finally:
+                results.close()
+        if error is not None:
+            raise error
+        return result
+
+    def transcribe_many(self, paths, lookahead=2):
+        """
+        Yields (path, result, error) in order. The parts of the next lookahead files are
+        queued while one is collected, so workers do not wait for the slowest part of a file
+        """
+        own_pool = self.pool is None
+        self.start()
+        try:
+            pending = deque()
+            for path in paths:
+                pending.append(self._submit(path))
+                if len(pending) > lookahead:
+                    yield self._collect(*pending.popleft())
+            while pending:
+                yield self._collect(*pending.popleft())
+        finally:
+            if own_pool:
+                self.close()
+
+    def _submit(self, path):
+        started = time.perf_counter()
+        try:
+            frames, sample_rate = wav_memmap(path)
+            audio_seconds = len(frames) / sample_rate
+            parts = split_parts(speech_segments(frame_energy(frames, sample_rate)), self.workers)
+            del frames
+            futures = [self.pool.submit(transcribe_part, path, part, self.vocabulary, self.language) for part in parts]
+        except Exception as e:
+            return path, started, 0.0, [], e
+        return path, started, audio_seconds, futures, None
+
+    def _collect(self, path, started, audio_seconds, futures, error):
+        segments = []
+        try:
+            for future in futures:
+                segments.extend(future.result())
+        except BrokenProcessPool as e:
+            # A worker died (out of memory?), later files get a fresh pool
+            self.close()
+            self.start()
+            error = e
+        except Exception as e:
+            error = e
+        if error is not None:
+            return path, None, error
+        return path, {
+            "transcript": " ".join(segment["text"] for segment in segments),
+            "segments": segments,
+            "audio_seconds": audio_seconds,
+            "seconds": time.perf_counter() - started,
+            "model": self.model if self.model_factory is None else "custom",
+            "workers": len(futures),
+        }, None
@@ -0,0 +1,362 @@
+"""
+Session router for the transcription server
+Accepts client connections on one address and proxies each meeting to one of several
+AudioServer backends, picking the least loaded one. A meeting stays pinned to its backend
+so its decoder context and resumable session live in one process. Backends are polled on
+their /status endpoint; when one goes down its clients are disconnected and their meetings
+re-homed on the next reconnect, where the client resends the audio it has not had
+acknowledged.
+
+Usage:
+    python src/transcription/server.py --port 17491 --metrics-port 17492
+    python src/transcription/server.py --port 17493 --metrics-port 17494
+    python src/transcription/router.py --backend localhost:17491 --backend localhost:17493
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+import urllib.request
+
+import websockets
+from websockets.protocol import State
+
+# Make the src/ packages importable when this file is run directly
+SRC_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if SRC_DIR not in sys.path:
+    sys.path.insert(0, SRC_DIR)
+
+from monitoring.metrics import (
+    ROUTER_BACKEND_UP,
+    ROUTER_CONNECTIONS,
+    ROUTER_REHOMED,
+    ROUTER_SESSIONS,
+    on_loop,
+    start_metrics_server,
+)
+from transcription.load import LEVELS, NORMAL
+
+host = "localhost"
+# Clients keep connecting to the usual server address, backends move to other ports
+port = 17483
+metrics_port = 17489
+health_interval = 2.0
+# Meetings whose client has been away this long are unpinned, same as the server's timeout
+session_timeout = 300
+
+# Close code telling the client to reconnect, it then lands on a healthy backend
+BACKEND_GONE = 1012
+
+
+def parse_backend(spec):
+    """'host:port' or 'host:port:metrics_port', the metrics port defaults to port + 1"""
+    parts = spec.split(":")
+    try:
+        if len(parts) == 3:
+            return Backend(parts[0], int(parts[1]), int(parts[2]))
+        if len(parts) == 2:
+            return Backend(parts[0], int(parts[1]))
+    except ValueError:
+        pass
+    raise argparse.ArgumentTypeError(f"expected host:port[:metrics_port], got {spec!r}")
+
+
+def fetch_status(url, timeout):
+    with urllib.request.urlopen(url, timeout=timeout) as response:
+        return json.load(response)
+
+
+def meeting_of(message):
+    """Meeting id named by a client's config message, None for anything else"""
+    if not isinstance(message, str):
+        return None
+    try:
+        data = json.loads(message)
+    except json.JSONDecodeError:
+        return None
+    if isinstance(data, dict) and data.get("type") == "config":
+        return data.get("meeting_id")
+    return None
+
+
+class Backend:
+    def __init__(self, host, port, metrics_port=None):
+        self.host = host
+        self.port = port
+        self.metrics_port = metrics_port if metrics_port is not None else port + 1
+        # Unknown until the first health check answers
+        self.healthy = False
+        self.failures = 0
+        self.status = {}
+
+    @property
+    def name(self):
+        return f"{self.host}:{self.port}"
+
+    @property
+    def url(self):
+        return f"ws://{self.host}:{self.port}"
+
+    @property
+    def status_url(self):
+        return f"http://{self.host}:{self.metrics_port}/status"
+
+    @property
+    def level(self):
+        return self.status.get("load", {}).get("level", NORMAL)
+
+    @property
+    def lag(self):
+        return self.status.get("load", {}).get("lag", 0.0)
+
+
+class SessionRouter:
+    def __init__(
+        self,
+        backends,
+        host=host,
+        port=port,
+        metrics_port=metrics_port,
+        health_interval=health_interval,
+        failure_threshold=2,
+        check_timeout=1.0,
+    ):
+        """
+        backends is a list of Backend. A backend is taken out after failure_threshold
+        failed health checks in a row, or at once when its connection drops and it does
+        not answer. Set metrics_port to None to skip /metrics and /status
+        """
+        if not backends:
+            raise ValueError("SessionRouter needs at least one backend")
+        self.backends = list(backends)
+        self.host = host
+        self.port = port
+        self.metrics_port = metrics_port
+        self.health_interval = health_interval
+        self.failure_threshold = failure_threshold
+        self.check_timeout = check_timeout
+        self.config_timeout = 10.0
+        self.session_timeout = session_timeout
+
+        self.pins = {}  # meeting_id -> Backend
+        self.last_seen = {}  # meeting_id -> monotonic time its client last connected or left
+        self.clients = {}  # client websocket -> (Backend, meeting_id or None)
+
+    def routed(self, backend):
+        """Meetings pinned to backend plus its connections without a meeting id"""
+        pinned = sum(1 for b in self.pins.values() if b is backend)
+        unnamed = sum(1 for b, m in self.clients.values() if b is backend and m is None)
+        return pinned + unnamed
+
+    def load_key(self, backend):
+        """Sort key, least loaded first: load level, then sessions, then inference lag"""
+        level = LEVELS.index(backend.level) if backend.level in LEVELS else 0
+        # Our own count is fresher than the last poll, the backend's includes other routers
+        sessions = max(self.routed(backend), backend.status.get("sessions", 0))
+        return level, sessions, backend.lag
+
+    def choose(self, meeting_id, exclude=()):
+        """Backend for a meeting, keeping its pin while that backend is healthy"""
+        pinned = self.pins.get(meeting_id) if meeting_id else None
+        if pinned is not None and pinned.healthy and pinned not in exclude:
+            return pinned
+
+        candidates = [b for b in self.backends if b.healthy and b not in exclude]
+        if not candidates:
+            return None
+        backend = min(candidates, key=self.load_key)
+        if meeting_id:
+            if pinned is not None:
+                print(f"Re-homing meeting {meeting_id}: {pinned.name} -> {backend.name}")
+                ROUTER_REHOMED.inc()
+            self.pins[meeting_id] = backend
+            self.update_gauges()
+        return backend
+
+    async def connect(self, meeting_id):
+        """Open a connection to the meeting's backend, (websocket, Backend) or (None, None)"""
+        failed = set()
+        while True:
+            backend = self.choose(meeting_id, exclude=failed)
+            if backend is None:
+                return None, None
+            try:
+                upstream = await websockets.connect(backend.url, open_timeout=5, max_size=None)
+                return upstream, backend
+            except (OSError, asyncio.TimeoutError, websockets.exceptions.WebSocketException) as e:
+                print(f"Could not connect to backend {backend.name}: {e}")
+                failed.add(backend)
+                self.mark_down(backend, "connection refused")
+
+    async def handle_client(self, websocket):
+        ROUTER_CONNECTIONS.inc()
+        try:
+            # The client's config message names the meeting, route on it
+            try:
+                first = await asyncio.wait_for(websocket.recv(), timeout=self.config_timeout)
+            except (asyncio.TimeoutError, websockets.exceptions.ConnectionClosed):
+                return
+            meeting_id = meeting_of(first)
+
+            upstream, backend = await self.connect(meeting_id)
+            if upstream is None:
+                print("No healthy transcription backend, refusing client")
+                await websocket.close(1013, "No transcription backend available")
+                return
+
+            self.clients[websocket] = (backend, meeting_id)
+            self.touch(meeting_id)
+            try:
+                await upstream.send(first)
+                await self.proxy(websocket, upstream, backend)
+            finally:
+                self.clients.pop(websocket, None)
+                self.touch(meeting_id)
+                await upstream.close()
+        finally:
+            ROUTER_CONNECTIONS.dec()
+
+    async def proxy(self, websocket, upstream, backend):
+        """Forward frames both ways until either side goes away"""
+
+        async def pipe(source, target):
+            async for message in source:
+                await target.send(message)
+
+        to_backend = asyncio.ensure_future(pipe(websocket, upstream))
+        to_client = asyncio.ensure_future(pipe(upstream, websocket))
+        try:
+            await asyncio.wait({to_backend, to_client}, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            for task in (to_backend, to_client):
+                task.cancel()
+            await asyncio.gather(to_backend, to_client, return_exceptions=True)
+
+        if websocket.state is State.OPEN:
+            # The backend dropped a client that is still here
+            if not await self.check(backend):
+                self.mark_down(backend, "connection dropped")
+            await websocket.close(BACKEND_GONE, "Transcription backend unavailable")
+
+    def touch(self, meeting_id):
+        if meeting_id:
+            self.last_seen[meeting_id] = time.monotonic()
+
+    async def check(self, backend):
+        """Poll a backend's /status, returns whether it answered"""
+        loop = asyncio.get_running_loop()
+        try:
+            status = await loop.run_in_executor(
+                None, fetch_status, backend.status_url, self.check_timeout
+            )
+        except (OSError, ValueError) as e:
+            backend.failures += 1
+            if backend.failures >= self.failure_threshold:
+                self.mark_down(backend, e)
+            return False
+
+        backend.status = status
+        backend.failures = 0
+        if not backend.healthy:
+            print(f"Backend {backend.name} is up ({status.get('model', {}).get('model')})")
+            backend.healthy = True
+            ROUTER_BACKEND_UP.labels(backend=backend.name).set(1)
+        return True
+
+    def mark_down(self, backend, reason):
+        """Take a backend out and disconnect its clients so they reconnect elsewhere"""
+        if backend.healthy:
+            print(f"Backend {backend.name} is down ({reason})")
+        backend.healthy = False
+        ROUTER_BACKEND_UP.labels(backend=backend.name).set(0)
+        for client, (b, _) in list(self.clients.items()):
+            if b is backend and client.state is State.OPEN:
+                asyncio.ensure_future(client.close(BACKEND_GONE, "Transcription backend unavailable"))
+
+    async def health_loop(self):
+        while True:
+            await asyncio.gather(*(self.check(b) for b in self.backends))
+            self.expire_pins()
+            await asyncio.sleep(self.health_interval)
+
+    def expire_pins(self):
+        """Forget meetings whose client has been away longer than the server keeps them"""
+        connected = {m for _, m in self.clients.values()}
+        now = time.monotonic()
+        for meeting_id in list(self.pins):
+            if meeting_id in connected:
+                continue
+            if now - self.last_seen.get(meeting_id, now) > self.session_timeout:
+                del self.pins[meeting_id]
+                self.last_seen.pop(meeting_id, None)
+        self.update_gauges()
+
+    def update_gauges(self):
+        for backend in self.backends:
+            ROUTER_SESSIONS.labels(backend=backend.name).set(
+                sum(1 for b in self.pins.values() if b is backend)
+            )
+
+    def status(self):
+        """Backends and pinned meetings, served as JSON on /status"""
+        return {
+            "backends": [
+                {
+                    "backend": b.name,
+                    "healthy": b.healthy,
+                    "routed": self.routed(b),
+                    "sessions": b.status.get("sessions"),
+                    "level": b.level,
+                    "lag": b.lag,
+                    "model": b.status.get("model", {}).get("model"),
+                }
+                for b in self.backends
+            ],
+            "meetings": len(self.pins),
+            "connections": len(self.clients),
+        }
+
+    async def start(self):
+        print(f"Starting session router on {self.host}:{self.port} for {len(self.backends)} backends")
+        if self.metrics_port is not None:
+            start_metrics_server(self.host, self.metrics_port, routes={"/status": on_loop(asyncio.get_running_loop(), self.status)})
+        await asyncio.gather(*(self.check(b) for b in self.backends))
+        for backend in self.backends:
+            if not backend.healthy:
+                print(f"Backend {backend.name} is not answering yet")
+        health = asyncio.ensure_future(self.health_loop())
+        async with websockets.serve(self.handle_client, self.host, self.port, max_size=None):
+            print(f"Router running on ws://{self.host}:{self.port}")
+            try:
+                await asyncio.Future()
+            finally:
+                health.cancel()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="FocusNote transcription session router")
+    parser.add_argument("--backend", type=parse_backend, action="append", required=True, help="Transcription server as host:port[:metrics_port], repeat for each")
+    parser.add_argument("--host", default=host)
+    parser.add_argument("--port", type=int, default=port)
+    parser.add_argument("--metrics-port", type=int, default=metrics_port)
+    parser.add_argument("--health-interval", type=float, default=health_interval, help="Seconds between backend health checks")
+    args = parser.parse_args()
+
+    router = SessionRouter(
+        args.backend,
+        host=args.host,
+        port=args.port,
+        metrics_port=args.metrics_port,
+        health_interval=args.health_interval,
+    )
+    try:
+        asyncio.run(router.start())
+    except KeyboardInterrupt:
+        print("\nShutting down router...")
+
+
+if __name__ == "__main__":
+    main()
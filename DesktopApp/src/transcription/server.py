@@ -1,38 +1,168 @@
 import re
+import os
+import sys
+import argparse
 import asyncio
 import websockets
 import json
+import struct
 import numpy as np
 import time
-from pywhispercpp.model import Model
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    from pywhispercpp.model import Model
+except ImportError:
+    # Only needed when loading a real Whisper model (benchmarks swap in a fake one)
+    Model = None
+
+# Make the src/ packages importable when this file is run directly
+SRC_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if SRC_DIR not in sys.path:
+    sys.path.insert(0, SRC_DIR)
+
+from monitoring.metrics import (
+    SERVER_AUDIO_SECONDS,
+    SERVER_CHUNKS,
+    SERVER_CONNECTIONS,
+    SERVER_INFERENCE,
+    SERVER_REAL_TIME_FACTOR,
+    on_loop,
+    start_metrics_server,
+)
+from monitoring import PROFILE_DIR
+from monitoring.profiling import (
+    DEFAULT_SECONDS as DEFAULT_PROFILE_SECONDS,
+    MODES as PROFILE_MODES,
+    SAMPLE,
+    Profiler,
+)
+from transcription import calibration
+from transcription.load import FAST_MODEL, MERGED, NO_PARTIALS, SKIPPED_SILENCE, LoadShedder
+from transcription.sessions import MeetingSession
+from transcription.streaming import (
+    SEGMENT_PARAMS,
+    WORD_TIMESTAMP_PARAMS,
+    StreamingSession,
+    segments_to_words,
+)
 
 host = "localhost"
 port = 17483
-model = Model("large-v3")
+metrics_port = 17484
+model_name = "large-v3"
+# Small, fast model for provisional captions in streaming mode
+partial_model_name = "base"
+# Sessions of meetings whose client has been away this long are closed
+session_timeout = 300
+
+# Resumable clients prefix each audio frame with a big-endian uint64 sequence number
+SEQ_HEADER = struct.Struct(">Q")
+
+
+def load_model(name=model_name, n_threads=None):
+    """Load a pywhispercpp Whisper model by name, n_threads defaults to whisper.cpp's choice"""
+    if Model is None:
+        raise RuntimeError("pywhispercpp not found. Install with: pip install pywhispercpp")
+    if n_threads:
+        return Model(name, n_threads=n_threads)
+    return Model(name)
+
+
+def choose_model(profile_path=calibration.PROFILE_PATH, target_rtf=calibration.DEFAULT_TARGET_RTF):
+    """Model settings from the calibration profile, large-v3 with default threads without one"""
+    profile = calibration.load_profile(profile_path)
+    selected = calibration.select(profile, target_rtf) if profile else None
+    if selected is None:
+        print(f"No calibration profile, using {model_name} (run with --calibrate to tune for this host)")
+        return {"model": model_name, "threads": None, "source": "default"}
+    name, threads, rtf = selected
+    print(f"Calibrated model: {name} with {threads} threads (real-time factor {rtf:.2f})")
+    return {
+        "model": name,
+        "threads": threads,
+        "source": "profile",
+        "expected_rtf": rtf,
+        "target_rtf": target_rtf,
+        "profile": profile_path,
+        "calibrated": profile["created"],
+    }
 
 
 class AudioServer:
-    def __init__(self):
+    def __init__(
+        self,
+        model=None,
+        host=host,
+        port=port,
+        metrics_port=metrics_port,
+        partial_model=None,
+        model_info=None,
+    ):
+        """
+        model is anything with a pywhispercpp-style transcribe(audio) method,
+        defaults to the large-v3 Whisper model. partial_model is used for streaming
+        captions and is loaded on first use. Set metrics_port to None to skip /metrics.
+        model_info describes the model choice for /status
+        """
         self.host = host
         self.port = port
+        self.metrics_port = metrics_port
+        if model is None:
+            model_info = model_info or {"model": model_name, "threads": None, "source": "default"}
+            model = load_model(model_info["model"], model_info.get("threads"))
         self.model = model
+        self.model_info = model_info or {"model": type(model).__name__, "source": "custom"}
+        self.started = time.time()
+        self.partial_model = partial_model
         self.sample_rate = 16000
+        self.word_timestamps = True
+
+        # Inference runs off the event loop, one worker per model since a
+        # whisper.cpp context cannot transcribe two clips at once
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="whisper")
+        self.partial_executor = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="whisper-partial"
+        )
+        self.sessions = {}
+        self.session_timeout = session_timeout
+        # Degrades quality step by step when inference falls behind the incoming audio
+        self.load = LoadShedder()
+        # Profiles the event loop or every thread on request (signal or control message)
+        self.profiler = Profiler("server", PROFILE_DIR, meeting_id=self.single_meeting)
+
+    def status(self):
+        """Model choice and session counts, served as JSON on /status"""
+        return {
+            "model": self.model_info,
+            "partial_model": partial_model_name if self.partial_model is None else type(self.partial_model).__name__,
+            "sessions": len(self.sessions),
+            "load": self.load.status(),
+            "profiling": self.profiler.status(),
+            "uptime": time.time() - self.started,
+        }
+
+    def single_meeting(self):
+        """The meeting ID profile files are named after when only one meeting is running"""
+        return next(iter(self.sessions)) if len(self.sessions) == 1 else None
 
     # handling the incoming websockets
     async def handle_client(self, websocket):
         print(f"Client connected from {websocket.remote_address}")
-        full_transcript = ""
+        SERVER_CONNECTIONS.inc()
+        self.expire_sessions()
+        # Connection-scoped until the client names its meeting in a config message
+        session = MeetingSession()
+        session.websocket = websocket
 
         try:
             async for message in websocket:
                 # Handle binary audio data (pre-chunked from client)
                 if isinstance(message, bytes):
-                    chunk_text = await self.transcribe_chunk(message, websocket)
-                    print(chunk_text)
-                    full_transcript += chunk_text + " "
+                    await self.handle_audio(message, session)
                 # Handle JSON control messages
                 elif isinstance(message, str):
-                    await self.handle_control_message(message, websocket)
+                    session = await self.handle_control_message(message, websocket, session)
         except websockets.exceptions.ConnectionClosed:
             print(f"Client disconnected: {websocket.remote_address}")
 
@@ -40,12 +170,133 @@ class AudioServer:
             print(f"Error handling client: {e}")
             await websocket.send(json.dumps({"type": "error", "message": str(e)}))
         finally:
-            # transcribe pre-chunked audio from client
-            print("\n" + "final transcript" + "\n")
-            print(full_transcript)
+            SERVER_CONNECTIONS.dec()
+            if not session.resumable:
+                # Nobody can resume a legacy session, finish what it already sent
+                await session.chunks.join()
+            if session.resumable:
+                # Keep transcribing what was received, the client can reconnect and resume
+                session.detach(websocket)
+            else:
+                self.close_session(session)
+
+    async def handle_audio(self, message, session):
+        """Transcribe or stream one audio frame, skipping frames a resumed session already has"""
+        seq = None
+        if session.resumable:
+            (seq,) = SEQ_HEADER.unpack_from(message)
+            message = message[SEQ_HEADER.size :]
+            if not session.accept(seq):
+                await session.send({"type": "ack", "seq": session.last_seq}, durable=False)
+                return
+
+        if session.stream is not None:
+            await self.stream_audio(message, session)
+            if seq is not None:
+                await session.send({"type": "ack", "seq": seq}, durable=False)
+        else:
+            # Chunks queue up per session so the backlog is visible and can be merged
+            if session.chunk_worker is None:
+                session.chunk_worker = self.spawn(session, self.chunk_worker(session))
+            session.chunks.put_nowait((message, seq))
+            self.load.add(session, len(message) / 4 / self.sample_rate)
+
+    def take_batch(self, queue, first, size):
+        """
+        first plus, while degraded, the items queued behind it up to max_batch_seconds
+        of audio. size(item) is its length in samples. Returns (batch, item left over)
+        """
+        batch = [first]
+        if not self.load.degraded:
+            return batch, None
+        limit = self.load.max_batch_seconds * self.sample_rate
+        total = size(first)
+        while not queue.empty():
+            item = queue.get_nowait()
+            if total + size(item) > limit:
+                return batch, item
+            batch.append(item)
+            total += size(item)
+        return batch, None
 
-    async def transcribe_chunk(self, audio_data, websocket):
+    async def chunk_worker(self, session):
+        """Transcribe a session's chunks in order, merging queued ones when behind"""
+        carry = None
+        while True:
+            first = carry if carry is not None else await session.chunks.get()
+            batch, carry = self.take_batch(session.chunks, first, lambda item: len(item[0]) // 4)
+            seq = batch[-1][1]
+            degradations = [MERGED] if len(batch) > 1 else []
+            try:
+                chunk_text = await self.transcribe_chunk(
+                    b"".join(audio for audio, _ in batch), session, seq, degradations
+                )
+                print(chunk_text)
+                session.transcript += chunk_text + " "
+                if seq is not None:
+                    # Acks are cumulative, so one covers every chunk of a merged batch
+                    await session.send({"type": "ack", "seq": seq}, durable=False)
+            finally:
+                self.load.done(session, len(batch))
+                for _ in batch:
+                    session.chunks.task_done()
+
+    def close_session(self, session):
+        session.close()
+        self.load.forget(session)
+        if session.resumable:
+            self.sessions.pop(session.meeting_id, None)
+            print(f"Closed session for meeting {session.meeting_id}")
+        # transcribe pre-chunked audio from client
+        print("\n" + "final transcript" + "\n")
+        print(session.transcript)
+
+    async def end_session(self, session):
+        """
+        The client's recording is over: finalize the streaming tail, wait until every
+        queued chunk and window has been transcribed and sent, then close the session
+        """
+        stream = session.stream
+        if stream is not None:
+            if len(stream.buffer):
+                window = stream.take_final_window(whole=True)
+                await stream.final_queue.put(window)
+                self.load.add(session, len(window[1]) / self.sample_rate)
+            await stream.final_queue.join()
+        await session.chunks.join()
+        self.close_session(session)
+
+    def close_sessions(self):
+        for session in list(self.sessions.values()):
+            self.close_session(session)
+
+    def expire_sessions(self):
+        """Close sessions whose client has not come back within session_timeout"""
+        for session in list(self.sessions.values()):
+            if session.idle_for() > self.session_timeout:
+                self.close_session(session)
+
+    async def fast_model(self):
+        """The partial-caption model, loaded on first use"""
+        if self.partial_model is None:
+            print(f"Loading partial model {partial_model_name}...")
+            loop = asyncio.get_running_loop()
+            self.partial_model = await loop.run_in_executor(
+                self.partial_executor, load_model, partial_model_name
+            )
+        return self.partial_model
+
+    async def pick_model(self, degradations):
+        """(model, executor) for a main pass, the fast model while overloaded"""
+        if self.load.overloaded:
+            degradations.append(FAST_MODEL)
+            return await self.fast_model(), self.partial_executor
+        return self.model, self.executor
+
+    async def transcribe_chunk(self, audio_data, session, seq=None, degradations=()):
         chunk_text = ""
+        context = session.context
+        degradations = list(degradations)
 
         try:
             # Convert bytes to numpy array
@@ -56,9 +307,37 @@ class AudioServer:
             min_samples = int(self.sample_rate * 1.5)
             if len(audio_array) < min_samples:
                 print(f"  Audio too short ({duration:.1f}s), skipping")
+                SERVER_CHUNKS.labels(outcome="skipped").inc()
+                return ""
+            if self.load.quiet(audio_array):
+                degradations.append(SKIPPED_SILENCE)
+                self.load.record(degradations)
+                SERVER_CHUNKS.labels(outcome="skipped").inc()
+                result = {
+                    "type": "transcription",
+                    "text": "",
+                    "start": 0,
+                    "end": int(duration * 100),
+                    "timestamp": time.time(),
+                    "degraded": degradations,
+                }
+                if seq is not None:
+                    result["seq"] = seq
+                await session.send(result)
                 return ""
             # Send chunk to model for transcription
-            segments = self.model.transcribe(audio_array)
+            await self.detect_language(context, audio_array)
+            model, executor = await self.pick_model(degradations)
+            segments = await self.run_inference(
+                model,
+                executor,
+                audio_array,
+                {**SEGMENT_PARAMS, **context.decode_params()},
+                "chunk",
+            )
+            SERVER_CHUNKS.labels(outcome="transcribed").inc()
+            SERVER_AUDIO_SECONDS.inc(duration)
+            self.load.record(degradations)
 
             # Send transcription results back to client
             for segment in segments:
@@ -70,44 +349,340 @@ class AudioServer:
                     "end": segment.t1,
                     "timestamp": time.time(),
                 }
-                await websocket.send(json.dumps(result))
+                if seq is not None:
+                    result["seq"] = seq
+                if degradations:
+                    result["degraded"] = degradations
+                await session.send(result)
+            context.update(chunk_text)
 
         except Exception as e:
             print(f"Error transcribing audio: {e}")
-            await websocket.send(
-                json.dumps(
-                    {"type": "error", "message": f"Transcription error: {str(e)}"}
-                )
+            SERVER_CHUNKS.labels(outcome="error").inc()
+            await session.send(
+                {"type": "error", "message": f"Transcription error: {str(e)}"},
+                durable=False,
             )
 
         return chunk_text
 
-    async def handle_control_message(self, message, websocket):
-        """Handle control messages from client"""
+    async def run_inference(self, model, executor, audio_array, params, pass_name):
+        """Transcribe on the model's worker thread and record timing metrics"""
+        loop = asyncio.get_running_loop()
+        duration = len(audio_array) / self.sample_rate
+
+        inference_start = time.perf_counter()
+        segments = await loop.run_in_executor(
+            executor, lambda: list(model.transcribe(audio_array, **params))
+        )
+        inference_time = time.perf_counter() - inference_start
+
+        SERVER_INFERENCE.labels(**{"pass": pass_name}).observe(inference_time)
+        SERVER_REAL_TIME_FACTOR.labels(**{"pass": pass_name}).observe(
+            inference_time / duration
+        )
+        return segments
+
+    async def detect_language(self, context, audio_array):
+        """Detect the session language once, on the first chunk with confident speech"""
+        if not context.needs_language or not hasattr(self.model, "auto_detect_language"):
+            return
+        loop = asyncio.get_running_loop()
+        try:
+            (language, probability), _ = await loop.run_in_executor(
+                self.executor, self.model.auto_detect_language, audio_array
+            )
+        except Exception as e:
+            print(f"Language detection failed, falling back to per-chunk detection: {e}")
+            context.stop_language_detection()
+            return
+        if context.set_detected_language(language, probability):
+            print(f"Detected session language: {language} ({probability:.0%})")
+
+    async def stream_audio(self, audio_data, session):
+        """Add a streaming hop and schedule partial or final passes"""
+        stream = session.stream
+        stream.add_audio(np.frombuffer(audio_data, dtype=np.float32))
+
+        if stream.final_due():
+            # Finals run in order on one queue so captions are never committed out of order
+            window = stream.take_final_window()
+            await stream.final_queue.put(window)
+            self.load.add(session, len(window[1]) / self.sample_rate)
+        elif stream.partial_due() and not stream.partial_running:
+            if self.load.degraded:
+                # Partials compete with the finals that are behind, pause them
+                stream.partials_paused = True
+                return
+            stream.partial_running = True
+            self.spawn(session, self.partial_pass(session, stream.take_partial_window()))
+
+    def spawn(self, session, coroutine):
+        task = asyncio.ensure_future(coroutine)
+        session.tasks.add(task)
+        task.add_done_callback(session.tasks.discard)
+        return task
+
+    async def partial_pass(self, session, window):
+        """Provisional hypothesis for the uncommitted audio from the fast model"""
+        stream, context = session.stream, session.context
+        segment_id, audio_array, start_sample, end_sample = window
+        try:
+            partial_model = await self.fast_model()
+            segments = await self.run_inference(
+                partial_model,
+                self.partial_executor,
+                audio_array,
+                {**SEGMENT_PARAMS, **context.decode_params()},
+                "partial",
+            )
+            if segment_id != stream.segment_id:
+                return  # the final pass already took this window
+
+            text = "".join(segment.text for segment in segments).strip()
+            stable, unstable = stream.update_hypothesis(text.split())
+            # Stale once the client is away, so partials are not kept for a reconnect
+            await session.send(
+                {
+                    "type": "partial",
+                    "segment_id": segment_id,
+                    "text": text,
+                    "stable": " ".join(stable),
+                    "unstable": " ".join(unstable),
+                    "start": start_sample / self.sample_rate,
+                    "end": end_sample / self.sample_rate,
+                    "end_sample": end_sample,
+                    "timestamp": time.time(),
+                },
+                durable=False,
+            )
+        except Exception as e:
+            print(f"Error in partial pass: {e}")
+        finally:
+            stream.partial_running = False
+
+    async def final_worker(self, session):
+        """Run the main model over each committed window, with word timestamps when available"""
+        stream, context = session.stream, session.context
+        carry = None
+        while True:
+            first = carry if carry is not None else await stream.final_queue.get()
+            windows, carry = self.take_batch(stream.final_queue, first, lambda window: len(window[1]))
+            segment_id = windows[-1][0]
+            start_sample, end_sample = windows[0][2], windows[-1][3]
+            audio_array = np.concatenate([window[1] for window in windows])
+            offset = start_sample / self.sample_rate
+            degradations = [MERGED] if len(windows) > 1 else []
+            if stream.partials_paused:
+                degradations.append(NO_PARTIALS)
+                stream.partials_paused = False
+            result = {
+                "type": "final",
+                "segment_id": segment_id,
+                "start": offset,
+                "end": end_sample / self.sample_rate,
+                "end_sample": end_sample,
+            }
+            if len(windows) > 1:
+                result["segment_ids"] = [window[0] for window in windows]
+            try:
+                if self.load.quiet(audio_array):
+                    degradations.append(SKIPPED_SILENCE)
+                    self.load.record(degradations)
+                    SERVER_CHUNKS.labels(outcome="skipped").inc()
+                    result.update({"text": "", "timestamp": time.time(), "degraded": degradations})
+                    await session.send(result)
+                    continue
+
+                await self.detect_language(context, audio_array)
+                model, executor = await self.pick_model(degradations)
+                words = None
+                if self.word_timestamps:
+                    try:
+                        segments = await self.run_inference(
+                            model,
+                            executor,
+                            audio_array,
+                            {**WORD_TIMESTAMP_PARAMS, **context.decode_params()},
+                            "final",
+                        )
+                        words = segments_to_words(segments, offset)
+                    except (AttributeError, TypeError) as e:
+                        print(f"Word timestamps not supported by this model ({e}), using segments")
+                        self.word_timestamps = False
+                if words is None:
+                    segments = await self.run_inference(
+                        model,
+                        executor,
+                        audio_array,
+                        {**SEGMENT_PARAMS, **context.decode_params()},
+                        "final",
+                    )
+                SERVER_CHUNKS.labels(outcome="transcribed").inc()
+                SERVER_AUDIO_SECONDS.inc(len(audio_array) / self.sample_rate)
+                self.load.record(degradations)
+
+                text = "".join(segment.text for segment in segments).strip()
+                stream.transcript += text + " "
+                context.update(text)
+                print(text)
+                result.update({"text": text, "timestamp": time.time()})
+                if words is not None:
+                    result["words"] = words
+                if degradations:
+                    result["degraded"] = degradations
+                await session.send(result)
+            except Exception as e:
+                print(f"Error in final pass: {e}")
+                SERVER_CHUNKS.labels(outcome="error").inc()
+                await session.send(
+                    {"type": "error", "message": f"Transcription error: {str(e)}"},
+                    durable=False,
+                )
+            finally:
+                self.load.done(session, len(windows))
+                for _ in windows:
+                    stream.final_queue.task_done()
+
+    async def handle_control_message(self, message, websocket, session):
+        """Handle control messages from client, returns the session for the rest of the connection"""
         try:
             data = json.loads(message)
             msg_type = data.get("type")
 
             if msg_type == "ping":
                 await websocket.send(json.dumps({"type": "pong"}))
+            elif msg_type == "profile":
+                # {"type": "profile", "seconds": 30, "mode": "sample" or "cprofile", "memory": true},
+                # "action": "stop" ends the running window and "status" only reports on it
+                action = data.get("action", "start")
+                try:
+                    if action == "start":
+                        reply = self.profiler.start(
+                            data.get("seconds", DEFAULT_PROFILE_SECONDS),
+                            data.get("mode", SAMPLE),
+                            session.meeting_id if session is not None else None,
+                            bool(data.get("memory", True)),
+                        )
+                    else:
+                        if action == "stop":
+                            self.profiler.stop()
+                        reply = self.profiler.status()
+                except (RuntimeError, ValueError) as e:
+                    reply = {"error": str(e), **self.profiler.status()}
+                await websocket.send(json.dumps({"type": "profile", **reply}))
+            elif msg_type == "end":
+                await self.end_session(session)
+                await websocket.send(json.dumps({"type": "ended", "meeting_id": session.meeting_id}))
+                # The connection can configure the next meeting
+                session = MeetingSession()
+                session.websocket = websocket
+            elif msg_type == "config":
+                resumed = False
+                meeting_id = data.get("meeting_id")
+                if meeting_id and session.meeting_id != meeting_id:
+                    if meeting_id in self.sessions:
+                        resumed = True
+                        print(f"Resuming meeting {meeting_id} after audio {self.sessions[meeting_id].last_seq}")
+                    else:
+                        self.sessions[meeting_id] = MeetingSession(meeting_id)
+                    session = self.sessions[meeting_id]
+                    session.websocket = websocket
+
+                session.context.configure(data)
+                if data.get("streaming") and session.stream is None:
+                    session.stream = StreamingSession(
+                        final_window=float(data.get("final_window", 5.0)),
+                        partial_interval=float(data.get("partial_interval", 0.5)),
+                    )
+                    self.spawn(session, self.final_worker(session))
+                    print("Streaming mode enabled")
+                context = session.context
+                await websocket.send(
+                    json.dumps(
+                        {
+                            "type": "config",
+                            "streaming": session.stream is not None,
+                            "context": context.enabled,
+                            "vocabulary_terms": len(context.vocabulary),
+                            "language": context.language,
+                            "meeting_id": session.meeting_id,
+                            "resumed": resumed,
+                            "last_seq": session.last_seq,
+                        }
+                    )
+                )
+                if session.resumable:
+                    # Deliver results produced while the client was away
+                    await session.attach(websocket)
 
         except json.JSONDecodeError:
             print(f"Invalid JSON message: {message}")
         except Exception as e:
             print(f"Error handling control message: {e}")
+        return session
 
-    async def start(self):
-        """Start the WebSocket server"""
+    async def start(self, profile_seconds=None, profile_mode=SAMPLE):
+        """Start the WebSocket server, profile_seconds profiles its first seconds"""
         print(f"Starting audio transcription server on {self.host}:{self.port}")
+        # cProfile follows the event loop, where sessions and results are handled
+        self.profiler.call_in_thread = asyncio.get_running_loop().call_soon_threadsafe
+        if profile_seconds:
+            self.profiler.start(profile_seconds, profile_mode)
+        if self.metrics_port is not None:
+            start_metrics_server(self.host, self.metrics_port, routes={"/status": on_loop(asyncio.get_running_loop(), self.status)})
         async with websockets.serve(self.handle_client, self.host, self.port):
             print(f"Server running on ws://{self.host}:{self.port}")
-            await asyncio.Future()  
+            try:
+                await asyncio.Future()
+            finally:
+                self.close_sessions()
 
 
 def main():
-    server = AudioServer()
+    parser = argparse.ArgumentParser(description="FocusNote transcription server")
+    parser.add_argument("--host", default=host)
+    parser.add_argument("--port", type=int, default=port)
+    parser.add_argument("--metrics-port", type=int, default=metrics_port)
+    parser.add_argument("--model", help="Whisper model name, skips the calibration profile")
+    parser.add_argument("--threads", type=int, help="Inference threads (with --model)")
+    parser.add_argument("--calibrate", action="store_true", help="Time the candidate models on this host, save the profile and exit")
+    parser.add_argument("--calibrate-models", nargs="+", default=calibration.CANDIDATE_MODELS, help="Models to calibrate, most accurate first")
+    parser.add_argument("--calibrate-threads", type=int, nargs="+", help="Thread counts to calibrate (default: 1, 2, 4, ... CPUs)")
+    parser.add_argument("--clip", help="16-bit WAV to calibrate on instead of the built-in clip")
+    parser.add_argument("--profile", default=calibration.PROFILE_PATH, help="Calibration profile path")
+    parser.add_argument("--target-rtf", type=float, default=calibration.DEFAULT_TARGET_RTF, help="Highest acceptable real-time factor")
+    parser.add_argument("--profile-for", type=float, metavar="SECONDS", help="Profile the first SECONDS (kill -USR2 or a profile control message profiles later)")
+    parser.add_argument("--profile-mode", choices=PROFILE_MODES, default=SAMPLE, help="Sampling (all threads) or cProfile (event loop)")
+    args = parser.parse_args()
+
+    if args.calibrate:
+        profile = calibration.calibrate(
+            load_model,
+            models=args.calibrate_models,
+            threads=args.calibrate_threads,
+            clip=calibration.load_clip(args.clip) if args.clip else None,
+            target_rtf=args.target_rtf,
+        )
+        calibration.save_profile(profile, args.profile)
+        selected = calibration.select(profile, args.target_rtf)
+        if selected:
+            print(f"Selected: {selected[0]} with {selected[1]} threads (real-time factor {selected[2]:.2f})")
+        return
+
+    if args.model:
+        model_info = {"model": args.model, "threads": args.threads, "source": "argument"}
+    else:
+        model_info = choose_model(args.profile, args.target_rtf)
+    server = AudioServer(
+        host=args.host,
+        port=args.port,
+        metrics_port=args.metrics_port,
+        model_info=model_info,
+    )
+    server.profiler.install_signal_handler()
     try:
-        asyncio.run(server.start())
+        asyncio.run(server.start(args.profile_for, args.profile_mode))
     except KeyboardInterrupt:
         print("\nShutting down server...")
 
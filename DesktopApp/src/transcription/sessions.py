@@ -0,0 +1,90 @@
+"""
+Server-side transcription sessions keyed by meeting ID
+A session outlives its websocket connection, so a client that reconnects with the same
+meeting ID resumes with its decoder context, streaming state and transcript intact.
+"""
+
+import asyncio
+import json
+import time
+from collections import deque
+
+import websockets
+
+from transcription.context import DecoderContext
+
+# Results that could not be delivered are kept for the next connection of the meeting
+MAX_OUTBOX_MESSAGES = 500
+
+
+class MeetingSession:
+    def __init__(self, meeting_id=None):
+        """meeting_id=None is a legacy connection-scoped session that is never resumed"""
+        self.meeting_id = meeting_id
+        self.context = DecoderContext()
+        self.stream = None
+        self.chunks = asyncio.Queue()  # (audio, seq) waiting for the chunk worker
+        self.chunk_worker = None
+        self.tasks = set()
+        self.transcript = ""
+        self.last_seq = 0  # highest audio sequence number received
+        self.websocket = None
+        self.outbox = deque(maxlen=MAX_OUTBOX_MESSAGES)
+        self.last_active = time.monotonic()
+
+    @property
+    def resumable(self):
+        return self.meeting_id is not None
+
+    def accept(self, seq):
+        """False for a chunk the session has already seen, e.g. one replayed after a reconnect"""
+        if seq <= self.last_seq:
+            return False
+        if seq > self.last_seq + 1:
+            print(f"Meeting {self.meeting_id}: missing audio {self.last_seq + 1}-{seq - 1}")
+        self.last_seq = seq
+        self.last_active = time.monotonic()
+        return True
+
+    async def send(self, message, durable=True):
+        """
+        Send a message to the current connection. durable messages (results) are kept
+        in the outbox while the client is away, others (acks, partials) are dropped
+        """
+        data = json.dumps(message)
+        if self.websocket is not None:
+            try:
+                await self.websocket.send(data)
+                return
+            except websockets.exceptions.ConnectionClosed:
+                self.websocket = None
+        if durable:
+            self.outbox.append(data)
+
+    async def attach(self, websocket):
+        """Make websocket the session's connection and deliver anything it missed"""
+        self.websocket = websocket
+        self.last_active = time.monotonic()
+        while self.outbox and self.websocket is websocket:
+            data = self.outbox.popleft()
+            try:
+                await websocket.send(data)
+            except websockets.exceptions.ConnectionClosed:
+                self.outbox.appendleft(data)
+                self.websocket = None
+
+    def detach(self, websocket):
+        if self.websocket is websocket:
+            self.websocket = None
+        self.last_active = time.monotonic()
+
+    def idle_for(self):
+        if self.websocket is not None:
+            return 0.0
+        return time.monotonic() - self.last_active
+
+    def close(self):
+        for task in self.tasks:
+            task.cancel()
+        if self.stream is not None:
+            self.transcript = self.stream.transcript
@@ -0,0 +1,125 @@
+"""
+Streaming transcription state for low-latency captions
+Audio arrives in small hops, a fast model emits partial hypotheses over the uncommitted
+window and the main model finalizes each window once it is long enough.
+"""
+
+import asyncio
+import numpy as np
+
+SAMPLE_RATE = 16000
+
+# pywhispercpp params that split the output into one segment per word with timestamps
+WORD_TIMESTAMP_PARAMS = {"token_timestamps": True, "max_len": 1, "split_on_word": True}
+# pywhispercpp keeps params between calls, so segment-level passes reset them explicitly
+SEGMENT_PARAMS = {"token_timestamps": False, "max_len": 0, "split_on_word": False}
+
+
+def normalize_word(word):
+    return word.strip().strip(".,!?;:\"'").lower()
+
+
+def common_prefix_length(words_a, words_b):
+    """Number of leading words two hypotheses agree on"""
+    count = 0
+    for a, b in zip(words_a, words_b):
+        if normalize_word(a) != normalize_word(b):
+            break
+        count += 1
+    return count
+
+
+def find_cut_point(audio, search_seconds=1.5, frame_seconds=0.1):
+    """Sample index of the quietest frame near the end of audio, so windows split between words"""
+    frame = int(frame_seconds * SAMPLE_RATE)
+    start = max(0, len(audio) - int(search_seconds * SAMPLE_RATE))
+    n_frames = (len(audio) - start) // frame
+    if n_frames < 2:
+        return len(audio)
+
+    tail = audio[start : start + n_frames * frame].reshape(n_frames, frame)
+    energy = np.mean(tail * tail, axis=1)
+    quietest = int(np.argmin(energy))
+    return start + quietest * frame + frame // 2
+
+
+def segments_to_words(segments, offset_seconds):
+    """Word-split pywhispercpp segments (t0/t1 in 10ms units) -> word dicts in stream time"""
+    words = []
+    for segment in segments:
+        text = segment.text.strip()
+        if not text:
+            continue
+        words.append(
+            {
+                "word": text,
+                "start": round(offset_seconds + segment.t0 / 100, 2),
+                "end": round(offset_seconds + segment.t1 / 100, 2),
+            }
+        )
+    return words
+
+
+class StreamingSession:
+    """Uncommitted audio for one connection plus the partial hypotheses made over it"""
+
+    def __init__(self, final_window=5.0, partial_interval=0.5):
+        self.final_window = final_window
+        self.partial_interval = partial_interval
+        self.buffer = np.zeros(0, dtype=np.float32)
+        self.buffer_start = 0  # stream sample index of buffer[0]
+        self.received = 0  # samples received since the stream started
+        self.segment_id = 0
+        self.last_partial_at = 0
+        self.previous_words = []
+        self.stable_words = []
+        self.partial_running = False
+        self.partials_paused = False  # set while load shedding skips partial passes
+        self.final_queue = asyncio.Queue()
+        self.transcript = ""
+
+    def add_audio(self, audio):
+        self.buffer = np.concatenate((self.buffer, audio))
+        self.received += len(audio)
+
+    def final_due(self):
+        return len(self.buffer) >= self.final_window * SAMPLE_RATE
+
+    def partial_due(self):
+        new_samples = self.received - self.last_partial_at
+        return len(self.buffer) > 0 and new_samples >= self.partial_interval * SAMPLE_RATE
+
+    def take_partial_window(self):
+        """(segment_id, audio, start_sample, end_sample) for a partial pass over the uncommitted audio"""
+        self.last_partial_at = self.received
+        return self.segment_id, self.buffer.copy(), self.buffer_start, self.received
+
+    def take_final_window(self, whole=False):
+        """
+        Cut the buffer at a quiet point and return the head for the final pass,
+        whole takes all of it at the end of the stream
+        """
+        cut = len(self.buffer) if whole else find_cut_point(self.buffer)
+        window = self.buffer[:cut]
+        start = self.buffer_start
+
+        self.buffer = self.buffer[cut:]
+        self.buffer_start += cut
+        segment_id = self.segment_id
+        self.segment_id += 1
+        self.last_partial_at = self.received
+        self.previous_words = []
+        self.stable_words = []
+        return segment_id, window, start, start + cut
+
+    def update_hypothesis(self, words):
+        """
+        Words two consecutive partial hypotheses agree on become stable and are kept
+        even if a later hypothesis changes them. Returns (stable, unstable) word lists.
+        """
+        agreed = common_prefix_length(self.previous_words, words)
+        keeps_stable = common_prefix_length(self.stable_words, words) == len(self.stable_words)
+        if keeps_stable and agreed > len(self.stable_words):
+            self.stable_words = words[:agreed]
+        self.previous_words = words
+        return self.stable_words, words[len(self.stable_words) :]
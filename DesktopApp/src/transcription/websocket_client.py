@@ -5,84 +5,331 @@ import threading
 import numpy as np
 import requests
 import os
+import struct
+import time
+import uuid
+from collections import deque
 from datetime import datetime
+from api.meeting_service import MeetingServiceClient
+from transcription.backlog import AudioBacklog
+from storage.catalog import ACTION_ITEMS, ARTIFACT_FILES, MINUTES, SUMMARY, TRANSCRIPT
+from monitoring.metrics import (
+    CLIENT_BUFFERS_SENT,
+    CLIENT_CAPTION_LATENCY,
+    CLIENT_CAPTURE_TO_SEND,
+    CLIENT_DEGRADED_RESULTS,
+    CLIENT_RECONNECTS,
+    CLIENT_ROUND_TRIP,
+    CLIENT_TIMEOUTS,
+)
+
+# Each audio frame starts with its backlog sequence number as a big-endian uint64
+SEQ_HEADER = struct.Struct(">Q")
 
 
 class TranscriptionWebSocketClient:
-    def __init__(self, audio_capture, server_url="ws://localhost:17483"):
+    def __init__(
+        self,
+        audio_capture,
+        server_url="ws://localhost:17483",
+        meeting_service_url="http://localhost:8888",
+        streaming=False,
+        vocabulary=None,
+        language=None,
+        decoder_context=True,
+        meeting_id=None,
+        catalog=None,
+        retranscriber=None,
+    ):
+        """
+        streaming=True sends short hops and receives provisional "partial" captions
+        about every half second, followed by "final" results for each ~5s window.
+        vocabulary is a list of names and project terms used to prompt Whisper,
+        language skips detection, decoder_context=False decodes every chunk from scratch.
+        meeting_id names the first recording's server-side session (see start()),
+        catalog (storage.catalog.MeetingCatalog) indexes the saved transcript and AI outputs,
+        retranscriber (transcription.retranscribe.Retranscriber) transcribes each saved
+        recording again after the call and its transcript is sent instead of the live one
+        """
         self.audio_capture = audio_capture
         self.server_url = server_url
+        self.meeting_service_url = meeting_service_url
+        self.streaming = streaming
+        self.vocabulary = list(vocabulary or [])
+        self.language = language
+        self.decoder_context = decoder_context
+        self.hop_duration = 0.5
+        self.meeting_id = meeting_id  # None between recordings
+        self.catalog = catalog
+        self.retranscriber = retranscriber
         self.running = False
         self.websocket = None
         self.thread = None
         self.loop = None
+        self.main_task = None
         self.transcript = ""
-
-    def start(self):
-        """Start the transcription client in a separate thread"""
+        self.partial_text = ""
+        # Timed transcript segments for timestamped paragraphs, seconds into the recording
+        self.segments = []
+        self.result_callback = None
+        # Results of this recording the server degraded under load, by degradation
+        self.degradations = {}
+
+        # (stream end sample, capture time) of recent hops, to time captions
+        self.samples_sent = 0
+        self.hop_capture_times = deque(maxlen=256)
+        # seq -> stream seconds where a 5s buffer starts, until it is acknowledged
+        self.buffer_offsets = {}
+
+        # Audio is numbered and kept until the server acknowledges it, so a dropped
+        # connection is resumed from the last acknowledged buffer instead of losing audio
+        self.backlog = AudioBacklog()
+        self.backlog_event = None
+        self.sent_at = {}  # seq -> (first send time, capture time) until acknowledged
+        self.acked_seq = 0
+        self.last_received = 0.0
+        # Reconnect quickly after a blip, backing off while the server stays down
+        self.min_retry_delay = 0.25
+        self.max_retry_delay = 5.0
+        # Drop a connection that went quiet with buffers unacknowledged
+        self.ack_timeout = 30.0
+        # Unacknowledged buffers on the wire, a 5s buffer is only acked once transcribed
+        self.max_unacked = 20 if streaming else 2
+
+        # Ending a recording (flush_transcript, finish_meeting): the capture loop sends what is
+        # left of it, the server transcribes the rest and answers "ended". Ends run one at a
+        # time on the client's loop. Recordings that start meanwhile wait in pending_starts as
+        # (meeting_id, monotonic start time), audio captured after a start belongs to it
+        self.ending = False
+        self.pending_starts = deque()
+        self.open_meeting = None  # the recording start() opened and nothing has ended yet
+        self.shutting_down = False
+        self.meeting_started = None
+        self.capture_drained = None
+        self.meeting_ended = None
+        self.end_lock = None
+        # Seconds an end waits for the server to finish a recording, shorter when the app closes
+        self.end_timeout = 30.0
+        self.shutdown_timeout = 3.0
+
+    def set_result_callback(self, callback):
+        """
+        Set a callback function that will be called with every result message from the server
+        callback should accept: (result: dict) with type "partial", "final" or "transcription",
+        text results carry their timed transcript entry under "segment". It runs on the
+        client's thread
+        """
+        self.result_callback = callback
+
+    def start(self, meeting_id=None):
+        """
+        Open a server session for a recording, the first one also starts the client thread.
+        meeting_id names the session (AudioCapture.meeting_id), one is made up if not given.
+        Each recording gets its own session, end the previous one with flush_transcript()
+        """
         if self.running:
+            if self.open_meeting is not None:
+                if meeting_id in (None, self.open_meeting):
+                    return
+                self.flush_transcript(self.open_meeting)  # the last recording was never flushed
+            self.open_meeting = meeting_id or uuid.uuid4().hex
+            # Queued here rather than on the loop, the recording's audio may already be arriving
+            self.pending_starts.append((self.open_meeting, time.monotonic()))
+            asyncio.run_coroutine_threadsafe(self._start_meeting(self.open_meeting), self.loop)
             return
 
+        self.meeting_id = self.open_meeting = meeting_id or self.meeting_id or uuid.uuid4().hex
+        self.shutting_down = False
+        self.pending_starts.clear()
         self.running = True
+        self.loop = asyncio.new_event_loop()
+        # Created before the loop runs, so ends and starts can be scheduled right away
+        self.backlog_event = asyncio.Event()
+        self.meeting_started = asyncio.Event()
+        self.capture_drained = asyncio.Event()
+        self.meeting_ended = asyncio.Event()
+        self.end_lock = asyncio.Lock()
         self.thread = threading.Thread(target=self._run_async_loop, daemon=True)
         self.thread.start()
         print(f"Transcription client started, connecting to {self.server_url}")
 
+    def end_meeting(self, timeout=None):
+        """
+        Start ending the current recording's session without waiting: the audio still queued
+        is sent, the server gets up to timeout (end_timeout) to acknowledge and transcribe it,
+        then the session is closed. Returns a concurrent Future of the recording's results
+        (see _end_meeting), None when the client is not running
+        """
+        if not self.running:
+            return None
+        self.open_meeting = None
+        return asyncio.run_coroutine_threadsafe(self._end_meeting(timeout), self.loop)
+
+    def finish_meeting(self, timeout=None):
+        """end_meeting() and wait for it, returns the recording's results or None"""
+        future = self.end_meeting(timeout)
+        if future is None:
+            return None
+        try:
+            return future.result(timeout=(timeout or self.end_timeout) + 5)
+        except Exception as e:
+            print(f"Could not end meeting {self.meeting_id}: {e!r}")
+            return None
+
     def stop(self):
-        """Stop the transcription client"""
+        """
+        Stop the transcription client. Recordings still being finished get shutdown_timeout,
+        audio the server has not transcribed by then stays in its resumable session
+        """
+        self.shutting_down = True
+        if self.running:
+            # An end already waiting for the server (a flush thread's) is cut short
+            self.loop.call_soon_threadsafe(self.meeting_ended.set)
+        ended = self.finish_meeting(self.shutdown_timeout)
         self.running = False
-        if self.loop:
-            self.loop.call_soon_threadsafe(self.loop.stop)
+        if self.loop and self.main_task:
+            try:
+                # Cancelling lets the websocket close cleanly instead of stopping the loop mid-await
+                self.loop.call_soon_threadsafe(self.main_task.cancel)
+            except RuntimeError:
+                pass  # loop already closed
         if self.thread:
             self.thread.join(timeout=2)
         print("Transcription client stopped")
-        
+
         # Send transcript to meeting assistant service if we have any transcript
-        if self.transcript.strip():
-            self._send_to_meeting_service()
-    
-    def flush_transcript(self):
-        """Send accumulated transcript to meeting service and reset (without stopping)"""
-        if self.transcript.strip():
+        if ended is None:
+            ended = self._take_results()
+        if ended["unacknowledged_seconds"]:
+            print(f"{ended['unacknowledged_seconds']:.0f}s of audio were not transcribed before closing")
+        if ended["transcript"].strip():
+            self._send_to_meeting_service(None, ended["transcript"], ended["segments"])
+
+    def flush_transcript(self, recording_id=None, recording=None):
+        """
+        End the recording's session in the background (end_meeting), then send its transcript
+        to the meeting service; returns at once and the client is ready for the next recording.
+        recording_id is the catalog ID of the recording the transcript belongs to.
+        With a retranscriber, recording (AudioCapture.last_recording()) gives the saved WAV
+        and it is transcribed again before sending
+        """
+        future = self.end_meeting()
+        # Not a daemon: closing the app waits for the summaries of the last call
+        thread = threading.Thread(
+            target=self._flush,
+            args=(future, recording_id, recording),
+            name="flush-transcript",
+        )
+        thread.start()
+        return thread
+
+    def _flush(self, future, recording_id, recording):
+        """Wait for the recording's results, then send them as flush_transcript describes"""
+        if future is None:
+            ended = self._take_results()
+        else:
+            try:
+                ended = future.result(timeout=self.end_timeout + 5)
+            except Exception as e:
+                print(f"Could not end meeting {recording_id}: {e!r}")
+                return
+        transcript, segments = ended["transcript"], ended["segments"]
+        if ended["degradations"]:
+            summary = ", ".join(f"{kind} {count}" for kind, count in sorted(ended["degradations"].items()))
+            print(f"Server was behind, degraded results: {summary}")
+        if self.retranscriber is not None and recording is not None:
+            self._retranscribe_and_send(recording_id, recording, transcript, segments)
+        elif transcript.strip():
             print(f"\nFlushing transcript (recording ended)...")
-            self._send_to_meeting_service()
-            # Reset transcript for next recording
-            self.transcript = ""
+            self._send_to_meeting_service(recording_id, transcript, segments)
         else:
             print("No transcript to flush")
-    
+
+    def _take_results(self):
+        """The finished recording's transcript, segments and degradations, reset for the next"""
+        results = {
+            "unacknowledged_seconds": 0.0,
+            "transcript": self.transcript,
+            "segments": self.segments,
+            "degradations": self.degradations,
+        }
+        self.transcript = ""
+        self.segments = []
+        self.degradations = {}
+        return results
+
+    def _retranscribe_and_send(self, recording_id, recording, transcript, segments):
+        """Replace the live transcript with one from the saved recording, then send it"""
+        path = recording()
+        if path is None:
+            print("No saved recording to re-transcribe, using the live transcript")
+        else:
+            print(f"Re-transcribing {path}...")
+            try:
+                result = self.retranscriber.transcribe(path)
+                print(
+                    f"Re-transcribed {result['audio_seconds']:.0f}s of audio in {result['seconds']:.0f}s "
+                    f"with {result['model']} ({result['workers']} workers)"
+                )
+                if result["transcript"].strip():
+                    transcript, segments = result["transcript"], result["segments"]
+            except Exception as e:
+                print(f"Re-transcription failed, using the live transcript: {e}")
+        if transcript.strip():
+            self._send_to_meeting_service(recording_id, transcript, segments)
+        else:
+            print("No transcript to send")
+
     #send to api to send to gmeini 
-    def _send_to_meeting_service(self):
-        """Send the accumulated transcript to the meeting assistant service"""
-        base_url = "http://localhost:8888"
+    def _save_output(self, recording_id, kind, output_dir, content):
+        """Write a transcript or AI output, cataloged under the recording when there is a catalog"""
+        path = os.path.join(output_dir, ARTIFACT_FILES[kind])
+        if self.catalog is not None:
+            return self.catalog.save_artifact(recording_id, kind, path, content)
+        with open(path, "w") as f:
+            f.write(content)
+        return path
+
+    def _send_to_meeting_service(self, recording_id=None, transcript=None, segments=None):
+        """Send a finished recording's transcript to the meeting assistant service"""
+        base_url = self.meeting_service_url
         endpoints = ["/summary", "/action-items", "/minutes"]
 
                # Prepare the request payload
-        payload = {
-            "transcript": self.transcript.strip(),
-            "meeting_date": datetime.now().isoformat()
-        }
+        meeting_date = datetime.now().isoformat()
+        transcript = transcript.strip()
+        # The service merges them into timestamped paragraphs
+        segments = segments or None
         
         # Create output directory if it doesn't exist
-        output_dir = os.path.join(os.path.dirname(__file__), "..", "..", "meeting_output",payload["meeting_date"].split(".")[0])
+        output_dir = os.path.join(os.path.dirname(__file__), "..", "..", "meeting_output",meeting_date.split(".")[0])
         output_dir = os.path.abspath(output_dir)
         os.makedirs(output_dir, exist_ok=True)
-        
+        # Transcripts without a recording (client stopped mid-call) get their own catalog entry
+        recording_id = recording_id or f"transcript_{meeting_date.split('.')[0]}"
+        try:
+            self._save_output(recording_id, TRANSCRIPT, output_dir, transcript)
+        except Exception as e:
+            print(f"Could not save transcript: {e}")
  
         print(f"\nSending transcript to meeting assistant service...")
-        print(f"Transcript length: {len(self.transcript)} characters")
+        print(f"Transcript length: {len(transcript)} characters")
         print(f"Output directory: {output_dir}\n")
+
+        # Upload once, every endpoint then only gets the transcript's ID
+        service = MeetingServiceClient(base_url)
+        transcript_id = service.upload(transcript, segments)
         
         for endpoint in endpoints:
             try:
-                url = f"{base_url}{endpoint}"
                 print(f"Requesting {endpoint}...")
                 
-                response = requests.post(
-                    url,
-                    json=payload,
-                    headers={"Content-Type": "application/json"},
-                    timeout=30
+                response = service.generate(
+                    endpoint,
+                    transcript,
+                    segments,
+                    transcript_id=transcript_id,
+                    meeting_date=meeting_date,
                 )
                 
                 if response.status_code == 200:
@@ -92,25 +339,20 @@ class TranscriptionWebSocketClient:
                     if endpoint == "/summary":
                         summary = result.get('summary', 'N/A')
                         print(f"Summary: {summary[:100]}...")
-                        summary_path = os.path.join(output_dir, "meeting_summary.txt")
-                        with open(summary_path, "w") as f:
-                            f.write(summary)
+                        summary_path = self._save_output(recording_id, SUMMARY, output_dir, summary)
                         print(f"Saved to: {summary_path}")
                     elif endpoint == "/action-items":
                         action_items = result.get('action_items', [])
                         print(f"Action items: {len(action_items)} found")
-                        actions_path = os.path.join(output_dir, "action_items.txt")
-                        with open(actions_path, "w") as f:
-                            for item in action_items:
-                                f.write(f"- {item}\n")
+                        actions_path = self._save_output(
+                            recording_id, ACTION_ITEMS, output_dir, "".join(f"- {item}\n" for item in action_items)
+                        )
                         print(f"Saved to: {actions_path}")
                         
                     elif endpoint == "/minutes":
                         minutes = result.get('minutes', '')
                         print(f"Minutes generated successfully")
-                        minutes_path = os.path.join(output_dir, "meeting_minutes.txt")
-                        with open(minutes_path, "w") as f:
-                            f.write(minutes)
+                        minutes_path = self._save_output(recording_id, MINUTES, output_dir, minutes)
                         print(f"Saved to: {minutes_path}")
                 else:
                     print(f"{endpoint}: Failed (status {response.status_code})")
@@ -126,150 +368,424 @@ class TranscriptionWebSocketClient:
 
     def _run_async_loop(self):
         """Run the asyncio event loop in this thread"""
-        self.loop = asyncio.new_event_loop()
         asyncio.set_event_loop(self.loop)
 
+        self.main_task = self.loop.create_task(self._transcription_loop())
         try:
-            self.loop.run_until_complete(self._transcription_loop())
+            self.loop.run_until_complete(self.main_task)
+        except asyncio.CancelledError:
+            pass
         except Exception as e:
             print(f"Transcription loop error: {e}")
         finally:
+            # e.g. the keepalive of a connection that closed as the client stopped
+            pending = asyncio.all_tasks(self.loop)
+            for task in pending:
+                task.cancel()
+            self.loop.run_until_complete(asyncio.gather(*pending, return_exceptions=True))
             self.loop.close()
 
     async def _transcription_loop(self):
-        """Main loop that sends audio chunks to the server"""
-        retry_delay = 5
+        """Capture audio into the backlog while a connection drains it to the server"""
+        if self.meeting_id is not None:
+            self.meeting_started.set()
+        capture = asyncio.ensure_future(self._capture_loop())
+        try:
+            await self._connection_loop()
+        finally:
+            capture.cancel()
+            self.websocket = None
+
+    async def _capture_loop(self):
+        """Accumulate captured audio into buffers, independent of the connection state"""
+        # Audio buffer for accumulating chunks
+        audio_buffer = []
+        meeting_id = self.meeting_id
+        # Audio of recordings that started while the last one is still being finished
+        held = deque()
+        # Accumulate 5 seconds of audio, or short hops when streaming
+        target_duration = self.hop_duration if self.streaming else 5.0
 
         while self.running:
+            if held and not self._after_next_start(held[0]):
+                chunk_data = held.popleft()
+            else:
+                # Get audio chunk from AudioCapture (non-blocking)
+                chunk_data = await asyncio.get_event_loop().run_in_executor(
+                    None,
+                    self.audio_capture.get_audio_chunk,
+                    0.1,  # 100ms timeout
+                )
+            if self.meeting_id != meeting_id:
+                # A recording ended without its tail being sent, never carry it into the next
+                audio_buffer = []
+                meeting_id = self.meeting_id
+            if chunk_data is None and held and not self._after_next_start(held[0]):
+                continue  # the read started before a held recording's session opened, send it first
+
+            # Audio captured after the next recording started waits until its session opens
+            next_chunk = chunk_data is not None and self._after_next_start(chunk_data)
+            if self.ending and not self.capture_drained.is_set() and (chunk_data is None or next_chunk):
+                # The recording's audio has all been read, send the last partial buffer
+                if audio_buffer:
+                    queue_tail = self._queue_hop if self.streaming else self._queue_buffer
+                    queue_tail(audio_buffer, sample_rate, channels, captured_at)
+                    audio_buffer = []
+                self.capture_drained.set()
+                self.backlog_event.set()
+            if chunk_data is None:
+                # No audio available, sleep briefly
+                await asyncio.sleep(0.1)
+                continue
+            if next_chunk:
+                held.append(chunk_data)
+                continue
+            if meeting_id is None:
+                continue  # between recordings
+
+            audio_bytes, sample_rate, channels, captured_at = chunk_data
+
+            # Add to buffer
+            audio_buffer.append(audio_bytes)
+
+            # Calculate total samples (accounting for channels and bytes per sample)
+            total_bytes = sum(len(chunk) for chunk in audio_buffer)
+            total_samples = total_bytes // (channels * 2)  # 2 bytes per sample (int16)
+
+            # Calculate duration based on original sample rate
+            duration_seconds = total_samples / sample_rate
+
+            # Send when buffer has enough duration (accounts for resampling)
+            if duration_seconds >= target_duration and self.streaming:
+                self._queue_hop(audio_buffer, sample_rate, channels, captured_at)
+                audio_buffer = []
+            elif duration_seconds >= target_duration:
+                print(f"Accumulated {duration_seconds:.1f}s of audio, sending to transcription...")
+                self._queue_buffer(audio_buffer, sample_rate, channels, captured_at)
+                audio_buffer = []
+
+    def _after_next_start(self, chunk_data):
+        """Whether a captured chunk belongs to a recording whose session is not open yet"""
+        pending = self.pending_starts
+        return bool(pending) and chunk_data[3] >= pending[0][1]
+
+    async def _connection_loop(self):
+        """Keep a connection to the server, resuming the meeting session after every drop"""
+        retry_delay = self.min_retry_delay
+
+        while self.running:
+            if self.meeting_id is None:
+                # Between recordings, start() opens the next session
+                self.meeting_started.clear()
+                await self.meeting_started.wait()
+                continue
+            meeting_id = self.meeting_id
             try:
-                async with websockets.connect(self.server_url) as websocket:
+                async with self._connect() as websocket:
                     self.websocket = websocket
+                    last_seq = await self._send_config(websocket, meeting_id)
+                    self.last_received = time.monotonic()
+                    self._acknowledge(last_seq)
                     print("Connected to transcription server")
+                    retry_delay = self.min_retry_delay
 
-                    # Audio buffer for accumulating chunks
-                    audio_buffer = []
-                    target_duration = 5.0  # Accumulate 5 seconds of audio
-                    current_sample_rate = None
-                    current_channels = None
-
-                    while self.running:
-                        # Get audio chunk from AudioCapture (non-blocking)
-                        chunk_data = await asyncio.get_event_loop().run_in_executor(
-                            None,
-                            self.audio_capture.get_audio_chunk,
-                            0.1,  # 100ms timeout
-                        )
-
-                        if chunk_data is None:
-                            # No audio available, sleep briefly
-                            await asyncio.sleep(0.1)
-                            continue
-
-                        audio_bytes, sample_rate, channels = chunk_data
-                        current_sample_rate = sample_rate
-                        current_channels = channels
+                    receiver = asyncio.ensure_future(self._receive_loop(websocket, meeting_id))
+                    try:
+                        await self._send_backlog(websocket, last_seq, receiver, meeting_id)
+                    finally:
+                        receiver.cancel()
 
-                        # Add to buffer
-                        audio_buffer.append(audio_bytes)
-
-                        # Calculate total samples (accounting for channels and bytes per sample)
-                        total_bytes = sum(len(chunk) for chunk in audio_buffer)
-                        total_samples = total_bytes // (
-                            channels * 2
-                        )  # 2 bytes per sample (int16)
-                        
-                        # Calculate duration based on original sample rate
-                        duration_seconds = total_samples / sample_rate
-
-                        # Send when buffer has enough duration (accounts for resampling)
-                        if duration_seconds >= target_duration:
-                            print(f"Accumulated {duration_seconds:.1f}s of audio, sending to transcription...")
-                            await self._send_buffer(
-                                audio_buffer, current_sample_rate, current_channels
-                            )
-                            audio_buffer = []
-
-            except websockets.exceptions.ConnectionClosed:
-                print(f"Connection closed, reconnecting in {retry_delay}s...")
-                await asyncio.sleep(retry_delay)
+            except (websockets.exceptions.ConnectionClosed, OSError, asyncio.TimeoutError) as e:
+                print(f"Connection lost ({e or type(e).__name__})")
             except Exception as e:
                 print(f"Connection error: {e}")
                 import traceback
 
                 traceback.print_exc()
-                await asyncio.sleep(retry_delay)
-
-        self.websocket = None
-
-    async def _send_buffer(self, audio_buffer, sample_rate, channels):
-        """Convert buffer to float32 and send to server"""
-        try:
-            # Combine all chunks
-            combined_bytes = b"".join(audio_buffer)
 
-            # Convert from int16 to numpy array
-            int16_data = np.frombuffer(combined_bytes, dtype=np.int16)
-
-            # If stereo, convert to mono by averaging channels
-            if channels == 2:
-                int16_data = int16_data.reshape(-1, 2).mean(axis=1).astype(np.int16)
-
-            # Resample to 16kHz if needed
-            if sample_rate != 16000:
-                int16_data = self._resample_int16(int16_data, sample_rate, 16000)
-
-            # Convert to float32 normalized to [-1, 1]
-            float32_data = int16_data.astype(np.float32) / 32768.0
-
-            # Ensure we have at least 2 seconds (server requirement)
-            min_samples = int(16000 * 2)
-            if len(float32_data) < min_samples:
-                # Pad with zeros if slightly short
-                padding = min_samples - len(float32_data)
-                float32_data = np.pad(float32_data, (0, padding), mode='constant')
-                print(
-                    f"Buffer slightly short, padded {padding} samples to reach {min_samples}"
-                )
-
-            # Ensure we don't exceed reasonable limits (10 seconds max)
-            max_samples = int(16000 * 10)
-            if len(float32_data) > max_samples:
+            self.websocket = None
+            if not self.running:
+                break
+            if self.meeting_id != meeting_id:
+                continue  # the recording ended, not a dropped connection
+            print(f"Reconnecting in {retry_delay:.2f}s ({len(self.backlog)} buffers waiting)...")
+            CLIENT_RECONNECTS.inc()
+            await asyncio.sleep(retry_delay)
+            retry_delay = min(retry_delay * 2, self.max_retry_delay)
+
+    def _connect(self):
+        """Async context manager for one connection to the server, yields a websocket"""
+        return websockets.connect(self.server_url)
+
+    async def _send_config(self, websocket, meeting_id):
+        """
+        Open or resume the meeting session with streaming mode and decoder context,
+        returns the sequence number of the last buffer the server already has
+        """
+        config = {"type": "config", "meeting_id": meeting_id}
+        if self.streaming:
+            config["streaming"] = True
+        if self.vocabulary:
+            config["vocabulary"] = self.vocabulary
+        if self.language:
+            config["language"] = self.language
+        if not self.decoder_context:
+            config["context"] = False
+
+        await websocket.send(json.dumps(config))
+        while True:
+            reply = json.loads(await asyncio.wait_for(websocket.recv(), timeout=10.0))
+            if reply.get("type") == "config":
+                break
+        last_seq = int(reply.get("last_seq") or 0)
+        if reply.get("resumed"):
+            print(f"Resumed meeting {meeting_id}, server has audio up to buffer {last_seq}")
+        return last_seq
+
+    async def _send_backlog(self, websocket, last_seq, receiver, meeting_id):
+        """
+        Send every buffer after last_seq, then new buffers as they are captured. Once the
+        recording is ending and all of it is acknowledged, ask the server to finish it
+        """
+        sent_through = last_seq
+        end_sent = False
+        while self.running and not receiver.done() and self.meeting_id == meeting_id:
+            if self.ending and not end_sent and self.capture_drained.is_set() and not len(self.backlog):
+                await websocket.send(json.dumps({"type": "end"}))
+                end_sent = True
+
+            quiet = time.monotonic() - self.last_received
+            if sent_through > self.acked_seq and quiet > self.ack_timeout:
+                print(f"No reply from server for {quiet:.0f}s, reconnecting")
+                CLIENT_TIMEOUTS.inc()
+                return
+
+            self.backlog_event.clear()
+            entry = None
+            if sent_through - self.acked_seq < self.max_unacked:
+                entry = self.backlog.next_after(sent_through)
+            if entry is None:
+                try:
+                    await asyncio.wait_for(self.backlog_event.wait(), timeout=0.5)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            seq, payload, captured_at = entry
+            now = time.monotonic()
+            if seq not in self.sent_at:
+                if captured_at is not None:
+                    CLIENT_CAPTURE_TO_SEND.observe(now - captured_at)
+                CLIENT_BUFFERS_SENT.inc()
+            if sent_through <= self.acked_seq:
+                self.last_received = now  # start the ack timeout from the first unacked send
+            self.sent_at.setdefault(seq, (now, captured_at))
+            await websocket.send(SEQ_HEADER.pack(seq) + payload)
+            sent_through = seq
+
+    async def _start_meeting(self, meeting_id):
+        """Open meeting_id's session once the recording being ended (if any) is done"""
+        async with self.end_lock:
+            self.meeting_id = meeting_id
+            self.pending_starts.popleft()
+            self.meeting_started.set()
+
+    async def _end_meeting(self, timeout=None):
+        """
+        Wait up to timeout (end_timeout) for the server to finish the current recording,
+        then reset for the next one. Returns the recording's results (_take_results) with
+        the seconds of its audio left unacknowledged
+        """
+        async with self.end_lock:
+            meeting_id = self.meeting_id
+            if meeting_id is None:
+                return self._take_results()
+            timeout = self.shutdown_timeout if self.shutting_down else timeout or self.end_timeout
+            self.ending = True
+            self.capture_drained.clear()
+            self.meeting_ended.clear()
+            self.backlog_event.set()
+            try:
+                await asyncio.wait_for(self.meeting_ended.wait(), timeout=timeout)
+            except asyncio.TimeoutError:
                 print(
-                    f"Buffer too long ({len(float32_data)} samples), truncating to {max_samples}"
+                    f"Meeting {meeting_id} did not finish within {timeout:.0f}s, "
+                    f"{len(self.backlog)} buffers unacknowledged"
                 )
-                float32_data = float32_data[:max_samples]
-
-            # Send as bytes
-            audio_bytes = float32_data.tobytes()
-
-            duration = len(float32_data) / 16000
-            print(f"Sending {len(float32_data)} samples ({duration:.1f}s)")
-
-            if self.websocket:
-                await self.websocket.send(audio_bytes)
-
-                # Listen for transcription response
+            results = self._take_results()
+            # 16kHz float32
+            results["unacknowledged_seconds"] = (self.backlog.memory_bytes + self.backlog.disk_bytes) / 4 / 16000
+            self._reset_meeting()
+            return results
+
+    def _reset_meeting(self):
+        """Forget the finished recording, the next one starts a new session at buffer 1"""
+        self.meeting_id = None
+        self.ending = False
+        self.backlog.close()
+        self.backlog = AudioBacklog()
+        self.sent_at = {}
+        self.acked_seq = 0
+        self.buffer_offsets = {}
+        self.samples_sent = 0
+        self.hop_capture_times.clear()
+        self.partial_text = ""
+        self.backlog_event.set()  # the sender notices the meeting is over
+
+    def _queue_hop(self, audio_buffer, sample_rate, channels, captured_at):
+        """Add a short streaming hop to the backlog; results arrive through _receive_loop"""
+        float32_data = self._to_float32(audio_buffer, sample_rate, channels)
+        self.samples_sent += len(float32_data)
+        self.hop_capture_times.append((self.samples_sent, captured_at))
+        self._queue(float32_data, captured_at)
+
+    def _queue(self, float32_data, captured_at):
+        seq = self.backlog.append(float32_data.tobytes(), captured_at)
+        self.backlog_event.set()
+        return seq
+
+    def _acknowledge(self, seq):
+        """The server has every buffer up to seq, drop them from the backlog"""
+        now = time.monotonic()
+        for acked in [s for s in self.sent_at if s <= seq]:
+            sent, captured_at = self.sent_at.pop(acked)
+            self._buffer_done(acked, now - sent, captured_at)
+        self.acked_seq = max(self.acked_seq, seq)
+        for acked in [s for s in self.buffer_offsets if s <= seq]:
+            del self.buffer_offsets[acked]
+        self.backlog.ack(seq)
+        self.backlog_event.set()
+
+    def _buffer_done(self, seq, round_trip, captured_at):
+        CLIENT_ROUND_TRIP.observe(round_trip)
+
+    def _to_float32(self, audio_buffer, sample_rate, channels):
+        """Combine int16 chunks into 16kHz mono float32 as the server expects"""
+        # Combine all chunks
+        combined_bytes = b"".join(audio_buffer)
+
+        # Convert from int16 to numpy array
+        int16_data = np.frombuffer(combined_bytes, dtype=np.int16)
+
+        # If stereo, convert to mono by averaging channels
+        if channels == 2:
+            int16_data = int16_data.reshape(-1, 2).mean(axis=1).astype(np.int16)
+
+        # Resample to 16kHz if needed
+        if sample_rate != 16000:
+            int16_data = self._resample_int16(int16_data, sample_rate, 16000)
+
+        # Convert to float32 normalized to [-1, 1]
+        return int16_data.astype(np.float32) / 32768.0
+
+    async def _receive_loop(self, websocket, meeting_id):
+        """Handle acks and results while audio keeps streaming"""
+        try:
+            async for message in websocket:
+                if self.meeting_id != meeting_id:
+                    return  # results of a recording that has been reset are not wanted
+                self.last_received = time.monotonic()
                 try:
-                    response = await asyncio.wait_for(
-                        self.websocket.recv(),
-                        timeout=30.0,  # Increased timeout
-                    )
-                    data = json.loads(response)
-                    if data.get("type") == "transcription":
-                        text = data.get("text", "").strip()
-                        if text:
-                            print(f"Transcription: {text}")
-                            self.transcript +=  text + " "
-                except asyncio.TimeoutError:
-                    print("Transcription timeout (server may be processing)")
+                    self._handle_result(json.loads(message))
                 except json.JSONDecodeError:
                     pass
-
-        except Exception as e:
-            print(f"Error sending audio: {e}")
-            import traceback
-
-            traceback.print_exc()
+        except websockets.exceptions.ConnectionClosed:
+            pass
+
+    def _handle_result(self, data):
+        """Apply a result message from the server to the transcript"""
+        msg_type = data.get("type")
+        if msg_type == "ack":
+            self._acknowledge(data["seq"])
+            return
+        if msg_type == "ended":
+            self.meeting_ended.set()
+            return
+        if msg_type == "partial":
+            self.partial_text = data.get("text", "")
+        elif msg_type in ("final", "transcription"):
+            text = data.get("text", "").strip()
+            if text:
+                print(f"Transcription: {text}")
+                self.transcript += text + " "
+                data["segment"] = self._add_segment(data, text)
+            self.partial_text = ""
+        elif msg_type == "error":
+            print(f"Server error: {data.get('message')}")
+            return
+        for kind in data.get("degraded", ()):
+            self.degradations[kind] = self.degradations.get(kind, 0) + 1
+            CLIENT_DEGRADED_RESULTS.labels(kind=kind).inc()
+
+        captured_at = None
+        if "end_sample" in data:
+            captured_at = self._capture_time_for(data["end_sample"])
+        elif data.get("seq") in self.sent_at:
+            captured_at = self.sent_at[data["seq"]][1]
+        if captured_at is not None:
+            latency = time.monotonic() - captured_at
+            data["caption_latency"] = latency
+            CLIENT_CAPTION_LATENCY.labels(kind=msg_type).observe(latency)
+
+        if self.result_callback:
+            try:
+                self.result_callback(data)
+            except Exception as e:
+                print(f"Result callback error: {e}")
+
+    def _add_segment(self, data, text):
+        """Keep a result's text with its time in the recording, returns the segment"""
+        if data.get("type") == "final":
+            start, end = data.get("start", 0.0), data.get("end", 0.0)
+        elif self.buffer_offsets:
+            # Chunk results arrive before the ack, a merged batch starts at its first buffer
+            offset = self.buffer_offsets[min(self.buffer_offsets)]
+            start = offset + data.get("start", 0) / 100
+            end = offset + data.get("end", 0) / 100
+        else:
+            start = end = self.samples_sent / 16000
+        segment = {
+            "start": round(max(0.0, start), 2),
+            "end": round(max(0.0, end), 2),
+            "text": text,
+        }
+        self.segments.append(segment)
+        return segment
+
+    def _capture_time_for(self, end_sample):
+        """Capture time of the hop that contains stream sample end_sample"""
+        for hop_end, captured_at in self.hop_capture_times:
+            if hop_end >= end_sample:
+                return captured_at
+        return None
+
+    def _queue_buffer(self, audio_buffer, sample_rate, channels, captured_at=None):
+        """Convert buffer to float32 and add it to the backlog for sending"""
+        float32_data = self._to_float32(audio_buffer, sample_rate, channels)
+
+        # Ensure we have at least 2 seconds (server requirement)
+        min_samples = int(16000 * 2)
+        if len(float32_data) < min_samples:
+            # Pad with zeros if slightly short
+            padding = min_samples - len(float32_data)
+            float32_data = np.pad(float32_data, (0, padding), mode='constant')
+            print(
+                f"Buffer slightly short, padded {padding} samples to reach {min_samples}"
+            )
+
+        # Ensure we don't exceed reasonable limits (10 seconds max)
+        max_samples = int(16000 * 10)
+        if len(float32_data) > max_samples:
+            print(
+                f"Buffer too long ({len(float32_data)} samples), truncating to {max_samples}"
+            )
+            float32_data = float32_data[:max_samples]
+
+        duration = len(float32_data) / 16000
+        print(f"Sending {len(float32_data)} samples ({duration:.1f}s)")
+        seq = self._queue(float32_data, captured_at)
+        self.buffer_offsets[seq] = self.samples_sent / 16000
+        self.samples_sent += len(float32_data)
 
     def _resample_int16(self, audio, orig_sr, target_sr):
         """Resample int16 audio using linear interpolation"""
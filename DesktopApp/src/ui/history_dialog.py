@@ -0,0 +1,126 @@
+from datetime import datetime
+
+from PyQt6.QtWidgets import (
+    QDialog,
+    QHBoxLayout,
+    QLabel,
+    QListView,
+    QPlainTextEdit,
+    QTabBar,
+    QVBoxLayout,
+)
+from PyQt6.QtCore import QAbstractListModel, QModelIndex, Qt
+from storage.catalog import ACTION_ITEMS, MINUTES, SUMMARY, TRANSCRIPT
+
+# Meetings fetched from the catalog per page, more are loaded as the list scrolls
+PAGE_SIZE = 100
+TABS = [(SUMMARY, "Summary"), (ACTION_ITEMS, "Action Items"), (MINUTES, "Minutes"), (TRANSCRIPT, "Transcript")]
+
+MEETING_ROLE = Qt.ItemDataRole.UserRole
+
+
+def describe(meeting):
+    """Two-line list entry: date, platform and duration, then the summary preview"""
+    try:
+        started = datetime.fromisoformat(meeting["started_at"]).strftime("%a %d %b %Y, %H:%M")
+    except ValueError:
+        started = meeting["started_at"]
+    details = [started]
+    if meeting["platform"]:
+        details.append(meeting["platform"].title())
+    if meeting["duration_seconds"]:
+        details.append(f"{meeting['duration_seconds'] / 60:.0f} min")
+    return " · ".join(details) + "\n" + (meeting["preview"] or meeting["title"] or "No summary")
+
+
+class MeetingListModel(QAbstractListModel):
+    """Catalog meetings newest first, one page at a time as the view asks for more"""
+
+    def __init__(self, catalog, parent=None):
+        super().__init__(parent)
+        self.catalog = catalog
+        self.meetings = []
+        self.cursor = None
+        self.exhausted = False
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.meetings)
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        meeting = self.meetings[index.row()]
+        if role == Qt.ItemDataRole.DisplayRole:
+            return describe(meeting)
+        if role == MEETING_ROLE:
+            return meeting["id"]
+        return None
+
+    def canFetchMore(self, parent=QModelIndex()):
+        return not parent.isValid() and not self.exhausted
+
+    def fetchMore(self, parent=QModelIndex()):
+        meetings, self.cursor = self.catalog.list_meetings(PAGE_SIZE, after=self.cursor)
+        self.exhausted = self.cursor is None
+        if meetings:
+            self.beginInsertRows(QModelIndex(), len(self.meetings), len(self.meetings) + len(meetings) - 1)
+            self.meetings.extend(meetings)
+            self.endInsertRows()
+
+
+class MeetingHistoryDialog(QDialog):
+    def __init__(self, catalog, parent=None):
+        super().__init__(parent)
+        self.catalog = catalog
+        self.meeting_id = None
+        self.setWindowTitle("Meeting History")
+        self.resize(820, 560)
+
+        layout = QHBoxLayout(self)
+        layout.setContentsMargins(15, 15, 15, 15)
+        layout.setSpacing(15)
+
+        # Uniform item sizes let the view lay out only the visible rows
+        self.model = MeetingListModel(catalog, self)
+        self.list_view = QListView()
+        self.list_view.setModel(self.model)
+        self.list_view.setUniformItemSizes(True)
+        self.list_view.setMinimumWidth(300)
+        self.list_view.selectionModel().currentChanged.connect(self.on_meeting_selected)
+        layout.addWidget(self.list_view, 2)
+
+        detail_layout = QVBoxLayout()
+        self.header_label = QLabel(f"{catalog.count()} meetings")
+        self.header_label.setStyleSheet("color: #666666; font-weight: bold; font-size: 11px;")
+        detail_layout.addWidget(self.header_label)
+
+        self.tabs = QTabBar()
+        for _, label in TABS:
+            self.tabs.addTab(label)
+        self.tabs.currentChanged.connect(self.show_artifact)
+        detail_layout.addWidget(self.tabs)
+
+        self.content = QPlainTextEdit()
+        self.content.setReadOnly(True)
+        detail_layout.addWidget(self.content)
+        layout.addLayout(detail_layout, 3)
+
+    def on_meeting_selected(self, current, previous):
+        self.meeting_id = current.data(MEETING_ROLE)
+        meeting = self.catalog.get_meeting(self.meeting_id) if self.meeting_id else None
+        if meeting is None:
+            return
+        sizes = ", ".join(
+            f"{kind.replace('_', ' ')} {artifact['size_bytes'] / 1024:.0f} KB"
+            for kind, artifact in sorted(meeting["artifacts"].items())
+        )
+        self.header_label.setText(f"{meeting['id']}  ({sizes or 'no files'})")
+        self.show_artifact(self.tabs.currentIndex())
+
+    def show_artifact(self, tab_index):
+        """Read the selected output from disk only when it is shown"""
+        if self.meeting_id is None or tab_index < 0:
+            return
+        kind = TABS[tab_index][0]
+        text = self.catalog.read_artifact(self.meeting_id, kind)
+        self.content.setPlainText(text if text is not None else f"No {TABS[tab_index][1].lower()} for this meeting")
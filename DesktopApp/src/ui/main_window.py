@@ -1,3 +1,5 @@
+import os
+import threading
 from PyQt6.QtWidgets import (
     QMainWindow,
     QWidget,
@@ -9,47 +11,174 @@ from PyQt6.QtWidgets import (
     QCheckBox,
     QFrame,
 )
-from PyQt6.QtCore import Qt, QTimer, QSize
+from PyQt6.QtCore import Qt, QTimer, QSize, pyqtSignal
 from PyQt6.QtGui import QFont
-from detection.detect_test import AudioCapture
-from audio.audio_thread import AudioCaptureThread
-from transcription.websocket_client import TranscriptionWebSocketClient
+from monitoring import PROFILE_DIR
+from monitoring.profiling import Profiler
+from monitoring.startup import StartupProfile
+from ui.history_dialog import MeetingHistoryDialog
+from ui.transcript_panel import TranscriptPanel
+from ui.view_model import ViewModel, status_view
+
+METRICS_SNAPSHOT_PATH = os.path.abspath(
+    os.path.join(os.path.dirname(__file__), "..", "..", "logs", "metrics_snapshot.json")
+)
 
 
 class MainWindow(QMainWindow):
-    def __init__(self):
+    # Emitted from the loader thread with the subsystems, or the exception that stopped it
+    subsystems_loaded = pyqtSignal(object)
+    # Audio capture and transcription are running
+    ready = pyqtSignal()
+    # Runs the callable it is emitted with on the UI thread, for cProfile
+    call_on_ui = pyqtSignal(object)
+
+    def __init__(self, profile=None):
+        """
+        Builds only the window. Audio devices, call detection, the transcription client and
+        the catalog are imported and set up on a background thread once the window is shown
+        (start_subsystems); the transcription connection opens when the first call starts
+        """
         super().__init__()
-        self.audio_capture = AudioCapture()
-        self.capture_thread = AudioCaptureThread(self.audio_capture)
+        self.profile = profile or StartupProfile()
+        self.catalog = None
+        self.audio_capture = None
+        self.capture_thread = None
+        self.transcription_client = None
 
-        # Setup WebSocket transcription client
-        self.transcription_client = TranscriptionWebSocketClient(
-            self.audio_capture,
-            server_url="ws://localhost:17483"
-        )
-        self.transcription_client.start()
-        
-        # Register callback to flush transcript when recording stops
-        self.audio_capture.set_recording_stop_callback(
-            self.transcription_client.flush_transcript
-        )
+        # Last state applied to the status widgets, update_status only touches what changed
+        self.view_model = ViewModel()
+        self.was_recording = False
 
-        self.init_ui()
-        self.apply_styles()
+        with self.profile.phase("build window"):
+            self.init_ui()
+            self.apply_styles()
 
         # Set up status update timer
         self.status_timer = QTimer()
         self.status_timer.timeout.connect(self.update_status)
-        self.status_timer.start(1000)
 
-        # Start the capture thread
-        self.capture_thread.start()
+        self.subsystems_loaded.connect(self.on_subsystems_loaded)
+
+        # On demand, see main.py (--profile-for, kill -USR2); cProfile follows the UI thread
+        self.call_on_ui.connect(self.run_on_ui)
+        self.profiler = Profiler(
+            "desktop", PROFILE_DIR, call_in_thread=self.call_on_ui.emit, meeting_id=self.recording_meeting
+        )
+
+    def run_on_ui(self, fn):
+        fn()
+
+    def recording_meeting(self):
+        """The meeting being recorded, profile files are named after it"""
+        if self.audio_capture is not None and self.audio_capture.is_recording:
+            return self.audio_capture.meeting_id
+        return None
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        if self.audio_capture is None and not hasattr(self, "loader"):
+            self.profile.mark("window shown")
+            # Let the first frame paint before the loader competes for the GIL
+            QTimer.singleShot(0, self.start_subsystems)
+
+    def start_subsystems(self):
+        self.loader = threading.Thread(target=self.load_subsystems, name="startup-loader", daemon=True)
+        self.loader.start()
+
+    def load_subsystems(self):
+        """Runs on the loader thread: heavy imports, device setup, catalog; no widgets"""
+        try:
+            with self.profile.phase("import storage.catalog"):
+                from storage.catalog import MeetingCatalog
+            with self.profile.phase("import detection (pyaudio, psutil)"):
+                from detection.detect_test import AudioCapture
+            embedded = os.getenv("FOCUSNOTE_TRANSCRIPTION", "server") == "embedded"
+            with self.profile.phase("import transcription (websockets)"):
+                if embedded:
+                    from transcription.embedded import EmbeddedTranscriptionClient as client_class
+                else:
+                    from transcription.websocket_client import TranscriptionWebSocketClient as client_class
+
+            with self.profile.phase("open catalog"):
+                # Indexes recordings, transcripts and AI outputs for the history view
+                catalog = MeetingCatalog()
+            with self.profile.phase("audio devices"):
+                audio_capture = AudioCapture(
+                    preroll_seconds=float(os.getenv("FOCUSNOTE_PREROLL_SECONDS") or 0),
+                    catalog=catalog,
+                )
+            if catalog.count() == 0:
+                with self.profile.phase("index existing meetings"):
+                    # Index what was saved before the catalog existed, once
+                    catalog.import_existing(os.path.dirname(catalog.path), audio_capture.output_dir)
+
+            with self.profile.phase("transcription client"):
+                vocabulary = [t for t in os.getenv("FOCUSNOTE_VOCABULARY", "").split(",") if t.strip()]
+                language = os.getenv("FOCUSNOTE_LANGUAGE") or None
+                options = {} if embedded else {"server_url": "ws://localhost:17483"}
+                if os.getenv("FOCUSNOTE_RETRANSCRIBE", "0") == "1":
+                    from transcription.retranscribe import Retranscriber
+
+                    # The saved recording is transcribed again for the summaries after each call
+                    options["retranscriber"] = Retranscriber(
+                        model=os.getenv("FOCUSNOTE_RETRANSCRIBE_MODEL") or "large-v3",
+                        workers=int(os.getenv("FOCUSNOTE_RETRANSCRIBE_WORKERS") or 0) or None,
+                        vocabulary=vocabulary,
+                        language=language,
+                    )
+                # Not started: the connection (or embedded engine) opens when the first call starts
+                transcription_client = client_class(
+                    audio_capture,
+                    streaming=True,
+                    vocabulary=vocabulary,
+                    language=language,
+                    catalog=catalog,
+                    **options,
+                )
+            if "retranscriber" in options:
+                with self.profile.phase("re-transcription workers"):
+                    # One pool for the session, its workers load the model for the first
+                    # recording and keep it for the next ones
+                    options["retranscriber"].start()
+        except BaseException as e:  # detect_test exits when PyAudio is missing
+            self.subsystems_loaded.emit(e)
+            return
+        self.subsystems_loaded.emit((catalog, audio_capture, transcription_client))
+
+    def on_subsystems_loaded(self, result):
+        """Back on the UI thread: wire the subsystems to the window and start monitoring"""
+        if isinstance(result, BaseException):
+            print(f"Could not start audio capture: {result!r}")
+            self.status_label.setText("Audio unavailable")
+            self.ready.emit()
+            return
+
+        with self.profile.phase("start monitoring"):
+            from audio.audio_thread import AudioCaptureThread
+
+            self.catalog, self.audio_capture, self.transcription_client = result
+            self.add_platform_rows(self.audio_capture.platforms)
+            self.view_notes_btn.setEnabled(True)
+
+            self.audio_capture.set_recording_start_callback(self.on_recording_started)
+            # Register callback to flush transcript when recording stops
+            self.audio_capture.set_recording_stop_callback(self.on_recording_stopped)
+            self.transcription_client.set_result_callback(self.transcript_panel.feed.on_result)
+
+            # Start the capture thread
+            self.capture_thread = AudioCaptureThread(self.audio_capture)
+            self.capture_thread.start()
+            self.status_timer.start(1000)
+            self.update_status()
+        self.profile.mark("ready")
+        self.ready.emit()
 
     def init_ui(self):
         """Initialize the user interface"""
         self.setWindowTitle("FocusNote")
-        self.setGeometry(100, 100, 420, 600)
-        self.setMinimumSize(400, 550)
+        self.setGeometry(100, 100, 420, 780)
+        self.setMinimumSize(400, 680)
 
         # Create central widget and main layout
         central_widget = QWidget()
@@ -93,7 +222,7 @@ class MainWindow(QMainWindow):
         self.status_icon.setStyleSheet("color: #999999; font-size: 24px;")
         status_header.addWidget(self.status_icon)
 
-        self.status_label = QLabel("Status: Idle")
+        self.status_label = QLabel("Starting...")
         status_font = QFont()
         status_font.setPointSize(14)
         status_font.setBold(True)
@@ -116,45 +245,24 @@ class MainWindow(QMainWindow):
         )
         status_card_layout.addWidget(platforms_label)
 
-        # Discord status
-        discord_layout = QHBoxLayout()
-        self.discord_icon = QLabel("◉")
-        self.discord_icon.setStyleSheet("color: #999999; font-size: 18px;")
-        discord_layout.addWidget(self.discord_icon)
-
-        self.discord_status_label = QLabel("Discord")
-        discord_status_font = QFont()
-        discord_status_font.setPointSize(12)
-        self.discord_status_label.setFont(discord_status_font)
-        discord_layout.addWidget(self.discord_status_label)
-        discord_layout.addStretch()
-
-        self.discord_cpu_label = QLabel("")
-        self.discord_cpu_label.setStyleSheet("color: #999999; font-size: 11px;")
-        discord_layout.addWidget(self.discord_cpu_label)
-
-        status_card_layout.addLayout(discord_layout)
-
-        # Zoom status
-        zoom_layout = QHBoxLayout()
-        self.zoom_icon = QLabel("◉")
-        self.zoom_icon.setStyleSheet("color: #999999; font-size: 18px;")
-        zoom_layout.addWidget(self.zoom_icon)
-
-        self.zoom_status_label = QLabel("Zoom")
-        zoom_status_font = QFont()
-        zoom_status_font.setPointSize(12)
-        self.zoom_status_label.setFont(zoom_status_font)
-        zoom_layout.addWidget(self.zoom_status_label)
-        zoom_layout.addStretch()
+        # One status row per call platform, added once call detection has loaded
+        self.status_card_layout = status_card_layout
+        self.platform_rows = {}
 
-        self.zoom_cpu_label = QLabel("")
-        self.zoom_cpu_label.setStyleSheet("color: #999999; font-size: 11px;")
-        zoom_layout.addWidget(self.zoom_cpu_label)
+        main_layout.addWidget(status_card)
 
-        status_card_layout.addLayout(zoom_layout)
+        # Widgets update_status may change, by view model key
+        self.status_widgets = {"status": self.status_label, "status_icon": self.status_icon}
 
-        main_layout.addWidget(status_card)
+        # Live transcript of the current recording
+        transcript_group = QGroupBox("Live Transcript")
+        transcript_layout = QVBoxLayout()
+        transcript_layout.setContentsMargins(15, 20, 15, 15)
+        self.transcript_panel = TranscriptPanel()
+        self.transcript_panel.setMinimumHeight(160)
+        transcript_layout.addWidget(self.transcript_panel)
+        transcript_group.setLayout(transcript_layout)
+        main_layout.addWidget(transcript_group, 1)
 
         # Settings Section
         settings_group = QGroupBox("Settings")
@@ -188,6 +296,8 @@ class MainWindow(QMainWindow):
         self.view_notes_btn = QPushButton("View Notes Hub")
         self.view_notes_btn.setObjectName("secondaryButton")
         self.view_notes_btn.setMinimumHeight(40)
+        self.view_notes_btn.clicked.connect(self.show_history)
+        self.view_notes_btn.setEnabled(False)  # until the catalog is open
         buttons_layout.addWidget(self.view_notes_btn)
 
         self.settings_btn = QPushButton("Advanced Settings")
@@ -197,15 +307,37 @@ class MainWindow(QMainWindow):
 
         main_layout.addLayout(buttons_layout)
 
-        # Push everything to the top
-        main_layout.addStretch()
-
         # Footer
         footer = QLabel("Desktop Meeting Assistant")
         footer.setAlignment(Qt.AlignmentFlag.AlignCenter)
         footer.setStyleSheet("color: #999999; font-size: 10px; padding: 10px;")
         main_layout.addWidget(footer)
 
+    def add_platform_rows(self, platforms):
+        """One status row per call platform in the registry"""
+        for call_platform in platforms:
+            platform_layout = QHBoxLayout()
+            icon = QLabel("◉")
+            icon.setStyleSheet("color: #999999; font-size: 18px;")
+            platform_layout.addWidget(icon)
+
+            status_label = QLabel(call_platform.display_name)
+            platform_status_font = QFont()
+            platform_status_font.setPointSize(12)
+            status_label.setFont(platform_status_font)
+            platform_layout.addWidget(status_label)
+            platform_layout.addStretch()
+
+            cpu_label = QLabel("")
+            cpu_label.setStyleSheet("color: #999999; font-size: 11px;")
+            platform_layout.addWidget(cpu_label)
+
+            self.status_card_layout.addLayout(platform_layout)
+            self.platform_rows[call_platform.key] = (icon, status_label, cpu_label)
+            self.status_widgets[f"{call_platform.key}.icon"] = icon
+            self.status_widgets[f"{call_platform.key}.name"] = status_label
+            self.status_widgets[f"{call_platform.key}.cpu"] = cpu_label
+
     def apply_styles(self):
         """Apply modern stylesheet to the application"""
         self.setStyleSheet("""
@@ -279,62 +411,75 @@ class MainWindow(QMainWindow):
         """)
 
     def update_status(self):
-        """Periodically check and update all status labels"""
-        # Check Discord status
-        discord_active, discord_name, discord_cpu = (
-            self.audio_capture.detect_discord_call()
-        )
-        if discord_active:
-            self.discord_status_label.setText("Discord")
-            self.discord_status_label.setStyleSheet(
-                "color: #4CAF50; font-weight: bold;"
-            )
-            self.discord_icon.setStyleSheet("color: #4CAF50; font-size: 18px;")
-            self.discord_cpu_label.setText(f"{discord_cpu:.1f}% CPU")
-        else:
-            self.discord_status_label.setText("Discord")
-            self.discord_status_label.setStyleSheet("color: #999999;")
-            self.discord_icon.setStyleSheet("color: #999999; font-size: 18px;")
-            self.discord_cpu_label.setText("Not detected")
-
-        # Check Zoom status
-        zoom_active, zoom_name, zoom_cpu = self.audio_capture.detect_zoom_call()
-        if zoom_active:
-            self.zoom_status_label.setText("Zoom")
-            self.zoom_status_label.setStyleSheet("color: #4CAF50; font-weight: bold;")
-            self.zoom_icon.setStyleSheet("color: #4CAF50; font-size: 18px;")
-            self.zoom_cpu_label.setText(f"{zoom_cpu:.1f}% CPU")
-        else:
-            self.zoom_status_label.setText("Zoom")
-            self.zoom_status_label.setStyleSheet("color: #999999;")
-            self.zoom_icon.setStyleSheet("color: #999999; font-size: 18px;")
-            self.zoom_cpu_label.setText("Not detected")
-
-        # Check recording status
+        """Apply the monitor loop's latest detection, touching only widgets whose state changed"""
         is_recording = self.audio_capture.is_recording
-        platform = self.audio_capture.active_platform
-
-        if is_recording and platform:
-            self.status_label.setText(f"Recording {platform.upper()}")
-            self.status_label.setStyleSheet("color: #f44336; font-weight: bold;")
-            self.status_icon.setStyleSheet("color: #f44336; font-size: 24px;")
-        elif self.audio_capture.running:
-            self.status_label.setText("Monitoring")
-            self.status_label.setStyleSheet("color: #2196F3; font-weight: bold;")
-            self.status_icon.setStyleSheet("color: #2196F3; font-size: 24px;")
-        else:
-            self.status_label.setText("Idle")
-            self.status_label.setStyleSheet("color: #999999; font-weight: bold;")
-            self.status_icon.setStyleSheet("color: #999999; font-size: 24px;")
+        if is_recording and not self.was_recording:
+            self.transcript_panel.clear()
+        self.was_recording = is_recording
+
+        view = status_view(
+            self.audio_capture.platform_status,
+            self.platform_rows,
+            is_recording,
+            self.audio_capture.active_platform,
+            self.audio_capture.running,
+        )
+        for key, properties in self.view_model.changes(view).items():
+            widget = self.status_widgets[key]
+            if "text" in properties:
+                widget.setText(properties["text"])
+            if "style" in properties:
+                widget.setStyleSheet(properties["style"])
+
+    def on_recording_started(self):
+        """Open a transcription session for the call, the connection itself opens with the first"""
+        self.transcription_client.start(self.audio_capture.meeting_id)
+
+    def on_recording_stopped(self):
+        """Flush the transcript and record pipeline metrics for the finished call"""
+        self.transcription_client.flush_transcript(
+            self.audio_capture.meeting_id, recording=self.audio_capture.last_recording()
+        )
+        self.save_metrics_snapshot()
+
+    def show_history(self):
+        """Open the meeting history, meetings and their outputs load as they are viewed"""
+        dialog = MeetingHistoryDialog(self.catalog, self)
+        dialog.exec()
+
+    def save_metrics_snapshot(self):
+        """Write a JSON snapshot of the pipeline metrics to the logs folder"""
+        from monitoring.metrics import write_snapshot
+
+        try:
+            write_snapshot(METRICS_SNAPSHOT_PATH)
+            print(f"Metrics snapshot saved to: {METRICS_SNAPSHOT_PATH}")
+        except OSError as e:
+            print(f"Could not save metrics snapshot: {e}")
 
     def on_auto_start_changed(self, state):
         """Handle auto-start checkbox change"""
         # Implement auto-start logic here
         pass
 
+    def close_retranscriber(self, retranscriber):
+        """Stop the re-transcription workers once the recording they are on (if any) is done"""
+        with retranscriber.lock:
+            retranscriber.close()
+
     def closeEvent(self, event):
         """Clean up when window is closed"""
         self.status_timer.stop()
-        self.transcription_client.stop()
-        self.capture_thread.stop()
+        self.profiler.stop()
+        if self.transcription_client is not None:
+            self.transcription_client.stop()
+            retranscriber = getattr(self.transcription_client, "retranscriber", None)
+            if retranscriber is not None:
+                # Not a daemon: a re-transcription in progress finishes before its workers go
+                threading.Thread(
+                    target=self.close_retranscriber, args=(retranscriber,), name="retranscriber-close"
+                ).start()
+        if self.capture_thread is not None:
+            self.capture_thread.stop()
+            self.save_metrics_snapshot()
         event.accept()
@@ -0,0 +1,133 @@
+import threading
+
+from PyQt6.QtWidgets import QLabel, QListView, QVBoxLayout, QWidget
+from PyQt6.QtCore import QAbstractListModel, QModelIndex, QObject, Qt, QTimer, pyqtSignal
+
+# Results arriving within this window are inserted into the list together
+BATCH_MS = 100
+# Rows laid out per pass of the list view, the rest are laid out between frames
+LAYOUT_BATCH = 100
+
+
+def format_time(seconds):
+    minutes, seconds = divmod(int(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours}:{minutes:02d}:{seconds:02d}" if hours else f"{minutes:02d}:{seconds:02d}"
+
+
+class TranscriptModel(QAbstractListModel):
+    """Final transcript segments of the current recording, appended in batches"""
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.segments = []
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.segments)
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid() or role != Qt.ItemDataRole.DisplayRole:
+            return None
+        segment = self.segments[index.row()]
+        return f"[{format_time(segment['start'])}] {segment['text']}"
+
+    def append_segments(self, segments):
+        if not segments:
+            return
+        first = len(self.segments)
+        self.beginInsertRows(QModelIndex(), first, first + len(segments) - 1)
+        self.segments.extend(segments)
+        self.endInsertRows()
+
+    def clear(self):
+        self.beginResetModel()
+        self.segments = []
+        self.endResetModel()
+
+
+class TranscriptFeed(QObject):
+    """
+    Takes results from the transcription client's thread and hands them to the UI thread
+    in batches: the first result after a flush schedules the next flush, later ones just
+    join the pending batch
+    """
+
+    segments_ready = pyqtSignal(list)
+    partial_changed = pyqtSignal(str)
+    _pending = pyqtSignal()
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.lock = threading.Lock()
+        self.segments = []
+        self.partial = None
+        self.scheduled = False
+        # Queued to this object's (the UI) thread when emitted from the client thread
+        self._pending.connect(self._schedule)
+
+    def on_result(self, data):
+        """Result callback for TranscriptionWebSocketClient, runs on the client's thread"""
+        msg_type = data.get("type")
+        with self.lock:
+            if msg_type == "partial":
+                self.partial = data.get("text", "")
+            elif msg_type in ("final", "transcription") and data.get("segment"):
+                self.segments.append(data["segment"])
+                self.partial = ""
+            else:
+                return
+            if self.scheduled:
+                return
+            self.scheduled = True
+        self._pending.emit()
+
+    def _schedule(self):
+        QTimer.singleShot(BATCH_MS, self._flush)
+
+    def _flush(self):
+        with self.lock:
+            segments, self.segments = self.segments, []
+            partial, self.partial = self.partial, None
+            self.scheduled = False
+        if segments:
+            self.segments_ready.emit(segments)
+        if partial is not None:
+            self.partial_changed.emit(partial)
+
+
+class TranscriptPanel(QWidget):
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(0, 0, 0, 0)
+        layout.setSpacing(4)
+
+        self.model = TranscriptModel(self)
+        self.list_view = QListView()
+        self.list_view.setModel(self.model)
+        self.list_view.setWordWrap(True)
+        self.list_view.setLayoutMode(QListView.LayoutMode.Batched)
+        self.list_view.setBatchSize(LAYOUT_BATCH)
+        self.list_view.setVerticalScrollMode(QListView.ScrollMode.ScrollPerPixel)
+        layout.addWidget(self.list_view)
+
+        self.partial_label = QLabel("")
+        self.partial_label.setWordWrap(True)
+        self.partial_label.setStyleSheet("color: #999999; font-style: italic; font-size: 11px;")
+        layout.addWidget(self.partial_label)
+
+        self.feed = TranscriptFeed(self)
+        self.feed.segments_ready.connect(self.append_segments)
+        self.feed.partial_changed.connect(self.partial_label.setText)
+
+    def append_segments(self, segments):
+        """Add a batch, following the end of the transcript unless the user scrolled up"""
+        scroll_bar = self.list_view.verticalScrollBar()
+        at_bottom = scroll_bar.value() >= scroll_bar.maximum() - 4
+        self.model.append_segments(segments)
+        if at_bottom:
+            self.list_view.scrollToBottom()
+
+    def clear(self):
+        self.model.clear()
+        self.partial_label.setText("")
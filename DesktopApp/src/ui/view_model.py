@@ -0,0 +1,60 @@
+"""
+Status view model
+Computes what the main window's labels should show from the capture state, and diffs it
+against what was last applied so the window only calls setText/setStyleSheet on widgets
+whose value actually changed. Stylesheets are re-parsed on every setStyleSheet call, even
+with an identical string. Kept free of Qt so it can be used and checked headless.
+"""
+
+GREEN = "#4CAF50"
+GREY = "#999999"
+RED = "#f44336"
+BLUE = "#2196F3"
+
+# Stylesheet strings are built once, identical states share the same string
+STATUS_STYLE = {color: f"color: {color}; font-weight: bold;" for color in (GREEN, GREY, RED, BLUE)}
+STATUS_ICON_STYLE = {color: f"color: {color}; font-size: 24px;" for color in (GREY, RED, BLUE)}
+PLATFORM_ACTIVE_STYLE = f"color: {GREEN}; font-weight: bold;"
+PLATFORM_IDLE_STYLE = f"color: {GREY};"
+PLATFORM_ICON_STYLE = {color: f"color: {color}; font-size: 18px;" for color in (GREEN, GREY)}
+
+NOT_DETECTED = (False, None, 0)
+
+
+def status_view(platform_status, platform_keys, is_recording, active_platform, monitoring):
+    """{widget key: {"text": ..., "style": ...}} for the status card"""
+    view = {}
+    for key in platform_keys:
+        active, name, cpu = platform_status.get(key, NOT_DETECTED)
+        color = GREEN if active else GREY
+        view[f"{key}.icon"] = {"style": PLATFORM_ICON_STYLE[color]}
+        view[f"{key}.name"] = {"style": PLATFORM_ACTIVE_STYLE if active else PLATFORM_IDLE_STYLE}
+        view[f"{key}.cpu"] = {"text": f"{cpu:.1f}% CPU" if active else "Not detected"}
+
+    if is_recording and active_platform:
+        text, color = f"Recording {active_platform.upper()}", RED
+    elif monitoring:
+        text, color = "Monitoring", BLUE
+    else:
+        text, color = "Idle", GREY
+    view["status"] = {"text": text, "style": STATUS_STYLE[color]}
+    view["status_icon"] = {"style": STATUS_ICON_STYLE[color]}
+    return view
+
+
+class ViewModel:
+    """Remembers the properties applied to each widget, reports only the ones that changed"""
+
+    def __init__(self):
+        self.applied = {}
+
+    def changes(self, view):
+        """{widget key: {property: value}} of the properties that differ from last time"""
+        changed = {}
+        for key, properties in view.items():
+            applied = self.applied.setdefault(key, {})
+            diff = {name: value for name, value in properties.items() if applied.get(name) != value}
+            if diff:
+                applied.update(diff)
+                changed[key] = diff
+        return changed
@@ -0,0 +1,81 @@
+import pytest
+
+from transcription.backlog import MAX_MEMORY_BYTES, AudioBacklog
+
+# A second of 16kHz float32 audio
+SECOND = 64 * 1024
+
+
+def payload(seq, size=SECOND):
+    """Buffer contents that say which buffer they are"""
+    return seq.to_bytes(4, "big") * (size // 4)
+
+
+@pytest.fixture
+def small_backlog():
+    # 2 buffers of 500 bytes in memory, 8 on disk
+    backlog = AudioBacklog(max_memory_bytes=1000, max_disk_bytes=4000)
+    yield backlog
+    backlog.close()
+
+
+def read_all(backlog):
+    entries, seq = [], 0
+    while True:
+        entry = backlog.next_after(seq)
+        if entry is None:
+            return entries
+        seq = entry[0]
+        entries.append(entry)
+
+
+def test_spills_past_the_memory_limit():
+    backlog = AudioBacklog()
+    try:
+        for seq in range(1, 201):
+            assert backlog.append(payload(seq), captured_at=float(seq)) == seq
+        assert backlog.memory_bytes <= MAX_MEMORY_BYTES
+        assert backlog.disk_bytes == 200 * SECOND - backlog.memory_bytes
+        assert backlog.spilled == 200 - backlog.memory_bytes // SECOND
+        # Spilled and in-memory buffers read back the same, in order
+        assert [(seq, data, at) for seq, data, at in read_all(backlog)] == [
+            (seq, payload(seq), float(seq)) for seq in range(1, 201)
+        ]
+    finally:
+        backlog.close()
+
+
+def test_acking_everything_on_disk_reuses_the_file(small_backlog):
+    for seq in range(1, 7):
+        small_backlog.append(payload(seq, 500))
+    assert small_backlog.spilled == 4 and small_backlog.file_bytes == 2000
+
+    small_backlog.ack(2)
+    assert small_backlog.next_after(0)[0] == 3
+    assert small_backlog.file_bytes == 2000  # buffers 3 and 4 are still on disk
+
+    small_backlog.ack(5)
+    assert small_backlog.spilled == 0 and small_backlog.disk_bytes == 0
+    assert small_backlog.file_bytes == 0
+    assert [seq for seq, _, _ in read_all(small_backlog)] == [6]
+
+
+def test_drops_the_oldest_buffers_over_the_disk_cap(small_backlog):
+    for seq in range(1, 21):
+        small_backlog.append(payload(seq, 500))
+    assert small_backlog.disk_bytes <= small_backlog.max_disk_bytes
+    assert len(small_backlog) == 10
+    # The newest audio is kept, the backlog resumes after the gap
+    assert [seq for seq, _, _ in read_all(small_backlog)] == list(range(11, 21))
+    assert small_backlog.next_after(3)[0] == 11
+
+
+def test_compacts_the_spill_file_during_long_outages(small_backlog):
+    for seq in range(1, 101):
+        small_backlog.append(payload(seq, 500))
+        # Dropped buffers leave dead space until the file is rewritten
+        assert small_backlog.file_bytes <= 2 * small_backlog.max_disk_bytes
+    assert small_backlog.file_bytes >= small_backlog.disk_bytes
+    assert [(seq, data) for seq, data, _ in read_all(small_backlog)] == [
+        (seq, payload(seq, 500)) for seq in range(91, 101)
+    ]
@@ -0,0 +1,128 @@
+import os
+import wave
+
+import pytest
+
+from storage.catalog import (
+    ARTIFACT_FILES,
+    MINUTES,
+    RECORDING,
+    SUMMARY,
+    TRANSCRIPT,
+    MeetingCatalog,
+)
+
+
+@pytest.fixture
+def catalog(tmp_path):
+    catalog = MeetingCatalog(str(tmp_path / "catalog.sqlite3"))
+    yield catalog
+    catalog.close()
+
+
+def write_wav(path, seconds, rate=8000):
+    with wave.open(str(path), "wb") as wf:
+        wf.setnchannels(1)
+        wf.setsampwidth(2)
+        wf.setframerate(rate)
+        wf.writeframes(b"\0\0" * int(seconds * rate))
+
+
+def write_outputs(directory, kinds):
+    directory.mkdir(parents=True)
+    for kind in kinds:
+        (directory / ARTIFACT_FILES[kind]).write_text(f"{kind} text", encoding="utf-8")
+
+
+def all_pages(catalog, limit, **filters):
+    pages, cursor = [], None
+    while True:
+        meetings, cursor = catalog.list_meetings(limit, after=cursor, **filters)
+        pages.append([meeting["id"] for meeting in meetings])
+        if cursor is None:
+            return pages
+
+
+def test_pages_through_meetings_newest_first(catalog):
+    # m3 and m4 start in the same second, the ID breaks the tie
+    for meeting_id, started_at, platform in [
+        ("m1", "2024-05-01T09:00:00", "zoom"),
+        ("m2", "2024-05-02T09:00:00", "teams"),
+        ("m3", "2024-05-03T09:00:00", "zoom"),
+        ("m4", "2024-05-03T09:00:00", "zoom"),
+        ("m5", "2024-05-04T09:00:00", "teams"),
+    ]:
+        catalog.start_meeting(meeting_id, platform=platform, started_at=started_at)
+
+    assert all_pages(catalog, 2) == [["m5", "m4"], ["m3", "m2"], ["m1"]]
+    # A last page that is exactly full needs one more, empty, request
+    assert all_pages(catalog, 5) == [["m5", "m4", "m3", "m2", "m1"], []]
+    assert all_pages(catalog, 2, platform="zoom") == [["m4", "m3"], ["m1"]]
+
+
+def test_listed_meetings_carry_their_artifact_kinds_and_sizes(catalog, tmp_path):
+    catalog.start_meeting("bare", started_at="2024-05-01T09:00:00")
+    catalog.save_artifact("full", TRANSCRIPT, str(tmp_path / "full" / "transcript.txt"), "hello")
+    catalog.save_artifact("full", SUMMARY, str(tmp_path / "full" / "summary.txt"), "a summary")
+
+    meetings, _ = catalog.list_meetings()
+    by_id = {meeting["id"]: meeting for meeting in meetings}
+    assert by_id["full"]["artifacts"] == [SUMMARY, TRANSCRIPT]
+    assert by_id["full"]["size_bytes"] == len("hello") + len("a summary")
+    assert by_id["full"]["preview"] == "a summary"
+    assert by_id["bare"]["artifacts"] == [] and by_id["bare"]["size_bytes"] == 0
+    assert all("kinds" not in meeting for meeting in meetings)
+
+
+def test_failed_save_leaves_neither_file_nor_row(catalog, tmp_path, monkeypatch):
+    path = tmp_path / "m1" / "meeting_minutes.txt"
+    catalog.save_artifact("m1", MINUTES, str(path), "first")
+
+    def fail(*args, **kwargs):
+        raise OSError("disk full")
+
+    # The row cannot be written, then the file cannot be moved into place
+    for target, name in [(catalog, "_insert_artifact"), (os, "replace")]:
+        with monkeypatch.context() as patch:
+            patch.setattr(target, name, fail)
+            with pytest.raises(OSError):
+                catalog.save_artifact("m1", MINUTES, str(path), "second, longer")
+            with pytest.raises(OSError):
+                catalog.save_artifact("m2", MINUTES, str(tmp_path / "m2" / "meeting_minutes.txt"), "x")
+
+        assert path.read_text(encoding="utf-8") == "first"
+        assert catalog.get_meeting("m1")["artifacts"][MINUTES]["size_bytes"] == len("first")
+        assert os.listdir(path.parent) == ["meeting_minutes.txt"]  # no temporary file left
+        assert catalog.get_meeting("m2") is None
+        assert os.listdir(tmp_path / "m2") == []
+
+
+def test_import_links_recordings_to_the_outputs_written_after_them(catalog, tmp_path):
+    recordings = tmp_path / "meeting_recordings"
+    outputs = tmp_path / "meeting_output"
+    recordings.mkdir()
+    write_wav(recordings / "meeting_zoom_20240501_090000.wav", seconds=2)
+    write_wav(recordings / "meeting_20240502_140000.wav", seconds=1)
+    (recordings / "notes.wav").write_bytes(b"not a recording")
+    # Written 5 minutes after the first recording, then one with no recording
+    write_outputs(outputs / "2024-05-01T09:05:00", [TRANSCRIPT, SUMMARY, MINUTES])
+    write_outputs(outputs / "2024-05-03T10:00:00", [TRANSCRIPT])
+    (outputs / "not-a-timestamp").mkdir()
+
+    assert catalog.import_existing(str(outputs), str(recordings)) == 3
+
+    zoom = catalog.get_meeting("legacy-20240501_090000")
+    assert zoom["platform"] == "zoom"
+    assert zoom["duration_seconds"] == pytest.approx(2.0)
+    assert zoom["started_at"] == "2024-05-01T09:00:00"
+    assert sorted(zoom["artifacts"]) == sorted([RECORDING, TRANSCRIPT, SUMMARY, MINUTES])
+    assert zoom["artifacts"][SUMMARY]["path"] == str(outputs / "2024-05-01T09:05:00" / ARTIFACT_FILES[SUMMARY])
+
+    assert list(catalog.get_meeting("legacy-20240502_140000")["artifacts"]) == [RECORDING]
+    orphan = catalog.get_meeting("legacy-20240503_100000")
+    assert list(orphan["artifacts"]) == [TRANSCRIPT]
+    assert orphan["started_at"] == "2024-05-03T10:00:00"
+
+    # Files already in the catalog are not imported twice
+    assert catalog.import_existing(str(outputs), str(recordings)) == 0
+    assert catalog.count() == 3
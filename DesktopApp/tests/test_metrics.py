@@ -0,0 +1,43 @@
+import asyncio
+import json
+import threading
+import time
+import urllib.error
+import urllib.request
+
+import pytest
+
+from monitoring.metrics import on_loop, start_metrics_server
+
+
+@pytest.fixture
+def loop():
+    """An event loop running on its own thread"""
+    loop = asyncio.new_event_loop()
+    thread = threading.Thread(target=loop.run_forever, name="event-loop", daemon=True)
+    thread.start()
+    yield loop
+    loop.call_soon_threadsafe(loop.stop)
+    thread.join(timeout=5)
+    loop.close()
+
+
+def test_status_routes_run_on_the_loop_thread(loop):
+    def status():
+        return {"thread": threading.current_thread().name}
+
+    httpd = start_metrics_server("127.0.0.1", 0, routes={"/status": on_loop(loop, status, timeout=0.5)})
+    url = f"http://127.0.0.1:{httpd.server_address[1]}/status"
+    try:
+        with urllib.request.urlopen(url, timeout=5) as response:
+            reply = json.load(response)
+        assert reply == {"thread": "event-loop"}
+
+        # A loop that cannot answer in time makes /status fail instead of hanging
+        loop.call_soon_threadsafe(time.sleep, 1.0)
+        with pytest.raises(urllib.error.HTTPError) as error:
+            urllib.request.urlopen(url, timeout=5)
+        assert error.value.code == 503
+    finally:
+        httpd.shutdown()
+        httpd.server_close()
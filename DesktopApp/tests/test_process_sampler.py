@@ -0,0 +1,47 @@
+import shutil
+
+from detection.process_sampler import ProcfsSampler
+
+
+def write_process(proc_root, pid, name, start_time, jiffies=0):
+    """A /proc/<pid> directory with the comm and stat fields ProcfsSampler reads"""
+    directory = proc_root / str(pid)
+    directory.mkdir(exist_ok=True)
+    (directory / "comm").write_text(name + "\n")
+    # Fields after "(comm) ": state is 0, utime 11, stime 12, starttime 19
+    fields = ["S"] + ["0"] * 50
+    fields[11] = str(jiffies)
+    fields[19] = str(start_time)
+    (directory / "stat").write_text(f"{pid} ({name}) " + " ".join(fields) + "\n")
+
+
+def names(samples):
+    return sorted((sample.pid, sample.name) for sample in samples)
+
+
+def test_a_reused_pid_is_named_again(tmp_path):
+    write_process(tmp_path, 100, "bash", start_time=1000)
+    write_process(tmp_path, 200, "zoom", start_time=1000)
+    sampler = ProcfsSampler(proc_root=str(tmp_path))
+    is_zoom = lambda name: name == "zoom"
+
+    assert names(sampler.sample(is_zoom)) == [(200, "zoom")]
+
+    # bash exits and zoom restarts under its PID before the next tick
+    shutil.rmtree(tmp_path / "200")
+    write_process(tmp_path, 100, "zoom", start_time=5000)
+    assert names(sampler.sample(is_zoom)) == [(100, "zoom")]
+    assert 200 not in sampler.names
+
+
+def test_cpu_is_measured_between_ticks_of_the_same_process(tmp_path):
+    write_process(tmp_path, 100, "zoom", start_time=1000, jiffies=0)
+    sampler = ProcfsSampler(proc_root=str(tmp_path))
+    assert [s.cpu_percent for s in sampler.sample()] == [0.0]
+
+    write_process(tmp_path, 100, "zoom", start_time=1000, jiffies=50)
+    assert sampler.sample()[0].cpu_percent > 0
+
+    # Same PID, new process: its first tick reports 0 like any new process
+    write_process(tmp_path, 100, "zoom", start_time=9000, jiffies=80)
+    assert [s.cpu_percent for s in sampler.sample()] == [0.0]
@@ -0,0 +1,72 @@
+import logging
+import os
+import signal
+import time
+
+import pytest
+
+from monitoring.profiling import Profiler
+
+SOURCE = os.path.join(os.path.dirname(__file__), "..", "src", "monitoring", "profiling.py")
+SERVICE_COPY = os.path.join(os.path.dirname(__file__), "..", "..", "MeetingAssistant", "profiling.py")
+
+
+def wait_until_idle(profiler, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while profiler.status()["running"] and time.monotonic() < deadline:
+        time.sleep(0.05)
+    return profiler.status()
+
+
+def test_service_copy_matches_source():
+    with open(SOURCE, encoding="utf-8") as f, open(SERVICE_COPY, encoding="utf-8") as g:
+        assert f.read() == g.read(), "run scripts/start-all or copy monitoring/profiling.py to MeetingAssistant/"
+
+
+def test_sample_window_writes_files(tmp_path):
+    profiler = Profiler("test", str(tmp_path))
+    status = profiler.start(0.2, "sample", meeting_id="m1")
+    assert status["running"] and status["meeting_id"] == "m1"
+    with pytest.raises(RuntimeError):
+        profiler.start(0.2)
+
+    status = wait_until_idle(profiler)
+    assert not status["running"]
+    names = sorted(os.path.basename(path) for path in status["last_outputs"])
+    assert {os.path.splitext(name)[1] for name in names} == {".collapsed", ".tracemalloc", ".txt"}
+    assert all(name.startswith("test-m1-") for name in names)
+
+
+def test_cprofile_needs_a_thread_to_run_on(tmp_path):
+    with pytest.raises(ValueError):
+        Profiler("test", str(tmp_path)).start(0.1, "cprofile")
+    with pytest.raises(ValueError):
+        Profiler("test", str(tmp_path)).start(0.1, "unknown")
+
+
+def test_messages_go_to_the_logger(tmp_path, caplog):
+    profiler = Profiler("test", str(tmp_path), logger=logging.getLogger("profiling-test"))
+    with caplog.at_level(logging.INFO, logger="profiling-test"):
+        profiler.start(0.1, memory=False)
+        wait_until_idle(profiler)
+    assert any("Profiling test" in record.getMessage() for record in caplog.records)
+
+
+@pytest.mark.skipif(not hasattr(signal, "SIGUSR2"), reason="no SIGUSR2 on this platform")
+def test_signal_while_holding_the_lock_does_not_deadlock(tmp_path):
+    profiler = Profiler("test", str(tmp_path))
+    previous = signal.getsignal(signal.SIGUSR2)
+    try:
+        assert profiler.install_signal_handler()
+        # The main thread is inside start()/status() when the signal lands
+        with profiler.lock:
+            os.kill(os.getpid(), signal.SIGUSR2)
+            time.sleep(0.1)
+        deadline = time.monotonic() + 2.0
+        while not profiler.status()["running"] and time.monotonic() < deadline:
+            time.sleep(0.02)
+        assert profiler.status()["running"]
+    finally:
+        profiler.stop()
+        wait_until_idle(profiler)
+        signal.signal(signal.SIGUSR2, previous)
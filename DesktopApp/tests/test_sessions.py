@@ -0,0 +1,192 @@
+import asyncio
+import json
+import queue
+import threading
+import time
+
+import numpy as np
+import pytest
+import websockets
+
+from transcription.server import SEQ_HEADER, AudioServer
+from transcription.sessions import MeetingSession
+from transcription.websocket_client import TranscriptionWebSocketClient
+
+SAMPLE_RATE = 16000
+
+
+class Segment:
+    def __init__(self, t0, t1, text):
+        self.t0 = t0
+        self.t1 = t1
+        self.text = text
+
+
+class CountingModel:
+    """Whisper stand-in that answers with one word per buffer and counts the audio it saw"""
+
+    def __init__(self, seconds_per_call=0.0):
+        self.seconds_per_call = seconds_per_call
+        self.audio_seconds = 0.0
+
+    def transcribe(self, media, **params):
+        time.sleep(self.seconds_per_call)
+        duration = len(media) / SAMPLE_RATE
+        self.audio_seconds += duration
+        return [Segment(0, int(duration * 100), f" words{len(media)}")]
+
+
+class FakeWebSocket:
+    def __init__(self):
+        self.sent = []
+
+    async def send(self, data):
+        self.sent.append(json.loads(data))
+
+
+class ToneSource:
+    """AudioCapture stand-in: 48kHz stereo chunks of a tone, loud enough to be transcribed"""
+
+    def __init__(self):
+        self.chunks = queue.Queue()
+
+    def feed(self, seconds, rate=48000):
+        t = np.arange(int(seconds * rate)) / rate
+        tone = (0.3 * np.sin(2 * np.pi * 220 * t) * 32767).astype(np.int16)
+        audio = np.repeat(tone[:, None], 2, axis=1).tobytes()
+        step = 1024 * 4
+        for i in range(0, len(audio), step):
+            self.chunks.put((audio[i : i + step], rate, 2, time.monotonic()))
+
+    def get_audio_chunk(self, timeout=None):
+        try:
+            return self.chunks.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+
+@pytest.fixture
+def server():
+    """An AudioServer on a free localhost port, run on its own thread"""
+    audio_server = AudioServer(model=CountingModel(0.05), partial_model=CountingModel(), metrics_port=None)
+    ready = threading.Event()
+    loop = asyncio.new_event_loop()
+    stop = asyncio.Event()
+
+    async def serve():
+        async with websockets.serve(audio_server.handle_client, "127.0.0.1", 0) as ws_server:
+            audio_server.url = f"ws://127.0.0.1:{ws_server.sockets[0].getsockname()[1]}"
+            ready.set()
+            await stop.wait()
+        audio_server.close_sessions()
+
+    thread = threading.Thread(target=lambda: loop.run_until_complete(serve()), daemon=True)
+    thread.start()
+    assert ready.wait(timeout=10)
+    yield audio_server
+    loop.call_soon_threadsafe(stop.set)
+    thread.join(timeout=5)
+
+
+def frame(seq, seconds=2.0):
+    t = np.arange(int(seconds * SAMPLE_RATE)) / SAMPLE_RATE
+    audio = (0.3 * np.sin(2 * np.pi * 220 * t)).astype(np.float32)
+    return SEQ_HEADER.pack(seq) + audio.tobytes()
+
+
+async def configure(websocket, meeting_id):
+    await websocket.send(json.dumps({"type": "config", "meeting_id": meeting_id}))
+    return await receive(websocket, "config")
+
+
+async def receive(websocket, msg_type, **fields):
+    """The next message of msg_type with the given fields, skipping the rest"""
+    while True:
+        message = json.loads(await asyncio.wait_for(websocket.recv(), timeout=10))
+        if message["type"] == msg_type and all(message.get(k) == v for k, v in fields.items()):
+            return message
+
+
+def test_accept_rejects_duplicate_and_old_sequence_numbers():
+    session = MeetingSession("m1")
+    assert session.accept(1)
+    assert not session.accept(1)
+    assert session.accept(2)
+    # A gap is accepted (the audio is lost), anything before it is old
+    assert session.accept(5)
+    assert not session.accept(3)
+    assert not session.accept(5)
+    assert session.last_seq == 5
+
+
+def test_results_wait_in_the_outbox_while_the_client_is_away():
+    async def scenario():
+        session = MeetingSession("m1")
+        await session.send({"type": "transcription", "text": "one"})
+        await session.send({"type": "ack", "seq": 1}, durable=False)
+        await session.send({"type": "transcription", "text": "two"})
+        websocket = FakeWebSocket()
+        await session.attach(websocket)
+        await session.send({"type": "ack", "seq": 2}, durable=False)
+        return websocket.sent
+
+    assert asyncio.run(scenario()) == [
+        {"type": "transcription", "text": "one"},
+        {"type": "transcription", "text": "two"},
+        {"type": "ack", "seq": 2},
+    ]
+
+
+def test_server_skips_replayed_audio_after_a_reconnect(server):
+    async def scenario():
+        async with websockets.connect(server.url) as websocket:
+            reply = await configure(websocket, "m1")
+            assert not reply["resumed"] and reply["last_seq"] == 0
+            for seq in (1, 2):
+                await websocket.send(frame(seq))
+            await receive(websocket, "ack", seq=2)
+
+        # The client lost the connection and resumes the meeting
+        async with websockets.connect(server.url) as websocket:
+            reply = await configure(websocket, "m1")
+            assert reply["resumed"] and reply["last_seq"] == 2
+            # Replayed from before the server's last_seq: acked again, not transcribed
+            await websocket.send(frame(2))
+            assert await receive(websocket, "ack") == {"type": "ack", "seq": 2}
+            await websocket.send(frame(3))
+            result = await receive(websocket, "transcription")
+            assert result["seq"] == 3
+            await receive(websocket, "ack", seq=3)
+            await websocket.send(json.dumps({"type": "end"}))
+            await receive(websocket, "ended")
+
+    asyncio.run(scenario())
+    assert server.model.audio_seconds == pytest.approx(6.0)
+    assert "m1" not in server.sessions
+
+
+def test_client_resumes_from_the_last_ack_after_a_disconnect(server):
+    source = ToneSource()
+    client = TranscriptionWebSocketClient(source, server_url=server.url)
+    client._send_to_meeting_service = lambda *args: None
+    results = []
+    client.set_result_callback(results.append)
+    try:
+        client.start("m1")
+        source.feed(32.0)
+        deadline = time.monotonic() + 10
+        while client.acked_seq < 2:
+            assert time.monotonic() < deadline, "no acknowledgement from the server"
+            time.sleep(0.01)
+        # Drop the connection with buffers still unacknowledged
+        asyncio.run_coroutine_threadsafe(client.websocket.close(), client.loop).result(timeout=5)
+
+        ended = client.finish_meeting(timeout=20)
+    finally:
+        client.stop()
+
+    assert ended["unacknowledged_seconds"] == 0
+    # Every second of audio was transcribed exactly once
+    assert server.model.audio_seconds == pytest.approx(32.0, abs=0.1)
+    seqs = [result["seq"] for result in results if result["type"] == "transcription"]
+    assert len(seqs) == len(set(seqs))
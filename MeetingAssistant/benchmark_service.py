@@ -0,0 +1,372 @@
+"""
+Benchmark for the Meeting Transcript Microservice
+Drives /summary, /action-items and /minutes for concurrent simulated meetings
+against a stubbed Gemini backend, so no API key or network access is needed.
+
+Usage:
+    python benchmark_service.py --meetings 8 --gemini-latency 0.5
+    python benchmark_service.py --transcript-repeat 50 --output results.json
+    python benchmark_service.py --transcript-repeat 50 --inline  # resend the text with every request
+    python benchmark_service.py --background-meetings 20 --rpm 30  # queued behind a bulk backlog
+    python benchmark_service.py --baseline results.json  # exit 1 on regression
+"""
+
+import argparse
+import gzip
+import json
+import os
+import platform
+import socket
+import sys
+import threading
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+import requests
+import uvicorn
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+import meeting_microservice
+from llm_scheduler import LLMScheduler
+from test_service import SAMPLE_TRANSCRIPT
+
+ENDPOINTS = ["/summary", "/action-items", "/minutes"]
+
+
+# Stub latency multiplier by model name fragment, lighter models answer faster
+MODEL_SPEED = {"flash-lite": 0.4, "pro": 2.5}
+
+
+class StubGeminiBackend:
+    """Stands in for GeminiBackend: fixed latency plus a per-character cost, canned output"""
+
+    def __init__(self, latency=0.5, seconds_per_1k_chars=0.01):
+        self.latency = latency
+        self.seconds_per_1k_chars = seconds_per_1k_chars
+        self.calls = 0
+        self.prompt_chars = 0
+        self.calls_by_model = {}
+        self.lock = threading.Lock()
+
+    @property
+    def configured(self):
+        return True
+
+    def generate(self, model_name, prompt):
+        with self.lock:
+            self.calls += 1
+            self.prompt_chars += len(prompt)
+            self.calls_by_model[model_name] = self.calls_by_model.get(model_name, 0) + 1
+        speed = next((factor for fragment, factor in MODEL_SPEED.items() if fragment in model_name), 1.0)
+        time.sleep(speed * (self.latency + len(prompt) / 1000 * self.seconds_per_1k_chars))
+        if "action items" in prompt:
+            return "Mike to share the budget breakdown by Friday\nSarah to renew the analytics subscription"
+        return "The team agreed on the Q4 marketing budget and a January 15th launch date."
+
+
+def percentiles(values):
+    """Summary statistics for a list of latencies in seconds"""
+    if not values:
+        return None
+    ordered = sorted(values)
+
+    def pick(p):
+        return ordered[min(len(ordered) - 1, int(round(p / 100 * (len(ordered) - 1))))]
+
+    return {
+        "count": len(ordered),
+        "mean": sum(ordered) / len(ordered),
+        "p50": pick(50),
+        "p90": pick(90),
+        "p99": pick(99),
+        "max": ordered[-1],
+    }
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_service(port):
+    """Run the FastAPI app with uvicorn in a background thread"""
+    config = uvicorn.Config(meeting_microservice.app, host="127.0.0.1", port=port, log_level="warning")
+    server = uvicorn.Server(config)
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    deadline = time.monotonic() + 10
+    while not server.started:
+        if time.monotonic() > deadline:
+            raise RuntimeError("Meeting service did not start")
+        time.sleep(0.05)
+    return server, thread
+
+
+def run_meeting(base_url, transcript, meeting_index, compact=True, upload=True, priority="post_meeting"):
+    """
+    Post the transcript to every endpoint in turn, the way the desktop client does: once
+    to /transcripts and then by ID, or inline with every request when upload is False.
+    Returns [(endpoint, latency, ok)] and the request body bytes sent
+    """
+    # Distinct per meeting, identical uploads would be stored once
+    transcript = f"Benchmark meeting {meeting_index}\n{transcript}"
+    payload = {
+        "meeting_title": f"Benchmark meeting {meeting_index}",
+        "meeting_date": datetime.now().isoformat(),
+        "compact": compact,
+        "priority": priority,
+    }
+    results = []
+    bytes_sent = 0
+    if upload:
+        body = gzip.compress(json.dumps({"transcript": transcript}).encode("utf-8"))
+        bytes_sent += len(body)
+        start = time.monotonic()
+        try:
+            response = requests.post(
+                f"{base_url}/transcripts",
+                data=body,
+                headers={"Content-Type": "application/json", "Content-Encoding": "gzip"},
+                timeout=120,
+            )
+            ok = response.status_code in (200, 201)
+            payload["transcript_id"] = response.json()["transcript_id"] if ok else None
+        except requests.exceptions.RequestException:
+            ok = False
+        results.append(("/transcripts", time.monotonic() - start, ok))
+    else:
+        payload["transcript"] = transcript
+
+    data = json.dumps(payload)
+    for endpoint in ENDPOINTS:
+        bytes_sent += len(data)
+        start = time.monotonic()
+        try:
+            response = requests.post(
+                f"{base_url}{endpoint}",
+                data=data,
+                headers={"Content-Type": "application/json", "X-Client-Id": f"meeting-{meeting_index}"},
+                timeout=600,
+            )
+            ok = response.status_code == 200
+        except requests.exceptions.RequestException:
+            ok = False
+        results.append((endpoint, time.monotonic() - start, ok))
+    return results, bytes_sent
+
+
+def run_benchmark(meetings, transcript, backend, compact=True, upload=True, background_meetings=0, scheduler=None):
+    """
+    background_meetings are started first at background priority, the way a bulk
+    re-summarization would be queued when the post-meeting requests arrive
+    """
+    tracemalloc.start()
+    meeting_microservice.gemini_backend = backend
+    if scheduler is not None:
+        meeting_microservice.llm_scheduler = scheduler
+    port = free_port()
+    server, thread = start_service(port)
+    base_url = f"http://127.0.0.1:{port}"
+
+    start = time.monotonic()
+    with ThreadPoolExecutor(max_workers=meetings + background_meetings) as pool:
+        background = [
+            pool.submit(run_meeting, base_url, transcript, meetings + i, compact, upload, "background")
+            for i in range(background_meetings)
+        ]
+        if background:
+            time.sleep(0.5)  # let the backlog queue up
+        futures = [pool.submit(run_meeting, base_url, transcript, i, compact, upload) for i in range(meetings)]
+        meeting_results = [f.result() for f in futures]
+        post_meeting_seconds = time.monotonic() - start
+        background_results = [f.result() for f in background]
+    wall_seconds = time.monotonic() - start
+    scheduler_status = meeting_microservice.llm_scheduler.status()
+
+    server.should_exit = True
+    thread.join(timeout=5)
+
+    _, tracemalloc_peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    max_rss_mb = None
+    if resource is not None:
+        max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # ru_maxrss is kilobytes on Linux and bytes on macOS
+        max_rss_mb = max_rss / (1024 * 1024) if sys.platform == "darwin" else max_rss / 1024
+
+    latencies = {endpoint: [] for endpoint in (["/transcripts"] if upload else []) + ENDPOINTS}
+    errors = 0
+    for results, _ in meeting_results:
+        for endpoint, latency, ok in results:
+            latencies[endpoint].append(latency)
+            errors += 0 if ok else 1
+    all_latencies = [x for values in latencies.values() for x in values]
+    background_latencies = []
+    background_errors = 0
+    for results, _ in background_results:
+        for endpoint, latency, ok in results:
+            if endpoint != "/transcripts":
+                background_latencies.append(latency)
+            background_errors += 0 if ok else 1
+
+    return {
+        "wall_seconds": wall_seconds,
+        "requests": len(all_latencies),
+        "errors": errors,
+        "requests_per_second": len(all_latencies) / wall_seconds,
+        "meetings_per_minute": meetings / wall_seconds * 60,
+        "latency": percentiles(all_latencies),
+        "latency_by_endpoint": {k: percentiles(v) for k, v in latencies.items()},
+        "post_meeting_seconds": post_meeting_seconds,
+        "background": {
+            "meetings": background_meetings,
+            "errors": background_errors,
+            "latency": percentiles(background_latencies),
+        },
+        "scheduler": scheduler_status,
+        "gemini_calls": backend.calls,
+        "gemini_calls_by_model": dict(backend.calls_by_model),
+        "prompt_chars": backend.prompt_chars,
+        "request_bytes": sum(bytes_sent for _, bytes_sent in meeting_results + background_results),
+        "memory": {
+            "tracemalloc_peak_mb": tracemalloc_peak / (1024 * 1024),
+            "max_rss_mb": max_rss_mb,
+        },
+    }
+
+
+def find_regressions(results, baseline, tolerance):
+    """Compare against a previous results file, return a list of human-readable regressions"""
+    regressions = []
+    old, new = baseline["results"], results["results"]
+    if new["requests_per_second"] < old["requests_per_second"] * (1 - tolerance):
+        regressions.append(
+            f"throughput {new['requests_per_second']:.2f} req/s < "
+            f"baseline {old['requests_per_second']:.2f} req/s"
+        )
+    if new["latency"]["p90"] > old["latency"]["p90"] * (1 + tolerance):
+        regressions.append(
+            f"p90 latency {new['latency']['p90'] * 1000:.0f}ms > "
+            f"baseline {old['latency']['p90'] * 1000:.0f}ms"
+        )
+    if new["errors"] > old["errors"]:
+        regressions.append(f"errors {new['errors']} > baseline {old['errors']}")
+    return regressions
+
+
+def print_report(results):
+    r = results["results"]
+    print("\n" + "=" * 60)
+    print("Meeting Transcript Service - Benchmark")
+    print("=" * 60)
+    print(f"Meetings: {results['config']['meetings']}, transcript: {results['config']['transcript_chars']} chars")
+    print(f"{r['requests']} requests in {r['wall_seconds']:.1f}s ({r['requests_per_second']:.2f} req/s, {r['errors']} errors)")
+    for endpoint, stats in r["latency_by_endpoint"].items():
+        if stats:
+            print(
+                f"{endpoint}: p50 {stats['p50'] * 1000:.0f}ms, p90 {stats['p90'] * 1000:.0f}ms, "
+                f"p99 {stats['p99'] * 1000:.0f}ms"
+            )
+    background = r["background"]
+    if background["meetings"]:
+        print(f"Post-meeting requests done in {r['post_meeting_seconds']:.1f}s")
+        stats = background["latency"]
+        print(
+            f"Background: {background['meetings']} meetings, p50 {stats['p50'] * 1000:.0f}ms, "
+            f"p90 {stats['p90'] * 1000:.0f}ms, {background['errors']} errors"
+        )
+    for priority, stats in r["scheduler"]["classes"].items():
+        if stats["wait_seconds"]:
+            print(
+                f"Scheduler {priority}: wait p50 {stats['wait_seconds']['p50'] * 1000:.0f}ms, "
+                f"max {stats['wait_seconds']['max'] * 1000:.0f}ms, rejected {stats['rejected'] or 0}"
+            )
+    print(f"Request bodies: {r['request_bytes']} bytes")
+    print(f"Gemini prompts: {r['prompt_chars']} chars over {r['gemini_calls']} calls")
+    print("Models: " + ", ".join(f"{model} x{calls}" for model, calls in sorted(r["gemini_calls_by_model"].items())))
+    mem = r["memory"]
+    print(f"Memory: tracemalloc peak {mem['tracemalloc_peak_mb']:.1f} MB", end="")
+    print(f", max RSS {mem['max_rss_mb']:.1f} MB" if mem["max_rss_mb"] else "")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the meeting service against a stubbed Gemini backend")
+    parser.add_argument("--meetings", type=int, default=4, help="Concurrent simulated meetings")
+    parser.add_argument("--transcript", help="Transcript text file (default: sample transcript)")
+    parser.add_argument("--transcript-repeat", type=int, default=1, help="Repeat the transcript to simulate long meetings")
+    parser.add_argument("--inline", action="store_true", help="Send the transcript with every request instead of uploading it once")
+    parser.add_argument("--no-compact", action="store_true", help="Send transcripts to Gemini without compaction")
+    parser.add_argument("--gemini-latency", type=float, default=0.5, help="Stub Gemini latency per call in seconds")
+    parser.add_argument("--background-meetings", type=int, default=0, help="Background-priority meetings queued ahead of the others")
+    parser.add_argument("--rpm", type=int, default=600, help="Scheduler request budget per minute")
+    parser.add_argument("--tpm", type=int, default=4_000_000, help="Scheduler token budget per minute")
+    parser.add_argument("--concurrency", type=int, default=4, help="Gemini calls in flight")
+    parser.add_argument("--output", help="Write JSON results to this file")
+    parser.add_argument("--baseline", help="Previous JSON results, exit 1 on regression")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed regression vs baseline")
+    args = parser.parse_args()
+
+    transcript = SAMPLE_TRANSCRIPT
+    if args.transcript:
+        with open(args.transcript) as f:
+            transcript = f.read()
+    transcript = "\n".join([transcript] * args.transcript_repeat)
+
+    backend = StubGeminiBackend(latency=args.gemini_latency)
+    results = {
+        "benchmark": "meeting_service",
+        "timestamp": datetime.now().isoformat(),
+        "config": {
+            "meetings": args.meetings,
+            "transcript_chars": len(transcript),
+            "gemini_latency": args.gemini_latency,
+            "compact": not args.no_compact,
+            "upload": not args.inline,
+            "background_meetings": args.background_meetings,
+            "rpm": args.rpm,
+            "tpm": args.tpm,
+            "concurrency": args.concurrency,
+        },
+        "host": {
+            "platform": platform.platform(),
+            "python": platform.python_version(),
+            "cpu_count": os.cpu_count(),
+        },
+        "results": run_benchmark(
+            args.meetings,
+            transcript,
+            backend,
+            compact=not args.no_compact,
+            upload=not args.inline,
+            background_meetings=args.background_meetings,
+            scheduler=LLMScheduler(args.rpm, args.tpm, args.concurrency),
+        ),
+    }
+    print_report(results)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"Results written to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = find_regressions(results, baseline, args.tolerance)
+        if regressions:
+            print("\nRegressions:")
+            for regression in regressions:
+                print(f"  {regression}")
+            sys.exit(1)
+        print("\nNo regressions against baseline")
+
+
+if __name__ == "__main__":
+    main()
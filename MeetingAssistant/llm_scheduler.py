@@ -0,0 +1,274 @@
+"""
+LLM request scheduler
+Orders Gemini calls by priority class so a bulk re-summarization cannot starve the
+summary a user is waiting for. Calls are dispatched highest class first, round robin
+across clients within a class, and only while the request and token rate budgets
+(a sliding one-minute window) have room for the call's estimated tokens. Lower classes
+may only fill part of the budget, which leaves headroom for interactive calls.
+"""
+
+import asyncio
+import math
+import time
+from collections import OrderedDict, deque
+
+INTERACTIVE = "interactive"  # a user is looking at a spinner
+POST_MEETING = "post_meeting"  # summary, minutes and action items right after a call
+BACKGROUND = "background"  # bulk re-summarization of old meetings
+PRIORITIES = [INTERACTIVE, POST_MEETING, BACKGROUND]
+
+# Share of the rate budgets a class may fill
+BUDGET_SHARE = {INTERACTIVE: 1.0, POST_MEETING: 0.9, BACKGROUND: 0.5}
+# Seconds a call may wait in the queue before it is rejected
+MAX_WAIT = {INTERACTIVE: 60.0, POST_MEETING: 300.0, BACKGROUND: 1800.0}
+MAX_QUEUED = {INTERACTIVE: 100, POST_MEETING: 200, BACKGROUND: 1000}
+
+WINDOW_SECONDS = 60.0
+# Gemini averages about four characters per token on English text
+CHARS_PER_TOKEN = 4
+
+
+def estimate_tokens(text):
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+class Rejected(Exception):
+    """A call the scheduler will not run: queue_full, too_large or timeout"""
+
+    def __init__(self, reason, message, retry_after=None):
+        super().__init__(message)
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class RateBudget:
+    """Requests and tokens spent in the last window_seconds"""
+
+    def __init__(self, requests_per_minute, tokens_per_minute, window_seconds=WINDOW_SECONDS):
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self.window_seconds = window_seconds
+        self.events = deque()  # [time, tokens], oldest first
+        self.tokens = 0
+
+    def _expire(self, now):
+        while self.events and self.events[0][0] <= now - self.window_seconds:
+            self.tokens -= self.events.popleft()[1]
+
+    def usage(self):
+        self._expire(time.monotonic())
+        return len(self.events), self.tokens
+
+    def _fits(self, requests, tokens, extra_tokens, share):
+        if requests == 0:
+            return True  # an empty window takes any call under the full budget
+        return (
+            requests + 1 <= self.requests_per_minute * share
+            and tokens + extra_tokens <= self.tokens_per_minute * share
+        )
+
+    def fits(self, tokens, share=1.0):
+        requests, used = self.usage()
+        return self._fits(requests, used, tokens, share)
+
+    def wait_time(self, tokens, share=1.0):
+        """Seconds until enough of the window expires for a call of tokens"""
+        now = time.monotonic()
+        self._expire(now)
+        requests, used = len(self.events), self.tokens
+        for spent_at, spent in self.events:
+            requests -= 1
+            used -= spent
+            if self._fits(requests, used, tokens, share):
+                return max(0.0, spent_at + self.window_seconds - now)
+        return 0.0
+
+    def spend(self, tokens):
+        """Record a dispatched call, the returned entry can be adjusted to the real count"""
+        entry = [time.monotonic(), tokens]
+        self.events.append(entry)
+        self.tokens += tokens
+        return entry
+
+    def adjust(self, entry, tokens):
+        if any(e is entry for e in self.events):
+            self.tokens += tokens - entry[1]
+        entry[1] = tokens
+
+
+class Job:
+    def __init__(self, fn, priority, client, prompt_tokens, output_tokens, future):
+        self.fn = fn
+        self.priority = priority
+        self.client = client
+        self.prompt_tokens = prompt_tokens
+        self.tokens = prompt_tokens + output_tokens
+        self.future = future
+        self.enqueued = time.monotonic()
+
+
+class LLMScheduler:
+    def __init__(self, requests_per_minute=60, tokens_per_minute=1_000_000, max_concurrency=4):
+        """
+        requests_per_minute and tokens_per_minute are the provider's rate limits,
+        max_concurrency bounds calls in flight (each blocks a worker thread)
+        """
+        self.budget = RateBudget(requests_per_minute, tokens_per_minute)
+        self.max_concurrency = max_concurrency
+        self.queues = {p: OrderedDict() for p in PRIORITIES}  # client -> deque of Job
+        self.in_flight = 0
+        self.wakeup = None
+        self.dispatcher = None
+        self.stats = {
+            p: {"dispatched": 0, "completed": 0, "failed": 0, "rejected": {}, "waits": deque(maxlen=500)}
+            for p in PRIORITIES
+        }
+
+    async def run(self, fn, prompt_tokens, output_tokens=0, priority=POST_MEETING, client="anonymous"):
+        """
+        Run fn() in a worker thread once the budgets allow and return its result.
+        prompt_tokens plus output_tokens is the estimate charged before dispatch; a str
+        result replaces the output estimate afterwards. Raises Rejected
+        """
+        if priority not in PRIORITIES:
+            raise ValueError(f"Unknown priority {priority!r}")
+        if prompt_tokens + output_tokens > self.budget.tokens_per_minute:
+            self._reject(priority, "too_large")
+            raise Rejected("too_large", f"Request of ~{prompt_tokens + output_tokens} tokens exceeds the token budget")
+        if self.queued(priority) >= MAX_QUEUED[priority]:
+            self._reject(priority, "queue_full")
+            raise Rejected("queue_full", f"Too many {priority} requests waiting", retry_after=WINDOW_SECONDS)
+
+        self._start()
+        job = Job(fn, priority, client, prompt_tokens, output_tokens, asyncio.get_running_loop().create_future())
+        self.queues[priority].setdefault(client, deque()).append(job)
+        self.wakeup.set()
+        return await job.future
+
+    def queued(self, priority=None):
+        priorities = [priority] if priority else PRIORITIES
+        return sum(len(jobs) for p in priorities for jobs in self.queues[p].values())
+
+    def _start(self):
+        if self.dispatcher is None or self.dispatcher.done():
+            self.wakeup = asyncio.Event()
+            self.dispatcher = asyncio.ensure_future(self._dispatch_loop())
+
+    def _reject(self, priority, reason):
+        rejected = self.stats[priority]["rejected"]
+        rejected[reason] = rejected.get(reason, 0) + 1
+
+    def _expire_waiting(self):
+        """Reject calls that waited too long, forget those whose caller went away"""
+        now = time.monotonic()
+        for priority, clients in self.queues.items():
+            for client in list(clients):
+                jobs = clients[client]
+                for job in list(jobs):
+                    if job.future.done():
+                        jobs.remove(job)
+                    elif now - job.enqueued > MAX_WAIT[priority]:
+                        jobs.remove(job)
+                        self._reject(priority, "timeout")
+                        job.future.set_exception(
+                            Rejected("timeout", f"Waited over {MAX_WAIT[priority]:.0f}s for rate budget")
+                        )
+                if not jobs:
+                    del clients[client]
+
+    def _next_job(self):
+        """Highest priority first, the least recently served client within a priority"""
+        for priority in PRIORITIES:
+            clients = self.queues[priority]
+            if clients:
+                return next(iter(clients.values()))[0]
+        return None
+
+    def _pop(self, job):
+        clients = self.queues[job.priority]
+        jobs = clients.pop(job.client)
+        jobs.popleft()
+        if jobs:
+            clients[job.client] = jobs  # back of the line
+        return job
+
+    async def _dispatch_loop(self):
+        while True:
+            self._expire_waiting()
+            job = self._next_job()
+            delay = 1.0  # re-check waiting calls for timeouts at least this often
+            if job is not None and self.in_flight < self.max_concurrency:
+                share = BUDGET_SHARE[job.priority]
+                if self.budget.fits(job.tokens, share):
+                    self._dispatch(self._pop(job))
+                    continue
+                delay = min(delay, max(0.01, self.budget.wait_time(job.tokens, share)))
+            # A new or higher priority call, a finished call or expiring budget wakes us
+            self.wakeup.clear()
+            # Not wait_for: before Python 3.12 it swallows a cancel that lands as the event is set
+            waiter = asyncio.ensure_future(self.wakeup.wait())
+            try:
+                await asyncio.wait([waiter], timeout=delay)
+            finally:
+                waiter.cancel()
+
+    def _dispatch(self, job):
+        stats = self.stats[job.priority]
+        stats["dispatched"] += 1
+        stats["waits"].append(time.monotonic() - job.enqueued)
+        self.in_flight += 1
+        entry = self.budget.spend(job.tokens)
+        task = asyncio.get_running_loop().run_in_executor(None, job.fn)
+
+        def done(task):
+            self.in_flight -= 1
+            self.wakeup.set()
+            if task.exception() is not None:
+                stats["failed"] += 1
+                if not job.future.done():
+                    job.future.set_exception(task.exception())
+                return
+            result = task.result()
+            stats["completed"] += 1
+            if isinstance(result, str):
+                self.budget.adjust(entry, job.prompt_tokens + estimate_tokens(result))
+            if not job.future.done():
+                job.future.set_result(result)
+
+        task.add_done_callback(done)
+
+    def status(self):
+        """Queue waits, budget use and rejections, reported on /health"""
+        requests, tokens = self.budget.usage()
+        classes = {}
+        for priority in PRIORITIES:
+            stats = self.stats[priority]
+            waits = sorted(stats["waits"])
+            classes[priority] = {
+                "queued": self.queued(priority),
+                "clients_waiting": len(self.queues[priority]),
+                "dispatched": stats["dispatched"],
+                "completed": stats["completed"],
+                "failed": stats["failed"],
+                "rejected": dict(stats["rejected"]),
+                "wait_seconds": {
+                    "p50": waits[len(waits) // 2],
+                    "p90": waits[min(len(waits) - 1, int(len(waits) * 0.9))],
+                    "max": waits[-1],
+                }
+                if waits
+                else None,
+            }
+        return {
+            "in_flight": self.in_flight,
+            "max_concurrency": self.max_concurrency,
+            "budget": {
+                "requests_per_minute": self.budget.requests_per_minute,
+                "tokens_per_minute": self.budget.tokens_per_minute,
+                "requests_used": requests,
+                "tokens_used": tokens,
+                "request_utilization": requests / self.budget.requests_per_minute,
+                "token_utilization": tokens / self.budget.tokens_per_minute,
+            },
+            "classes": classes,
+        }
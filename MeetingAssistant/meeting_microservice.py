@@ -3,17 +3,32 @@ Meeting Transcript Processing Microservice
 FastAPI service for generating summaries, minutes, and action items from meeting transcripts
 """
 
-from fastapi import FastAPI, HTTPException, BackgroundTasks
+from fastapi import FastAPI, HTTPException, BackgroundTasks, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
 from dotenv import load_dotenv
 import os
-from pydantic import BaseModel, Field
-from typing import Optional, List
-import google.generativeai as genai
+from pydantic import BaseModel, Field, ValidationError, model_validator
+from typing import Literal, Optional, List
 import os
 from datetime import datetime
+import asyncio
 import logging
+import json
+import time
+import zlib
+from prometheus_client import CONTENT_TYPE_LATEST, Counter, Histogram, generate_latest
 
+from llm_scheduler import POST_MEETING, LLMScheduler, Rejected, estimate_tokens
+from model_router import ModelRouter
+from profiling import MODES as PROFILE_MODES, SAMPLE, Profiler
+from transcript_compaction import compact, compact_segments, compaction_report
+from transcript_store import MAX_TRANSCRIPT_BYTES, StoredTranscript, TranscriptStore
+
+try:
+    import google.generativeai as genai
+except ImportError:
+    # Only needed for the real backend (benchmarks swap in a stub)
+    genai = None
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -39,23 +54,126 @@ load_dotenv()
 
 # Configure Gemini API
 GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
-if not GEMINI_API_KEY:
-    logger.warning("GEMINI_API_KEY not found in environment variables")
-else:
-    genai.configure(api_key=GEMINI_API_KEY)
+
+
+class GeminiBackend:
+    """Sends prompts to Gemini through the google-generativeai SDK"""
+
+    def __init__(self, api_key: Optional[str]):
+        self.api_key = api_key
+        if not api_key:
+            logger.warning("GEMINI_API_KEY not found in environment variables")
+        elif genai is None:
+            logger.warning("google-generativeai not installed. Install with: pip install google-generativeai")
+        else:
+            genai.configure(api_key=api_key)
+
+    @property
+    def configured(self) -> bool:
+        return bool(self.api_key) and genai is not None
+
+    def generate(self, model_name: str, prompt: str) -> str:
+        model = genai.GenerativeModel(model_name)
+        response = model.generate_content(prompt)
+        return response.text
+
+
+# Module-level so benchmarks can replace it with a stub backend
+gemini_backend = GeminiBackend(GEMINI_API_KEY)
+# Transcripts uploaded once and referenced by ID
+transcript_store = TranscriptStore()
+# Orders Gemini calls by priority within the account's rate limits
+llm_scheduler = LLMScheduler(
+    requests_per_minute=int(os.getenv("GEMINI_RPM", 60)),
+    tokens_per_minute=int(os.getenv("GEMINI_TPM", 1_000_000)),
+    max_concurrency=int(os.getenv("GEMINI_MAX_CONCURRENCY", 4)),
+)
+# Model tier per task and prompt size
+model_router = ModelRouter.from_env()
+# Expected response length per task, charged against the token budget before dispatch
+EXPECTED_OUTPUT_TOKENS = {"summary": 400, "minutes": 1200, "action_items": 300}
+# Profiles the event loop (cProfile) or every thread (sampling) on request, see /debug/profile
+profiler = Profiler("service", output_dir=os.getenv("PROFILE_DIR", "profiles"), logger=logger)
+
+# Metrics
+GEMINI_LATENCY = Histogram(
+    "focusnote_gemini_request_seconds",
+    "Latency of a single Gemini generate_content attempt, by model tier",
+    ["tier", "outcome"],
+    buckets=(0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 30.0, 60.0, 120.0),
+)
+GEMINI_RETRIES = Counter(
+    "focusnote_gemini_retries_total",
+    "Gemini calls retried after a failed attempt",
+)
+GEMINI_FAILURES = Counter(
+    "focusnote_gemini_failures_total",
+    "Gemini calls that failed after all retries",
+)
+TRANSCRIPT_TOKENS = Counter(
+    "focusnote_transcript_tokens_total",
+    "Estimated transcript tokens received and sent to Gemini after compaction",
+    ["stage"],
+)
+GEMINI_REJECTIONS = Counter(
+    "focusnote_gemini_rejections_total",
+    "Gemini calls the scheduler refused, by priority and reason",
+    ["priority", "reason"],
+)
+TRANSCRIPT_UPLOADS = Counter(
+    "focusnote_transcript_uploads_total",
+    "Transcripts posted to /transcripts, by whether they were new",
+    ["outcome"],
+)
 
 # Models
+class TranscriptSegment(BaseModel):
+    start: float = Field(..., description="Seconds from the start of the recording")
+    end: float = Field(..., description="Seconds from the start of the recording")
+    text: str
+
 class TranscriptRequest(BaseModel):
-    transcript: str = Field(..., description="The meeting transcript text")
+    transcript: Optional[str] = Field(None, description="The meeting transcript text")
+    transcript_id: Optional[str] = Field(None, description="ID returned by POST /transcripts, instead of transcript")
     meeting_title: Optional[str] = Field(None, description="Optional meeting title")
     meeting_date: Optional[str] = Field(None, description="Optional meeting date")
     participants: Optional[List[str]] = Field(None, description="Optional list of participants")
+    segments: Optional[List[TranscriptSegment]] = Field(None, description="Optional timed segments, merged into timestamped paragraphs when compacting")
+    compact: bool = Field(True, description="Remove fillers, repetitions and Whisper hallucinations before prompting")
+    priority: Literal["interactive", "post_meeting", "background"] = Field(POST_MEETING, description="Scheduling class: interactive, post_meeting or background")
+
+    @model_validator(mode="after")
+    def check_transcript(self):
+        if self.transcript is None and self.transcript_id is None:
+            raise ValueError("Either transcript or transcript_id is required")
+        return self
+
+class ProfileRequest(BaseModel):
+    seconds: float = Field(30.0, gt=0, le=600)
+    mode: Literal[PROFILE_MODES] = SAMPLE
+    memory: bool = Field(True, description="Also take a tracemalloc snapshot")
+    meeting_id: Optional[str] = Field(None, description="Names the output files")
+
+class TranscriptUploadResponse(BaseModel):
+    transcript_id: str
+    created: bool
+    chars: int
+    segments: int
+    bytes_received: int
+
+class TranscriptInfo(BaseModel):
+    transcript_id: str
+    chars: int
+    segments: int
+    created_at: str
 
 class SummaryResponse(BaseModel):
     summary: str
     meeting_title: Optional[str]
     meeting_date: Optional[str]
     processed_at: str
+    compaction: Optional[dict] = None
+    generation: Optional[dict] = None
 
 class MinutesResponse(BaseModel):
     minutes: str
@@ -63,31 +181,135 @@ class MinutesResponse(BaseModel):
     meeting_date: Optional[str]
     participants: Optional[List[str]]
     processed_at: str
+    compaction: Optional[dict] = None
+    generation: Optional[dict] = None
 
 class ActionItemsResponse(BaseModel):
     action_items: List[str]
     meeting_title: Optional[str]
     meeting_date: Optional[str]
     processed_at: str
+    compaction: Optional[dict] = None
+    generation: Optional[dict] = None
+
+def resolve_transcript(request: TranscriptRequest) -> StoredTranscript:
+    """The uploaded transcript named by transcript_id, or the one sent inline"""
+    if request.transcript_id is not None:
+        entry = transcript_store.get(request.transcript_id)
+        if entry is None:
+            raise HTTPException(status_code=404, detail="Unknown transcript_id, upload the transcript to /transcripts first")
+        return entry
+    segments = [{"start": s.start, "end": s.end, "text": s.text} for s in request.segments or ()]
+    return StoredTranscript(request.transcript, segments)
+
+async def prepare_transcript(request: TranscriptRequest):
+    """
+    Transcript text for the prompt and the compaction report (None when not compacting).
+    Compaction runs on a worker thread, an uploaded transcript is compacted once for
+    every endpoint, including ones asking for it at the same time
+    """
+    entry = resolve_transcript(request)
+    if not request.compact:
+        return entry.transcript, None
+    if entry.prepared is None:
+        entry.prepared = asyncio.ensure_future(asyncio.to_thread(compact_transcript, entry))
+    prepared = entry.prepared
+    try:
+        # Shielded, a client that goes away does not cancel it for the other endpoints
+        return await asyncio.shield(prepared)
+    except Exception:
+        if entry.prepared is prepared:
+            entry.prepared = None  # the next request tries again
+        raise
+
+def compact_transcript(entry: StoredTranscript):
+    if entry.segments:
+        original = " ".join(s["text"] for s in entry.segments)
+        text = compact_segments(entry.segments)
+    else:
+        original = entry.transcript
+        text = compact(original)
+    report = compaction_report(original, text)
+    TRANSCRIPT_TOKENS.labels(stage="received").inc(report["tokens_before"])
+    TRANSCRIPT_TOKENS.labels(stage="prompted").inc(report["tokens_after"])
+    logger.info(
+        f"Compacted transcript: {report['tokens_before']} -> {report['tokens_after']} tokens "
+        f"({report['reduction']:.0%} smaller)"
+    )
+    return text, report
+
+def client_id(http_request: Request) -> str:
+    """Who a request is queued for, fair queueing rotates between clients"""
+    return http_request.headers.get("x-client-id") or (http_request.client.host if http_request.client else "anonymous")
 
 # Helper function to call Gemini API
-async def call_gemini(prompt: str, max_retries: int = 3) -> str:
-    """Call Gemini API with retry logic"""
-    if not GEMINI_API_KEY:
+async def call_gemini(prompt: str, task: str, priority: str = POST_MEETING, client: str = "anonymous", max_retries: int = 3):
+    """
+    Call Gemini API with retry logic, every attempt waits its turn in the scheduler.
+    Returns the text and the generation metadata: model tier, model, latency
+    """
+    if not gemini_backend.configured:
         raise HTTPException(status_code=500, detail="GEMINI_API_KEY not configured")
+
+    prompt_tokens = estimate_tokens(prompt)
+    route = model_router.route(task, prompt_tokens)
+    logger.info(f"Routing {task} (~{prompt_tokens} tokens) to the {route.tier} tier ({route.model})")
+    latencies = []
+
+    def attempt():
+        start = time.perf_counter()
+        try:
+            text = gemini_backend.generate(route.model, prompt)
+        except Exception:
+            GEMINI_LATENCY.labels(tier=route.tier, outcome="error").observe(time.perf_counter() - start)
+            raise
+        latencies.append(time.perf_counter() - start)
+        GEMINI_LATENCY.labels(tier=route.tier, outcome="success").observe(latencies[-1])
+        return text
     
-    for attempt in range(max_retries):
+    start = time.perf_counter()
+    for attempt_number in range(max_retries):
+        if attempt_number > 0:
+            GEMINI_RETRIES.inc()
         try:
-            model = genai.GenerativeModel('gemini-2.5-flash')
-            response = model.generate_content(prompt)
-            return response.text
+            text = await llm_scheduler.run(
+                attempt,
+                prompt_tokens=prompt_tokens,
+                output_tokens=EXPECTED_OUTPUT_TOKENS.get(task, 0),
+                priority=priority,
+                client=client,
+            )
+            total = time.perf_counter() - start
+            return text, {
+                "tier": route.tier,
+                "model": route.model,
+                "prompt_tokens": prompt_tokens,
+                "attempts": attempt_number + 1,
+                "latency_seconds": round(latencies[-1], 3),
+                "total_seconds": round(total, 3),
+            }
+        except Rejected as e:
+            GEMINI_REJECTIONS.labels(priority=priority, reason=e.reason).inc()
+            logger.warning(f"Gemini call rejected ({e.reason}): {e}")
+            status_code = {"too_large": 413, "queue_full": 429}.get(e.reason, 503)
+            headers = {"Retry-After": str(int(e.retry_after))} if e.retry_after else None
+            raise HTTPException(status_code=status_code, detail=str(e), headers=headers)
         except Exception as e:
-            logger.error(f"Gemini API call failed (attempt {attempt + 1}/{max_retries}): {str(e)}")
-            if attempt == max_retries - 1:
+            logger.error(f"Gemini API call failed (attempt {attempt_number + 1}/{max_retries}): {str(e)}")
+            if attempt_number == max_retries - 1:
+                GEMINI_FAILURES.inc()
                 raise HTTPException(status_code=500, detail=f"Failed to generate content: {str(e)}")
     
     raise HTTPException(status_code=500, detail="Failed to generate content after retries")
 
+@app.on_event("startup")
+async def start_profiling():
+    """cProfile runs on the event loop, SIGUSR2 or PROFILE_SECONDS start a sampling window"""
+    profiler.call_in_thread = asyncio.get_running_loop().call_soon_threadsafe
+    profiler.install_signal_handler()
+    if os.getenv("PROFILE_SECONDS"):
+        profiler.start(float(os.getenv("PROFILE_SECONDS")), os.getenv("PROFILE_MODE", SAMPLE))
+
 # Endpoints
 @app.get("/")
 async def root():
@@ -101,19 +323,124 @@ async def root():
 @app.get("/health")
 async def health_check():
     """Detailed health check"""
-    gemini_configured = GEMINI_API_KEY is not None
+    gemini_configured = gemini_backend.configured
     return {
         "status": "healthy",
         "gemini_api_configured": gemini_configured,
+        "llm_scheduler": llm_scheduler.status(),
+        "model_routing": model_router.status(),
         "timestamp": datetime.utcnow().isoformat()
     }
 
+@app.get("/metrics")
+async def metrics():
+    """Prometheus metrics"""
+    return Response(content=generate_latest(), media_type=CONTENT_TYPE_LATEST)
+
+@app.get("/debug/profile")
+async def profile_status():
+    """The running profile window and the files written by the last one"""
+    return profiler.status()
+
+@app.post("/debug/profile")
+async def start_profile(request: ProfileRequest):
+    """Profile the running service for a time window, one window at a time"""
+    try:
+        return profiler.start(request.seconds, request.mode, request.meeting_id, request.memory)
+    except RuntimeError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@app.post("/debug/profile/stop")
+async def stop_profile():
+    """End the running window early, its files are still written"""
+    profiler.stop()
+    return profiler.status()
+
+async def read_upload(request: Request):
+    """Request body, gunzipped as it streams in when Content-Encoding is gzip"""
+    gzipped = "gzip" in request.headers.get("content-encoding", "").lower()
+    decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS) if gzipped else None
+    parts = []
+    received = 0
+    size = 0
+    try:
+        async for chunk in request.stream():
+            received += len(chunk)
+            if decompressor is not None:
+                chunk = decompressor.decompress(chunk, MAX_TRANSCRIPT_BYTES - size + 1)
+                if decompressor.unconsumed_tail:
+                    size = MAX_TRANSCRIPT_BYTES + 1
+            size += len(chunk)
+            if size > MAX_TRANSCRIPT_BYTES:
+                raise HTTPException(status_code=413, detail=f"Transcript larger than {MAX_TRANSCRIPT_BYTES} bytes")
+            parts.append(chunk)
+        if decompressor is not None:
+            parts.append(decompressor.flush())
+    except zlib.error as e:
+        raise HTTPException(status_code=400, detail=f"Invalid gzip body: {e}")
+    return b"".join(parts), received
+
+@app.post("/transcripts", response_model=TranscriptUploadResponse)
+async def upload_transcript(request: Request, response: Response):
+    """
+    Store a transcript once and return its ID for /summary, /minutes and /action-items.
+    The body is the transcript as text/plain, or JSON with transcript and optional segments,
+    optionally gzip-compressed (Content-Encoding: gzip) and streamed in chunks.
+    Uploading the same content again returns the same ID without storing it twice
+    """
+    body, received = await read_upload(request)
+    try:
+        if request.headers.get("content-type", "").startswith("application/json"):
+            data = json.loads(body)
+            transcript = data["transcript"]
+            segments = [TranscriptSegment(**s) for s in data.get("segments") or ()]
+        else:
+            transcript = body.decode("utf-8")
+            segments = []
+    except (ValueError, KeyError, TypeError, ValidationError) as e:
+        raise HTTPException(status_code=400, detail=f"Invalid transcript upload: {e}")
+    if not isinstance(transcript, str):
+        raise HTTPException(status_code=400, detail="transcript must be a string")
+
+    entry, created = transcript_store.put(
+        transcript, [{"start": s.start, "end": s.end, "text": s.text} for s in segments]
+    )
+    TRANSCRIPT_UPLOADS.labels(outcome="created" if created else "existing").inc()
+    logger.info(
+        f"{'Stored' if created else 'Already have'} transcript {entry.transcript_id[:12]} "
+        f"({len(transcript)} chars, {received} bytes received)"
+    )
+    response.status_code = 201 if created else 200
+    return TranscriptUploadResponse(
+        transcript_id=entry.transcript_id,
+        created=created,
+        chars=len(transcript),
+        segments=len(segments),
+        bytes_received=received,
+    )
+
+@app.get("/transcripts/{transcript_id}", response_model=TranscriptInfo)
+async def get_transcript(transcript_id: str):
+    """Whether a transcript is stored, without sending it back"""
+    entry = transcript_store.get(transcript_id)
+    if entry is None:
+        raise HTTPException(status_code=404, detail="Unknown transcript_id")
+    return TranscriptInfo(
+        transcript_id=entry.transcript_id,
+        chars=len(entry.transcript),
+        segments=len(entry.segments or ()),
+        created_at=datetime.utcfromtimestamp(entry.created_at).isoformat(),
+    )
+
 @app.post("/summary", response_model=SummaryResponse)
-async def generate_summary(request: TranscriptRequest):
+async def generate_summary(request: TranscriptRequest, http_request: Request):
     """
     Generate a concise summary of the meeting transcript
     """
-    logger.info(f"Generating summary for transcript (length: {len(request.transcript)})")
+    transcript, compaction = await prepare_transcript(request)
+    logger.info(f"Generating summary for transcript (length: {len(transcript)})")
     
     prompt = f"""
     Please provide a concise summary of the following meeting transcript. 
@@ -121,26 +448,29 @@ async def generate_summary(request: TranscriptRequest):
     Keep the summary clear and actionable.
     
     Meeting Transcript:
-    {request.transcript}
+    {transcript}
     
     Provide only the summary without any preamble.
     """
     
-    summary = await call_gemini(prompt)
+    summary, generation = await call_gemini(prompt, "summary", request.priority, client_id(http_request))
     
     return SummaryResponse(
         summary=summary.strip(),
         meeting_title=request.meeting_title,
         meeting_date=request.meeting_date,
-        processed_at=datetime.utcnow().isoformat()
+        processed_at=datetime.utcnow().isoformat(),
+        compaction=compaction,
+        generation=generation
     )
 
 @app.post("/minutes", response_model=MinutesResponse)
-async def generate_minutes(request: TranscriptRequest):
+async def generate_minutes(request: TranscriptRequest, http_request: Request):
     """
     Generate formal meeting minutes from the transcript
     """
-    logger.info(f"Generating minutes for transcript (length: {len(request.transcript)})")
+    transcript, compaction = await prepare_transcript(request)
+    logger.info(f"Generating minutes for transcript (length: {len(transcript)})")
     
     prompt = f"""
     Please generate formal meeting minutes from the following transcript.
@@ -151,27 +481,30 @@ async def generate_minutes(request: TranscriptRequest):
     - Next Steps
     
     Meeting Transcript:
-    {request.transcript}
+    {transcript}
     
     Provide the minutes in a professional format suitable for distribution.
     """
     
-    minutes = await call_gemini(prompt)
+    minutes, generation = await call_gemini(prompt, "minutes", request.priority, client_id(http_request))
     
     return MinutesResponse(
         minutes=minutes.strip(),
         meeting_title=request.meeting_title,
         meeting_date=request.meeting_date,
         participants=request.participants,
-        processed_at=datetime.utcnow().isoformat()
+        processed_at=datetime.utcnow().isoformat(),
+        compaction=compaction,
+        generation=generation
     )
 
 @app.post("/action-items", response_model=ActionItemsResponse)
-async def generate_action_items(request: TranscriptRequest):
+async def generate_action_items(request: TranscriptRequest, http_request: Request):
     """
     Extract action items from the meeting transcript
     """
-    logger.info(f"Generating action items for transcript (length: {len(request.transcript)})")
+    transcript, compaction = await prepare_transcript(request)
+    logger.info(f"Generating action items for transcript (length: {len(transcript)})")
     
     prompt = f"""
     Please extract all action items from the following meeting transcript.
@@ -184,12 +517,12 @@ async def generate_action_items(request: TranscriptRequest):
     If no action items are found, return "No action items identified."
     
     Meeting Transcript:
-    {request.transcript}
+    {transcript}
     
     Provide only the list of action items, one per line, without numbering or bullets.
     """
     
-    action_items_text = await call_gemini(prompt)
+    action_items_text, generation = await call_gemini(prompt, "action_items", request.priority, client_id(http_request))
     
     # Parse action items into a list
     action_items = [
@@ -202,7 +535,9 @@ async def generate_action_items(request: TranscriptRequest):
         action_items=action_items,
         meeting_title=request.meeting_title,
         meeting_date=request.meeting_date,
-        processed_at=datetime.utcnow().isoformat()
+        processed_at=datetime.utcnow().isoformat(),
+        compaction=compaction,
+        generation=generation
     )
 
 if __name__ == "__main__":
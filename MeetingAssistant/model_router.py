@@ -0,0 +1,90 @@
+"""
+Gemini model routing
+Picks a model tier for each call from the task and the prompt's estimated token count:
+a lighter model for short extraction jobs, the standard model for most meetings and a
+long-context model for marathon ones. Rules are checked in order and the first match
+wins. Model names come from GEMINI_MODEL_LIGHT, GEMINI_MODEL_STANDARD and
+GEMINI_MODEL_LONG_CONTEXT, rules from the JSON file named by GEMINI_ROUTING_FILE:
+
+    {
+      "models": {"light": "gemini-2.5-flash-lite"},
+      "rules": [
+        {"task": "action_items", "max_tokens": 8000, "tier": "light"},
+        {"max_tokens": 200000, "tier": "standard"},
+        {"tier": "long_context"}
+      ]
+    }
+"""
+
+import json
+import os
+
+LIGHT = "light"
+STANDARD = "standard"
+LONG_CONTEXT = "long_context"
+TIERS = [LIGHT, STANDARD, LONG_CONTEXT]
+
+DEFAULT_MODELS = {
+    LIGHT: "gemini-2.5-flash-lite",
+    STANDARD: "gemini-2.5-flash",
+    LONG_CONTEXT: "gemini-2.5-pro",
+}
+MODEL_ENV = {
+    LIGHT: "GEMINI_MODEL_LIGHT",
+    STANDARD: "GEMINI_MODEL_STANDARD",
+    LONG_CONTEXT: "GEMINI_MODEL_LONG_CONTEXT",
+}
+TASKS = ["summary", "minutes", "action_items"]
+
+# Action items from a short meeting are a simple extraction, a marathon meeting gets
+# the model that reasons best over very long context
+DEFAULT_RULES = [
+    {"task": "action_items", "max_tokens": 8_000, "tier": LIGHT},
+    {"max_tokens": 200_000, "tier": STANDARD},
+    {"tier": LONG_CONTEXT},
+]
+
+
+class Route:
+    def __init__(self, tier, model, rule):
+        self.tier = tier
+        self.model = model
+        self.rule = rule
+
+
+class ModelRouter:
+    def __init__(self, models=None, rules=None):
+        """models maps tier to model name, rules is a list of {task, max_tokens, tier}"""
+        self.models = dict(DEFAULT_MODELS)
+        self.models.update(models or {})
+        self.rules = list(rules if rules is not None else DEFAULT_RULES)
+        for rule in self.rules:
+            if rule.get("tier") not in self.models:
+                raise ValueError(f"Routing rule {rule} names an unknown tier, expected one of {list(self.models)}")
+            if rule.get("task") not in (None, *TASKS):
+                raise ValueError(f"Routing rule {rule} names an unknown task, expected one of {TASKS}")
+        if not any("task" not in rule and "max_tokens" not in rule for rule in self.rules):
+            self.rules.append({"tier": STANDARD})  # every call needs a model
+
+    @classmethod
+    def from_env(cls):
+        models = {tier: os.environ[name] for tier, name in MODEL_ENV.items() if os.getenv(name)}
+        rules = None
+        path = os.getenv("GEMINI_ROUTING_FILE")
+        if path:
+            with open(path) as f:
+                config = json.load(f)
+            models = {**config.get("models", {}), **models}
+            rules = config.get("rules")
+        return cls(models, rules)
+
+    def route(self, task, tokens):
+        for index, rule in enumerate(self.rules):
+            if rule.get("task") not in (None, task):
+                continue
+            if "max_tokens" in rule and tokens > rule["max_tokens"]:
+                continue
+            return Route(rule["tier"], self.models[rule["tier"]], index)
+
+    def status(self):
+        return {"models": dict(self.models), "rules": list(self.rules)}
@@ -0,0 +1,23 @@
+import pytest
+from fastapi.testclient import TestClient
+
+import meeting_microservice
+from benchmark_service import StubGeminiBackend
+from llm_scheduler import LLMScheduler
+
+
+@pytest.fixture
+def backend(monkeypatch):
+    """The stub Gemini backend the benchmarks use, answering at once"""
+    stub = StubGeminiBackend(latency=0.0, seconds_per_1k_chars=0.0)
+    monkeypatch.setattr(meeting_microservice, "gemini_backend", stub)
+    return stub
+
+
+@pytest.fixture
+def client(backend, monkeypatch):
+    """The service with the stub backend and a scheduler of its own"""
+    monkeypatch.setattr(meeting_microservice, "llm_scheduler", LLMScheduler())
+    # One event loop for every request, the scheduler's dispatcher lives on it
+    with TestClient(meeting_microservice.app) as test_client:
+        yield test_client
@@ -0,0 +1,214 @@
+import asyncio
+import threading
+
+import pytest
+
+import llm_scheduler
+from llm_scheduler import (
+    BACKGROUND,
+    INTERACTIVE,
+    MAX_WAIT,
+    POST_MEETING,
+    WINDOW_SECONDS,
+    LLMScheduler,
+    RateBudget,
+    Rejected,
+)
+
+
+class FakeClock:
+    """Stands in for the time module the scheduler reads, only moves when told to"""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+    def advance(self, seconds):
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = FakeClock()
+    monkeypatch.setattr(llm_scheduler, "time", fake)
+    return fake
+
+
+def recorder():
+    """(calls, make) where make(name) is a job that appends name to calls when it runs"""
+    calls = []
+    lock = threading.Lock()
+
+    def make(name):
+        def fn():
+            with lock:
+                calls.append(name)
+            return name
+
+        return fn
+
+    return calls, make
+
+
+async def settle(condition, timeout=2.0):
+    """Let the dispatcher run until condition() holds"""
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    while not condition():
+        if loop.time() > deadline:
+            raise AssertionError("scheduler did not settle")
+        await asyncio.sleep(0.01)
+
+
+def test_higher_priority_classes_go_first(clock):
+    calls, make = recorder()
+
+    async def scenario():
+        scheduler = LLMScheduler(max_concurrency=1)
+        # All queued before the dispatcher first runs
+        await asyncio.gather(
+            scheduler.run(make("background"), 10, priority=BACKGROUND),
+            scheduler.run(make("post_meeting"), 10, priority=POST_MEETING),
+            scheduler.run(make("interactive"), 10, priority=INTERACTIVE),
+        )
+
+    asyncio.run(scenario())
+    assert calls == ["interactive", "post_meeting", "background"]
+
+
+def test_clients_take_turns_within_a_class(clock):
+    calls, make = recorder()
+
+    async def scenario():
+        scheduler = LLMScheduler(max_concurrency=1)
+        jobs = [("a", 1), ("a", 2), ("a", 3), ("b", 1), ("b", 2)]
+        await asyncio.gather(*(scheduler.run(make(f"{c}{i}"), 10, client=c) for c, i in jobs))
+
+    asyncio.run(scenario())
+    assert calls == ["a1", "b1", "a2", "b2", "a3"]
+
+
+def test_lower_classes_only_fill_their_budget_share(clock):
+    calls, make = recorder()
+
+    async def scenario():
+        scheduler = LLMScheduler(requests_per_minute=10, tokens_per_minute=100_000)
+        background = [
+            asyncio.ensure_future(scheduler.run(make(f"bg{i}"), 10, priority=BACKGROUND)) for i in range(7)
+        ]
+        # BUDGET_SHARE lets background calls use half of the 10 requests a minute
+        await settle(lambda: len(calls) == 5)
+        await asyncio.sleep(0.05)
+        assert len(calls) == 5 and scheduler.queued(BACKGROUND) == 2
+
+        # The rest of the budget is still there for interactive calls
+        assert await scheduler.run(make("interactive"), 10, priority=INTERACTIVE) == "interactive"
+        assert scheduler.queued(BACKGROUND) == 2
+
+        clock.advance(WINDOW_SECONDS + 1)
+        scheduler.wakeup.set()
+        await asyncio.gather(*background)
+
+    asyncio.run(scenario())
+    assert calls[5] == "interactive"
+    assert sorted(calls[6:]) == ["bg5", "bg6"]
+
+
+def test_token_share_holds_back_large_background_calls(clock):
+    calls, make = recorder()
+
+    async def scenario():
+        scheduler = LLMScheduler(requests_per_minute=100, tokens_per_minute=1000)
+        first = await scheduler.run(make("first"), 400, priority=BACKGROUND)
+        # 400 + 400 tokens is over half of the 1000 a minute
+        second = asyncio.ensure_future(scheduler.run(make("second"), 400, priority=BACKGROUND))
+        await asyncio.sleep(0.05)
+        assert not second.done()
+        clock.advance(WINDOW_SECONDS + 1)
+        scheduler.wakeup.set()
+        return first, await second
+
+    assert asyncio.run(scenario()) == ("first", "second")
+
+
+def test_rejects_calls_over_the_token_budget(clock):
+    async def scenario():
+        scheduler = LLMScheduler(tokens_per_minute=1000)
+        with pytest.raises(Rejected) as rejected:
+            await scheduler.run(lambda: "", 900, output_tokens=200)
+        return scheduler, rejected.value
+
+    scheduler, error = asyncio.run(scenario())
+    assert error.reason == "too_large"
+    assert scheduler.status()["classes"][POST_MEETING]["rejected"] == {"too_large": 1}
+
+
+def test_rejects_calls_when_the_queue_is_full(clock, monkeypatch):
+    monkeypatch.setitem(llm_scheduler.MAX_QUEUED, BACKGROUND, 2)
+
+    async def scenario():
+        # Nothing is dispatched, the calls stay queued
+        scheduler = LLMScheduler(max_concurrency=0)
+        waiting = [asyncio.ensure_future(scheduler.run(lambda: "", 10, priority=BACKGROUND)) for _ in range(2)]
+        await asyncio.sleep(0)
+        with pytest.raises(Rejected) as rejected:
+            await scheduler.run(lambda: "", 10, priority=BACKGROUND)
+        # Other classes have queues of their own
+        other = asyncio.ensure_future(scheduler.run(lambda: "", 10, priority=INTERACTIVE))
+        await asyncio.sleep(0)
+        assert scheduler.queued(INTERACTIVE) == 1
+        for future in [*waiting, other]:
+            future.cancel()
+        return rejected.value
+
+    error = asyncio.run(scenario())
+    assert error.reason == "queue_full"
+    assert error.retry_after == WINDOW_SECONDS
+
+
+def test_rejects_calls_that_wait_too_long(clock):
+    async def scenario():
+        scheduler = LLMScheduler(max_concurrency=0)
+        waiting = asyncio.ensure_future(scheduler.run(lambda: "", 10, priority=INTERACTIVE))
+        await asyncio.sleep(0.01)
+        clock.advance(MAX_WAIT[INTERACTIVE] - 1)
+        scheduler.wakeup.set()
+        await asyncio.sleep(0.01)
+        assert not waiting.done()
+
+        clock.advance(2)
+        scheduler.wakeup.set()
+        with pytest.raises(Rejected) as rejected:
+            await waiting
+        return scheduler, rejected.value
+
+    scheduler, error = asyncio.run(scenario())
+    assert error.reason == "timeout"
+    assert scheduler.queued() == 0
+    assert scheduler.status()["classes"][INTERACTIVE]["rejected"] == {"timeout": 1}
+
+
+def test_result_replaces_the_output_estimate(clock):
+    async def scenario():
+        scheduler = LLMScheduler()
+        # 400 characters are about 100 tokens, not the 1000 estimated
+        await scheduler.run(lambda: "x" * 400, 50, output_tokens=1000)
+        await settle(lambda: scheduler.in_flight == 0)
+        return scheduler.budget.usage()
+
+    assert asyncio.run(scenario()) == (1, 150)
+
+
+def test_adjust_after_the_window_moved_on(clock):
+    budget = RateBudget(requests_per_minute=10, tokens_per_minute=1000)
+    entry = budget.spend(300)
+    budget.adjust(entry, 120)
+    assert budget.usage() == (1, 120)
+
+    clock.advance(WINDOW_SECONDS)
+    assert budget.usage() == (0, 0)
+    # The call already left the window, it no longer counts against the budget
+    budget.adjust(entry, 500)
+    assert budget.usage() == (0, 0)
@@ -0,0 +1,95 @@
+import json
+
+import pytest
+
+import meeting_microservice
+from model_router import DEFAULT_MODELS, LIGHT, LONG_CONTEXT, MODEL_ENV, STANDARD, ModelRouter
+
+
+@pytest.fixture
+def routing_env(monkeypatch):
+    """No model or routing overrides from the environment the tests run in"""
+    for name in [*MODEL_ENV.values(), "GEMINI_ROUTING_FILE"]:
+        monkeypatch.delenv(name, raising=False)
+    return monkeypatch
+
+
+@pytest.mark.parametrize(
+    "task, tokens, tier",
+    [
+        ("action_items", 100, LIGHT),
+        ("action_items", 8_000, LIGHT),
+        ("action_items", 8_001, STANDARD),
+        ("summary", 100, STANDARD),
+        ("minutes", 200_000, STANDARD),
+        ("summary", 200_001, LONG_CONTEXT),
+        ("action_items", 250_000, LONG_CONTEXT),
+    ],
+)
+def test_default_rules(task, tokens, tier):
+    route = ModelRouter().route(task, tokens)
+    assert route.tier == tier
+    assert route.model == DEFAULT_MODELS[tier]
+
+
+def test_unknown_tier_or_task_is_rejected():
+    with pytest.raises(ValueError, match="unknown tier"):
+        ModelRouter(rules=[{"tier": "huge"}])
+    with pytest.raises(ValueError, match="unknown task"):
+        ModelRouter(rules=[{"task": "agenda", "tier": LIGHT}])
+
+
+def test_rules_without_a_catch_all_fall_back_to_standard():
+    router = ModelRouter(rules=[{"task": "summary", "tier": LONG_CONTEXT}])
+    assert router.route("summary", 10).tier == LONG_CONTEXT
+    assert router.route("minutes", 10).tier == STANDARD
+
+
+def test_from_env_merges_routing_file_and_model_overrides(routing_env, tmp_path):
+    path = tmp_path / "routing.json"
+    path.write_text(
+        json.dumps(
+            {
+                "models": {LIGHT: "file-light", STANDARD: "file-standard"},
+                "rules": [{"max_tokens": 1000, "tier": LIGHT}, {"tier": STANDARD}],
+            }
+        )
+    )
+    routing_env.setenv("GEMINI_ROUTING_FILE", str(path))
+    routing_env.setenv(MODEL_ENV[STANDARD], "env-standard")
+
+    router = ModelRouter.from_env()
+    # Environment variables win over the file, the file over the defaults
+    assert router.models == {
+        LIGHT: "file-light",
+        STANDARD: "env-standard",
+        LONG_CONTEXT: DEFAULT_MODELS[LONG_CONTEXT],
+    }
+    assert router.route("summary", 1000).model == "file-light"
+    assert router.route("summary", 300_000).model == "env-standard"
+
+
+def test_from_env_without_routing_file_keeps_default_rules(routing_env):
+    routing_env.setenv(MODEL_ENV[LONG_CONTEXT], "env-long")
+    router = ModelRouter.from_env()
+    assert router.route("minutes", 500_000).model == "env-long"
+    assert router.route("action_items", 10).model == DEFAULT_MODELS[LIGHT]
+
+
+def test_summary_reports_the_routed_model(client, backend):
+    response = client.post("/summary", json={"transcript": "Alice: we ship on Friday.", "compact": False})
+    assert response.status_code == 200
+    generation = response.json()["generation"]
+    assert generation["tier"] == STANDARD
+    assert generation["model"] == DEFAULT_MODELS[STANDARD]
+    assert backend.calls_by_model == {DEFAULT_MODELS[STANDARD]: 1}
+
+
+def test_summary_follows_a_configured_rule(client, backend, monkeypatch):
+    router = ModelRouter(models={LIGHT: "stub-light"}, rules=[{"task": "summary", "tier": LIGHT}])
+    monkeypatch.setattr(meeting_microservice, "model_router", router)
+    response = client.post("/summary", json={"transcript": "Alice: we ship on Friday."})
+    assert response.status_code == 200
+    assert response.json()["generation"]["tier"] == LIGHT
+    assert response.json()["generation"]["model"] == "stub-light"
+    assert backend.calls_by_model == {"stub-light": 1}
@@ -0,0 +1,92 @@
+import asyncio
+import threading
+
+import meeting_microservice
+from transcript_compaction import compact, compact_segments, compaction_report, trim_seam
+
+
+def test_drops_fillers_and_keeps_the_sentence_capitalized():
+    assert compact("Um, so we agreed, uh, to ship on Friday. I'm, erm, not sure.") == (
+        "So we agreed, to ship on Friday. I'm, not sure."
+    )
+    # Only whole words, "Umbrella" is not a filler
+    assert compact("Umbrella um ERM uh-huh") == "Umbrella"
+    assert compact("Um, uh, so.", fillers=False) == "Um, uh, so."
+
+
+def test_collapses_repeated_sentences_and_word_loops():
+    assert compact("We ship Friday. We ship Friday. We ship Friday. Then we test.") == (
+        "We ship Friday. Then we test."
+    )
+    assert compact("the the the plan is is is fine") == "the plan is fine"
+    # Two in a row is emphasis for short n-grams, a loop for long ones
+    assert compact("it is very very good") == "it is very very good"
+    assert compact("let me share my screen let me share my screen ok") == "let me share my screen ok"
+
+
+def test_removes_hallucinations_and_non_speech_tags():
+    text = (
+        "Thanks for watching! [BLANK_AUDIO] (upbeat music) ♪\n"
+        "Subtitles by the Amara.org community\n"
+        "Real point here."
+    )
+    assert compact(text) == "Real point here."
+
+
+def test_drops_runs_of_silence_phrases_but_keeps_a_single_one():
+    assert compact("Thank you. Thank you. Thank you.\nLet's start.") == "Let's start."
+    assert compact("That was useful. Thank you.") == "That was useful. Thank you."
+
+
+def test_keeps_one_speaker_turn_per_line():
+    assert compact("Alice: hello there.\n\nBob: hi, um, hello.") == "Alice: hello there.\nBob: hi, hello."
+
+
+def test_trims_text_repeated_at_chunk_seams():
+    assert trim_seam("we need to finish the budget".split(), "finish the budget review by Friday") == (
+        "review by Friday"
+    )
+    # Fewer than MIN_SEAM_WORDS shared is a coincidence
+    assert trim_seam("the budget".split(), "the budget review") == "the budget review"
+
+
+def test_merges_segments_into_timestamped_paragraphs():
+    segments = [
+        {"start": 0.0, "end": 5.0, "text": "we need to finish the budget review by"},
+        {"start": 5.0, "end": 10.0, "text": "finish the budget review by Friday and then ship"},
+        {"start": 20.0, "end": 24.0, "text": "Thanks for watching"},
+        {"start": 24.0, "end": 28.0, "text": "Next topic is hiring."},
+        {"start": 3700.0, "end": 3705.0, "text": "Last item."},
+    ]
+    assert compact_segments(segments) == (
+        "[00:00] we need to finish the budget review by Friday and then ship\n\n"
+        "[00:24] Next topic is hiring.\n\n"
+        "[1:01:40] Last item."
+    )
+
+
+def test_report_counts_the_tokens_saved():
+    report = compaction_report("x" * 400, "x" * 100)
+    assert (report["tokens_before"], report["tokens_after"], report["reduction"]) == (100, 25, 0.75)
+    assert compaction_report("", "")["reduction"] == 0.0
+
+
+def test_endpoints_share_one_compaction_off_the_event_loop(monkeypatch):
+    calls = []
+    compact_transcript = meeting_microservice.compact_transcript
+
+    def recording_compact(entry):
+        calls.append(threading.current_thread())
+        return compact_transcript(entry)
+
+    monkeypatch.setattr(meeting_microservice, "compact_transcript", recording_compact)
+    entry, _ = meeting_microservice.transcript_store.put("Um, we ship Friday. We ship Friday.")
+    request = meeting_microservice.TranscriptRequest(transcript_id=entry.transcript_id)
+
+    async def scenario():
+        # /summary, /minutes and /action-items ask at the same time
+        return await asyncio.gather(*(meeting_microservice.prepare_transcript(request) for _ in range(3)))
+
+    results = asyncio.run(scenario())
+    assert [text for text, _ in results] == ["We ship Friday."] * 3
+    assert len(calls) == 1 and calls[0] is not threading.main_thread()
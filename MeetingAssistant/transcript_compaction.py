@@ -0,0 +1,228 @@
+"""
+Transcript compaction
+Cleans raw Whisper output before it is put into a Gemini prompt: normalizes whitespace,
+drops non-speech tags, fillers and the phrases Whisper hallucinates on silence, collapses
+repeated sentences and word loops, and trims text duplicated at chunk seams. Timed
+segments can be merged into timestamped paragraphs. Shorter prompts cut Gemini latency
+and cost for every endpoint.
+
+Usage:
+    python transcript_compaction.py transcript.txt  # prints the compacted text and the saving
+"""
+
+import math
+import re
+import sys
+
+# Gemini averages about four characters per token on English text
+CHARS_PER_TOKEN = 4
+
+FILLERS = ("um", "umm", "uh", "uhh", "uh-huh", "erm", "er", "ah", "hmm", "mm", "mhm")
+FILLER_RE = re.compile(
+    r"(?<![\w'-])(?:" + "|".join(re.escape(f) for f in FILLERS) + r")(?![\w'-])[,.!?]*\s*",
+    re.IGNORECASE,
+)
+# [BLANK_AUDIO], [Music], (upbeat music), (silence), ♪
+NON_SPEECH_RE = re.compile(
+    r"\[[^\]]*\]"
+    r"|\([^)]*\b(?:music|silence|applause|laughter|laughs|inaudible|noise|blank audio)\b[^)]*\)"
+    r"|♪+",
+    re.IGNORECASE,
+)
+SENTENCE_END_RE = re.compile(r"(?<=[.!?])\s+")
+
+# Whisper's training data talking, never part of a meeting
+HALLUCINATIONS = {
+    "thanks for watching",
+    "thank you for watching",
+    "thank you so much for watching",
+    "please subscribe",
+    "like and subscribe",
+    "subscribe to my channel",
+    "please like and subscribe",
+}
+HALLUCINATION_PREFIXES = ("subtitles by", "captions by", "transcribed by", "translated by")
+# Real now and then, hallucinated when Whisper hears silence, so only runs are dropped
+SILENCE_PHRASES = {"thank you", "thank you very much", "thanks", "bye", "you", "okay"}
+
+# Word loops: an n-gram repeated this many times in a row is kept once
+SHORT_LOOP_REPEATS = 3  # n < LONG_LOOP_WORDS, "very very" is left alone
+LONG_LOOP_REPEATS = 2
+LONG_LOOP_WORDS = 4
+MAX_LOOP_WORDS = 12
+# Fewest words shared by the end of one segment and the start of the next to count as a seam
+MIN_SEAM_WORDS = 3
+MAX_SEAM_WORDS = 16
+
+
+def estimate_tokens(text):
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+def normalize_word(word):
+    return re.sub(r"[^\w']+", "", word.lower())
+
+
+def sentence_key(sentence):
+    return " ".join(w for w in (normalize_word(w) for w in sentence.split()) if w)
+
+
+def drop_fillers(sentence):
+    stripped = FILLER_RE.sub("", sentence).strip()
+    # "Um, so we agreed" -> "So we agreed"
+    if stripped and sentence[:1].isupper() and stripped[:1].islower():
+        stripped = stripped[0].upper() + stripped[1:]
+    return stripped
+
+
+def is_hallucination(key):
+    return key in HALLUCINATIONS or key.startswith(HALLUCINATION_PREFIXES)
+
+
+def collapse_loops(words):
+    """Keep one copy of word n-grams repeated back to back"""
+    keys = [normalize_word(w) for w in words]
+    result = []
+    i = 0
+    while i < len(words):
+        for n in range(min(MAX_LOOP_WORDS, (len(words) - i) // 2), 0, -1):
+            gram = keys[i : i + n]
+            if not any(gram):
+                continue
+            repeats = 1
+            while keys[i + repeats * n : i + (repeats + 1) * n] == gram:
+                repeats += 1
+            needed = LONG_LOOP_REPEATS if n >= LONG_LOOP_WORDS else SHORT_LOOP_REPEATS
+            if repeats >= needed:
+                kept = words[i : i + n]
+                # Keep the sentence punctuation of the last copy
+                last = words[i + repeats * n - 1]
+                if last[-1:] in ".!?" and kept[-1][-1:] not in ".!?":
+                    kept = kept[:-1] + [kept[-1].rstrip(",;:") + last[-1]]
+                result.extend(kept)
+                i += repeats * n
+                break
+        else:
+            result.append(words[i])
+            i += 1
+    return result
+
+
+def drop_repeats(items, key):
+    """
+    One copy of each run of items with the same key(item), no copy of hallucinations or
+    of repeated silence phrases
+    """
+    kept = []
+    i = 0
+    while i < len(items):
+        item_key = key(items[i])
+        run = 1
+        while i + run < len(items) and key(items[i + run]) == item_key:
+            run += 1
+        if not (is_hallucination(item_key) or (item_key in SILENCE_PHRASES and run > 1)):
+            kept.append(items[i])
+        i += run
+    return kept
+
+
+def compact(text, fillers=True):
+    """Compacted transcript text, line breaks (one speaker turn per line) are kept"""
+    text = NON_SPEECH_RE.sub(" ", text)
+
+    sentences = []  # (line number, sentence)
+    for line_no, line in enumerate(text.splitlines()):
+        line = " ".join(line.split())
+        for sentence in SENTENCE_END_RE.split(line):
+            if fillers:
+                sentence = drop_fillers(sentence)
+            if sentence_key(sentence):
+                sentences.append((line_no, sentence))
+
+    lines = {}
+    for line_no, sentence in drop_repeats(sentences, lambda item: sentence_key(item[1])):
+        lines.setdefault(line_no, []).extend(sentence.split())
+    return "\n".join(" ".join(collapse_loops(words)) for _, words in sorted(lines.items()))
+
+
+def trim_seam(previous_words, text):
+    """Drop the start of text that repeats the end of the previous segment"""
+    words = text.split()
+    previous = [normalize_word(w) for w in previous_words]
+    current = [normalize_word(w) for w in words]
+    for n in range(min(MAX_SEAM_WORDS, len(previous), len(current)), MIN_SEAM_WORDS - 1, -1):
+        if previous[-n:] == current[:n]:
+            return " ".join(words[n:])
+    return text
+
+
+def format_timestamp(seconds):
+    seconds = int(seconds)
+    hours, rest = divmod(seconds, 3600)
+    minutes, seconds = divmod(rest, 60)
+    if hours:
+        return f"{hours}:{minutes:02d}:{seconds:02d}"
+    return f"{minutes:02d}:{seconds:02d}"
+
+
+def compact_segments(segments, paragraph_gap=3.0, max_paragraph_seconds=60.0, fillers=True):
+    """
+    Merge timed segments (dicts with start and end seconds and text) into compacted
+    paragraphs prefixed with their start time. A pause longer than paragraph_gap or a
+    paragraph reaching max_paragraph_seconds starts a new one
+    """
+    timed = []  # (segment, text without the seam)
+    previous_words = []
+    for segment in sorted(segments, key=lambda s: s["start"]):
+        timed.append((segment, trim_seam(previous_words, segment["text"])))
+        previous_words = segment["text"].split()
+
+    paragraphs = []  # [start, end, [texts]]
+    for segment, text in drop_repeats(timed, lambda item: sentence_key(item[1])):
+        # Segments that are nothing but tags or fillers do not hold paragraphs open
+        if not compact(text, fillers=fillers):
+            continue
+        if (
+            paragraphs
+            and segment["start"] - paragraphs[-1][1] <= paragraph_gap
+            and segment["start"] - paragraphs[-1][0] < max_paragraph_seconds
+        ):
+            paragraphs[-1][1] = max(paragraphs[-1][1], segment["end"])
+            paragraphs[-1][2].append(text)
+        else:
+            paragraphs.append([segment["start"], segment["end"], [text]])
+
+    blocks = []
+    for start, _, texts in paragraphs:
+        text = compact(" ".join(texts), fillers=fillers).replace("\n", " ")
+        if text:
+            blocks.append(f"[{format_timestamp(start)}] {text}")
+    return "\n\n".join(blocks)
+
+
+def compaction_report(original, compacted):
+    """Size before and after, reduction is the share of tokens saved"""
+    before, after = estimate_tokens(original), estimate_tokens(compacted)
+    return {
+        "chars_before": len(original),
+        "chars_after": len(compacted),
+        "tokens_before": before,
+        "tokens_after": after,
+        "reduction": 1 - after / before if before else 0.0,
+    }
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 2:
+        print("Usage: python transcript_compaction.py transcript.txt")
+        sys.exit(1)
+    with open(sys.argv[1]) as f:
+        original = f.read()
+    compacted = compact(original)
+    print(compacted)
+    report = compaction_report(original, compacted)
+    print(
+        f"\n{report['tokens_before']} -> {report['tokens_after']} tokens "
+        f"({report['reduction']:.0%} smaller)",
+        file=sys.stderr,
+    )
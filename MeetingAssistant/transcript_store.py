@@ -0,0 +1,79 @@
+"""
+Uploaded transcript store
+Keeps transcripts posted to /transcripts in memory under the SHA-256 of their content,
+so /summary, /minutes and /action-items can take a short ID instead of the full text.
+Identical uploads map to the same entry, the least recently used entries are evicted
+once the store is over its size limit, and each entry caches its compacted prompt text.
+"""
+
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+
+# Largest decompressed upload accepted
+MAX_TRANSCRIPT_BYTES = 20 * 1024 * 1024
+# Characters held across all entries before the least recently used are dropped
+MAX_STORE_BYTES = 200 * 1024 * 1024
+
+
+def transcript_id(transcript, segments=None):
+    """
+    Content hash of a transcript and its optional segments, returned by POST /transcripts
+    for clients to send instead of the text
+    """
+    if segments:
+        segments = [{"start": float(s["start"]), "end": float(s["end"]), "text": s["text"]} for s in segments]
+    canonical = json.dumps(
+        {"transcript": transcript, "segments": segments or None},
+        sort_keys=True,
+        separators=(",", ":"),
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class StoredTranscript:
+    def __init__(self, transcript, segments=None, transcript_id=None):
+        self.transcript = transcript
+        self.segments = segments or None
+        self.transcript_id = transcript_id
+        self.size = len(transcript) + sum(len(s["text"]) for s in self.segments or ())
+        self.created_at = time.time()
+        # Task computing the compacted prompt text and its report, started on first use
+        self.prepared = None
+
+
+class TranscriptStore:
+    def __init__(self, max_bytes=MAX_STORE_BYTES):
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()  # transcript_id -> StoredTranscript, oldest use first
+        self.total_bytes = 0
+        self.lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.entries)
+
+    def put(self, transcript, segments=None):
+        """Store a transcript, returns (entry, created), a known one is only touched"""
+        key = transcript_id(transcript, segments)
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None:
+                self.entries.move_to_end(key)
+                return entry, False
+            entry = StoredTranscript(transcript, segments, key)
+            self.entries[key] = entry
+            self.total_bytes += entry.size
+            while self.total_bytes > self.max_bytes and len(self.entries) > 1:
+                _, evicted = self.entries.popitem(last=False)
+                self.total_bytes -= evicted.size
+            return entry, True
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None:
+                self.entries.move_to_end(key)
+            return entry